@@ -4,22 +4,325 @@ Background Tasks System
 
 Sistema para executar tarefas em segundo plano, permitindo que o usuário
 navegue pela aplicação enquanto tarefas longas são executadas.
+
+As tarefas ficam em uma fila durável (tabela ``background_tasks`` no Postgres,
+dict do ``MemStorage`` sem banco) em vez de ``asyncio.create_task`` no processo
+que recebeu a requisição: um restart ou deploy não perde mais análises em
+andamento, e qualquer worker (processo) pode executá-las.
+
+- ``TaskWorker`` reivindica tarefas com ``SELECT ... FOR UPDATE SKIP LOCKED``
+  (workers concorrentes nunca pegam a mesma linha) e mantém um lease renovado
+  por heartbeat. Lease vencido = worker morreu: a tarefa volta para a fila.
+- Falhas são reexecutadas com backoff exponencial (com jitter) até
+  ``maxAttempts``; um worker encerrando devolve as tarefas sem gastar tentativa.
+- Concorrência limitada por worker (``BACKGROUND_WORKER_CONCURRENCY``) e por
+  tipo de tarefa (``register_task_processor(..., concurrency=)`` ou
+  ``BACKGROUND_TASK_CONCURRENCY_<TIPO>``).
+- Tarefas novas acordam os workers via NOTIFY (Postgres); sem LISTEN, o poll
+  de ``BACKGROUND_TASK_POLL_SECONDS`` garante o progresso.
+- Mudanças de status e progresso (``report_progress``) são publicadas no
+  ``event_bus`` (tópico ``task:<id>``) para ``GET /api/tasks/{id}/events``.
 """
 
 import asyncio
-from typing import Dict, Any, Optional, Callable
+import contextvars
+import os
+import random
+import socket
+from typing import Dict, Any, List, Optional, Callable, Set
 from datetime import datetime
 import uuid
 from python_backend.models import BackgroundTask, TaskStatus, TaskType
 from python_backend.storage import storage
+from python_backend.event_bus import event_bus, task_topic
+
+TASKS_CHANNEL = "background_tasks"
+DEFAULT_MAX_ATTEMPTS = 3
 
 # Task registry - armazena funções de processamento por tipo de task
 _task_processors: Dict[TaskType, Callable] = {}
+_task_concurrency: Dict[TaskType, Optional[int]] = {}  # Execuções simultâneas por worker (None = só o limite do worker)
+_task_max_attempts: Dict[TaskType, int] = {}
+# Task em execução no contexto atual (cada execução roda em sua própria asyncio.Task)
+_current_task_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_task_id", default=None)
+
 
+def register_task_processor(
+    task_type: TaskType,
+    processor: Callable,
+    concurrency: Optional[int] = None,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS
+):
+    """
+    Registra um processador para um tipo de task.
 
-def register_task_processor(task_type: TaskType, processor: Callable):
-    """Registra um processador para um tipo de task"""
+    ``concurrency`` limita quantas tasks deste tipo cada worker executa ao mesmo
+    tempo (sobrescrito por ``BACKGROUND_TASK_CONCURRENCY_<TIPO>``, ex.:
+    ``BACKGROUND_TASK_CONCURRENCY_COUNCIL_ANALYSIS=2``). ``max_attempts`` inclui a
+    primeira execução.
+    """
+    override = os.getenv(f"BACKGROUND_TASK_CONCURRENCY_{task_type.name}")
     _task_processors[task_type] = processor
+    _task_concurrency[task_type] = (int(override) if override else concurrency) or None
+    _task_max_attempts[task_type] = max(max_attempts, 1)
+
+
+async def _publish_task(task_id: str, **fields) -> None:
+    await event_bus.publish(task_topic(task_id), {"type": "task", "taskId": task_id, **fields})
+
+
+async def report_progress(progress: int, **detail) -> None:
+    """
+    Chamado pelo processador durante a execução: grava o progresso (0-100) da task
+    atual e publica ``{"type": "progress", ...detail}`` para os assinantes. No-op fora de uma task.
+    """
+    task_id = _current_task_id.get()
+    if task_id is None:
+        return
+    progress = max(0, min(int(progress), 99))  # 100 só na conclusão
+    try:
+        await storage.update_background_task(task_id, progress=progress)
+    except Exception as e:
+        print(f"[Background Task] Erro ao gravar progresso de {task_id}: {e}")
+    await event_bus.publish(task_topic(task_id), {"type": "progress", "taskId": task_id, "progress": progress, **detail})
+
+
+class TaskWorker:
+    """Executa tasks da fila durável neste processo (um por processo, iniciado no startup)."""
+
+    def __init__(
+        self,
+        storage: Any,
+        concurrency: Optional[int] = None,
+        lease_seconds: Optional[float] = None,
+        poll_seconds: Optional[float] = None,
+        retry_base_seconds: Optional[float] = None,
+        retry_max_seconds: Optional[float] = None,
+        shutdown_grace_seconds: Optional[float] = None
+    ):
+        self.storage = storage
+        self.enabled = os.getenv("BACKGROUND_WORKER", "on").lower() not in ("0", "off", "false", "no")
+        self.concurrency = concurrency or int(os.getenv("BACKGROUND_WORKER_CONCURRENCY", "8"))
+        self.lease_seconds = lease_seconds or float(os.getenv("BACKGROUND_TASK_LEASE_SECONDS", "60"))
+        self.poll_seconds = poll_seconds or float(os.getenv("BACKGROUND_TASK_POLL_SECONDS", "2"))
+        self.retry_base_seconds = retry_base_seconds or float(os.getenv("BACKGROUND_TASK_RETRY_BASE_SECONDS", "5"))
+        self.retry_max_seconds = retry_max_seconds or float(os.getenv("BACKGROUND_TASK_RETRY_MAX_SECONDS", "300"))
+        self.shutdown_grace_seconds = (
+            shutdown_grace_seconds if shutdown_grace_seconds is not None
+            else float(os.getenv("BACKGROUND_WORKER_SHUTDOWN_GRACE_SECONDS", "10"))
+        )
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._running: Dict[str, asyncio.Task] = {}
+        self._running_by_type: Dict[TaskType, int] = {}
+        self._lost: Set[str] = set()  # Lease perdido (cancelada ou reivindicada por outro): não reportar
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._listener = None
+        self._stopping = False
+        self._rounds = 0
+
+        self.claimed = 0
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+        self.released = 0
+        self.lost_leases = 0
+        self.requeued = 0
+
+    @property
+    def running(self) -> bool:
+        return self._loop_task is not None and not self._loop_task.done()
+
+    def retry_delay(self, attempts: int) -> float:
+        """Backoff exponencial com jitter: metade fixa, metade aleatória (workers não sincronizam)"""
+        delay = min(self.retry_max_seconds, self.retry_base_seconds * 2 ** max(attempts - 1, 0))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    async def start(self) -> None:
+        if self.running or not self.enabled:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        if hasattr(self.storage, "listen"):
+            try:
+                self._listener = await self.storage.listen(TASKS_CHANNEL, self._on_notify)
+            except Exception as e:
+                print(f"[TaskWorker] LISTEN indisponível, usando poll de {self.poll_seconds:.0f}s: {e}")
+                self._listener = None
+        self._loop_task = asyncio.create_task(self._run_loop())
+        self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        print(f"[TaskWorker] ✓ Worker {self.worker_id} iniciado (concorrência {self.concurrency})")
+
+    async def stop(self) -> None:
+        """Para de reivindicar, espera as tasks em execução até o grace e devolve o resto à fila"""
+        if not self.running:
+            return
+        self._stopping = True
+        self._loop_task.cancel()
+        await asyncio.gather(self._loop_task, return_exceptions=True)
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            await listener.close()
+
+        if self._running and self.shutdown_grace_seconds > 0:
+            await asyncio.wait(list(self._running.values()), timeout=self.shutdown_grace_seconds)
+        remaining = list(self._running.values())
+        for runner in remaining:
+            runner.cancel()
+        await asyncio.gather(*remaining, return_exceptions=True)
+
+        self._heartbeat_task.cancel()
+        await asyncio.gather(self._heartbeat_task, return_exceptions=True)
+        print(f"[TaskWorker] ✓ Worker {self.worker_id} parado ({len(remaining)} tasks devolvidas à fila)")
+
+    async def wake(self, task_type: Optional[TaskType] = None) -> None:
+        """Task nova: acorda este worker e, via NOTIFY, os dos outros processos"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+        if hasattr(self.storage, "notify"):
+            try:
+                await self.storage.notify(TASKS_CHANNEL, task_type.value if task_type else "")
+            except Exception as e:
+                print(f"[TaskWorker] Falha ao publicar NOTIFY (workers usam o poll): {e}")
+
+    def interrupt(self, task_id: str) -> bool:
+        """Cancela a execução local de uma task (ex.: cancelada pelo usuário); False se não roda aqui"""
+        runner = self._running.get(task_id)
+        if runner is None:
+            return False
+        self._lost.add(task_id)
+        runner.cancel()
+        return True
+
+    def _on_notify(self, payload: str) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run_loop(self) -> None:
+        while True:
+            # Limpa antes de buscar: um wake durante a busca dispara a próxima rodada
+            self._wakeup.clear()
+            try:
+                self.requeued += await self.storage.requeue_expired_background_tasks()
+                await self._claim_available()
+            except Exception as e:
+                print(f"[TaskWorker] Erro ao buscar tasks: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def _claim_order(self) -> List[TaskType]:
+        """Tipos registrados, começando por um diferente a cada rodada (nenhum tipo monopoliza o worker)"""
+        task_types = list(_task_processors)
+        if not task_types:
+            return []
+        offset = self._rounds % len(task_types)
+        self._rounds += 1
+        return task_types[offset:] + task_types[:offset]
+
+    async def _claim_available(self) -> None:
+        for task_type in self._claim_order():
+            free = self.concurrency - len(self._running)
+            if free <= 0:
+                return
+            type_limit = _task_concurrency.get(task_type)
+            if type_limit is not None:
+                free = min(free, type_limit - self._running_by_type.get(task_type, 0))
+            if free <= 0:
+                continue
+            tasks = await self.storage.claim_background_tasks(task_type, self.worker_id, free, self.lease_seconds)
+            for task in tasks:
+                self._start(task)
+
+    def _start(self, task: BackgroundTask) -> None:
+        self.claimed += 1
+        self._running_by_type[task.taskType] = self._running_by_type.get(task.taskType, 0) + 1
+        self._running[task.id] = asyncio.create_task(self._execute(task))
+
+    async def _report(self, operation: str, coroutine) -> None:
+        """Falha ao gravar o resultado não derruba o worker: o lease vence e a task volta para a fila"""
+        try:
+            await coroutine
+        except Exception as e:
+            print(f"[TaskWorker] Erro ao registrar {operation}: {e}")
+
+    async def _execute(self, task: BackgroundTask) -> None:
+        _current_task_id.set(task.id)
+        try:
+            await _publish_task(task.id, status=TaskStatus.RUNNING.value, attempts=task.attempts)
+            processor = _task_processors.get(task.taskType)
+            if processor is None:
+                raise RuntimeError(f"Processador não encontrado para tipo {task.taskType}")
+            result = await processor(task.metadata or {})
+        except asyncio.CancelledError:
+            if task.id not in self._lost and self._stopping:
+                self.released += 1
+                await self._report("devolução", self.storage.release_background_task(task.id, self.worker_id))
+                await _publish_task(task.id, status=TaskStatus.PENDING.value)
+            raise
+        except Exception as e:
+            retry = task.attempts < task.maxAttempts
+            print(f"[Background Task] Erro na task {task.id} (tentativa {task.attempts}/{task.maxAttempts}): {e}")
+            if retry:
+                self.retried += 1
+            else:
+                self.failed += 1
+            delay = self.retry_delay(task.attempts) if retry else None
+            await self._report("falha", self.storage.fail_background_task(task.id, self.worker_id, str(e), delay))
+            if retry:
+                await _publish_task(task.id, status=TaskStatus.PENDING.value, error=str(e), retryInSeconds=round(delay, 1))
+            else:
+                await _publish_task(task.id, status=TaskStatus.FAILED.value, error=str(e))
+        else:
+            self.completed += 1
+            await self._report("conclusão", self.storage.complete_background_task(task.id, self.worker_id, result))
+            await _publish_task(task.id, status=TaskStatus.COMPLETED.value, progress=100, result=result)
+            print(f"[Background Task] Task {task.id} completada com sucesso")
+        finally:
+            self._running.pop(task.id, None)
+            self._lost.discard(task.id)
+            self._running_by_type[task.taskType] -= 1
+            if self._wakeup is not None:
+                self._wakeup.set()  # Vaga livre: buscar a próxima task
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            task_ids = list(self._running)
+            if not task_ids:
+                continue
+            try:
+                renewed = set(await self.storage.renew_background_task_leases(self.worker_id, task_ids, self.lease_seconds))
+            except Exception as e:
+                print(f"[TaskWorker] Erro no heartbeat: {e}")
+                continue
+            for task_id in task_ids:
+                if task_id not in renewed and self.interrupt(task_id):
+                    # Cancelada pelo usuário ou lease vencido e reivindicado por outro worker
+                    self.lost_leases += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workerId": self.worker_id,
+            "enabled": self.enabled,
+            "running": self.running,
+            "listening": self._listener is not None,
+            "concurrency": self.concurrency,
+            "inFlight": {task_type.value: count for task_type, count in self._running_by_type.items() if count},
+            "claimed": self.claimed,
+            "completed": self.completed,
+            "failed": self.failed,
+            "retried": self.retried,
+            "released": self.released,
+            "lostLeases": self.lost_leases,
+            "requeuedExpired": self.requeued,
+        }
+
+
+task_worker = TaskWorker(storage)
 
 
 async def create_task(
@@ -27,9 +330,9 @@ async def create_task(
     task_type: TaskType,
     metadata: Optional[Dict[str, Any]] = None
 ) -> BackgroundTask:
-    """Cria uma nova task em background"""
+    """Enfileira uma nova task em background (executada por qualquer TaskWorker)"""
     task_id = str(uuid.uuid4())
-    
+
     task = BackgroundTask(
         id=task_id,
         userId=user_id,
@@ -37,73 +340,16 @@ async def create_task(
         status=TaskStatus.PENDING,
         progress=0,
         metadata=metadata or {},
+        maxAttempts=_task_max_attempts.get(task_type, DEFAULT_MAX_ATTEMPTS),
         createdAt=datetime.utcnow(),
         updatedAt=datetime.utcnow()
     )
-    
-    # Salvar task no storage
-    await storage.create_background_task(task)
-    
-    # Iniciar processamento em background
-    asyncio.create_task(process_task(task_id))
-    
-    return task
 
+    # Salvar task na fila e acordar os workers
+    task = await storage.create_background_task(task)
+    await task_worker.wake(task_type)
 
-async def process_task(task_id: str):
-    """Processa uma task em background"""
-    try:
-        # Buscar task
-        task = await storage.get_background_task(task_id)
-        if not task:
-            print(f"[Background Task] Task {task_id} não encontrada")
-            return
-        
-        # Atualizar status para RUNNING
-        await storage.update_background_task(
-            task_id,
-            status=TaskStatus.RUNNING,
-            progress=0
-        )
-        
-        # Obter processador para este tipo de task
-        processor = _task_processors.get(task.taskType)
-        if not processor:
-            await storage.update_background_task(
-                task_id,
-                status=TaskStatus.FAILED,
-                error=f"Processador não encontrado para tipo {task.taskType}"
-            )
-            return
-        
-        # Executar processador
-        result = await processor(task.metadata)
-        
-        # Atualizar task como completada
-        await storage.update_background_task(
-            task_id,
-            status=TaskStatus.COMPLETED,
-            progress=100,
-            result=result,
-            completedAt=datetime.utcnow()
-        )
-        
-        print(f"[Background Task] Task {task_id} completada com sucesso")
-        
-    except Exception as e:
-        print(f"[Background Task] Erro ao processar task {task_id}: {e}")
-        import traceback
-        traceback.print_exc()
-        
-        # Atualizar task como falha
-        try:
-            await storage.update_background_task(
-                task_id,
-                status=TaskStatus.FAILED,
-                error=str(e)
-            )
-        except:
-            pass
+    return task
 
 
 async def get_task_status(task_id: str) -> Optional[BackgroundTask]:
@@ -116,13 +362,15 @@ async def cancel_task(task_id: str) -> bool:
     task = await storage.get_background_task(task_id)
     if not task:
         return False
-    
+
     if task.status in [TaskStatus.PENDING, TaskStatus.RUNNING]:
         await storage.update_background_task(
             task_id,
             status=TaskStatus.CANCELLED
         )
+        # Rodando neste processo: interrompe já; em outro worker, o próximo heartbeat interrompe
+        task_worker.interrupt(task_id)
+        await _publish_task(task_id, status=TaskStatus.CANCELLED.value)
         return True
-    
-    return False
 
+    return False
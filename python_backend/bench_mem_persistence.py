@@ -0,0 +1,77 @@
+"""
+Benchmark do restart do MemStorage durável (snapshot via mmap + cauda do log).
+
+Grava ``conversations`` conversas com ``turns`` turnos cada em um diretório
+temporário, fecha (snapshot final) e mede o startup de uma instância nova:
+só snapshot, e snapshot + ``tail`` turnos no log. Também mede o custo por
+escrita com o log ligado.
+
+Uso:
+    python -m python_backend.bench_mem_persistence
+    python -m python_backend.bench_mem_persistence --conversations 5000 --turns 10
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from typing import Any, Dict
+
+from python_backend.models import ConversationCreate
+from python_backend.storage import MemStorage
+
+PARAGRAPH = (
+    "O público compra redução de risco, não features. Ciclos de venda longos exigem "
+    "nutrição contínua e provas sociais do mesmo setor aceleram a decisão. "
+)
+
+
+def _fresh(directory: str) -> MemStorage:
+    MemStorage._instance = None
+    storage = MemStorage()
+    storage.max_messages = 0
+    storage.enable_persistence(directory, snapshot_every=0)
+    return storage
+
+
+async def _populate(storage: MemStorage, conversations: int, turns: int) -> float:
+    start = time.perf_counter()
+    for c in range(conversations):
+        conversation = await storage.create_conversation(ConversationCreate(expertId=f"expert-{c % 18}", title=f"Chat {c}"))
+        for t in range(turns):
+            await storage.create_message_pair(conversation.id, f"Pergunta {t}: {PARAGRAPH}", PARAGRAPH * 4)
+    return time.perf_counter() - start
+
+
+def run_benchmark(conversations: int = 2000, turns: int = 10, tail: int = 500) -> Dict[str, Any]:
+    previous = MemStorage._instance
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            storage = _fresh(directory)
+            write_seconds = asyncio.run(_populate(storage, conversations, turns))
+            records = storage._journal.seq
+            asyncio.run(storage.close())
+
+            restored = _fresh(directory)
+            snapshot_only = restored._journal.load_seconds
+            asyncio.run(_populate(restored, tail // turns or 1, turns))
+
+            with_tail = _fresh(directory)
+            return {
+                "messages": len(with_tail.messages),
+                "writeMicrosecondsPerRecord": round(write_seconds / records * 1e6, 1),
+                "startupSnapshotOnlyMs": round(snapshot_only * 1000, 1),
+                "startupWithLogTailMs": round(with_tail._journal.load_seconds * 1000, 1),
+                "replayedRecords": with_tail._journal.replayed_records,
+            }
+    finally:
+        MemStorage._instance = previous
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--conversations", type=int, default=2000)
+    parser.add_argument("--turns", type=int, default=10)
+    args = parser.parse_args()
+    print("⏱️  BENCHMARK RESTART DO MEMSTORAGE DURÁVEL")
+    print(json.dumps(run_benchmark(args.conversations, args.turns), indent=2))
@@ -0,0 +1,235 @@
+"""
+Benchmark de decodificação das linhas de ``get_council_analyses`` e ``get_personas``.
+
+Antes: o asyncpg entregava colunas JSONB como ``str`` e cada método fazia
+``json.loads`` guardado por ``isinstance(..., str)`` linha a linha (mapeadores
+antigos copiados abaixo como referência). Depois: os codecs de ``pg_codecs``
+decodificam no driver (orjson) e os mapeadores só montam os modelos.
+
+Sem banco, usa linhas sintéticas no formato que o asyncpg entrega (o JSON como
+texto) e mede decodificação + montagem dos modelos. Com ``--live`` e
+DATABASE_URL, compara as consultas reais (pool sem codecs vs ``PostgresStorage``).
+
+Uso:
+    python -m python_backend.bench_pg_json
+    python -m python_backend.bench_pg_json --live
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from python_backend.models import ActionPlan, CouncilAnalysis, ExpertContribution, Persona
+from python_backend.pg_codecs import JSON_BACKEND, json_loads
+from python_backend.postgres_storage import PostgresStorage
+
+ANALYSIS_JSON_COLUMNS = ("contributions", "actionPlan", "skippedExperts", "metadata")
+PERSONA_JSON_COLUMNS = ("demographics", "psychographics", "contentPreferences", "behavioralPatterns", "researchData")
+
+PARAGRAPH = (
+    "O público compra redução de risco, não features. Ciclos de venda longos exigem "
+    "nutrição contínua e provas sociais do mesmo setor aceleram a decisão. "
+)
+
+
+def sample_analysis_row(i: int) -> Dict[str, Any]:
+    """Linha de council_analyses como o asyncpg entrega sem codecs (JSONB em texto)."""
+    contributions = [{
+        "expertId": f"expert-{n}",
+        "expertName": f"Especialista {n}",
+        "analysis": PARAGRAPH * 20,
+        "keyInsights": [f"Insight {k}: {PARAGRAPH[:90]}" for k in range(5)],
+        "recommendations": [f"Recomendação {k}: {PARAGRAPH[:90]}" for k in range(5)],
+    } for n in range(5)]
+    action_plan = {
+        "phases": [{
+            "phaseNumber": p + 1,
+            "name": f"Fase {p + 1}",
+            "duration": "2 semanas",
+            "objectives": ["Mapear o funil", "Definir ICP"],
+            "actions": [{
+                "id": f"a{p}{a}", "title": f"Ação {a}", "description": PARAGRAPH, "responsible": "CMO",
+                "priority": "alta", "estimatedTime": "3 dias", "tools": ["GA4", "HubSpot"], "steps": ["Passo 1", "Passo 2"],
+            } for a in range(4)],
+        } for p in range(3)],
+        "totalDuration": "6 semanas",
+    }
+    return {
+        "id": f"analysis-{i}",
+        "userId": "default_user",
+        "problem": "Como aumentar a conversão do funil B2B?",
+        "personaId": "persona-1",
+        "contributions": json.dumps(contributions),
+        "consensus": PARAGRAPH * 10,
+        "actionPlan": json.dumps(action_plan),
+        "skippedExperts": json.dumps([{"expertId": "expert-9", "expertName": "Atrasado", "reason": "deadline"}]),
+        "metadata": json.dumps({"contributionCache": {"hits": 2, "misses": 3}}),
+        "createdAt": datetime(2025, 11, 3, 12, 0),
+    }
+
+
+def sample_persona_row(i: int) -> Dict[str, Any]:
+    """Linha de personas como o asyncpg entrega sem codecs (JSONB em texto, listas em text[])."""
+    return {
+        "id": f"persona-{i}",
+        "userId": "default_user",
+        "name": f"Persona {i}",
+        "researchMode": "strategic",
+        "demographics": json.dumps({"age": "30-45", "location": "São Paulo", "income": "R$ 15-25 mil", "role": "Head de Marketing"}),
+        "psychographics": json.dumps({"values": ["eficiência", "dados"], "fears": ["desperdiçar verba"], "notes": PARAGRAPH * 3}),
+        "painPoints": ["CAC alto", "Leads frios", "Pouca previsibilidade"],
+        "goals": ["Dobrar pipeline", "Reduzir CAC"],
+        "values": ["Transparência", "Resultados"],
+        "contentPreferences": json.dumps({"formats": ["podcast", "estudo de caso"], "channels": ["LinkedIn", "newsletter"]}),
+        "communities": ["RD Summit", "Growth BR"],
+        "behavioralPatterns": json.dumps({"buying": PARAGRAPH * 2, "research": ["G2", "indicação"]}),
+        "researchData": json.dumps({"sources": [f"https://exemplo.com/{k}" for k in range(10)], "summary": PARAGRAPH * 8}),
+        "createdAt": datetime(2025, 11, 3, 12, 0),
+        "updatedAt": datetime(2025, 11, 3, 12, 0),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Mapeadores antigos (referência: como PostgresStorage decodificava antes)
+# ---------------------------------------------------------------------------
+
+def legacy_analysis_from_record(record) -> CouncilAnalysis:
+    contributions_data = json.loads(record["contributions"]) if isinstance(record["contributions"], str) else record["contributions"]
+    contributions = [ExpertContribution(**c) for c in contributions_data]
+    action_plan = None
+    action_plan_data = record.get("actionPlan")
+    if action_plan_data:
+        action_plan_dict = json.loads(action_plan_data) if isinstance(action_plan_data, str) else action_plan_data
+        action_plan = ActionPlan(**action_plan_dict)
+    skipped_data = record.get("skippedExperts") or []
+    if isinstance(skipped_data, str):
+        skipped_data = json.loads(skipped_data)
+    metadata = record.get("metadata") or {}
+    if isinstance(metadata, str):
+        metadata = json.loads(metadata)
+    return CouncilAnalysis(
+        id=record["id"],
+        userId=record.get("userId") or record.get("userid"),
+        problem=record["problem"],
+        personaId=record.get("personaId") or record.get("personaid"),
+        contributions=contributions,
+        consensus=record["consensus"],
+        actionPlan=action_plan,
+        skippedExperts=skipped_data,
+        metadata=metadata,
+        createdAt=record.get("createdAt") or record.get("createdat")
+    )
+
+
+def legacy_persona_from_record(record) -> Persona:
+    persona_dict = dict(record)
+    for json_field in PERSONA_JSON_COLUMNS:
+        if json_field in persona_dict and isinstance(persona_dict[json_field], str):
+            try:
+                persona_dict[json_field] = json.loads(persona_dict[json_field])
+            except (json.JSONDecodeError, TypeError):
+                persona_dict[json_field] = {}
+    for list_field in ['painPoints', 'goals', 'values', 'communities']:
+        if list_field in persona_dict:
+            if isinstance(persona_dict[list_field], str):
+                try:
+                    parsed = json.loads(persona_dict[list_field])
+                    persona_dict[list_field] = parsed if isinstance(parsed, list) else []
+                except (json.JSONDecodeError, TypeError):
+                    persona_dict[list_field] = [item.strip() for item in persona_dict[list_field].split(',') if item.strip()]
+            elif persona_dict[list_field] is None:
+                persona_dict[list_field] = []
+    return Persona(**persona_dict)
+
+
+def _driver_decode(row: Dict[str, Any], json_columns) -> Dict[str, Any]:
+    """O que o codec faz no asyncpg: decodifica cada coluna JSON uma vez, ao ler a linha."""
+    return {column: json_loads(value) if column in json_columns and value is not None else value
+            for column, value in row.items()}
+
+
+def _rows_per_second(fn: Callable[[Dict[str, Any]], Any], rows: List[Dict[str, Any]], rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for row in rows:
+            fn(row)
+    elapsed = time.perf_counter() - start
+    return rounds * len(rows) / elapsed if elapsed else 0.0
+
+
+def run_benchmark(rows: int = 50, rounds: int = 20) -> Dict[str, Any]:
+    analyses = [sample_analysis_row(i) for i in range(rows)]
+    personas = [sample_persona_row(i) for i in range(rows)]
+
+    # As duas versões precisam produzir os mesmos modelos
+    for row in analyses[:3]:
+        assert legacy_analysis_from_record(row) == PostgresStorage._council_analysis_from_record(_driver_decode(row, ANALYSIS_JSON_COLUMNS))
+    for row in personas[:3]:
+        assert legacy_persona_from_record(row) == PostgresStorage._persona_from_record(_driver_decode(row, PERSONA_JSON_COLUMNS))
+
+    result = {"rows": rows, "rounds": rounds, "backend": JSON_BACKEND}
+    for name, sample, legacy, mapper, columns in (
+        ("councilAnalyses", analyses, legacy_analysis_from_record, PostgresStorage._council_analysis_from_record, ANALYSIS_JSON_COLUMNS),
+        ("personas", personas, legacy_persona_from_record, PostgresStorage._persona_from_record, PERSONA_JSON_COLUMNS),
+    ):
+        before = _rows_per_second(legacy, sample, rounds)
+        after = _rows_per_second(lambda row: mapper(_driver_decode(row, columns)), sample, rounds)
+        result[name] = {
+            "beforeRowsPerSecond": round(before),
+            "afterRowsPerSecond": round(after),
+            "speedup": round(after / before, 2) if before else None,
+        }
+    return result
+
+
+async def run_live_benchmark(user_id: str = "default_user", rounds: int = 20) -> Dict[str, Any]:
+    """Consultas reais: pool sem codecs + mapeadores antigos vs PostgresStorage com codecs."""
+    import asyncpg
+
+    dsn = os.environ["DATABASE_URL"]
+    raw_pool = await asyncpg.create_pool(dsn)
+    storage = PostgresStorage(dsn)
+    await storage.connect()
+    try:
+        result = {"backend": JSON_BACKEND, "rounds": rounds}
+        for name, query, legacy, new_call in (
+            ("councilAnalyses", 'SELECT * FROM council_analyses WHERE "userId" = $1 ORDER BY "createdAt" DESC',
+             legacy_analysis_from_record, storage.get_council_analyses),
+            ("personas", 'SELECT * FROM personas WHERE "userId" = $1 ORDER BY "createdAt" DESC',
+             legacy_persona_from_record, storage.get_personas),
+        ):
+            start = time.perf_counter()
+            for _ in range(rounds):
+                rows = [legacy(record) for record in await raw_pool.fetch(query, user_id)]
+            before = time.perf_counter() - start
+            start = time.perf_counter()
+            for _ in range(rounds):
+                await new_call(user_id)
+            after = time.perf_counter() - start
+            result[name] = {
+                "rows": len(rows),
+                "beforeMsPerCall": round(before / rounds * 1000, 2),
+                "afterMsPerCall": round(after / rounds * 1000, 2),
+                "speedup": round(before / after, 2) if after else None,
+            }
+        return result
+    finally:
+        await raw_pool.close()
+        await storage.close()
+
+
+if __name__ == "__main__":
+    if "--live" in sys.argv:
+        print("⏱️  BENCHMARK JSON/JSONB (PostgreSQL)")
+        print(json.dumps(asyncio.run(run_live_benchmark()), indent=2))
+    else:
+        print("⏱️  BENCHMARK JSON/JSONB (linhas sintéticas)")
+        result = run_benchmark()
+        print(f"   Linhas: {result['rows']} x {result['rounds']} rodadas | decoder: {result['backend']}")
+        for name in ("councilAnalyses", "personas"):
+            stats = result[name]
+            print(f"   {name}: antes {stats['beforeRowsPerSecond']} linhas/s | "
+                  f"depois {stats['afterRowsPerSecond']} linhas/s | {stats['speedup']}x")
@@ -0,0 +1,299 @@
+"""
+Micro-benchmark do parser de seções das respostas dos especialistas.
+
+Compara o antigo ``CouncilOrchestrator._extract_bullet_points`` (copiado abaixo
+como referência) com ``section_parser.parse_expert_response`` e verifica que a
+saída é idêntica.
+
+Respostas gravadas: ``test_results_18_clones.json`` na raiz do projeto. Se o
+arquivo estiver vazio, usa as respostas de ``philip_kotler_teste_real.json``
+e amostras no formato do conselho.
+
+Uso:
+    python -m python_backend.bench_section_parser
+"""
+import contextlib
+import io
+import json
+import re
+import time
+from pathlib import Path
+from typing import List
+
+from python_backend.section_parser import parse_expert_response
+
+ROOT = Path(__file__).resolve().parent.parent
+SECTIONS = ("Principais Insights", "Recomendações Acionáveis")
+
+# Amostras no formato do conselho, por nome
+COUNCIL_SAMPLES = {
+    "posicionamento_b2b": """## Análise Principal
+
+O problema central é **posicionamento**. Sem diferenciação clara, a empresa compete por preço.
+
+## Principais Insights
+
+- O público B2B compra **redução de risco**, não features
+- Ciclos de venda longos exigem nutrição contínua de leads
+- Provas sociais de clientes do mesmo setor aceleram a decisão
+- O onboarding é parte da proposta de valor
+- Churn alto indica promessa desalinhada com entrega
+
+## Recomendações Acionáveis
+
+1. Reescrever a proposta de valor com foco em ROI em 30 dias
+2. Criar 3 estudos de caso por vertical até o fim do trimestre
+3. Implementar sequência de nutrição com 6 e-mails
+4. Medir tempo até o primeiro valor no onboarding
+5. Revisar o ICP com dados dos 20 melhores clientes
+""",
+    "negrito_e_numeracao_mista": """**Análise Principal:**
+Texto corrido da análise com vários detalhes sobre o mercado.
+
+**Principais Insights:**
+* Insight com asterisco e *ênfase* no meio do texto
+* Segundo insight bem específico sobre canais
+-Bullet sem espaço depois do hífen mas longo o bastante
+
+**Recomendações Acionáveis:**
+1) Formato com parênteses que não é capturado como lista
+2. Recomendação numerada padrão com prazo
+   - Sub-bullet indentado com detalhes adicionais
+""",
+    "secoes_em_ingles": """## Core Analysis
+Analysis in English.
+
+## Key Insights
+- First insight about positioning strategy
+- Second insight about pricing and packaging
+
+## Actionable Recommendations
+- Launch a referral program within 60 days
+- Run pricing experiments on the mid tier
+""",
+    "secoes_sem_listas": """### 1. Principais Insights
+O mercado está saturado e os clientes comparam tudo por preço.
+
+Há espaço para um posicionamento premium baseado em serviço.
+
+### 2. Recomendações Acionáveis
+Sem lista aqui, apenas um parágrafo longo explicando o que fazer nos próximos meses.
+""",
+    "texto_livre": """Resposta sem as seções esperadas, apenas um texto livre do especialista
+falando sobre principais insights de forma solta e recomendações acionáveis também.
+- um bullet perdido no final do texto
+""",
+}
+
+
+def legacy_extract_bullet_points(text: str, section_title: str) -> List[str]:
+    """
+    Cópia fiel do antigo CouncilOrchestrator._extract_bullet_points (referência).
+    """
+    try:
+        # Normalize text - remove extra whitespace
+        text = re.sub(r'\n{3,}', '\n\n', text)
+        
+        # Define the known sections in order
+        section_titles_map = {
+            "Análise Principal": ["Análise Principal", "Core Analysis", "## Análise Principal"],
+            "Principais Insights": ["Principais Insights", "Key Insights", "## Principais Insights"],
+            "Recomendações Acionáveis": ["Recomendações Acionáveis", "Actionable Recommendations", "## Recomendações Acionáveis"],
+        }
+        section_titles = list(section_titles_map.keys())
+        
+        # Get all possible title variations for the target section
+        target_variations = section_titles_map.get(section_title, [section_title])
+        target_variations.extend([f"## {st}" for st in target_variations])
+        target_variations.extend([f"**{st}**" for st in target_variations])
+        target_variations.extend([f"### {st}" for st in target_variations])
+        
+        # Find the starting position - try multiple patterns
+        start_index = None
+        for variation in target_variations:
+            # Try markdown header pattern (## or ###)
+            pattern1 = re.compile(rf'##+\s*{re.escape(variation.replace("## ", "").replace("### ", ""))}\s*:?\s*\n', re.IGNORECASE)
+            match = pattern1.search(text)
+            if match:
+                start_index = match.end()
+                break
+            
+            # Try numbered or bold pattern
+            pattern2 = re.compile(rf'(?:^\d+\.\s*)?(\*\*)?{re.escape(variation.replace("## ", "").replace("### ", "").replace("**", ""))}(\*\*)?:?\s*\n', re.IGNORECASE | re.MULTILINE)
+            match = pattern2.search(text)
+            if match:
+                start_index = match.end()
+                break
+        
+        if start_index is None:
+            print(f"[CouncilOrchestrator] Seção '{section_title}' não encontrada. Tentando busca mais ampla...")
+            # Fallback: busca mais ampla
+            for variation in target_variations:
+                clean_variation = variation.replace("## ", "").replace("### ", "").replace("**", "")
+                if clean_variation.lower() in text.lower():
+                    # Find position after this title
+                    idx = text.lower().find(clean_variation.lower())
+                    if idx != -1:
+                        start_index = idx + len(clean_variation)
+                        # Move past any colon, newline, etc.
+                        while start_index < len(text) and text[start_index] in [':', '\n', ' ', '*']:
+                            start_index += 1
+                        break
+            
+            if start_index is None:
+                return [f"Seção '{section_title}' não foi encontrada na resposta do especialista."]
+
+        # Determine the end boundary by finding the start of the NEXT section
+        end_index = len(text)
+        
+        current_title_index = -1
+        for i, title in enumerate(section_titles):
+            if title == section_title:
+                current_title_index = i
+                break
+
+        if current_title_index != -1 and current_title_index < len(section_titles) - 1:
+            next_section_title = section_titles[current_title_index + 1]
+            next_variations = section_titles_map.get(next_section_title, [next_section_title])
+            next_variations.extend([f"## {st}" for st in next_variations])
+            next_variations.extend([f"### {st}" for st in next_variations])
+            
+            for variation in next_variations:
+                pattern = re.compile(rf'##+\s*{re.escape(variation.replace("## ", "").replace("### ", ""))}\s*:?\s*\n', re.IGNORECASE)
+                match = pattern.search(text, start_index)
+                if match:
+                    end_index = match.start()
+                    break
+        
+        # Extract the content of the relevant section
+        section_text = text[start_index:end_index].strip()
+
+        # Extract bullet points - try multiple patterns
+        bullets = []
+        
+        # Pattern 1: Standard bullet points (-, •, *)
+        pattern1 = re.compile(r'^\s*[-•*]\s+(.+)$', re.MULTILINE)
+        bullets.extend(pattern1.findall(section_text))
+        
+        # Pattern 2: Numbered list (1., 2., etc.)
+        pattern2 = re.compile(r'^\s*\d+\.\s+(.+)$', re.MULTILINE)
+        bullets.extend(pattern2.findall(section_text))
+        
+        # Pattern 3: Lines starting with whitespace (indented)
+        lines = section_text.split('\n')
+        for line in lines:
+            stripped = line.strip()
+            # Skip empty, headers, or very short lines
+            if stripped and len(stripped) > 10 and not stripped.startswith('#'):
+                # If it looks like a bullet point but wasn't captured
+                if stripped.startswith('-') or stripped.startswith('•') or stripped.startswith('*'):
+                    # Extract content after bullet
+                    content = re.sub(r'^[-•*]\s*', '', stripped)
+                    if content and content not in bullets:
+                        bullets.append(content)
+                elif re.match(r'^\d+\.', stripped):
+                    # Extract content after number
+                    content = re.sub(r'^\d+\.\s*', '', stripped)
+                    if content and content not in bullets:
+                        bullets.append(content)
+        
+        # Clean bullets
+        cleaned_bullets = []
+        seen = set()
+        for b in bullets:
+            # Remove markdown formatting
+            clean = re.sub(r'\*\*|__', '', b.strip())
+            # Remove leading/trailing punctuation issues
+            clean = re.sub(r'^[-•*\s]+', '', clean)
+            clean = clean.strip()
+            
+            # Skip if too short, empty, or duplicate
+            if clean and len(clean) > 5 and clean.lower() not in seen:
+                cleaned_bullets.append(clean)
+                seen.add(clean.lower())
+
+        # Fallback: if no bullets found, try splitting by double newlines or numbered items
+        if not cleaned_bullets:
+            # Try to find paragraphs or numbered sections
+            paragraphs = [p.strip() for p in section_text.split('\n\n') if p.strip() and len(p.strip()) > 20]
+            if paragraphs:
+                cleaned_bullets = paragraphs[:5]  # Limit to 5
+            else:
+                # Last resort: split by single newlines
+                lines = [l.strip() for l in section_text.split('\n') if l.strip() and len(l.strip()) > 15 and not l.strip().startswith('#')]
+                if lines:
+                    cleaned_bullets = lines[:5]
+
+        if not cleaned_bullets:
+            return [f"Não foi possível extrair os pontos principais da seção '{section_title}'. A seção pode estar vazia ou em formato inesperado."]
+            
+        return cleaned_bullets
+    except Exception as e:
+        print(f"[CouncilOrchestrator] Erro ao extrair pontos da seção '{section_title}': {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return [f"Erro ao processar a resposta do especialista: {str(e)[:100]}"]
+
+
+def _collect_responses(node, found: List[str]) -> None:
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key in ("response", "analysis") and isinstance(value, str) and len(value) > 200:
+                found.append(value)
+            else:
+                _collect_responses(value, found)
+    elif isinstance(node, list):
+        for item in node:
+            _collect_responses(item, found)
+
+
+def load_samples() -> List[str]:
+    """Respostas gravadas (test_results_18_clones.json, ou fallback) + amostras do conselho."""
+    samples: List[str] = []
+    for name in ("test_results_18_clones.json", "philip_kotler_teste_real.json"):
+        path = ROOT / name
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                _collect_responses(json.load(f), samples)
+        if samples:
+            break
+    return samples + list(COUNCIL_SAMPLES.values())
+
+
+def legacy_parse(text: str) -> dict:
+    return {section: legacy_extract_bullet_points(text, section) for section in SECTIONS}
+
+
+def _time_it(fn, samples: List[str], rounds: int) -> float:
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for text in samples:
+                fn(text)
+        return time.perf_counter() - start
+
+
+def run_benchmark(rounds: int = 50) -> dict:
+    samples = load_samples()
+    with contextlib.redirect_stdout(io.StringIO()):
+        mismatches = sum(1 for text in samples if legacy_parse(text) != parse_expert_response(text, SECTIONS))
+
+    legacy_seconds = _time_it(legacy_parse, samples, rounds)
+    new_seconds = _time_it(lambda text: parse_expert_response(text, SECTIONS), samples, rounds)
+    calls = rounds * len(samples)
+    return {
+        "samples": len(samples),
+        "mismatches": mismatches,
+        "legacyUsPerResponse": round(legacy_seconds / calls * 1e6, 1),
+        "parserUsPerResponse": round(new_seconds / calls * 1e6, 1),
+        "speedup": round(legacy_seconds / new_seconds, 2) if new_seconds else None,
+    }
+
+
+if __name__ == "__main__":
+    print("⏱️  BENCHMARK DO PARSER DE SEÇÕES")
+    result = run_benchmark()
+    print(f"   Respostas: {result['samples']} | Divergências: {result['mismatches']}")
+    print(f"   Extrator antigo: {result['legacyUsPerResponse']} µs/resposta")
+    print(f"   Parser novo:     {result['parserUsPerResponse']} µs/resposta")
+    print(f"   Speedup: {result['speedup']}x")
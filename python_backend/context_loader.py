@@ -0,0 +1,254 @@
+"""
+Context Loader
+==============
+
+Carrega o contexto de um turno (chat ou conselho) antes da chamada ao Claude.
+
+Antes, cada leitura esperava a anterior (conversa -> especialista -> histórico ->
+perfil) e os especialistas do conselho eram buscados um a um em um loop. Aqui:
+
+1. Leituras independentes rodam juntas com ``asyncio.gather``
+2. Especialistas vêm do ``ExpertCatalog``: o catálogo inteiro fica em memória
+   e ids que ainda não estão nele são buscados em uma única consulta
+   (``get_experts_by_ids`` -> ``WHERE id = ANY($1)``)
+
+O catálogo é versionado e invalidado quando um especialista é criado ou
+alterado (e no seed); com Postgres, a invalidação chega aos outros workers do
+uvicorn via LISTEN/NOTIFY.
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from python_backend.models import Expert, ExpertSummary
+
+
+EXPERT_CATALOG_CHANNEL = "expert_catalog"
+
+
+class ExpertCatalog:
+    """
+    Catálogo de especialistas em memória, read-through e versionado.
+
+    Cada ``invalidate`` incrementa ``version``: uma carga que começou antes de uma
+    invalidação não é marcada como válida (não "ressuscita" um catálogo velho).
+    Com ``start_sync`` (Postgres), invalidações são publicadas via NOTIFY e as
+    dos outros workers chegam por LISTEN, então o catálogo pode ficar em memória
+    por ``synced_ttl_seconds``; sem sincronização vale o TTL curto.
+    """
+
+    def __init__(self, storage: Any, ttl_seconds: float = 60.0, synced_ttl_seconds: float = 3600.0):
+        self.storage = storage
+        self.ttl_seconds = ttl_seconds
+        self.synced_ttl_seconds = synced_ttl_seconds
+        self.worker_id = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.version = 0
+        self._experts: Dict[str, Expert] = {}
+        self._ordered: List[Expert] = []
+        self._loaded_version = -1
+        self._expires_at = 0.0
+        self._summaries: List[ExpertSummary] = []
+        self._summaries_version = -1
+        self._summaries_expires_at = 0.0
+        self._lock = asyncio.Lock()
+        self._listener = None
+        self.hits = 0
+        self.loads = 0
+        self.summary_loads = 0
+        self.batch_lookups = 0
+        self.invalidations = 0
+        self.remote_invalidations = 0
+
+    @property
+    def synced(self) -> bool:
+        return self._listener is not None
+
+    def _ttl(self) -> float:
+        return self.synced_ttl_seconds if self.synced else self.ttl_seconds
+
+    def _fresh(self) -> bool:
+        return self._loaded_version == self.version and time.monotonic() < self._expires_at
+
+    def _summaries_fresh(self) -> bool:
+        return self._summaries_version == self.version and time.monotonic() < self._summaries_expires_at
+
+    async def _ensure_loaded(self) -> None:
+        if self._fresh():
+            self.hits += 1
+            return
+        async with self._lock:
+            # Outra corrotina pode ter recarregado enquanto esperávamos o lock
+            if self._fresh():
+                self.hits += 1
+                return
+            version = self.version
+            experts = await self.storage.get_experts()
+            self._ordered = list(experts)
+            self._experts = {expert.id: expert for expert in experts}
+            self.loads += 1
+            # Invalidado durante a leitura: usa o resultado agora, mas recarrega na próxima
+            if version == self.version:
+                self._loaded_version = version
+                self._expires_at = time.monotonic() + self._ttl()
+
+    async def all(self) -> List[Expert]:
+        await self._ensure_loaded()
+        return list(self._ordered)
+
+    async def summaries(self) -> List[ExpertSummary]:
+        """Listagem sem ``systemPrompt``, carregada por uma consulta que não lê a coluna do prompt."""
+        if self._summaries_fresh():
+            self.hits += 1
+            return list(self._summaries)
+        async with self._lock:
+            if self._summaries_fresh():
+                self.hits += 1
+                return list(self._summaries)
+            version = self.version
+            summaries = await self.storage.get_expert_summaries()
+            self.summary_loads += 1
+            if version == self.version:
+                self._summaries = list(summaries)
+                self._summaries_version = version
+                self._summaries_expires_at = time.monotonic() + self._ttl()
+            return list(summaries)
+
+    async def get_many(self, expert_ids: List[str]) -> List[Expert]:
+        """Especialistas na ordem de ``expert_ids``; ids inexistentes são omitidos."""
+        await self._ensure_loaded()
+        missing = [expert_id for expert_id in expert_ids if expert_id not in self._experts]
+        if missing:
+            # Criado depois da última carga (ou em outro processo): uma consulta para todos
+            self.batch_lookups += 1
+            for expert in await self.storage.get_experts_by_ids(missing):
+                self._experts[expert.id] = expert
+        return [self._experts[expert_id] for expert_id in expert_ids if expert_id in self._experts]
+
+    async def get(self, expert_id: str) -> Optional[Expert]:
+        experts = await self.get_many([expert_id])
+        return experts[0] if experts else None
+
+    def _invalidate_local(self) -> None:
+        self.version += 1
+        self.invalidations += 1
+
+    async def invalidate(self) -> None:
+        """Descarta o catálogo local e avisa os outros workers (create/avatar/seed)."""
+        self._invalidate_local()
+        try:
+            await self.storage.notify(EXPERT_CATALOG_CHANNEL, self.worker_id)
+        except Exception as e:
+            print(f"[ExpertCatalog] Falha ao publicar invalidação (outros workers usam o TTL): {e}")
+
+    def _on_notify(self, payload: str) -> None:
+        if payload != self.worker_id:
+            self._invalidate_local()
+            self.remote_invalidations += 1
+
+    def _on_listener_lost(self, *args) -> None:
+        print("[ExpertCatalog] ⚠️ Conexão LISTEN perdida; voltando ao TTL curto")
+        self._listener = None
+        self._invalidate_local()
+
+    async def start_sync(self) -> None:
+        """LISTEN no canal de invalidação (no-op sem Postgres)."""
+        if self._listener is not None:
+            return
+        try:
+            self._listener = await self.storage.listen(EXPERT_CATALOG_CHANNEL, self._on_notify)
+        except Exception as e:
+            print(f"[ExpertCatalog] LISTEN indisponível, usando TTL de {self.ttl_seconds:.0f}s: {e}")
+            self._listener = None
+            return
+        if self._listener is not None:
+            self._listener.add_termination_listener(self._on_listener_lost)
+            # Pode ter perdido invalidações antes do LISTEN: recarrega
+            self._invalidate_local()
+            print(f"[ExpertCatalog] ✓ Sincronizado entre workers via LISTEN {EXPERT_CATALOG_CHANNEL}")
+
+    async def stop_sync(self) -> None:
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            await listener.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "experts": len(self._experts),
+            "version": self.version,
+            "synced": self.synced,
+            "ttlSeconds": self._ttl(),
+            "fresh": self._fresh(),
+            "hits": self.hits,
+            "loads": self.loads,
+            "summaryLoads": self.summary_loads,
+            "batchLookups": self.batch_lookups,
+            "invalidations": self.invalidations,
+            "remoteInvalidations": self.remote_invalidations,
+        }
+
+
+class ContextLoader:
+    """Leituras de contexto em paralelo para os chats e o conselho."""
+
+    def __init__(self, storage: Any, expert_catalog: ExpertCatalog, rendered_context_cache: Any):
+        self.storage = storage
+        self.expert_catalog = expert_catalog
+        self.rendered_context_cache = rendered_context_cache
+
+    async def chat_turn(self, conversation_id: str, user_id: str) -> Dict[str, Any]:
+        """Conversa, especialista, histórico e perfil de negócio de um turno do chat 1:1."""
+        conversation, history, profile = await asyncio.gather(
+            self.storage.get_conversation(conversation_id),
+            self.storage.get_messages(conversation_id),
+            self.storage.get_business_profile(user_id),
+        )
+        expert = await self.expert_catalog.get(conversation.expertId) if conversation else None
+        return {"conversation": conversation, "expert": expert, "history": history, "profile": profile}
+
+    async def council_chat_turn(self, conversation: Any) -> Dict[str, Any]:
+        """Contexto renderizado, especialistas e histórico de um turno do chat do conselho."""
+        rendered, experts, history = await asyncio.gather(
+            self.rendered_context_cache.get(conversation.analysisId, conversation.personaId),
+            self.expert_catalog.get_many(conversation.expertIds),
+            self.storage.get_council_messages(conversation.id),
+        )
+        return {"rendered": rendered, "experts": experts, "history": history}
+
+    async def council_inputs(self, persona_id: str, user_id: str, expert_ids: Optional[List[str]]) -> Dict[str, Any]:
+        """
+        Persona, perfil e especialistas de uma análise do conselho.
+
+        ``missingExpertIds`` lista os ids pedidos que não existem (cada endpoint
+        decide se isso é erro); sem ``expert_ids``, usa o catálogo inteiro.
+        """
+        experts_read = self.expert_catalog.get_many(expert_ids) if expert_ids else self.expert_catalog.all()
+        persona, profile, experts = await asyncio.gather(
+            self.storage.get_persona(persona_id),
+            self.storage.get_business_profile(user_id),
+            experts_read,
+        )
+        found = {expert.id for expert in experts}
+        return {
+            "persona": persona,
+            "profile": profile,
+            "experts": experts,
+            "missingExpertIds": [expert_id for expert_id in (expert_ids or []) if expert_id not in found],
+        }
+
+
+def _build_default_loader() -> ContextLoader:
+    from python_backend.storage import storage
+    from python_backend.rendered_context import rendered_context_cache
+    catalog = ExpertCatalog(
+        storage,
+        ttl_seconds=float(os.getenv("EXPERT_CATALOG_TTL", "60")),
+        synced_ttl_seconds=float(os.getenv("EXPERT_CATALOG_SYNCED_TTL", "3600")),
+    )
+    return ContextLoader(storage, catalog, rendered_context_cache)
+
+
+context_loader = _build_default_loader()
+expert_catalog = context_loader.expert_catalog
@@ -0,0 +1,191 @@
+"""
+Contribution Cache
+==================
+
+Cache de contribuições dos especialistas do conselho.
+
+Times re-executam ``/api/council/analyze`` com o mesmo problema, persona e
+conjunto de especialistas; sem cache, cada execução repete todas as chamadas
+ao Claude. A chave é um hash (conteúdo) de:
+
+- id do especialista + hash da versão do prompt
+- texto do problema normalizado
+- id da persona + ``updatedAt`` da persona
+- versão do perfil de negócio
+- achados de pesquisa de mercado
+
+Dois níveis:
+1. LRU em memória (por processo, com TTL)
+2. Postgres (compartilhado entre processos, com TTL e evicção) via ``storage``
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from python_backend.models import ExpertContribution, Persona
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def normalize_problem(problem: str) -> str:
+    """Normaliza o problema para que variações de espaço/caixa gerem a mesma chave."""
+    text = unicodedata.normalize("NFKC", problem or "")
+    return _WHITESPACE_RE.sub(" ", text).strip().casefold()
+
+
+def prompt_version_hash(*parts: str) -> str:
+    """Hash curto de tudo que define o prompt (template, modelo, system prompt)."""
+    return _sha256("\x1f".join(parts))[:16]
+
+
+def profile_version(profile: Any) -> Optional[str]:
+    """
+    Versão do perfil de negócio: ``updatedAt`` quando existe, senão hash do conteúdo.
+    Aceita dict (PostgresStorage) ou objeto com atributos.
+    """
+    if not profile:
+        return None
+    data = profile if isinstance(profile, dict) else getattr(profile, "__dict__", {})
+    updated_at = data.get("updatedAt") or data.get("updated_at")
+    if updated_at:
+        return str(updated_at.isoformat() if isinstance(updated_at, datetime) else updated_at)
+    return _sha256(json.dumps(data, sort_keys=True, default=str))[:16]
+
+
+def build_contribution_key(
+    expert_id: str,
+    prompt_version: str,
+    problem: str,
+    persona: Optional[Persona] = None,
+    profile: Any = None,
+    research_findings: Optional[str] = None,
+) -> str:
+    """Chave de conteúdo da contribuição de um especialista."""
+    components = {
+        "expert": expert_id,
+        "promptVersion": prompt_version,
+        "problem": normalize_problem(problem),
+        "personaId": persona.id if persona else None,
+        "personaUpdatedAt": persona.updatedAt.isoformat() if persona and persona.updatedAt else None,
+        "profileVersion": profile_version(profile),
+        "research": _sha256(research_findings) if research_findings else None,
+    }
+    return _sha256(json.dumps(components, sort_keys=True))
+
+
+class ContributionCache:
+    """
+    Cache de dois níveis para ExpertContribution.
+
+    O nível Postgres é acessado pelos métodos ``get_cached_contribution`` /
+    ``save_cached_contribution`` / ``evict_contribution_cache`` do storage
+    (no MemStorage eles não persistem nada e só o LRU é usado).
+    """
+
+    def __init__(
+        self,
+        storage: Any,
+        max_entries: int = 512,
+        ttl_seconds: int = 7 * 24 * 3600,
+        persistent_max_entries: int = 20000,
+        evict_every: int = 100,
+    ):
+        self.storage = storage
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persistent_max_entries = persistent_max_entries
+        self.evict_every = evict_every
+        self._entries: "OrderedDict[str, Tuple[float, ExpertContribution]]" = OrderedDict()
+        self._writes = 0
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    def _remember(self, key: str, contribution: ExpertContribution) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, contribution)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[ExpertContribution]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, contribution = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return contribution.model_copy(deep=True)
+            del self._entries[key]
+
+        try:
+            data = await self.storage.get_cached_contribution(key)
+        except Exception as e:
+            print(f"[ContributionCache] Erro ao ler cache persistente (ignorado): {e}")
+            data = None
+        if data:
+            contribution = ExpertContribution(**data)
+            self._remember(key, contribution)
+            self.persistent_hits += 1
+            return contribution.model_copy(deep=True)
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, contribution: ExpertContribution) -> None:
+        self._remember(key, contribution.model_copy(deep=True))
+        try:
+            await self.storage.save_cached_contribution(
+                key, contribution.expertId, contribution.model_dump(), self.ttl_seconds
+            )
+            self._writes += 1
+            if self._writes % self.evict_every == 0:
+                evicted = await self.storage.evict_contribution_cache(self.persistent_max_entries)
+                if evicted:
+                    print(f"[ContributionCache] {evicted} entradas removidas do cache persistente")
+        except Exception as e:
+            print(f"[ContributionCache] Erro ao gravar cache persistente (ignorado): {e}")
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.persistent_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "maxEntries": self.max_entries,
+            "ttlSeconds": self.ttl_seconds,
+            "memoryHits": self.memory_hits,
+            "persistentHits": self.persistent_hits,
+            "misses": self.misses,
+            "hitRate": round((self.memory_hits + self.persistent_hits) / lookups, 3) if lookups else 0.0,
+        }
+
+
+def create_contribution_cache(storage: Any) -> Optional[ContributionCache]:
+    """Cria o cache a partir das variáveis de ambiente (CONTRIBUTION_CACHE=off desliga)."""
+    if os.getenv("CONTRIBUTION_CACHE", "on").lower() in ("0", "off", "false", "no"):
+        return None
+    return ContributionCache(
+        storage,
+        max_entries=_env_int("CONTRIBUTION_CACHE_MAX_ENTRIES", 512),
+        ttl_seconds=_env_int("CONTRIBUTION_CACHE_TTL_SECONDS", 7 * 24 * 3600),
+        persistent_max_entries=_env_int("CONTRIBUTION_CACHE_PERSISTENT_MAX_ENTRIES", 20000),
+    )
@@ -0,0 +1,247 @@
+"""
+Conversation Memory
+===================
+
+Memória de conversa com tamanho limitado para os chats (especialista e conselho).
+
+Antes, cada turno enviava o histórico inteiro: latência e custo de tokens
+cresciam linearmente com o tamanho da conversa. Agora cada prompt leva:
+
+1. Um resumo persistido das mensagens antigas (``ConversationSummary``)
+2. As mensagens recentes na íntegra (janela de ``CHAT_MEMORY_WINDOW``)
+
+O resumo é atualizado em background depois que a resposta foi enviada: quando
+``CHAT_MEMORY_BATCH`` mensagens saem da janela, elas são incorporadas ao resumo
+anterior por um modelo barato. Mensagens ainda não resumidas sempre vão na
+íntegra, nunca são puladas. Se o resumo ficar mais de ``max_verbatim``
+mensagens atrás (falha do resumidor, worker reiniciado no meio, conversa antiga),
+``context`` o alcança antes do turno, em lotes; assim o prompt fica limitado
+mesmo com centenas de mensagens. O corte entre resumo e janela cai sempre no
+início de um turno (mensagem do usuário): no conselho um turno tem uma
+pergunta e várias respostas, e a janela nunca começa com uma resposta órfã.
+Sem resumidor disponível o histórico não
+resumido vai inteiro.
+
+CHAT_MEMORY=off volta a enviar o histórico completo.
+"""
+
+import asyncio
+import os
+from typing import Any, Dict, List, Optional, Set
+
+from python_backend.http_clients import client_registry
+from python_backend.upstream_scheduler import anthropic_scheduler
+
+SUMMARY_MODEL = os.getenv("CHAT_SUMMARY_MODEL", "claude-3-haiku-20240307")
+
+# Tamanho máximo de cada mensagem enviada ao resumidor (respostas longas são cortadas)
+MAX_SUMMARY_INPUT_CHARS = 2000
+
+SUMMARY_PROMPT = """Você mantém a memória de uma conversa de consultoria de marketing.
+
+Atualize o RESUMO ANTERIOR incorporando as NOVAS MENSAGENS. Preserve:
+- Fatos sobre o negócio, público e metas que o usuário informou
+- Decisões tomadas, recomendações aceitas/rejeitadas e números citados
+- Perguntas em aberto
+
+Escreva em português, em bullets curtos, no máximo 250 palavras. Responda apenas com o resumo."""
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(int(os.getenv(name, default)), 1)
+    except (TypeError, ValueError):
+        return default
+
+
+def memory_enabled() -> bool:
+    return os.getenv("CHAT_MEMORY", "on").lower() not in ("0", "off", "false", "no")
+
+
+def _speaker(message: Dict[str, Any]) -> str:
+    if message.get("role") == "user":
+        return "Usuário"
+    return message.get("expertName") or "Especialista"
+
+
+def format_transcript(messages: List[Dict[str, Any]]) -> str:
+    lines = []
+    for message in messages:
+        content = message.get("content") or ""
+        if len(content) > MAX_SUMMARY_INPUT_CHARS:
+            content = content[:MAX_SUMMARY_INPUT_CHARS] + " […]"
+        lines.append(f"{_speaker(message)}: {content}")
+    return "\n\n".join(lines)
+
+
+def _turn_start(history: List[Dict[str, Any]], index: int) -> int:
+    """Recua ``index`` até a mensagem do usuário que abre o turno."""
+    while 0 < index < len(history) and history[index].get("role") != "user":
+        index -= 1
+    return index
+
+
+def _next_turn_start(history: List[Dict[str, Any]], index: int, limit: int) -> int:
+    """Primeiro início de turno depois de ``index`` (``limit`` se não houver)."""
+    index += 1
+    while index < limit and history[index].get("role") != "user":
+        index += 1
+    return index
+
+
+class MemoryContext:
+    """O que vai no prompt de um turno: resumo das mensagens antigas + janela recente."""
+
+    def __init__(self, messages: List[Dict[str, Any]], summary: str = "", summarized_count: int = 0, total: int = 0):
+        self.messages = messages
+        self.summary = summary
+        self.summarized_count = summarized_count
+        self.total = total
+
+    def summary_block(self) -> str:
+        if not self.summary:
+            return ""
+        return (
+            f"**RESUMO DA CONVERSA ATÉ AQUI ({self.summarized_count} mensagens anteriores):**\n"
+            f"{self.summary}"
+        )
+
+
+class ConversationMemory:
+    """
+    Janela verbatim + resumo rolante por conversa.
+
+    ``context`` é chamado antes da resposta (só lê o resumo persistido);
+    ``schedule_update`` depois dela, e resume em background.
+    """
+
+    def __init__(self, storage: Any, window: Optional[int] = None, batch: Optional[int] = None):
+        self.storage = storage
+        self.window = window or _env_int("CHAT_MEMORY_WINDOW", 12)
+        self.batch = batch or _env_int("CHAT_MEMORY_BATCH", 8)
+        self._running: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self.updates = 0
+        self.failures = 0
+        self.summarized_messages = 0
+
+    @property
+    def max_verbatim(self) -> int:
+        """Teto de mensagens na íntegra (janela + folga enquanto o resumo é atualizado)."""
+        return self.window + 2 * self.batch
+
+    async def _load_summary(self, conversation_id: str):
+        try:
+            return await self.storage.get_conversation_summary(conversation_id)
+        except Exception as e:
+            print(f"[ConversationMemory] Erro ao ler resumo de {conversation_id} (ignorado): {e}")
+            return None
+
+    async def context(self, conversation_id: str, history: List[Dict[str, Any]]) -> MemoryContext:
+        """
+        Resumo persistido + todas as mensagens que ele ainda não cobre.
+
+        Com o resumo mais de ``max_verbatim`` mensagens atrás, resume o atraso
+        antes (a menos que uma atualização já esteja em andamento).
+        """
+        if not memory_enabled() or len(history) <= self.window:
+            return MemoryContext(list(history), total=len(history))
+
+        summary = await self._load_summary(conversation_id)
+        covered = min(summary.coveredCount, len(history)) if summary else 0
+        if len(history) - covered > self.max_verbatim and conversation_id not in self._running:
+            self._running.add(conversation_id)
+            await self._update(conversation_id, list(history))
+            summary = await self._load_summary(conversation_id)
+            covered = min(summary.coveredCount, len(history)) if summary else 0
+        # Resumo antigo cortado no meio de um turno: a pergunta volta para a janela
+        covered = _turn_start(history, covered)
+        return MemoryContext(
+            list(history[covered:]),
+            summary=summary.summary if summary and covered else "",
+            summarized_count=covered,
+            total=len(history),
+        )
+
+    def schedule_update(self, conversation_id: str, history: List[Dict[str, Any]]) -> Optional[asyncio.Task]:
+        """Agenda a atualização do resumo (não bloqueia a resposta já enviada)."""
+        if not memory_enabled() or len(history) - self.window < self.batch:
+            return None
+        if conversation_id in self._running:
+            return None
+        self._running.add(conversation_id)
+        task = asyncio.create_task(self._update(conversation_id, list(history)))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _update(self, conversation_id: str, history: List[Dict[str, Any]]) -> None:
+        try:
+            summary = await self._load_summary(conversation_id)
+            covered = min(summary.coveredCount, len(history)) if summary else 0
+            # Cortes só em início de turno, para a janela não abrir com uma resposta sem a pergunta
+            target = _turn_start(history, len(history) - self.window)
+            if target - covered < self.batch:
+                return
+
+            # Atraso grande é resumido em lotes de até max_verbatim mensagens (prompt limitado)
+            previous = summary.summary if summary else ""
+            while covered < target:
+                end = _turn_start(history, min(target, covered + self.max_verbatim))
+                if end <= covered:
+                    # Turno maior que o lote: resume o turno inteiro
+                    end = _next_turn_start(history, covered, target)
+                new_summary = await self._summarize(previous, history[covered:end])
+                if not new_summary:
+                    return
+                await self.storage.save_conversation_summary(conversation_id, new_summary, end)
+                self.updates += 1
+                self.summarized_messages += end - covered
+                print(f"[ConversationMemory] Resumo de {conversation_id} atualizado: {covered} -> {end} mensagens")
+                previous, covered = new_summary, end
+        except Exception as e:
+            self.failures += 1
+            print(f"[ConversationMemory] Erro ao atualizar resumo de {conversation_id}: {e}")
+        finally:
+            self._running.discard(conversation_id)
+
+    async def _summarize(self, previous_summary: str, messages: List[Dict[str, Any]]) -> str:
+        client = client_registry.anthropic()
+        if client is None:
+            return ""
+        user_message = (
+            f"**RESUMO ANTERIOR:**\n{previous_summary or '(vazio)'}\n\n"
+            f"**NOVAS MENSAGENS:**\n{format_transcript(messages)}"
+        )
+        async with anthropic_scheduler.slot():
+            response = await client.messages.create(
+                model=SUMMARY_MODEL,
+                max_tokens=600,
+                system=SUMMARY_PROMPT,
+                messages=[{"role": "user", "content": user_message}]
+            )
+        return "".join(block.text for block in response.content if getattr(block, "type", "") == "text").strip()
+
+    async def drain(self) -> None:
+        """Espera as atualizações em andamento (shutdown e testes)."""
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": memory_enabled(),
+            "window": self.window,
+            "batch": self.batch,
+            "running": len(self._running),
+            "updates": self.updates,
+            "failures": self.failures,
+            "summarizedMessages": self.summarized_messages,
+        }
+
+
+def _build_default_memory() -> ConversationMemory:
+    from python_backend.storage import storage
+    return ConversationMemory(storage)
+
+
+conversation_memory = _build_default_memory()
@@ -2,18 +2,25 @@
 CrewAI Integration for Marketing Legends Cognitive Clones
 Com sistema Deep Clone para profundidade e contexto
 """
+import asyncio
+import inspect
 import os
 import datetime
-from typing import List, Optional
-from anthropic import AsyncAnthropic
+from typing import AsyncIterator, List, Optional
+from anthropic import AsyncAnthropic, RateLimitError
 from dotenv import load_dotenv, find_dotenv
 from python_backend.deep_clone import DeepCloneEnhancer
+from python_backend.prompt_cache import build_system_blocks, record_cache_usage
+from python_backend.http_clients import client_registry
 
 # Carregar .env quando o módulo é importado
 _env_file = find_dotenv(usecwd=True)
 if _env_file:
     load_dotenv(_env_file)
 
+CHAT_MODEL = "claude-sonnet-4-20250514"
+CHAT_MAX_TOKENS = 2048
+
 class MarketingLegendAgent:
     """
     Wrapper for CrewAI Agent representing a marketing legend
@@ -30,39 +37,50 @@ class MarketingLegendAgent:
         if _env_file:
             load_dotenv(_env_file)
         
-        # Use AsyncAnthropic to avoid blocking FastAPI's event loop
+        # Use AsyncAnthropic to avoid blocking FastAPI's event loop.
+        # O cliente é compartilhado (pool keep-alive do client_registry), não um por agente.
         anthropic_key = os.getenv("ANTHROPIC_API_KEY") or os.environ.get("ANTHROPIC_API_KEY")
         if not anthropic_key:
             raise ValueError(
                 "ANTHROPIC_API_KEY não encontrada. "
                 "Verifique se o arquivo .env existe e contém ANTHROPIC_API_KEY=sk-ant-..."
             )
-        self.anthropic_client = AsyncAnthropic(api_key=anthropic_key)
+        self._anthropic_client_override = None
+
+    @property
+    def anthropic_client(self) -> AsyncAnthropic:
+        """Cliente atual do client_registry (recriado após um aclose()), ou o override de teste."""
+        return self._anthropic_client_override or client_registry.require_anthropic()
+
+    @anthropic_client.setter
+    def anthropic_client(self, client) -> None:
+        self._anthropic_client_override = client
     
-    async def chat(
-        self, 
-        conversation_history: List[dict], 
+    def _build_request(
+        self,
+        conversation_history: List[dict],
         user_message: str,
         current_time: Optional[datetime.datetime] = None,
-        person_speaking: Optional[str] = None
-    ) -> str:
+        person_speaking: Optional[str] = None,
+        system_context: Optional[str] = None,
+        shared_context: Optional[str] = None
+    ) -> dict:
         """
-        Process a chat message using the legend's cognitive clone
-        Enhanced with Deep Clone system for contextual depth
-        
-        Args:
-            conversation_history: List of {role: str, content: str} messages
-            user_message: New user message to process
-            current_time: Optional datetime for temporal context
-            person_speaking: Optional person context (who is speaking)
+        Build the Messages API request shared by chat() and chat_stream()
         
-        Returns:
-            str: Assistant response from the cognitive clone
+        The system prompt is sent as cacheable blocks: the stable prefix (legend
+        prompt + signature pattern) and the optional shared_context carry
+        cache_control breakpoints; the Deep Clone session context and
+        system_context (profile, persona, preferences) go in the uncached suffix.
         """
+        stable_prefix = self.base_system_prompt
+        dynamic_suffix = ""
+        message_to_use = user_message
+        
         # Apply Deep Clone enhancement if enabled
         if self.enable_deep_clone:
             try:
-                enhanced_prompt, enhanced_message = DeepCloneEnhancer.enhance_with_deep_clone(
+                stable_prefix, dynamic_suffix, message_to_use = DeepCloneEnhancer.split_with_deep_clone(
                     self.base_system_prompt,
                     self.name,
                     user_message,
@@ -70,18 +88,18 @@ class MarketingLegendAgent:
                     person_speaking,
                     conversation_history
                 )
-                system_prompt_to_use = enhanced_prompt
-                message_to_use = enhanced_message
             except Exception as e:
                 # Se Deep Clone falhar, usar prompt original (fail-safe)
                 print(f"[MarketingLegendAgent] Erro no Deep Clone, usando prompt original: {e}")
                 import traceback
                 traceback.print_exc()
-                system_prompt_to_use = self.base_system_prompt
+                stable_prefix = self.base_system_prompt
+                dynamic_suffix = ""
                 message_to_use = user_message
-        else:
-            system_prompt_to_use = self.base_system_prompt
-            message_to_use = user_message
+        
+        if system_context:
+            dynamic_suffix = f"{dynamic_suffix}\n\n{system_context}" if dynamic_suffix else system_context
+        system_blocks = build_system_blocks(stable_prefix, dynamic_suffix, shared_context=shared_context)
         
         # Build full message history for Claude
         messages = []
@@ -99,14 +117,76 @@ class MarketingLegendAgent:
             "content": message_to_use
         })
         
+        return {
+            "model": CHAT_MODEL,
+            "max_tokens": CHAT_MAX_TOKENS,
+            "system": system_blocks,
+            "messages": messages
+        }
+    
+    @staticmethod
+    def _raise_api_error(e: Exception):
+        error_msg = str(e)
+        if "api_key" in error_msg.lower() or "authentication" in error_msg.lower():
+            raise ValueError(
+                f"Erro de autenticação com Anthropic API: {error_msg}. "
+                "Verifique se ANTHROPIC_API_KEY está configurada corretamente no .env"
+            )
+        raise e
+    
+    async def _create(self, request: dict, scheduler=None):
+        """
+        messages.create; com ``scheduler`` a chamada ocupa uma vaga dele e os headers
+        anthropic-ratelimit-* (ou o 429) alimentam o controle AIMD de concorrência.
+        """
+        if scheduler is None:
+            return await self.anthropic_client.messages.create(**request)
+        async with scheduler.slot():
+            try:
+                raw = await self.anthropic_client.messages.with_raw_response.create(**request)
+            except RateLimitError as e:
+                scheduler.on_rate_limited(e.response.headers if e.response is not None else None)
+                raise
+            scheduler.on_success(raw.headers)
+            response = raw.parse()
+            if inspect.isawaitable(response):
+                response = await response
+            return response
+    
+    async def chat(
+        self, 
+        conversation_history: List[dict], 
+        user_message: str,
+        current_time: Optional[datetime.datetime] = None,
+        person_speaking: Optional[str] = None,
+        system_context: Optional[str] = None,
+        shared_context: Optional[str] = None,
+        scheduler=None
+    ) -> str:
+        """
+        Process a chat message using the legend's cognitive clone
+        Enhanced with Deep Clone system for contextual depth
+        
+        Args:
+            conversation_history: List of {role: str, content: str} messages
+            user_message: New user message to process
+            current_time: Optional datetime for temporal context
+            person_speaking: Optional person context (who is speaking)
+            system_context: Optional per-call context appended after the cached prefix
+            shared_context: Optional context reused across calls (cached separately)
+            scheduler: Optional UpstreamScheduler that paces the call and learns from its headers
+        
+        Returns:
+            str: Assistant response from the cognitive clone
+        """
+        request = self._build_request(
+            conversation_history, user_message, current_time, person_speaking, system_context, shared_context
+        )
+        
         # Call Claude with the enhanced system prompt (async to avoid blocking event loop)
         try:
-            response = await self.anthropic_client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=2048,
-                system=system_prompt_to_use,
-                messages=messages
-            )
+            response = await self._create(request, scheduler)
+            record_cache_usage("legend_chat", response)
             
             # Extract text from response - handle different content block types
             for block in response.content:
@@ -120,13 +200,36 @@ class MarketingLegendAgent:
                 return str(response.content[0])
             return "Erro: Resposta vazia da API"
         except Exception as e:
-            error_msg = str(e)
-            if "api_key" in error_msg.lower() or "authentication" in error_msg.lower():
-                raise ValueError(
-                    f"Erro de autenticação com Anthropic API: {error_msg}. "
-                    "Verifique se ANTHROPIC_API_KEY está configurada corretamente no .env"
-                )
+            self._raise_api_error(e)
+    
+    async def chat_stream(
+        self,
+        conversation_history: List[dict],
+        user_message: str,
+        current_time: Optional[datetime.datetime] = None,
+        person_speaking: Optional[str] = None,
+        system_context: Optional[str] = None,
+        shared_context: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Same as chat(), but yields text deltas as they arrive (Anthropic streaming API)
+        
+        Closing the generator early (e.g. the client disconnected) exits the
+        stream context, which closes the upstream HTTP response and stops
+        generation.
+        """
+        request = self._build_request(
+            conversation_history, user_message, current_time, person_speaking, system_context, shared_context
+        )
+        try:
+            async with self.anthropic_client.messages.stream(**request) as stream:
+                async for text in stream.text_stream:
+                    yield text
+                record_cache_usage("legend_chat", await stream.get_final_message())
+        except (GeneratorExit, asyncio.CancelledError):
             raise
+        except Exception as e:
+            self._raise_api_error(e)
 
 class LegendAgentFactory:
     """
@@ -2,7 +2,8 @@ import os
 import json
 import asyncio
 import re
-from typing import Dict, List, Optional, Any, Union
+import unicodedata
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple, Union
 from datetime import datetime as dt
 from uuid import uuid4
 
@@ -17,17 +18,126 @@ from python_backend.prompts.template_master import (
     _build_conversational_guidelines,
     _get_conversational_fewshots,
 )
-from anthropic import AsyncAnthropic
+from anthropic import AsyncAnthropic, RateLimitError
 import httpx
+import inspect
 
-from python_backend.models import Expert, CouncilAnalysis, ExpertContribution, Persona, ActionPlan, Phase, Action
+from python_backend.models import Expert, CouncilAnalysis, ExpertContribution, Persona, ActionPlan, Phase, Action, SkippedExpert
 from python_backend.storage import storage
+from python_backend.upstream_scheduler import anthropic_scheduler
+from python_backend.hedging import anthropic_hedger
+from python_backend.http_clients import client_registry
+from python_backend.prompt_cache import build_system_blocks, record_cache_usage
+from python_backend.deep_clone import DeepCloneEnhancer
+from python_backend.section_parser import extract_section_bullets, is_placeholder, parse_expert_response
+from python_backend.contribution_cache import (
+    build_contribution_key, create_contribution_cache, prompt_version_hash
+)
+from python_backend.token_budget import ContextSection, TokenBudgetPlanner, summarize_reports
+from python_backend.structured_output import (
+    ACTION_PLAN_TOOL, CONSENSUS_TOOL, EXPERT_ANALYSIS_TOOL, json_from_text, structured_output_enabled, tool_input
+)
 
 # Carregar .env quando o módulo é importado
 _env_file = find_dotenv(usecwd=True)
 if _env_file:
     load_dotenv(_env_file, override=True)
 
+# Modelo e versão do template da análise individual. Entram no hash de versão do
+# prompt do ContributionCache: altere a versão ao mudar o template da mensagem.
+EXPERT_ANALYSIS_MODEL = "claude-3-haiku-20240307"
+EXPERT_PROMPT_TEMPLATE_VERSION = "2"
+
+# Acrescentado à mensagem do especialista no modo estruturado
+_EXPERT_TOOL_INSTRUCTION = f"""
+
+**FORMATO DE SAÍDA:**
+Registre sua resposta chamando a ferramenta `{EXPERT_ANALYSIS_TOOL.name}`: `analysis` = Análise Principal,
+`keyInsights` = Principais Insights, `recommendations` = Recomendações Acionáveis.
+Não repita os títulos das seções nem use marcadores ("-") dentro dos itens das listas."""
+
+# Formato do relatório de consenso (modo estruturado / fallback em texto)
+_CONSENSUS_TOOL_INSTRUCTION = f"""
+- Registre o relatório chamando a ferramenta `{CONSENSUS_TOOL.name}`, com um campo para cada item acima."""
+_CONSENSUS_TEXT_INSTRUCTION = """
+- O resultado deve ser um relatório de texto contínuo, não um objeto JSON."""
+
+_ACTION_PLAN_TOOL_INSTRUCTION = f"""
+**FORMATO DE SAÍDA:** Registre o plano chamando a ferramenta `{ACTION_PLAN_TOOL.name}` (o input segue o schema acima)."""
+
+_STOPWORDS = {
+    "a", "o", "as", "os", "de", "da", "do", "das", "dos", "e", "em", "no", "na", "nos", "nas",
+    "um", "uma", "para", "por", "com", "que", "se", "ao", "aos", "seu", "sua", "seus", "suas",
+    "the", "and", "of", "to", "in", "for", "on", "with", "is", "are",
+}
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _normalize_terms(text: str) -> frozenset:
+    """Reduz um bullet a um conjunto de termos relevantes (sem acento, sem stopwords)."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return frozenset(w for w in _WORD_RE.findall(text) if len(w) > 2 and w not in _STOPWORDS)
+
+
+class ExpertAnalysisError(Exception):
+    """Falha de um expert (timeout, API, parse); a mensagem segue o padrão "Não consegui X por Y; tentei Z; proponho W"."""
+
+
+class ConsensusAccumulator:
+    """
+    Consenso parcial incremental (map-reduce local, sem chamadas à API).
+    
+    Map: cada contribuição é reduzida a temas (insights/recomendações normalizados).
+    Reduce: temas semelhantes entre experts são agrupados e contados, de forma que
+    a cada nova contribuição temos um retrato atualizado das convergências.
+    """
+    
+    SIMILARITY_THRESHOLD = 0.5
+    
+    def __init__(self, total_experts: int):
+        self.total_experts = total_experts
+        self.experts_reported: List[str] = []
+        self._themes: Dict[str, List[Dict[str, Any]]] = {"insights": [], "recommendations": []}
+    
+    def _merge(self, kind: str, items: List[str], expert_name: str) -> None:
+        themes = self._themes[kind]
+        for item in items:
+            terms = _normalize_terms(item)
+            if not terms:
+                continue
+            best, best_score = None, 0.0
+            for theme in themes:
+                overlap = len(terms & theme["terms"]) / len(terms | theme["terms"])
+                if overlap > best_score:
+                    best, best_score = theme, overlap
+            if best is not None and best_score >= self.SIMILARITY_THRESHOLD:
+                if expert_name not in best["experts"]:
+                    best["experts"].append(expert_name)
+            else:
+                themes.append({"text": item, "terms": terms, "experts": [expert_name]})
+    
+    def add(self, contribution: ExpertContribution) -> None:
+        """Map + reduce de uma nova contribuição no consenso parcial"""
+        self.experts_reported.append(contribution.expertName)
+        self._merge("insights", contribution.keyInsights, contribution.expertName)
+        self._merge("recommendations", contribution.recommendations, contribution.expertName)
+    
+    def _top(self, kind: str, limit: int) -> List[Dict[str, Any]]:
+        ranked = sorted(self._themes[kind], key=lambda t: len(t["experts"]), reverse=True)
+        return [{"text": t["text"], "experts": list(t["experts"]), "support": len(t["experts"])} for t in ranked[:limit]]
+    
+    def snapshot(self, limit: int = 5) -> Dict[str, Any]:
+        """Retrato atual do consenso parcial (serializável em JSON)"""
+        return {
+            "expertsReported": len(self.experts_reported),
+            "expertsTotal": self.total_experts,
+            "experts": list(self.experts_reported),
+            "sharedInsights": self._top("insights", limit),
+            "sharedRecommendations": self._top("recommendations", limit),
+        }
+
+
 class CouncilOrchestrator:
     """
     Orchestrates the council of marketing experts to analyze problems
@@ -44,16 +154,33 @@ class CouncilOrchestrator:
         if not anthropic_key:
             print("[CouncilOrchestrator] ⚠️  ANTHROPIC_API_KEY não encontrada. Council analysis será desabilitado.")
             print("[CouncilOrchestrator] Para habilitar, adicione ANTHROPIC_API_KEY=sk-ant-... no arquivo .env")
-            self.anthropic_client = None
-        else:
-            self.anthropic_client = AsyncAnthropic(api_key=anthropic_key)
-        # Limit concurrent API calls to avoid rate limiting (reduced to 1 for rate limit safety)
-        self.semaphore = asyncio.Semaphore(1)
-        # Add delay between calls to stay within rate limits
-        self.call_delay = 2.0  # seconds between calls
+        # Override injetável (testes); sem ele, anthropic_client lê o registro a cada uso
+        self._anthropic_client_override = None
+        # Taxa e concorrência das chamadas são controladas pelo agendador compartilhado
+        # (token bucket + AIMD baseado em 429 e headers anthropic-ratelimit-*)
+        self.scheduler = anthropic_scheduler
+        # Hedge opcional contra a cauda de latência (histogramas por etapa + orçamento por upstream)
+        self.hedger = anthropic_hedger
+        # Cache de contribuições (LRU em memória + Postgres com TTL)
+        self.contribution_cache = create_contribution_cache(storage)
+        # Saída estruturada (tool use validado por TypeAdapter); texto só como fallback
+        self.structured_output = structured_output_enabled()
         # Memória leve de preferências por sessão (user_id -> dict)
         # Não persiste, apenas durante a execução do processo
         self._session_preferences: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def anthropic_client(self) -> Optional[AsyncAnthropic]:
+        """
+        Cliente compartilhado do client_registry, lido a cada uso (None sem
+        ANTHROPIC_API_KEY). Guardar a instância no __init__ prenderia o
+        orquestrador a um cliente fechado depois de um shutdown/startup.
+        """
+        return self._anthropic_client_override or client_registry.anthropic()
+
+    @anthropic_client.setter
+    def anthropic_client(self, client: Optional[AsyncAnthropic]) -> None:
+        self._anthropic_client_override = client
     
     async def analyze_problem(
         self,
@@ -63,7 +190,9 @@ class CouncilOrchestrator:
         research_findings: Optional[str] = None,
         profile: Optional[dict] = None,
         persona: Optional[Persona] = None,
-        citations: Optional[List[Dict[str, str]]] = None
+        citations: Optional[List[Dict[str, str]]] = None,
+        deadline_seconds: Optional[float] = None,
+        quorum: Optional[int] = None
     ) -> CouncilAnalysis:
         """
         Analyze a marketing problem with the council of experts
@@ -75,10 +204,56 @@ class CouncilOrchestrator:
             research_findings: Optional market research data
             profile: Optional business profile for context
             citations: Optional list of citations to include
+            deadline_seconds: Optional latency budget for the expert phase
+            quorum: Minimum number of experts required once the deadline hits (default 1)
             
         Returns:
             CouncilAnalysis with expert contributions and consensus
         """
+        analysis = None
+        async for event_type, payload in self.analyze_problem_stream(
+            user_id=user_id,
+            problem=problem,
+            experts=experts,
+            research_findings=research_findings,
+            profile=profile,
+            persona=persona,
+            citations=citations,
+            deadline_seconds=deadline_seconds,
+            quorum=quorum
+        ):
+            if event_type == "analysis_complete":
+                analysis = payload
+        return analysis
+    
+    async def analyze_problem_stream(
+        self,
+        user_id: str,
+        problem: str,
+        experts: List[Expert],
+        research_findings: Optional[str] = None,
+        profile: Optional[dict] = None,
+        persona: Optional[Persona] = None,
+        citations: Optional[List[Dict[str, str]]] = None,
+        deadline_seconds: Optional[float] = None,
+        quorum: Optional[int] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Pipelined council analysis, yielding (event_type, payload) as it progresses.
+        
+        Expert analyses run concurrently and each contribution is folded into a
+        ConsensusAccumulator as soon as it lands (asyncio.as_completed), emitting a
+        "consensus_partial" event. Final synthesis starts the moment the last
+        contribution arrives, using the reduced partial consensus as extra context.
+        
+        With deadline_seconds set, once the deadline passes and at least `quorum`
+        experts have answered, outstanding calls (including retry chains) are
+        cancelled and recorded in CouncilAnalysis.skippedExperts.
+        
+        Events:
+            expert_completed / expert_failed / expert_skipped, consensus_partial, consensus_started,
+            consensus_completed, action_plan_started, analysis_complete (payload: CouncilAnalysis)
+        """
         if not experts or len(experts) < 1:
             raise HTTPException(status_code=400, detail="At least one expert is required")
         
@@ -107,49 +282,105 @@ class CouncilOrchestrator:
         # Create unique ID for this analysis
         analysis_id = str(uuid4())
         
-        # Step 1: Get individual expert analyses in parallel
-        tasks = []
-        for expert in experts:
-            task = self._get_expert_analysis(
-                expert=expert,
-                problem=problem,
-                research_findings=research_findings,
-                profile=profile,
-                persona=persona,
-                user_id=user_id
-            )
-            tasks.append(task)
-            
-        # Wait for all expert analyses to complete
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        cache_stats: Dict[str, Any] = {"hits": 0, "misses": 0, "hitExperts": []}
+        budget_reports: List[Dict[str, Any]] = []
         
-        # Step 2: Filter out any failed analyses
-        valid_contributions = []
-        for i, contrib in enumerate(results):
-            if isinstance(contrib, Exception):
-                print(f"⚠️ Expert {experts[i].name} analysis failed: {str(contrib)}")
-            else:
-                valid_contributions.append(contrib)
+        async def run_expert(index: int, expert: Expert):
+            try:
+                contribution = await self._get_expert_analysis(
+                    expert=expert,
+                    problem=problem,
+                    research_findings=research_findings,
+                    profile=profile,
+                    persona=persona,
+                    user_id=user_id,
+                    cache_stats=cache_stats,
+                    budget_reports=budget_reports
+                )
+                return index, expert, contribution
+            except Exception as e:
+                return index, expert, e
+        
+        # Step 1: Fan out expert analyses and fold each one into the partial consensus
+        tasks = {asyncio.create_task(run_expert(i, expert)): expert for i, expert in enumerate(experts)}
+        accumulator = ConsensusAccumulator(total_experts=len(experts))
+        completed: Dict[int, ExpertContribution] = {}
+        skipped: List[SkippedExpert] = []
+        
+        loop = asyncio.get_running_loop()
+        required = min(quorum or 1, len(experts))
+        deadline_at = loop.time() + deadline_seconds if deadline_seconds else None
+        pending = set(tasks)
+        try:
+            while pending:
+                timeout = None
+                if deadline_at is not None:
+                    remaining = deadline_at - loop.time()
+                    if remaining <= 0 and len(completed) >= required:
+                        break
+                    # Prazo estourado sem quórum: esperar pelo próximo expert que responder
+                    timeout = remaining if remaining > 0 else None
+                
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    index, expert, result = task.result()
+                    if isinstance(result, Exception):
+                        print(f"⚠️ Expert {expert.name} analysis failed: {str(result)}")
+                        skipped.append(SkippedExpert(expertId=expert.id, expertName=expert.name, reason="failed", detail=str(result)))
+                        yield "expert_failed", {"expertId": expert.id, "expertName": expert.name, "error": str(result)}
+                        continue
+                    
+                    completed[index] = result
+                    accumulator.add(result)
+                    yield "expert_completed", {
+                        "expertId": expert.id,
+                        "expertName": expert.name,
+                        "insightCount": len(result.keyInsights),
+                        "recommendationCount": len(result.recommendations),
+                        "cached": expert.id in cache_stats["hitExperts"]
+                    }
+                    yield "consensus_partial", accumulator.snapshot()
+        finally:
+            # Cancelar chamadas pendentes (prazo atingido ou consumidor desistiu do stream)
+            stragglers = [task for task in tasks if not task.done()]
+            for task in stragglers:
+                task.cancel()
+            if stragglers:
+                await asyncio.gather(*stragglers, return_exceptions=True)
         
-        if not valid_contributions:
+        for task in stragglers:
+            expert = tasks[task]
+            print(f"⏱️ Expert {expert.name} skipped: deadline of {deadline_seconds}s reached")
+            skipped.append(SkippedExpert(
+                expertId=expert.id,
+                expertName=expert.name,
+                reason="deadline",
+                detail=f"Sem resposta em {deadline_seconds}s"
+            ))
+            yield "expert_skipped", {"expertId": expert.id, "expertName": expert.name, "reason": "deadline"}
+        
+        if not completed:
             raise Exception("All expert analyses failed - unable to generate council analysis")
         
-        contributions = valid_contributions
+        # Keep the original expert order regardless of completion order
+        contributions = [completed[i] for i in sorted(completed)]
         
-        # Step 3: Synthesize consensus from all contributions
-        # Add delay before synthesis to avoid rate limits
-        await asyncio.sleep(self.call_delay)
+        # Step 2: Final synthesis starts as soon as the last contribution lands
+        yield "consensus_started", {"contributionCount": len(contributions)}
         consensus = await self._synthesize_consensus(
             problem=problem,
             contributions=contributions,
             research_findings=research_findings,
-            persona=persona
+            persona=persona,
+            partial_consensus=accumulator.snapshot(),
+            budget_reports=budget_reports
         )
+        yield "consensus_completed", {"length": len(consensus)}
         
-        # Step 4: Generate action plan based on consensus and persona
+        # Step 3: Generate action plan based on consensus and persona
         action_plan = None
         try:
-            await asyncio.sleep(self.call_delay)
+            yield "action_plan_started", {}
             action_plan = await self._generate_action_plan(
                 problem=problem,
                 consensus=consensus,
@@ -174,23 +405,62 @@ class CouncilOrchestrator:
             contributions=contributions,
             consensus=consensus,
             actionPlan=action_plan,
+            skippedExperts=skipped,
+            metadata={"contributionCache": cache_stats, "tokenBudget": summarize_reports(budget_reports)},
             citations=citations or []
         )
         
-        return analysis
+        yield "analysis_complete", analysis
+
+    async def _create_message(self, stage: str, timeout: float, **kwargs):
+        """
+        Chama messages.create através do agendador de upstream e do hedger.
+        
+        ``stage`` identifica o histograma de latência usado para decidir o hedge
+        (expert_analysis, consensus, action_plan). A corrida de hedge roda dentro da
+        vaga do agendador: o histograma mede só o upstream (não o tempo na fila), e a
+        cópia usa a mesma vaga em vez de esperar atrás das chamadas que quer vencer.
+        """
+        async with self.scheduler.slot():
+            response = await self.hedger.run(stage, lambda: self._upstream_create(timeout, **kwargs))
+        record_cache_usage(f"council_{stage}", response)
+        return response
+    
+    async def _upstream_create(self, timeout: float, **kwargs):
+        """
+        Uma chamada a messages.create (a vaga do agendador já foi obtida).
+        
+        Os headers anthropic-ratelimit-* da resposta alimentam o controle AIMD de concorrência.
+        """
+        try:
+            raw = await asyncio.wait_for(
+                self.anthropic_client.messages.with_raw_response.create(**kwargs),
+                timeout=timeout
+            )
+        except RateLimitError as e:
+            self.scheduler.on_rate_limited(e.response.headers if e.response is not None else None)
+            raise
+        self.scheduler.on_success(raw.headers)
+        response = raw.parse()
+        if inspect.isawaitable(response):
+            response = await response
+        return response
     
-    def _build_error_contribution(
+    def _build_expert_error(
         self,
         expert: Expert,
         error_type: str,
         error_detail: str,
         attempted_action: str = "obter análise",
         fallback_action: str = "tente novamente em alguns minutos"
-    ) -> ExpertContribution:
+    ) -> ExpertAnalysisError:
         """
-        Constrói uma contribuição padronizada de erro/recuperação seguindo o padrão:
+        Constrói o erro padronizado de recuperação seguindo o padrão:
         "Não consegui X por Y; tentei Z; proponho W"
         
+        O erro é levantado (não vira contribuição): o expert entra em
+        skippedExperts como "failed" e não conta para o quórum nem para o consenso.
+        
         Args:
             expert: O expert que falhou
             error_type: Tipo do erro (timeout, api_error, parse_error, etc)
@@ -221,13 +491,7 @@ class CouncilOrchestrator:
         
         full_message = f"{base_message} {attempted} {proposal}"
         
-        return ExpertContribution(
-            expertId=expert.id,
-            expertName=expert.name,
-            analysis=full_message,
-            keyInsights=[f"Análise não disponível: {error_type}"],
-            recommendations=[fallback_action]
-        )
+        return ExpertAnalysisError(full_message)
 
     async def _get_expert_analysis(
         self,
@@ -236,11 +500,14 @@ class CouncilOrchestrator:
         research_findings: Optional[str],
         profile: Optional[dict],
         persona: Optional[Persona] = None,
-        user_id: Optional[str] = None
+        user_id: Optional[str] = None,
+        cache_stats: Optional[Dict[str, Any]] = None,
+        budget_reports: Optional[List[Dict[str, Any]]] = None
     ) -> ExpertContribution:
         """
         Get analysis from a single expert using their cognitive clone.
-        Uses semaphore to limit concurrent API calls and prevent rate limiting.
+        API calls go through the shared upstream scheduler (rate and concurrency limits).
+        Successful contributions are served from / stored in the ContributionCache.
         
         Args:
             expert: Expert to analyze
@@ -248,27 +515,25 @@ class CouncilOrchestrator:
             research_findings: Optional market research
             profile: Optional business profile
             user_id: Optional user ID for session preferences
+            cache_stats: Optional dict updated with cache hits/misses for this analysis
+            budget_reports: Optional list receiving the token budget report of the prompt
         
         Returns:
             ExpertContribution with expert's unique perspective
         """
-        async with self.semaphore:
-            # Add delay before each API call to avoid rate limits
-            await asyncio.sleep(self.call_delay)
-            
-            # Extrair preferências implícitas da mensagem se user_id disponível
-            if user_id:
-                detected_prefs = self._extract_preferences_from_message(problem)
-                if detected_prefs:
-                    self._update_user_preferences(user_id, detected_prefs)
+        # Extrair preferências implícitas da mensagem se user_id disponível
+        if user_id:
+            detected_prefs = self._extract_preferences_from_message(problem)
+            if detected_prefs:
+                self._update_user_preferences(user_id, detected_prefs)
+        
+        try:
+            # Build context-rich prompt (sections are trimmed to the stage token budget below)
+            context_sections: List[ContextSection] = []
             
-            try:
-                # Build context-rich prompt
-                context_parts = []
-                
-                # Add persona context if available (CRÍTICO para personalização)
-                if persona:
-                    persona_context = f"""**CLIENTE IDEAL - PERSONA:**
+            # Add persona context if available (CRÍTICO para personalização)
+            if persona:
+                persona_context = f"""**CLIENTE IDEAL - PERSONA:**
 - Nome: {persona.name}
 - Demográficos: {json.dumps(persona.demographics, ensure_ascii=False, indent=2) if isinstance(persona.demographics, dict) else persona.demographics}
 - Objetivos: {', '.join(persona.goals[:5]) if persona.goals else 'Não especificados'}
@@ -282,35 +547,33 @@ Ajuste linguagem, canais, estratégias e táticas para ressoar com esta persona
 Considere os pain points e objetivos desta persona em cada recomendação.
 
 """
-                    context_parts.append(persona_context)
-                
-                # Add business context if available
-                if profile:
-                    context_parts.append(
-                        f"**Business Context:**\n"
-                        f"- Company: {profile.companyName} ({profile.companySize} employees)\n"
-                        f"- Industry: {profile.industry}\n"
-                        f"- Target Audience: {profile.targetAudience}\n"
-                        f"- Products: {profile.mainProducts}\n"
-                        f"- Channels: {', '.join(profile.channels)}\n"
-                        f"- Budget: {profile.budgetRange}\n"
-                        f"- Primary Goal: {profile.primaryGoal}\n"
-                        f"- Main Challenge: {profile.mainChallenge}\n"
-                        f"- Timeline: {profile.timeline}\n"
-                    )
-                
-                # Add market research if available
-                if research_findings:
-                    context_parts.append(
-                        f"**Market Research & Intelligence:**\n{research_findings}\n"
-                    )
-                
-                # Build final user message
-                context = "\n\n".join(context_parts) if context_parts else ""
-                
-                user_message = f"""{context}
-
-**Problema/Questão:**
+                context_sections.append(ContextSection("persona", persona_context, priority=2))
+            
+            # Add business context if available
+            if profile:
+                context_sections.append(ContextSection(
+                    "profile",
+                    f"**Business Context:**\n"
+                    f"- Company: {profile.companyName} ({profile.companySize} employees)\n"
+                    f"- Industry: {profile.industry}\n"
+                    f"- Target Audience: {profile.targetAudience}\n"
+                    f"- Products: {profile.mainProducts}\n"
+                    f"- Channels: {', '.join(profile.channels)}\n"
+                    f"- Budget: {profile.budgetRange}\n"
+                    f"- Primary Goal: {profile.primaryGoal}\n"
+                    f"- Main Challenge: {profile.mainChallenge}\n"
+                    f"- Timeline: {profile.timeline}\n",
+                    priority=2
+                ))
+            
+            # Add market research if available (lowest priority: first to be compressed)
+            if research_findings:
+                context_sections.append(ContextSection(
+                    "research",
+                    f"**Market Research & Intelligence:**\n{research_findings}\n"
+                ))
+            
+            task_message = f"""**Problema/Questão:**
 {problem}
 
 **Sua Tarefa:**
@@ -343,42 +606,94 @@ Como {expert.name}, forneça sua análise especializada para este problema. Estr
 - Seja autêntico ao seu estilo cognitivo e use seus frameworks característicos
 - Responda SEMPRE em português do Brasil (pt-BR)
 - Seja específico, não genérico"""
-                
-                # Call Claude with expert's system prompt (with timeout)
-                retry_count = 0
-                max_retries = 3
-                backoff_factor = 1.5
-                response = None
-                
-                try:
-                    # Augment system prompt with safety/structure if missing
-                    system_prompt = self._augment_system_prompt(expert.systemPrompt, expert.name, user_id=user_id)
+            
+            # Build final user message within the expert_analysis token budget
+            plan = TokenBudgetPlanner("expert_analysis").plan(
+                context_sections + [ContextSection("task", task_message, required=True)]
+            )
+            if budget_reports is not None:
+                budget_reports.append(plan.report)
+            context = plan.join([section.name for section in context_sections])
+            
+            user_message = f"""{context}
 
-                    while retry_count <= max_retries:
-                        try:
-                            response = await asyncio.wait_for(
-                                self.anthropic_client.messages.create(
-                                    model="claude-3-haiku-20240307",
-                                    max_tokens=3000,
-                                    system=system_prompt,
-                                    messages=[{
-                                        "role": "user",
-                                        "content": user_message
-                                    }]
-                                ),
-                                timeout=60.0  # 60 second timeout per expert
-                            )
-                            break  # Success, exit retry loop
-                        except Exception as retry_error:
-                            retry_count += 1
-                            if retry_count > max_retries:
-                                print(f"[CouncilOrchestrator] Max retries ({max_retries}) reached for {expert.name}. Giving up.")
-                                raise  # Re-raise the last exception
-                            
-                            wait_time = backoff_factor ** retry_count
-                            print(f"[CouncilOrchestrator] Retry {retry_count}/{max_retries} for {expert.name} after error: {str(retry_error)}. Waiting {wait_time:.1f}s")
-                            await asyncio.sleep(wait_time)
+{task_message}"""
+            
+            # Call Claude with expert's system prompt (with timeout)
+            retry_count = 0
+            max_retries = 3
+            backoff_factor = 1.5
+            response = None
+            
+            try:
+                # Augment system prompt with safety/structure if missing
+                stable_prefix, dynamic_suffix = self._augment_system_prompt(expert.systemPrompt, expert.name, user_id=user_id)
+                system_prompt = build_system_blocks(stable_prefix, dynamic_suffix)
+
+                # Consultar o cache antes de chamar o upstream
+                cache_key = None
+                if self.contribution_cache:
+                    cache_key = build_contribution_key(
+                        expert_id=expert.id,
+                        prompt_version=prompt_version_hash(
+                            EXPERT_PROMPT_TEMPLATE_VERSION, EXPERT_ANALYSIS_MODEL, stable_prefix, dynamic_suffix
+                        ),
+                        problem=problem,
+                        persona=persona,
+                        profile=profile,
+                        research_findings=research_findings
+                    )
+                    cached = await self.contribution_cache.get(cache_key)
+                    if cache_stats is not None:
+                        cache_stats["hits" if cached else "misses"] += 1
+                        if cached:
+                            cache_stats["hitExperts"].append(expert.id)
+                    if cached:
+                        print(f"[CouncilOrchestrator] ♻️ Contribuição de {expert.name} servida do cache")
+                        return cached
+
+                # Modo estruturado: ferramenta forçada + validação por TypeAdapter (com reparo local).
+                # Só se nem o reparo passar no schema repete uma única vez em modo texto (sem contar como retry).
+                structured = self.structured_output
+                output = None
+                while retry_count <= max_retries:
+                    try:
+                        response = await self._create_message(
+                            stage="expert_analysis",
+                            timeout=60.0,  # 60 second timeout per expert
+                            model=EXPERT_ANALYSIS_MODEL,
+                            max_tokens=3000,
+                            system=system_prompt,
+                            messages=[{
+                                "role": "user",
+                                "content": user_message + (_EXPERT_TOOL_INSTRUCTION if structured else "")
+                            }],
+                            **(EXPERT_ANALYSIS_TOOL.request_kwargs() if structured else {})
+                        )
+                    except Exception as retry_error:
+                        retry_count += 1
+                        if retry_count > max_retries:
+                            print(f"[CouncilOrchestrator] Max retries ({max_retries}) reached for {expert.name}. Giving up.")
+                            raise  # Re-raise the last exception
+                        
+                        wait_time = backoff_factor ** retry_count
+                        print(f"[CouncilOrchestrator] Retry {retry_count}/{max_retries} for {expert.name} after error: {str(retry_error)}. Waiting {wait_time:.1f}s")
+                        await asyncio.sleep(wait_time)
+                        continue
                     
+                    if structured:
+                        output = EXPERT_ANALYSIS_TOOL.parse(response)
+                        if output is None:
+                            print(f"[CouncilOrchestrator] Saída estruturada inválida para {expert.name}. Repetindo em modo texto.")
+                            structured = False
+                            continue
+                    break  # Success, exit retry loop
+                
+                if output is not None:
+                    response_text = output.to_markdown()
+                    insights = output.keyInsights
+                    recommendations = output.recommendations
+                else:
                     # Extract text response (handle TextBlock type)
                     response_text = ""
                     for block in response.content:
@@ -386,227 +701,103 @@ Como {expert.name}, forneça sua análise especializada para este problema. Estr
                             response_text = block.text  # type: ignore
                             break
                     
-                    # Parse structured response with robust parser
-                    insights = self._extract_bullet_points(response_text, "Principais Insights")
-                    recommendations = self._extract_bullet_points(response_text, "Recomendações Acionáveis")
-                    
-                    return ExpertContribution(
-                        expertId=expert.id,
-                        expertName=expert.name,
-                        analysis=response_text,
-                        keyInsights=insights,
-                        recommendations=recommendations
-                    )
-                except asyncio.TimeoutError:
-                    print(f"[CouncilOrchestrator] {expert.name} analysis timed out after 60 seconds")
-                    return self._build_error_contribution(
-                        expert=expert,
-                        error_type="timeout",
-                        error_detail="60 segundos",
-                        attempted_action="obter análise",
-                        fallback_action="tente novamente em alguns minutos ou reduza o número de experts"
-                    )
-                except Exception as e:
-                    error_str = str(e)
-                    # Identificar tipo de erro baseado na mensagem
-                    error_type = "unknown"
-                    if "timeout" in error_str.lower():
-                        error_type = "timeout"
-                    elif "rate" in error_str.lower() or "limit" in error_str.lower():
-                        error_type = "rate_limit"
-                    elif "network" in error_str.lower() or "connection" in error_str.lower():
-                        error_type = "network_error"
-                    elif "api" in error_str.lower() or "anthropic" in error_str.lower():
-                        error_type = "api_error"
-                    
-                    print(f"[CouncilOrchestrator] {expert.name} analysis failed: {error_str}")
-                    return self._build_error_contribution(
-                        expert=expert,
-                        error_type=error_type,
-                        error_detail=error_str[:200],  # Limitar tamanho
-                        attempted_action="obter análise",
-                        fallback_action="tente novamente em alguns minutos"
-                    )
+                    # Parse structured response (all sections in one pass)
+                    sections = parse_expert_response(response_text)
+                    insights = sections["Principais Insights"]
+                    recommendations = sections["Recomendações Acionáveis"]
+                
+                contribution = ExpertContribution(
+                    expertId=expert.id,
+                    expertName=expert.name,
+                    analysis=response_text,
+                    keyInsights=insights,
+                    recommendations=recommendations
+                )
+                # Só contribuições completas vão para o cache: uma seção que o parser de texto
+                # não achou seria servida quebrada, sem nova chamada, até o TTL vencer
+                complete = output is not None or not (is_placeholder(insights) or is_placeholder(recommendations))
+                if cache_key and response_text and complete:
+                    await self.contribution_cache.set(cache_key, contribution)
+                return contribution
+            except asyncio.TimeoutError:
+                print(f"[CouncilOrchestrator] {expert.name} analysis timed out after 60 seconds")
+                raise self._build_expert_error(
+                    expert=expert,
+                    error_type="timeout",
+                    error_detail="60 segundos",
+                    attempted_action="obter análise",
+                    fallback_action="tente novamente em alguns minutos ou reduza o número de experts"
+                )
             except Exception as e:
-                print(f"[CouncilOrchestrator] Unexpected error in _get_expert_analysis: {str(e)}")
-                raise
+                error_str = str(e)
+                # Identificar tipo de erro baseado na mensagem
+                error_type = "unknown"
+                if "timeout" in error_str.lower():
+                    error_type = "timeout"
+                elif "rate" in error_str.lower() or "limit" in error_str.lower():
+                    error_type = "rate_limit"
+                elif "network" in error_str.lower() or "connection" in error_str.lower():
+                    error_type = "network_error"
+                elif "api" in error_str.lower() or "anthropic" in error_str.lower():
+                    error_type = "api_error"
+                
+                print(f"[CouncilOrchestrator] {expert.name} analysis failed: {error_str}")
+                raise self._build_expert_error(
+                    expert=expert,
+                    error_type=error_type,
+                    error_detail=error_str[:200],  # Limitar tamanho
+                    attempted_action="obter análise",
+                    fallback_action="tente novamente em alguns minutos"
+                )
+        except ExpertAnalysisError:
+            raise
+        except Exception as e:
+            print(f"[CouncilOrchestrator] Unexpected error in _get_expert_analysis: {str(e)}")
+            raise
 
     def _extract_bullet_points(self, text: str, section_title: str) -> List[str]:
         """
         Extracts bullet points from a specific section of the AI's response.
-        Improved version with better pattern matching.
+        Delegates to section_parser (precompiled patterns, same output as the old extractor).
         """
-        try:
-            # Normalize text - remove extra whitespace
-            text = re.sub(r'\n{3,}', '\n\n', text)
-            
-            # Define the known sections in order
-            section_titles_map = {
-                "Análise Principal": ["Análise Principal", "Core Analysis", "## Análise Principal"],
-                "Principais Insights": ["Principais Insights", "Key Insights", "## Principais Insights"],
-                "Recomendações Acionáveis": ["Recomendações Acionáveis", "Actionable Recommendations", "## Recomendações Acionáveis"],
-            }
-            section_titles = list(section_titles_map.keys())
-            
-            # Get all possible title variations for the target section
-            target_variations = section_titles_map.get(section_title, [section_title])
-            target_variations.extend([f"## {st}" for st in target_variations])
-            target_variations.extend([f"**{st}**" for st in target_variations])
-            target_variations.extend([f"### {st}" for st in target_variations])
-            
-            # Find the starting position - try multiple patterns
-            start_index = None
-            for variation in target_variations:
-                # Try markdown header pattern (## or ###)
-                pattern1 = re.compile(rf'##+\s*{re.escape(variation.replace("## ", "").replace("### ", ""))}\s*:?\s*\n', re.IGNORECASE)
-                match = pattern1.search(text)
-                if match:
-                    start_index = match.end()
-                    break
-                
-                # Try numbered or bold pattern
-                pattern2 = re.compile(rf'(?:^\d+\.\s*)?(\*\*)?{re.escape(variation.replace("## ", "").replace("### ", "").replace("**", ""))}(\*\*)?:?\s*\n', re.IGNORECASE | re.MULTILINE)
-                match = pattern2.search(text)
-                if match:
-                    start_index = match.end()
-                    break
-            
-            if start_index is None:
-                print(f"[CouncilOrchestrator] Seção '{section_title}' não encontrada. Tentando busca mais ampla...")
-                # Fallback: busca mais ampla
-                for variation in target_variations:
-                    clean_variation = variation.replace("## ", "").replace("### ", "").replace("**", "")
-                    if clean_variation.lower() in text.lower():
-                        # Find position after this title
-                        idx = text.lower().find(clean_variation.lower())
-                        if idx != -1:
-                            start_index = idx + len(clean_variation)
-                            # Move past any colon, newline, etc.
-                            while start_index < len(text) and text[start_index] in [':', '\n', ' ', '*']:
-                                start_index += 1
-                            break
-                
-                if start_index is None:
-                    return [f"Seção '{section_title}' não foi encontrada na resposta do especialista."]
-
-            # Determine the end boundary by finding the start of the NEXT section
-            end_index = len(text)
-            
-            current_title_index = -1
-            for i, title in enumerate(section_titles):
-                if title == section_title:
-                    current_title_index = i
-                    break
-
-            if current_title_index != -1 and current_title_index < len(section_titles) - 1:
-                next_section_title = section_titles[current_title_index + 1]
-                next_variations = section_titles_map.get(next_section_title, [next_section_title])
-                next_variations.extend([f"## {st}" for st in next_variations])
-                next_variations.extend([f"### {st}" for st in next_variations])
-                
-                for variation in next_variations:
-                    pattern = re.compile(rf'##+\s*{re.escape(variation.replace("## ", "").replace("### ", ""))}\s*:?\s*\n', re.IGNORECASE)
-                    match = pattern.search(text, start_index)
-                    if match:
-                        end_index = match.start()
-                        break
-            
-            # Extract the content of the relevant section
-            section_text = text[start_index:end_index].strip()
-
-            # Extract bullet points - try multiple patterns
-            bullets = []
-            
-            # Pattern 1: Standard bullet points (-, •, *)
-            pattern1 = re.compile(r'^\s*[-•*]\s+(.+)$', re.MULTILINE)
-            bullets.extend(pattern1.findall(section_text))
-            
-            # Pattern 2: Numbered list (1., 2., etc.)
-            pattern2 = re.compile(r'^\s*\d+\.\s+(.+)$', re.MULTILINE)
-            bullets.extend(pattern2.findall(section_text))
-            
-            # Pattern 3: Lines starting with whitespace (indented)
-            lines = section_text.split('\n')
-            for line in lines:
-                stripped = line.strip()
-                # Skip empty, headers, or very short lines
-                if stripped and len(stripped) > 10 and not stripped.startswith('#'):
-                    # If it looks like a bullet point but wasn't captured
-                    if stripped.startswith('-') or stripped.startswith('•') or stripped.startswith('*'):
-                        # Extract content after bullet
-                        content = re.sub(r'^[-•*]\s*', '', stripped)
-                        if content and content not in bullets:
-                            bullets.append(content)
-                    elif re.match(r'^\d+\.', stripped):
-                        # Extract content after number
-                        content = re.sub(r'^\d+\.\s*', '', stripped)
-                        if content and content not in bullets:
-                            bullets.append(content)
-            
-            # Clean bullets
-            cleaned_bullets = []
-            seen = set()
-            for b in bullets:
-                # Remove markdown formatting
-                clean = re.sub(r'\*\*|__', '', b.strip())
-                # Remove leading/trailing punctuation issues
-                clean = re.sub(r'^[-•*\s]+', '', clean)
-                clean = clean.strip()
-                
-                # Skip if too short, empty, or duplicate
-                if clean and len(clean) > 5 and clean.lower() not in seen:
-                    cleaned_bullets.append(clean)
-                    seen.add(clean.lower())
-
-            # Fallback: if no bullets found, try splitting by double newlines or numbered items
-            if not cleaned_bullets:
-                # Try to find paragraphs or numbered sections
-                paragraphs = [p.strip() for p in section_text.split('\n\n') if p.strip() and len(p.strip()) > 20]
-                if paragraphs:
-                    cleaned_bullets = paragraphs[:5]  # Limit to 5
-                else:
-                    # Last resort: split by single newlines
-                    lines = [l.strip() for l in section_text.split('\n') if l.strip() and len(l.strip()) > 15 and not l.strip().startswith('#')]
-                    if lines:
-                        cleaned_bullets = lines[:5]
-
-            if not cleaned_bullets:
-                return [f"Não foi possível extrair os pontos principais da seção '{section_title}'. A seção pode estar vazia ou em formato inesperado."]
-                
-            return cleaned_bullets
-        except Exception as e:
-            print(f"[CouncilOrchestrator] Erro ao extrair pontos da seção '{section_title}': {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return [f"Erro ao processar a resposta do especialista: {str(e)[:100]}"]
+        return extract_section_bullets(text, section_title)
 
     async def _synthesize_consensus(
         self,
         problem: str,
         contributions: List[ExpertContribution],
         research_findings: Optional[str] = None,
-        persona: Optional[Persona] = None
+        persona: Optional[Persona] = None,
+        partial_consensus: Optional[Dict[str, Any]] = None,
+        budget_reports: Optional[List[Dict[str, Any]]] = None
     ) -> str:
         """
-        Synthesize a consensus view from all expert contributions
+        Synthesize a consensus view from all expert contributions.
+        
+        partial_consensus is the reduced view from ConsensusAccumulator (themes shared
+        by several experts); when present it is given to the model as a starting point.
+        The prompt is fitted to the "consensus" token budget (budget_reports receives the report).
         """
         try:
-            # Build context for synthesis
-            expert_insights = []
-            expert_recommendations = []
+            # Build context for synthesis: one budget section per expert and list,
+            # so a long contribution cannot crowd out the others
+            insight_sections: List[ContextSection] = []
+            recommendation_sections: List[ContextSection] = []
             
-            for contrib in contributions:
+            for i, contrib in enumerate(contributions):
                 # Add each expert's insights
-                expert_insights.append(f"**{contrib.expertName}**:")
-                for insight in contrib.keyInsights:
-                    expert_insights.append(f"- {insight}")
-                expert_insights.append("")  # blank line
+                insight_sections.append(ContextSection(
+                    f"insights:{i}",
+                    "\n".join([f"**{contrib.expertName}**:"] + [f"- {insight}" for insight in contrib.keyInsights]),
+                    priority=2
+                ))
                 
                 # Add each expert's recommendations
-                expert_recommendations.append(f"**{contrib.expertName}**:")
-                for rec in contrib.recommendations:
-                    expert_recommendations.append(f"- {rec}")
-                expert_recommendations.append("")  # blank line
+                recommendation_sections.append(ContextSection(
+                    f"recommendations:{i}",
+                    "\n".join([f"**{contrib.expertName}**:"] + [f"- {rec}" for rec in contrib.recommendations]),
+                    priority=2
+                ))
             
             # Build synthesis prompt
             system_prompt = """Você é um estrategista de marketing habilidoso que sintetiza insights de múltiplos especialistas.
@@ -629,16 +820,18 @@ Recomendações devem ser práticas e acionáveis para ressoar com esta persona.
 
 """
             
-            user_message = f"""{persona_context}**Problema de Marketing/Questão:**
-{problem}
-
-**Insights dos Especialistas:**
-{chr(10).join(expert_insights)}
-
-**Recomendações dos Especialistas:**
-{chr(10).join(expert_recommendations)}
-
-**Sua Tarefa:**
+            # Temas convergentes já reduzidos durante o pipeline (map-reduce)
+            convergence_context = ""
+            if partial_consensus:
+                shared = [
+                    f"- {t['text']} ({', '.join(t['experts'])})"
+                    for t in partial_consensus.get("sharedInsights", []) + partial_consensus.get("sharedRecommendations", [])
+                    if t.get("support", 0) > 1
+                ]
+                if shared:
+                    convergence_context = "**Temas Convergentes (citados por mais de um especialista):**\n" + "\n".join(shared) + "\n\n"
+            
+            task_message = f"""**Sua Tarefa:**
 Sintetize essas perspectivas de especialistas em uma visão de consenso coesa e bem estruturada. O resultado deve ser um relatório de texto completo.
 
 O relatório deve incluir:
@@ -654,22 +847,67 @@ O relatório deve incluir:
 - Escreva toda a resposta em português do Brasil (pt-BR).
 - Use formatação Markdown (negrito, listas) para clareza.
 - Seja prático, específico e acionável.
-- O resultado deve ser um relatório de texto contínuo, não um objeto JSON.
 - A pergunta final deve ser natural e ajudar o usuário a pensar no próximo passo ou aprofundar o entendimento."""
 
+            # Fit persona, convergent themes and contributions into the consensus token budget
+            plan = TokenBudgetPlanner("consensus").plan(
+                [
+                    ContextSection("persona", persona_context),
+                    ContextSection("problem", problem, required=True),
+                    ContextSection("convergence", convergence_context, priority=3),
+                ]
+                + insight_sections
+                + recommendation_sections
+                + [ContextSection("task", task_message, required=True)]
+            )
+            if budget_reports is not None:
+                budget_reports.append(plan.report)
+            expert_insights = plan.join([section.name for section in insight_sections])
+            expert_recommendations = plan.join([section.name for section in recommendation_sections])
+            persona_context = plan.text("persona")
+            convergence_context = plan.text("convergence")
+            
+            user_message = f"""{persona_context}**Problema de Marketing/Questão:**
+{problem}
+
+{convergence_context}**Insights dos Especialistas:**
+{expert_insights}
+
+**Recomendações dos Especialistas:**
+{expert_recommendations}
+
+{task_message}"""
+
             # Call Claude for synthesis
             try:
-                response = await asyncio.wait_for(
-                    self.anthropic_client.messages.create(
+                if self.structured_output:
+                    response = await self._create_message(
+                        stage="consensus",
+                        timeout=60.0,
                         model="claude-3-haiku-20240307",
                         max_tokens=4000,
                         system=system_prompt,
                         messages=[{
                             "role": "user",
-                            "content": user_message
-                        }]
-                    ),
-                    timeout=60.0
+                            "content": user_message + _CONSENSUS_TOOL_INSTRUCTION
+                        }],
+                        **CONSENSUS_TOOL.request_kwargs()
+                    )
+                    report = CONSENSUS_TOOL.parse(response)
+                    if report is not None:
+                        return report.to_markdown()
+                    print("[CouncilOrchestrator] Consenso fora do schema. Repetindo em modo texto.")
+                
+                response = await self._create_message(
+                    stage="consensus",
+                    timeout=60.0,
+                    model="claude-3-haiku-20240307",
+                    max_tokens=4000,
+                    system=system_prompt,
+                    messages=[{
+                        "role": "user",
+                        "content": user_message + _CONSENSUS_TEXT_INSTRUCTION
+                    }]
                 )
                 
                 # Extract text response
@@ -820,17 +1058,43 @@ Crie um PLANO DE AÇÃO COMPLETO e ESTRUTURADO em formato JSON seguindo EXATAMEN
 **IMPORTANTE:** Retorne APENAS JSON válido. Não use ```json ou qualquer markdown.
 """
             
-            response = await asyncio.wait_for(
-                self.anthropic_client.messages.create(
+            if self.structured_output:
+                response = await self._create_message(
+                    stage="action_plan",
+                    timeout=90.0,  # 90 segundos para gerar plano completo
                     model="claude-sonnet-4-20250514",
                     max_tokens=4096,
-                    system="Você é um consultor estratégico especializado em criar planos de ação executáveis. Retorne sempre JSON válido, sem markdown.",
+                    system="Você é um consultor estratégico especializado em criar planos de ação executáveis.",
                     messages=[{
                         "role": "user",
-                        "content": prompt
-                    }]
-                ),
-                timeout=90.0  # 90 segundos para gerar plano completo
+                        "content": prompt + _ACTION_PLAN_TOOL_INSTRUCTION
+                    }],
+                    **ACTION_PLAN_TOOL.request_kwargs()
+                )
+                action_plan = ACTION_PLAN_TOOL.parse(response)
+                if action_plan is None:
+                    # Fora do schema estrito: tentar a conversão tolerante (com defaults) do mesmo input
+                    plan_dict = tool_input(response, ACTION_PLAN_TOOL.name) or json_from_text(response)
+                    if plan_dict:
+                        try:
+                            action_plan = self._action_plan_from_dict(plan_dict)
+                        except Exception as e:
+                            print(f"[CouncilOrchestrator] Plano estruturado inválido: {e}")
+                if action_plan is not None:
+                    print(f"[CouncilOrchestrator] ✓ Plano de ação gerado: {len(action_plan.phases)} fases, {sum(len(p.actions) for p in action_plan.phases)} ações")
+                    return action_plan
+                print("[CouncilOrchestrator] Plano de ação fora do schema. Repetindo em modo texto.")
+            
+            response = await self._create_message(
+                stage="action_plan",
+                timeout=90.0,  # 90 segundos para gerar plano completo
+                model="claude-sonnet-4-20250514",
+                max_tokens=4096,
+                system="Você é um consultor estratégico especializado em criar planos de ação executáveis. Retorne sempre JSON válido, sem markdown.",
+                messages=[{
+                    "role": "user",
+                    "content": prompt
+                }]
             )
             
             # Extract text from response
@@ -848,43 +1112,9 @@ Crie um PLANO DE AÇÃO COMPLETO e ESTRUTURADO em formato JSON seguindo EXATAMEN
             
             try:
                 plan_dict = json.loads(text)
+                action_plan = self._action_plan_from_dict(plan_dict)
                 
-                # Validate and convert to ActionPlan model
-                phases = []
-                for phase_data in plan_dict.get("phases", []):
-                    actions = []
-                    for action_data in phase_data.get("actions", []):
-                        action = Action(
-                            id=action_data.get("id", f"action-{phase_data.get('phaseNumber', 0)}-{len(actions) + 1}"),
-                            title=action_data.get("title", "Ação sem título"),
-                            description=action_data.get("description", ""),
-                            responsible=action_data.get("responsible", "Equipe"),
-                            priority=action_data.get("priority", "média"),
-                            estimatedTime=action_data.get("estimatedTime", "Não especificado"),
-                            tools=action_data.get("tools", []),
-                            steps=action_data.get("steps", [])
-                        )
-                        actions.append(action)
-                    
-                    phase = Phase(
-                        phaseNumber=phase_data.get("phaseNumber", 0),
-                        name=phase_data.get("name", "Fase sem nome"),
-                        duration=phase_data.get("duration", "Não especificado"),
-                        objectives=phase_data.get("objectives", []),
-                        actions=actions,
-                        dependencies=phase_data.get("dependencies", []),
-                        deliverables=phase_data.get("deliverables", [])
-                    )
-                    phases.append(phase)
-                
-                action_plan = ActionPlan(
-                    phases=phases,
-                    totalDuration=plan_dict.get("totalDuration", "Não especificado"),
-                    estimatedBudget=plan_dict.get("estimatedBudget"),
-                    successMetrics=plan_dict.get("successMetrics", [])
-                )
-                
-                print(f"[CouncilOrchestrator] ✓ Plano de ação gerado: {len(phases)} fases, {sum(len(p.actions) for p in phases)} ações")
+                print(f"[CouncilOrchestrator] ✓ Plano de ação gerado: {len(action_plan.phases)} fases, {sum(len(p.actions) for p in action_plan.phases)} ações")
                 return action_plan
                 
             except json.JSONDecodeError as e:
@@ -897,6 +1127,42 @@ Crie um PLANO DE AÇÃO COMPLETO e ESTRUTURADO em formato JSON seguindo EXATAMEN
             import traceback
             traceback.print_exc()
             return None
+    
+    def _action_plan_from_dict(self, plan_dict: Dict[str, Any]) -> ActionPlan:
+        """Converte o JSON do plano em ActionPlan, preenchendo campos ausentes com defaults."""
+        phases = []
+        for phase_data in plan_dict.get("phases", []):
+            actions = []
+            for action_data in phase_data.get("actions", []):
+                action = Action(
+                    id=action_data.get("id", f"action-{phase_data.get('phaseNumber', 0)}-{len(actions) + 1}"),
+                    title=action_data.get("title", "Ação sem título"),
+                    description=action_data.get("description", ""),
+                    responsible=action_data.get("responsible", "Equipe"),
+                    priority=action_data.get("priority", "média"),
+                    estimatedTime=action_data.get("estimatedTime", "Não especificado"),
+                    tools=action_data.get("tools", []),
+                    steps=action_data.get("steps", [])
+                )
+                actions.append(action)
+            
+            phase = Phase(
+                phaseNumber=phase_data.get("phaseNumber", 0),
+                name=phase_data.get("name", "Fase sem nome"),
+                duration=phase_data.get("duration", "Não especificado"),
+                objectives=phase_data.get("objectives", []),
+                actions=actions,
+                dependencies=phase_data.get("dependencies", []),
+                deliverables=phase_data.get("deliverables", [])
+            )
+            phases.append(phase)
+        
+        return ActionPlan(
+            phases=phases,
+            totalDuration=plan_dict.get("totalDuration", "Não especificado"),
+            estimatedBudget=plan_dict.get("estimatedBudget"),
+            successMetrics=plan_dict.get("successMetrics", [])
+        )
 
     def _get_user_preferences(self, user_id: str) -> Dict[str, Any]:
         """
@@ -972,15 +1238,20 @@ Crie um PLANO DE AÇÃO COMPLETO e ESTRUTURADO em formato JSON seguindo EXATAMEN
         
         return preferences
 
-    def _augment_system_prompt(self, system_prompt: str, expert_name: str, user_id: Optional[str] = None) -> str:
+    def _augment_system_prompt(self, system_prompt: str, expert_name: str, user_id: Optional[str] = None) -> Tuple[str, str]:
         """
         Garante PT-BR e adiciona protocolos operacionais ao prompt de sistema do especialista,
         sem sobrescrever o conteúdo original.
         Inclui Conversational Guidelines se CONVERSATION_MODE estiver ativado.
         Usa preferências da sessão do usuário se disponíveis.
+        
+        Returns:
+            (stable_prefix, dynamic_suffix): o prefixo (prompt da lenda + signature pattern +
+            protocolos) é cacheável; as preferências do usuário ficam no sufixo.
         """
         blocks: List[str] = []
-        base = system_prompt or ""
+        suffix_blocks: List[str] = []
+        base = DeepCloneEnhancer.build_stable_prefix(system_prompt or "", expert_name)
         blocks.append(base)
 
         normalized = base.lower()
@@ -1032,9 +1303,9 @@ Crie um PLANO DE AÇÃO COMPLETO e ESTRUTURADO em formato JSON seguindo EXATAMEN
                         pref_lines.append(f"- Tom preferido: {user_prefs['tone_preference']}")
                     
                     if pref_lines:
-                        blocks.append("\n\n## Preferências Detectadas do Usuário")
-                        blocks.append("\n".join(pref_lines))
-                        blocks.append("\nAdapte sua resposta considerando essas preferências quando possível.")
+                        suffix_blocks.append("## Preferências Detectadas do Usuário")
+                        suffix_blocks.append("\n".join(pref_lines))
+                        suffix_blocks.append("\nAdapte sua resposta considerando essas preferências quando possível.")
 
         # Hint de tom conciso e acionável
         blocks.append(
@@ -1042,7 +1313,7 @@ Crie um PLANO DE AÇÃO COMPLETO e ESTRUTURADO em formato JSON seguindo EXATAMEN
             f"{expert_name} sem linguagem abusiva."
         )
 
-        return "".join(blocks)
+        return "".join(blocks), "\n".join(suffix_blocks)
 
 # Create a singleton instance
 council_orchestrator = CouncilOrchestrator()
\ No newline at end of file
@@ -270,22 +270,19 @@ class DeepCloneEnhancer:
         return expert_contexts.get(person, f"Conversando com {person} - ajustando tom para contexto apropriado.")
     
     @staticmethod
-    def enhance_system_prompt(
-        base_prompt: str,
+    def build_dynamic_context(
         expert_name: str,
         current_time: Optional[datetime.datetime] = None,
         person_speaking: Optional[str] = None,
         conversation_history: Optional[List[Dict[str, str]]] = None
     ) -> str:
         """
-        Enriquece o system prompt base com contexto dinâmico
+        Monta a seção de contexto dinâmico da sessão (horário, pessoa, tópicos recentes).
+        Muda a cada chamada, por isso fica fora do prefixo cacheável.
         """
         if current_time is None:
             current_time = datetime.datetime.now()
         
-        enhanced_prompt = base_prompt
-        
-        # Adicionar seção de contexto dinâmico
         context_section = "\n\n## CONTEXTO DINÂMICO DA SESSÃO\n\n"
         
         # Contexto temporal
@@ -332,6 +329,26 @@ class DeepCloneEnhancer:
 - Mantenha consistência com tópicos anteriores da conversa
 - Seja autêntico à personalidade do especialista mesmo com contexto dinâmico
 """
+        return context_section
+    
+    @staticmethod
+    def enhance_system_prompt(
+        base_prompt: str,
+        expert_name: str,
+        current_time: Optional[datetime.datetime] = None,
+        person_speaking: Optional[str] = None,
+        conversation_history: Optional[List[Dict[str, str]]] = None
+    ) -> str:
+        """
+        Enriquece o system prompt base com contexto dinâmico
+        """
+        enhanced_prompt = base_prompt
+        context_section = DeepCloneEnhancer.build_dynamic_context(
+            expert_name,
+            current_time,
+            person_speaking,
+            conversation_history
+        )
         
         # Inserir antes das instruções finais
         if "INSTRUÇÕES FINAIS" in enhanced_prompt or "## Limitações" in enhanced_prompt:
@@ -346,6 +363,25 @@ class DeepCloneEnhancer:
         
         return enhanced_prompt
     
+    @staticmethod
+    def build_stable_prefix(base_system_prompt: str, expert_name: str) -> str:
+        """
+        Prefixo estável do system prompt: prompt da lenda + signature pattern.
+        Não depende de horário/usuário, então pode ser cacheado entre chamadas.
+        """
+        prefix = base_system_prompt
+        signature_pattern = DeepCloneEnhancer.get_signature_response_pattern(expert_name)
+        if signature_pattern and "SIGNATURE RESPONSE PATTERN" not in prefix:
+            # Inserir antes de Communication Style ou no final
+            if "## Communication Style" in prefix:
+                prefix = prefix.replace(
+                    "## Communication Style",
+                    signature_pattern + "\n\n## Communication Style"
+                )
+            else:
+                prefix += "\n\n" + signature_pattern
+        return prefix
+    
     @staticmethod
     def enrich_user_message(
         user_message: str,
@@ -573,20 +609,36 @@ class DeepCloneEnhancer:
         )
         
         # Adicionar signature pattern se não estiver no prompt
-        signature_pattern = DeepCloneEnhancer.get_signature_response_pattern(expert_name)
-        if signature_pattern and "SIGNATURE RESPONSE PATTERN" not in enhanced_prompt:
-            # Inserir antes de Communication Style ou no final
-            if "## Communication Style" in enhanced_prompt:
-                enhanced_prompt = enhanced_prompt.replace(
-                    "## Communication Style",
-                    signature_pattern + "\n\n## Communication Style"
-                )
-            else:
-                enhanced_prompt += "\n\n" + signature_pattern
+        enhanced_prompt = DeepCloneEnhancer.build_stable_prefix(enhanced_prompt, expert_name)
         
         # Enriquecer mensagem do usuário (apenas se necessário)
         enhanced_message = user_message
         # Não modificamos muito a mensagem para manter autenticidade
         
         return enhanced_prompt, enhanced_message
+    
+    @staticmethod
+    def split_with_deep_clone(
+        base_system_prompt: str,
+        expert_name: str,
+        user_message: str,
+        current_time: Optional[datetime.datetime] = None,
+        person_speaking: Optional[str] = None,
+        conversation_history: Optional[List[Dict[str, str]]] = None
+    ) -> Tuple[str, str, str]:
+        """
+        Versão cache-friendly de enhance_with_deep_clone: em vez de inserir o contexto
+        dinâmico no meio do prompt, separa prefixo estável e sufixo dinâmico.
+        
+        Returns:
+            Tuple[stable_prefix, dynamic_suffix, enhanced_user_message]
+        """
+        stable_prefix = DeepCloneEnhancer.build_stable_prefix(base_system_prompt, expert_name)
+        dynamic_suffix = DeepCloneEnhancer.build_dynamic_context(
+            expert_name,
+            current_time,
+            person_speaking,
+            conversation_history
+        )
+        return stable_prefix, dynamic_suffix, user_message
 
@@ -0,0 +1,191 @@
+"""
+Event Bus
+=========
+
+Pub/sub em processo para entregar atualizações por push (SSE) em vez de polling.
+
+Tópicos: ``task:<id>`` (status/progresso das background tasks) e
+``council:<conversationId>`` (mensagens novas do conselho). ``publish`` entrega
+aos assinantes deste processo e, com Postgres, faz ``NOTIFY`` no canal
+``app_events``: o cliente pode estar conectado a um worker diferente do que
+executa a task. Eventos maiores que o limite do NOTIFY viajam como
+``{"type": "resync"}`` e o endpoint relê o estado do storage.
+
+Cada assinatura tem uma fila limitada (``EVENT_BUS_QUEUE_SIZE``). Um cliente
+que não consome perde os eventos excedentes e recebe um ``resync`` no lugar.
+"""
+
+import asyncio
+import json
+import os
+import uuid
+from typing import Any, Dict, Optional, Set
+
+EVENTS_CHANNEL = "app_events"
+NOTIFY_MAX_BYTES = 7900  # Limite do payload do NOTIFY é 8000 bytes
+KEEPALIVE_SECONDS = 15.0
+KEEPALIVE = ": keepalive\n\n"
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no"  # Disable nginx buffering
+}
+
+
+def task_topic(task_id: str) -> str:
+    return f"task:{task_id}"
+
+
+def council_topic(conversation_id: str) -> str:
+    return f"council:{conversation_id}"
+
+
+def sse_event(event_type: str, data: dict) -> str:
+    return f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class Subscription:
+    """Fila de eventos de um tópico para um cliente; use como context manager para cancelar."""
+
+    def __init__(self, bus: "EventBus", topic: str, maxsize: int):
+        self.bus = bus
+        self.topic = topic
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self._overflowed = False
+
+    def deliver(self, event: Dict[str, Any]) -> None:
+        if self._overflowed:
+            return
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Descarta a partir daqui; depois de consumir a fila o cliente recebe um resync
+            self._overflowed = True
+            self.bus.dropped += 1
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Próximo evento; None se ``timeout`` passou sem eventos."""
+        if self._overflowed and self._queue.empty():
+            self._overflowed = False
+            return {"type": "resync"}
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self.bus._unsubscribe(self)
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class EventBus:
+    """Assinantes por tópico neste processo + NOTIFY/LISTEN entre workers (no-op sem Postgres)."""
+
+    def __init__(self, storage: Any, queue_size: Optional[int] = None):
+        self.storage = storage
+        self.queue_size = queue_size or int(os.getenv("EVENT_BUS_QUEUE_SIZE", "256"))
+        self.worker_id = uuid.uuid4().hex
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._listener = None
+
+        self.published = 0
+        self.delivered = 0
+        self.remote_received = 0
+        self.dropped = 0
+        self.oversized = 0
+
+    @property
+    def synced(self) -> bool:
+        return self._listener is not None
+
+    def subscribe(self, topic: str) -> Subscription:
+        subscription = Subscription(self, topic, self.queue_size)
+        self._subscribers.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.topic)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[subscription.topic]
+
+    def _deliver_local(self, topic: str, event: Dict[str, Any]) -> None:
+        for subscription in list(self._subscribers.get(topic, ())):
+            subscription.deliver(event)
+            self.delivered += 1
+
+    async def publish(self, topic: str, event: Dict[str, Any]) -> None:
+        """Entrega aos assinantes locais e publica para os outros workers; nunca levanta."""
+        self.published += 1
+        self._deliver_local(topic, event)
+        if not hasattr(self.storage, "notify"):
+            return
+        payload = json.dumps({"o": self.worker_id, "t": topic, "e": event}, default=str)
+        if len(payload.encode("utf-8")) > NOTIFY_MAX_BYTES:
+            self.oversized += 1
+            payload = json.dumps({"o": self.worker_id, "t": topic, "e": {"type": "resync"}})
+        try:
+            await self.storage.notify(EVENTS_CHANNEL, payload)
+        except Exception as e:
+            print(f"[EventBus] Falha ao publicar NOTIFY (clientes em outros workers recebem no keepalive): {e}")
+
+    def _on_notify(self, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        if message.get("o") == self.worker_id:
+            return
+        self.remote_received += 1
+        self._deliver_local(message["t"], message["e"])
+
+    def _on_listener_lost(self, *args) -> None:
+        print("[EventBus] ⚠️ Conexão LISTEN perdida; assinantes recebem resync")
+        self._listener = None
+        for topic in list(self._subscribers):
+            self._deliver_local(topic, {"type": "resync"})
+
+    async def start_sync(self) -> None:
+        """LISTEN no canal de eventos (no-op sem Postgres)."""
+        if self._listener is not None or not hasattr(self.storage, "listen"):
+            return
+        try:
+            self._listener = await self.storage.listen(EVENTS_CHANNEL, self._on_notify)
+        except Exception as e:
+            print(f"[EventBus] LISTEN indisponível, só eventos deste worker: {e}")
+            self._listener = None
+            return
+        self._listener.add_termination_listener(self._on_listener_lost)
+        print(f"[EventBus] ✓ Eventos entre workers via LISTEN {EVENTS_CHANNEL}")
+
+    async def stop_sync(self) -> None:
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            await listener.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "synced": self.synced,
+            "topics": len(self._subscribers),
+            "subscribers": sum(len(subscribers) for subscribers in self._subscribers.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+            "remoteReceived": self.remote_received,
+            "dropped": self.dropped,
+            "oversized": self.oversized,
+        }
+
+
+def _build_default_bus() -> EventBus:
+    from python_backend.storage import storage
+    return EventBus(storage)
+
+
+event_bus = _build_default_bus()
@@ -0,0 +1,197 @@
+"""
+Hedged Requests
+===============
+
+Requisições "hedged" para cortar a cauda de latência das chamadas ao Claude.
+
+Se uma chamada ainda não respondeu quando atinge um percentil configurável da
+sua distribuição recente de latência (por etapa: análise do expert, consenso,
+plano de ação), disparamos uma cópia, ficamos com a primeira que terminar e
+cancelamos a outra.
+
+Para não dobrar o consumo da API, cada upstream tem um orçamento de hedge:
+cada chamada primária gera ``budget_percent``% de crédito e cada cópia gasta
+um crédito inteiro, então as cópias nunca passam de X% das chamadas.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class LatencyHistogram:
+    """Janela deslizante das últimas ``window`` latências (segundos) de uma etapa."""
+
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._total = 0
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self._total += 1
+
+    @property
+    def count(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, int(round(p / 100.0 * (len(ordered) - 1)))))
+        return ordered[index]
+
+    def stats(self) -> Dict[str, Any]:
+        def fmt(value: Optional[float]) -> Optional[float]:
+            return round(value, 3) if value is not None else None
+
+        return {
+            "samples": len(self._samples),
+            "total": self._total,
+            "p50": fmt(self.percentile(50)),
+            "p90": fmt(self.percentile(90)),
+            "p95": fmt(self.percentile(95)),
+            "p99": fmt(self.percentile(99)),
+        }
+
+
+class HedgeBudget:
+    """Orçamento de cópias: no máximo ``percent``% a mais de chamadas no upstream."""
+
+    def __init__(self, percent: float = 10.0, max_credit: float = 5.0):
+        self.ratio = max(0.0, percent) / 100.0
+        self.max_credit = max_credit
+        self._credit = 0.0
+        self.primary_calls = 0
+        self.hedged_calls = 0
+
+    def on_primary(self) -> None:
+        self.primary_calls += 1
+        self._credit = min(self.max_credit, self._credit + self.ratio)
+
+    def try_acquire(self) -> bool:
+        if self._credit >= 1.0:
+            self._credit -= 1.0
+            self.hedged_calls += 1
+            return True
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "budgetPercent": round(self.ratio * 100, 2),
+            "primaryCalls": self.primary_calls,
+            "hedgedCalls": self.hedged_calls,
+            "credit": round(self._credit, 3),
+        }
+
+
+class Hedger:
+    """
+    Executa chamadas com hedge opcional, mantendo histogramas por etapa.
+
+    Uso:
+        response = await anthropic_hedger.run("expert_analysis", lambda: call())
+
+    ``factory`` precisa criar uma chamada nova a cada invocação (a cópia é outra requisição).
+    Com um agendador de upstream, ``run`` deve ser chamado já dentro da vaga: assim
+    o histograma mede só o upstream e a fila não dispara cópias.
+    """
+
+    def __init__(
+        self,
+        upstream: str,
+        enabled: bool = False,
+        percentile: float = 95.0,
+        budget_percent: float = 10.0,
+        min_samples: int = 20,
+        window: int = 200,
+    ):
+        self.upstream = upstream
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.window = window
+        self.budget = HedgeBudget(percent=budget_percent)
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.hedge_wins = 0
+
+    def histogram(self, stage: str) -> LatencyHistogram:
+        if stage not in self.histograms:
+            self.histograms[stage] = LatencyHistogram(window=self.window)
+        return self.histograms[stage]
+
+    def hedge_delay(self, stage: str) -> Optional[float]:
+        """Tempo de espera antes de disparar a cópia (None = sem hedge)."""
+        if not self.enabled:
+            return None
+        histogram = self.histogram(stage)
+        if histogram.count < self.min_samples:
+            return None
+        return histogram.percentile(self.percentile)
+
+    async def _timed(self, stage: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        started = time.monotonic()
+        result = await factory()
+        self.histogram(stage).record(time.monotonic() - started)
+        return result
+
+    async def run(self, stage: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        self.budget.on_primary()
+        delay = self.hedge_delay(stage)
+        if delay is None:
+            return await self._timed(stage, factory)
+
+        primary = asyncio.ensure_future(self._timed(stage, factory))
+        attempts = [primary]
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=delay)
+            if not done and self.budget.try_acquire():
+                print(f"[Hedger:{self.upstream}] {stage} passou do p{self.percentile:g} ({delay:.2f}s), disparando cópia")
+                attempts.append(asyncio.ensure_future(self._timed(stage, factory)))
+
+            pending = set(attempts)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge_wins += 1
+                        return task.result()
+                if not pending:
+                    # Todas as tentativas falharam: propagar o erro da primária
+                    return primary.result()
+        finally:
+            losers = [task for task in attempts if not task.done()]
+            for task in losers:
+                task.cancel()
+            if losers:
+                await asyncio.gather(*losers, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "percentile": self.percentile,
+            "minSamples": self.min_samples,
+            "hedgeWins": self.hedge_wins,
+            "budget": self.budget.stats(),
+            "stages": {stage: h.stats() for stage, h in self.histograms.items()},
+        }
+
+
+# Hedger compartilhado para a API da Anthropic (desligado por padrão)
+anthropic_hedger = Hedger(
+    upstream="anthropic",
+    enabled=os.getenv("ANTHROPIC_HEDGING_ENABLED", "false").lower() in ("1", "true", "yes"),
+    percentile=_env_float("ANTHROPIC_HEDGE_PERCENTILE", 95.0),
+    budget_percent=_env_float("ANTHROPIC_HEDGE_BUDGET_PERCENT", 10.0),
+    min_samples=int(_env_float("ANTHROPIC_HEDGE_MIN_SAMPLES", 20)),
+)
@@ -0,0 +1,235 @@
+"""
+HTTP Clients
+============
+
+Registro único de clientes HTTP do backend.
+
+Antes, cada mensagem de chat criava um ``AsyncAnthropic`` novo e vários
+endpoints/pesquisas abriam um ``httpx.AsyncClient`` por requisição (ou por
+tentativa). Cada cliente novo tem um pool vazio: toda chamada pagava DNS +
+TCP + TLS de novo.
+
+O ``client_registry`` mantém:
+
+- ``anthropic()``: um ``AsyncAnthropic`` compartilhado (pool keep-alive próprio)
+- ``http()``: um ``httpx.AsyncClient`` compartilhado para as demais APIs
+  (Perplexity, etc.); timeouts específicos podem ser passados por requisição
+
+Os clientes são criados no startup da aplicação (ou no primeiro uso) e fechados
+no shutdown. Configuração por ambiente:
+
+- HTTP_POOL_MAX_CONNECTIONS (padrão 100)
+- HTTP_POOL_MAX_KEEPALIVE (padrão 20)
+- HTTP_POOL_KEEPALIVE_EXPIRY (segundos, padrão 30)
+- HTTP_CONNECT_TIMEOUT (segundos, padrão 10)
+- HTTP_TIMEOUT (segundos, padrão 60; cliente genérico)
+- ANTHROPIC_TIMEOUT (segundos, padrão 600)
+- HTTP2_ENABLED (padrão false; requer o pacote ``h2``)
+"""
+
+import importlib
+import os
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import httpx
+from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class PoolStats:
+    """Contadores de uso de um pool."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.status_classes: Dict[str, int] = {}
+
+    def snapshot(self, client: Any) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            "requests": self.requests,
+            "errors": self.errors,
+            "inFlight": self.in_flight,
+            "peakInFlight": self.peak_in_flight,
+            "statusClasses": dict(self.status_classes),
+        }
+        data.update(_pool_connections(client))
+        return data
+
+
+def _sdk_httpx_module():
+    """
+    Pacote httpx usado pelo SDK da Anthropic (``httpx`` ou ``httpx2``, conforme a
+    versão instalada). O SDK rejeita transportes/limites de outro pacote.
+    """
+    for cls in DefaultAsyncHttpxClient.__mro__[1:]:
+        package = cls.__module__.partition(".")[0]
+        if package != "anthropic":
+            return importlib.import_module(package)
+    return httpx
+
+
+@lru_cache(maxsize=None)
+def _counting_transport_class(httpx_module):
+    """Transporte padrão do pacote informado, registrando requisições em andamento e status."""
+
+    class CountingTransport(httpx_module.AsyncHTTPTransport):
+        def __init__(self, stats: PoolStats, **kwargs):
+            super().__init__(**kwargs)
+            self.stats = stats
+
+        async def handle_async_request(self, request):
+            stats = self.stats
+            stats.requests += 1
+            stats.in_flight += 1
+            stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+            try:
+                response = await super().handle_async_request(request)
+            except Exception:
+                stats.errors += 1
+                raise
+            finally:
+                stats.in_flight -= 1
+            status_class = f"{response.status_code // 100}xx"
+            stats.status_classes[status_class] = stats.status_classes.get(status_class, 0) + 1
+            return response
+
+    return CountingTransport
+
+
+def _pool_connections(client: Any) -> Dict[str, Any]:
+    """Estado atual das conexões do pool (httpcore), quando disponível."""
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    connections = getattr(pool, "connections", None)
+    if connections is None:
+        return {"connections": 0, "idleConnections": 0, "http2Connections": 0}
+    idle = sum(1 for c in connections if c.is_idle())
+    http2 = sum(1 for c in connections if "HTTP/2" in c.info())
+    return {"connections": len(connections), "idleConnections": idle, "http2Connections": http2}
+
+
+class ClientRegistry:
+    """Clientes HTTP compartilhados, com pools keep-alive e limites comuns."""
+
+    def __init__(self):
+        self._anthropic: Optional[AsyncAnthropic] = None
+        self._anthropic_http: Any = None
+        self._http: Optional[httpx.AsyncClient] = None
+        self.anthropic_stats = PoolStats("anthropic")
+        self.http_stats = PoolStats("http")
+        self.started_at: Optional[float] = None
+        self._load_config()
+
+    def _load_config(self) -> None:
+        self.max_connections = _env_int("HTTP_POOL_MAX_CONNECTIONS", 100)
+        self.max_keepalive = _env_int("HTTP_POOL_MAX_KEEPALIVE", 20)
+        self.keepalive_expiry = _env_float("HTTP_POOL_KEEPALIVE_EXPIRY", 30.0)
+        self.connect_timeout = _env_float("HTTP_CONNECT_TIMEOUT", 10.0)
+        self.http_timeout = _env_float("HTTP_TIMEOUT", 60.0)
+        self.anthropic_timeout = _env_float("ANTHROPIC_TIMEOUT", 600.0)
+        self.http2 = os.getenv("HTTP2_ENABLED", "false").lower() in ("1", "true", "yes", "on")
+        if self.http2 and not _http2_available():
+            print("[ClientRegistry] ⚠️  HTTP2_ENABLED=true mas o pacote 'h2' não está instalado. Usando HTTP/1.1.")
+            self.http2 = False
+
+    def _transport(self, httpx_module, stats: PoolStats):
+        limits = httpx_module.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+        return _counting_transport_class(httpx_module)(stats, limits=limits, http2=self.http2)
+
+    def _timeout(self, httpx_module, read_timeout: float):
+        return httpx_module.Timeout(read_timeout, connect=self.connect_timeout)
+
+    async def start(self) -> None:
+        """Cria os clientes no startup (idempotente; clientes já criados são mantidos)."""
+        self.http()
+        self.anthropic()
+        self.started_at = time.time()
+        print(
+            f"[ClientRegistry] ✅ Clientes HTTP prontos (max_connections={self.max_connections}, "
+            f"keepalive={self.max_keepalive}, http2={self.http2})"
+        )
+
+    def anthropic(self) -> Optional[AsyncAnthropic]:
+        """AsyncAnthropic compartilhado; None se ANTHROPIC_API_KEY não estiver configurada."""
+        if self._anthropic is None:
+            api_key = os.getenv("ANTHROPIC_API_KEY")
+            if not api_key:
+                return None
+            sdk_httpx = _sdk_httpx_module()
+            self._anthropic_http = DefaultAsyncHttpxClient(
+                transport=self._transport(sdk_httpx, self.anthropic_stats),
+                timeout=self._timeout(sdk_httpx, self.anthropic_timeout),
+            )
+            self._anthropic = AsyncAnthropic(api_key=api_key, http_client=self._anthropic_http)
+        return self._anthropic
+
+    def require_anthropic(self) -> AsyncAnthropic:
+        """Como ``anthropic()``, mas falha se a chave não estiver configurada."""
+        client = self.anthropic()
+        if client is None:
+            raise ValueError("ANTHROPIC_API_KEY não configurada")
+        return client
+
+    def http(self) -> httpx.AsyncClient:
+        """httpx.AsyncClient compartilhado para as demais APIs externas."""
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                transport=self._transport(httpx, self.http_stats),
+                timeout=self._timeout(httpx, self.http_timeout),
+            )
+        return self._http
+
+    async def aclose(self) -> None:
+        """Fecha os pools (shutdown). Um acesso posterior cria clientes novos."""
+        if self._anthropic is not None:
+            await self._anthropic.close()
+        if self._http is not None:
+            await self._http.aclose()
+        self._anthropic = None
+        self._anthropic_http = None
+        self._http = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "http2": self.http2,
+            "maxConnections": self.max_connections,
+            "maxKeepaliveConnections": self.max_keepalive,
+            "keepaliveExpirySeconds": self.keepalive_expiry,
+            "startedAt": self.started_at,
+            "pools": {
+                "anthropic": self.anthropic_stats.snapshot(self._anthropic_http),
+                "http": self.http_stats.snapshot(self._http),
+            },
+        }
+
+
+client_registry = ClientRegistry()
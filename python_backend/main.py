@@ -43,16 +43,24 @@ from python_backend.models import (
     Expert, ExpertCreate, ExpertType, CategoryType, CategoryInfo,
     Conversation, ConversationCreate,
     Message, MessageSend, MessageResponse,
-    CouncilAnalysis, CouncilAnalysisCreate,
+    CouncilAnalysis, CouncilAnalysisCreate, CouncilAnalysisPage,
     RecommendExpertsRequest, RecommendExpertsResponse, ExpertRecommendation,
     AutoCloneRequest, UserPreferencesUpdate,
-    TaskType, BackgroundTask
+    TaskType, TaskStatus, BackgroundTask
 )
 from python_backend.storage import storage
 from python_backend.crew_agent import LegendAgentFactory
 from python_backend.seed import seed_legends
 from python_backend.crew_council import council_orchestrator
-from python_backend.background_tasks import create_task, get_task_status, register_task_processor
+from python_backend.http_clients import client_registry
+from python_backend.rendered_context import rendered_context_cache
+from python_backend.context_loader import context_loader, expert_catalog
+from python_backend.conversation_memory import conversation_memory
+from python_backend.background_tasks import (
+    create_task, get_task_status, register_task_processor, report_progress, task_worker
+)
+from python_backend.event_bus import KEEPALIVE, KEEPALIVE_SECONDS, SSE_HEADERS, event_bus, sse_event, task_topic
+from python_backend.pagination import decode_cursor, encode_cursor
 
 # Importar roteadores
 from python_backend.routers import experts as experts_router
@@ -110,6 +118,27 @@ app.include_router(experts_router.router)
 app.include_router(council_chat.router)
 app.include_router(conversations_router.router)
 
+# Shared HTTP/Anthropic clients (keep-alive pools reused by every request)
+@app.on_event("startup")
+async def start_http_clients():
+    await client_registry.start()
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    # Tasks em execução usam os clientes: terminam (ou voltam para a fila) antes de fechá-los
+    await task_worker.stop()
+    # Resumos de conversa em andamento usam o cliente Anthropic compartilhado
+    await conversation_memory.drain()
+    await expert_catalog.stop_sync()
+    await rendered_context_cache.stop_sync()
+    await event_bus.stop_sync()
+    await client_registry.aclose()
+    print("[Shutdown] ✓ Clientes HTTP fechados")
+    # MemStorage durável: snapshot final para o próximo startup só ler o snapshot
+    if getattr(storage, "durable", False):
+        await storage.close()
+        print("[Shutdown] ✓ Snapshot do MemStorage gravado")
+
 # Initialize with seeded legends
 @app.on_event("startup")
 async def startup_event():
@@ -121,14 +150,25 @@ async def startup_event():
         try:
             await storage.connect()
             print("[Startup] ✅ Connected to PostgreSQL database")
+            # Invalidações do catálogo de especialistas feitas por outros workers
+            await expert_catalog.start_sync()
+            # Invalidações do contexto renderizado (persona/análise alteradas em outro worker)
+            await rendered_context_cache.start_sync()
+            # Eventos de tasks/mensagens publicados em outros workers (SSE)
+            await event_bus.start_sync()
         except Exception as e:
-            print(f"[Startup] ❌ Failed to connect to database: {e}")
-            print("[Startup] ⚠️  Sistema irá iniciar mas sem especialistas!")
-            print("[Startup] ⚠️  Use POST /api/admin/seed-experts após configurar DATABASE_URL")
-            return  # Não falhar completamente
+            # Sem banco (ou com migration quebrada) a API não sobe: falhar aqui é melhor
+            # do que servir requisições contra um pool ausente ou um schema incompleto
+            print(f"[Startup] ❌ Failed to connect to database or apply migrations: {e}")
+            print("[Startup] ⚠️  Verifique DATABASE_URL e python_backend/migrations/")
+            raise
     
     # Force reset MemStorage singleton if needed (only for MemStorage)
     if hasattr(storage, 'experts') and not isinstance(storage, PostgresStorage):
+        if getattr(storage, "durable", False) and storage.experts:
+            # Modo durável: especialistas (inclusive clones) vieram do disco, sem re-seed
+            print(f"[Startup] ✅ {len(storage.experts)} experts restaurados de MEMSTORAGE_DATA_DIR")
+            return
         existing = len(storage.experts)
         if existing > 0:
             print(f"[Startup] Clearing {existing} existing experts from MemStorage...")
@@ -136,6 +176,7 @@ async def startup_event():
     
     try:
         await seed_legends(storage)
+        await expert_catalog.invalidate()
         experts_count = len(await storage.get_experts())
         print(f"[Startup] ✅ Seeded {experts_count} marketing legends successfully.")
         
@@ -195,6 +236,7 @@ async def manual_seed_experts():
         # Executar seeding
         from python_backend.seed import seed_legends
         await seed_legends(storage)
+        await expert_catalog.invalidate()
         
         # Verificar resultado
         experts_after = await storage.get_experts()
@@ -259,6 +301,43 @@ async def database_status():
     
     return status
 
+@app.get("/api/admin/upstream-status")
+async def upstream_status():
+    """
+    Estado do agendador de chamadas à API da Anthropic.
+    Mostra concorrência atual, fila de espera, limites informados pela API
+    e histogramas de latência/orçamento de hedge por etapa, além do uso do prompt cache
+    e dos pools de conexão HTTP compartilhados, e tamanhos de prompt antes/depois do orçamento de tokens.
+    """
+    from python_backend.upstream_scheduler import anthropic_scheduler
+    from python_backend.hedging import anthropic_hedger
+    from python_backend.prompt_cache import prompt_cache_stats
+    from python_backend.token_budget import token_budget_stats
+    return {
+        "anthropic": anthropic_scheduler.stats(),
+        "hedging": {"anthropic": anthropic_hedger.stats()},
+        "promptCache": prompt_cache_stats.stats(),
+        "httpClients": client_registry.stats(),
+        "tokenBudget": token_budget_stats.stats()
+    }
+
+@app.get("/api/admin/cache-status")
+async def cache_status():
+    """
+    Métricas dos caches da aplicação (hits, misses, tamanho).
+    """
+    from python_backend.crew_council import council_orchestrator
+    contribution_cache = council_orchestrator.contribution_cache
+    return {
+        "contributionCache": contribution_cache.stats() if contribution_cache else {"enabled": False},
+        "renderedContext": rendered_context_cache.stats(),
+        "conversationMemory": conversation_memory.stats(),
+        "expertCatalog": expert_catalog.stats(),
+        "memStorage": storage.memory_stats() if hasattr(storage, "memory_stats") else {"enabled": False},
+        "taskWorker": task_worker.stats(),
+        "eventBus": event_bus.stats()
+    }
+
 # =============================================================================
 # END ADMIN ENDPOINTS
 # =============================================================================
@@ -510,7 +589,6 @@ async def auto_clone_expert(request: Request, data: AutoCloneRequest):
     """
     try:
         import httpx
-        from anthropic import AsyncAnthropic
         
         # Step 1: Perplexity research (com fallback)
         perplexity_api_key = os.getenv("PERPLEXITY_API_KEY")
@@ -554,30 +632,31 @@ Forneça:
 Inclua dados específicos, citações, livros publicados, e exemplos concretos."""
 
             # Call Perplexity API (timeout 120s para pesquisas complexas)
-            async with httpx.AsyncClient(timeout=120.0) as client:
-                perplexity_response = await client.post(
-                    "https://api.perplexity.ai/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {perplexity_api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": "sonar-pro",
-                        "messages": [
-                            {
-                                "role": "system",
-                                "content": "Você é um pesquisador especializado em biografias profissionais e análise de personalidades. Forneça informações factuais, detalhadas e específicas."
-                            },
-                            {
-                                "role": "user",
-                                "content": research_query
-                            }
-                        ],
-                        "temperature": 0.2,
-                        "search_recency_filter": "month",
-                        "return_related_questions": False
-                    }
-                )
+            client = client_registry.http()
+            perplexity_response = await client.post(
+                "https://api.perplexity.ai/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {perplexity_api_key}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": "sonar-pro",
+                    "messages": [
+                        {
+                            "role": "system",
+                            "content": "Você é um pesquisador especializado em biografias profissionais e análise de personalidades. Forneça informações factuais, detalhadas e específicas."
+                        },
+                        {
+                            "role": "user",
+                            "content": research_query
+                        }
+                    ],
+                    "temperature": 0.2,
+                    "search_recency_filter": "month",
+                    "return_related_questions": False
+                },
+                timeout=120.0
+            )
             
             perplexity_data = perplexity_response.json()
             
@@ -590,7 +669,7 @@ Inclua dados específicos, citações, livros publicados, e exemplos concretos."
                 raise ValueError("Nenhum resultado de pesquisa foi encontrado")
         
         # Step 2: Claude synthesis into EXTRACT system prompt
-        anthropic_client = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        anthropic_client = client_registry.require_anthropic()
         
         synthesis_prompt = f"""Você é um especialista em clonagem cognitiva usando o Framework EXTRACT de 20 pontos.
 
@@ -976,8 +1055,6 @@ async def test_chat_expert(data: dict):
     Used for preview/testing before saving an auto-cloned expert.
     """
     try:
-        from anthropic import AsyncAnthropic
-        
         system_prompt = data.get("systemPrompt")
         message = data.get("message")
         history = data.get("history", [])
@@ -1000,7 +1077,7 @@ async def test_chat_expert(data: dict):
         })
         
         # Call Claude with the expert's system prompt
-        anthropic_client = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        anthropic_client = client_registry.require_anthropic()
         
         response = await anthropic_client.messages.create(
             model="claude-sonnet-4-20250514",
@@ -1029,7 +1106,7 @@ async def recommend_experts(request: RecommendExpertsRequest):
     """
     try:
         # Get all available experts
-        experts = await storage.get_experts()
+        experts = await expert_catalog.summaries()
         
         if not experts:
             raise HTTPException(status_code=404, detail="No experts available")
@@ -1077,8 +1154,7 @@ INSTRUÇÕES:
 IMPORTANTE: Retorne APENAS o JSON, sem texto adicional antes ou depois."""
 
         # Call Claude for intelligent analysis
-        from anthropic import AsyncAnthropic
-        anthropic_client = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        anthropic_client = client_registry.require_anthropic()
         
         response = await anthropic_client.messages.create(
             model="claude-sonnet-4-20250514",
@@ -1208,7 +1284,7 @@ async def upload_expert_avatar(expert_id: str, file: UploadFile = File(...)):
     """Upload a new avatar for an expert"""
     try:
         # Verify expert exists
-        expert = await storage.get_expert(expert_id)
+        expert = await expert_catalog.get(expert_id)
         if not expert:
             raise HTTPException(status_code=404, detail="Expert not found")
         
@@ -1301,6 +1377,7 @@ async def upload_expert_avatar(expert_id: str, file: UploadFile = File(...)):
         
         if not updated_expert:
             raise HTTPException(status_code=500, detail="Failed to update expert avatar")
+        await expert_catalog.invalidate()
         
         return updated_expert
     
@@ -1349,7 +1426,7 @@ async def get_expert_recommendations():
         profile = await storage.get_business_profile(user_id)
         
         # Get all experts
-        experts = await storage.get_experts()
+        experts = await expert_catalog.summaries()
         if not experts:
             raise HTTPException(status_code=404, detail="No experts available")
         
@@ -1386,7 +1463,7 @@ async def get_suggested_questions(expert_id: str):
         from perplexity_research import perplexity_research
         
         # Get expert
-        expert = await storage.get_expert(expert_id)
+        expert = await expert_catalog.get(expert_id)
         if not expert:
             raise HTTPException(status_code=404, detail="Expert not found")
         
@@ -1445,31 +1522,32 @@ NÃO numere as perguntas nem adicione prefixos. Apenas retorne 5 perguntas, uma
 """
         
         # Use Perplexity to generate questions with lower temperature for consistency
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                "https://api.perplexity.ai/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {perplexity_research.api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "sonar-pro",
-                    "messages": [
-                        {
-                            "role": "system",
-                            "content": "Você é um consultor de estratégia de marketing que gera perguntas altamente específicas e acionáveis. SEMPRE responda em português brasileiro. Sempre retorne exatamente 5 perguntas, uma por linha, sem numeração ou prefixos."
-                        },
-                        {
-                            "role": "user",
-                            "content": context
-                        }
-                    ],
-                    "temperature": 0.3,  # Lower temperature for more consistent, focused output
-                    "max_tokens": 500
-                }
-            )
-            response.raise_for_status()
-            data = response.json()
+        client = client_registry.http()
+        response = await client.post(
+            "https://api.perplexity.ai/chat/completions",
+            headers={
+                "Authorization": f"Bearer {perplexity_research.api_key}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": "sonar-pro",
+                "messages": [
+                    {
+                        "role": "system",
+                        "content": "Você é um consultor de estratégia de marketing que gera perguntas altamente específicas e acionáveis. SEMPRE responda em português brasileiro. Sempre retorne exatamente 5 perguntas, uma por linha, sem numeração ou prefixos."
+                    },
+                    {
+                        "role": "user",
+                        "content": context
+                    }
+                ],
+                "temperature": 0.3,  # Lower temperature for more consistent, focused output
+                "max_tokens": 500
+            },
+            timeout=30.0
+        )
+        response.raise_for_status()
+        data = response.json()
         
         # Parse questions from response
         content = data["choices"][0]["message"]["content"]
@@ -1512,7 +1590,7 @@ NÃO numere as perguntas nem adicione prefixos. Apenas retorne 5 perguntas, uma
         # Missing PERPLEXITY_API_KEY
         if "PERPLEXITY_API_KEY" in str(e):
             # Return fallback questions instead of failing
-            expert = await storage.get_expert(expert_id)
+            expert = await expert_catalog.get(expert_id)
             if expert:
                 return {
                     "expertId": expert_id,
@@ -1531,7 +1609,7 @@ NÃO numere as perguntas nem adicione prefixos. Apenas retorne 5 perguntas, uma
         traceback.print_exc()
         # Return fallback instead of failing
         try:
-            expert = await storage.get_expert(expert_id)
+            expert = await expert_catalog.get(expert_id)
             if expert:
                 return {
                     "expertId": expert_id,
@@ -1607,32 +1685,33 @@ E-mail Marketing: [insight específico aqui]
 """
         
         # Use Perplexity to generate insights
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                "https://api.perplexity.ai/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {perplexity_research.api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "sonar-pro",
-                    "messages": [
-                        {
-                            "role": "system",
-                            "content": "Você é um estrategista de marketing que fornece insights hiper-específicos e acionáveis baseados no contexto do negócio. SEMPRE responda em português brasileiro. Sempre use dados e tendências recentes. Formate os insights como 'Categoria: insight acionável específico'."
-                        },
-                        {
-                            "role": "user",
-                            "content": context
-                        }
-                    ],
-                    "temperature": 0.4,
-                    "max_tokens": 600,
-                    "search_recency_filter": "month"  # Use recent data
-                }
-            )
-            response.raise_for_status()
-            data = response.json()
+        client = client_registry.http()
+        response = await client.post(
+            "https://api.perplexity.ai/chat/completions",
+            headers={
+                "Authorization": f"Bearer {perplexity_research.api_key}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": "sonar-pro",
+                "messages": [
+                    {
+                        "role": "system",
+                        "content": "Você é um estrategista de marketing que fornece insights hiper-específicos e acionáveis baseados no contexto do negócio. SEMPRE responda em português brasileiro. Sempre use dados e tendências recentes. Formate os insights como 'Categoria: insight acionável específico'."
+                    },
+                    {
+                        "role": "user",
+                        "content": context
+                    }
+                ],
+                "temperature": 0.4,
+                "max_tokens": 600,
+                "search_recency_filter": "month"  # Use recent data
+            },
+            timeout=30.0
+        )
+        response.raise_for_status()
+        data = response.json()
         
         # Parse insights from response
         content = data["choices"][0]["message"]["content"]
@@ -1770,7 +1849,10 @@ async def create_council_analysis(request: Request, data: CouncilAnalysisCreate)
         if not data.personaId:
             raise HTTPException(status_code=400, detail="personaId é obrigatório. Você precisa ter uma persona criada para usar o conselho de especialistas.")
         
-        persona = await storage.get_persona(data.personaId)
+        # Persona, perfil de negócio (opcional) e especialistas em paralelo
+        # (todos os especialistas do catálogo se não especificados)
+        inputs = await context_loader.council_inputs(data.personaId, user_id, data.expertIds)
+        persona = inputs["persona"]
         if not persona:
             raise HTTPException(status_code=404, detail=f"Persona com ID {data.personaId} não encontrada. Verifique se a persona foi criada corretamente.")
         
@@ -1778,22 +1860,13 @@ async def create_council_analysis(request: Request, data: CouncilAnalysisCreate)
         # if persona.userId != user_id:
         #     raise HTTPException(status_code=403, detail="Esta persona não pertence a você.")
         
-        # Get user's business profile (optional)
-        profile = await storage.get_business_profile(user_id)
+        profile = inputs["profile"]
         
-        # Get experts to consult (all 8 if not specified)
-        if data.expertIds:
-            experts = []
-            for expert_id in data.expertIds:
-                expert = await storage.get_expert(expert_id)
-                if not expert:
-                    raise HTTPException(status_code=404, detail=f"Expert {expert_id} not found")
-                experts.append(expert)
-        else:
-            # Use all available experts
-            experts = await storage.get_experts()
-            if not experts:
-                raise HTTPException(status_code=400, detail="No experts available for analysis")
+        if inputs["missingExpertIds"]:
+            raise HTTPException(status_code=404, detail=f"Expert {inputs['missingExpertIds'][0]} not found")
+        experts = inputs["experts"]
+        if not experts:
+            raise HTTPException(status_code=400, detail="No experts available for analysis")
         
         # Run council analysis
         analysis = await council_orchestrator.analyze_problem(
@@ -1801,12 +1874,15 @@ async def create_council_analysis(request: Request, data: CouncilAnalysisCreate)
             problem=data.problem,
             experts=experts,
             profile=profile,
-            persona=persona
+            persona=persona,
+            deadline_seconds=data.deadlineSeconds,
+            quorum=data.quorum
         )
         
         # Salvar análise no banco para uso posterior no chat
         try:
             await storage.save_council_analysis(analysis)
+            await rendered_context_cache.invalidate_analysis(analysis.id)
             print(f"[Council] ✅ Análise salva no banco: {analysis.id}")
         except Exception as save_error:
             print(f"[Council] ⚠️ Erro ao salvar análise (não crítico): {save_error}")
@@ -1852,16 +1928,14 @@ async def create_council_analysis_stream(request: Request, data: CouncilAnalysis
     - expert_researching: During Perplexity research
     - expert_analyzing: During Claude analysis
     - expert_completed: When expert finishes
-    - consensus_started: Before synthesis
+    - expert_skipped: Expert cancelled after the deadline (quorum reached)
+    - consensus_partial: Partial consensus, updated after each expert completes
+    - consensus_started: Before final synthesis
     - analysis_complete: Final result with full analysis
     """
     user_id = "default_user"
     
     async def event_generator():
-        # Helper to format SSE events (defined outside try block for exception handling)
-        def sse_event(event_type: str, data: dict) -> str:
-            return f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
-        
         try:
             # Validar persona (OBRIGATÓRIA)
             if not data.personaId:
@@ -1870,30 +1944,24 @@ async def create_council_analysis_stream(request: Request, data: CouncilAnalysis
                 })
                 return
             
-            persona = await storage.get_persona(data.personaId)
+            # Persona, perfil de negócio (opcional) e especialistas em paralelo
+            inputs = await context_loader.council_inputs(data.personaId, user_id, data.expertIds)
+            persona = inputs["persona"]
             if not persona:
                 yield sse_event("error", {
                     "message": f"Persona com ID {data.personaId} não encontrada. Verifique se a persona foi criada corretamente."
                 })
                 return
             
-            # Get user's business profile (optional)
-            profile = await storage.get_business_profile(user_id)
+            profile = inputs["profile"]
             
-            # Get experts to consult
-            if data.expertIds:
-                experts = []
-                for expert_id in data.expertIds:
-                    expert = await storage.get_expert(expert_id)
-                    if not expert:
-                        yield sse_event("error", {"message": f"Expert {expert_id} not found"})
-                        return
-                    experts.append(expert)
-            else:
-                experts = await storage.get_experts()
-                if not experts:
-                    yield sse_event("error", {"message": "No experts available"})
-                    return
+            if inputs["missingExpertIds"]:
+                yield sse_event("error", {"message": f"Expert {inputs['missingExpertIds'][0]} not found"})
+                return
+            experts = inputs["experts"]
+            if not experts:
+                yield sse_event("error", {"message": "No experts available"})
+                return
             
             # Emit initial event with expert list
             yield sse_event("analysis_started", {
@@ -1902,10 +1970,6 @@ async def create_council_analysis_stream(request: Request, data: CouncilAnalysis
             })
             
             # Run council analysis with progress events
-            # We'll need to modify council_orchestrator to emit events
-            # For now, we'll simulate the workflow
-            
-            contributions = []
             research_findings = None
             
             # Perplexity research phase
@@ -1932,99 +1996,48 @@ async def create_council_analysis_stream(request: Request, data: CouncilAnalysis
                         "message": f"Research failed: {str(e)}"
                     })
             
-            # Analyze with each expert (emitting events for each)
+            # Analyze with all experts concurrently; consensus is reduced as results arrive
             from python_backend.crew_council import council_orchestrator
             
-            # Process experts sequentially for event emission
             for expert in experts:
                 yield sse_event("expert_started", {
                     "expertId": expert.id,
                     "expertName": expert.name,
                     "message": f"{expert.name} is analyzing..."
                 })
-                
-                try:
-                    print(f"[Council Stream] Starting analysis for {expert.name}")
-                    contribution = await council_orchestrator._get_expert_analysis(
-                        expert=expert,
-                        problem=data.problem,
-                        profile=profile,
-                        persona=persona,
-                        research_findings=research_findings
-                    )
-                    contributions.append(contribution)
-                    print(f"[Council Stream] Completed analysis for {expert.name}")
-                    
-                    yield sse_event("expert_completed", {
-                        "expertId": expert.id,
-                        "expertName": expert.name,
-                        "insightCount": len(contribution.keyInsights),
-                        "recommendationCount": len(contribution.recommendations)
-                    })
-                except Exception as e:
-                    print(f"[Council Stream] Expert {expert.name} failed: {str(e)}")
-                    import traceback
-                    traceback.print_exc()
-                    yield sse_event("expert_failed", {
-                        "expertId": expert.id,
-                        "expertName": expert.name,
-                        "error": str(e)
-                    })
-            
-            if not contributions:
-                yield sse_event("error", {"message": "All expert analyses failed"})
-                return
-            
-            # Synthesize consensus
-            yield sse_event("consensus_started", {
-                "message": "Synthesizing council consensus..."
-            })
             
-            print(f"[Council Stream] Synthesizing consensus from {len(contributions)} contributions")
-            consensus = await council_orchestrator._synthesize_consensus(
-                problem=data.problem,
-                contributions=contributions,
-                research_findings=research_findings,
-                persona=persona
-            )
-            print(f"[Council Stream] Consensus generated successfully")
-            
-            # Create final analysis object
-            from python_backend.models import CouncilAnalysis, ExpertContribution
-            import uuid
-            
-            # Generate action plan (optional, não bloqueia se falhar)
-            action_plan = None
+            analysis = None
             try:
-                import asyncio
-                await asyncio.sleep(2.0)  # Delay antes de gerar plano
-                action_plan = await council_orchestrator._generate_action_plan(
+                async for event_type, payload in council_orchestrator.analyze_problem_stream(
+                    user_id=user_id,
                     problem=data.problem,
-                    consensus=consensus,
-                    contributions=contributions,
+                    experts=experts,
+                    research_findings=research_findings,
+                    profile=profile,
                     persona=persona,
-                    profile=profile
-                )
-                print(f"[Council Stream] Action plan generated: {len(action_plan.phases) if action_plan else 0} phases")
+                    deadline_seconds=data.deadlineSeconds,
+                    quorum=data.quorum
+                ):
+                    if event_type == "analysis_complete":
+                        analysis = payload
+                    elif event_type == "consensus_started":
+                        print(f"[Council Stream] Synthesizing consensus from {payload['contributionCount']} contributions")
+                        yield sse_event("consensus_started", {
+                            "message": "Synthesizing council consensus..."
+                        })
+                    else:
+                        yield sse_event(event_type, payload)
             except Exception as e:
-                print(f"[Council Stream] Action plan generation failed (non-critical): {e}")
-                action_plan = None
-            
-            analysis = CouncilAnalysis(
-                id=str(uuid.uuid4()),
-                userId=user_id,
-                problem=data.problem,
-                personaId=persona.id if persona else None,
-                profileId=profile.id if profile else None,
-                marketResearch=research_findings,
-                contributions=contributions,
-                consensus=consensus,
-                actionPlan=action_plan
-            )
+                print(f"[Council Stream] Council analysis failed: {str(e)}")
+                import traceback
+                traceback.print_exc()
+                yield sse_event("error", {"message": str(e)})
+                return
             
             # Salvar análise no banco para uso posterior no chat
             try:
                 await storage.save_council_analysis(analysis)
+                await rendered_context_cache.invalidate_analysis(analysis.id)
                 print(f"[Council Stream] ✅ Análise salva no banco: {analysis.id}")
             except Exception as save_error:
                 print(f"[Council Stream] ⚠️ Erro ao salvar análise (não crítico): {save_error}")
@@ -2048,7 +2061,8 @@ async def create_council_analysis_stream(request: Request, data: CouncilAnalysis
                     for c in analysis.contributions
                 ],
                 "consensus": analysis.consensus,
-                "actionPlan": analysis.actionPlan.model_dump() if analysis.actionPlan else None
+                "actionPlan": analysis.actionPlan.model_dump() if analysis.actionPlan else None,
+                "skippedExperts": [s.model_dump() for s in analysis.skippedExperts]
             }
             
             yield sse_event("analysis_complete", {
@@ -2068,11 +2082,7 @@ async def create_council_analysis_stream(request: Request, data: CouncilAnalysis
     return StreamingResponse(
         event_generator(),
         media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"  # Disable nginx buffering
-        }
+        headers=SSE_HEADERS
     )
 
 @app.get("/api/council/analyses", response_model=List[CouncilAnalysis])
@@ -2082,6 +2092,31 @@ async def get_council_analyses():
     user_id = "default_user"
     return await storage.get_council_analyses(user_id)
 
+@app.get("/api/council/analyses/page", response_model=CouncilAnalysisPage)
+async def get_council_analyses_page(limit: int = 20, cursor: Optional[str] = None):
+    """
+    Listagem paginada das análises do usuário (mais recentes primeiro).
+    
+    Cada item é um resumo (trecho do problema, especialistas, se há plano de ação);
+    a análise completa vem de GET /api/council/analyses/{id}. Para a próxima
+    página, envie o `nextCursor` recebido como `cursor`.
+    """
+    user_id = "default_user"
+    if not 1 <= limit <= 100:
+        raise HTTPException(status_code=400, detail="limit deve estar entre 1 e 100")
+    try:
+        before = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="cursor inválido")
+    
+    # Um item a mais só para saber se existe próxima página
+    items = await storage.get_council_analysis_summaries(user_id, limit + 1, before)
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1].createdAt, items[-1].id)
+    return CouncilAnalysisPage(items=items, nextCursor=next_cursor)
+
 @app.get("/api/council/analyses/{analysis_id}", response_model=CouncilAnalysis)
 async def get_council_analysis(analysis_id: str):
     """Get a specific council analysis by ID"""
@@ -2107,43 +2142,51 @@ async def _process_council_analysis_background(metadata: dict):
         
         print(f"[Background] Iniciando análise do conselho para: {problem[:50]}...")
         
-        # Validar persona
-        persona = await storage.get_persona(persona_id)
+        # Persona, perfil de negócio e especialistas em paralelo (ids inexistentes são ignorados)
+        inputs = await context_loader.council_inputs(persona_id, user_id, expert_ids)
+        persona = inputs["persona"]
         if not persona:
             raise ValueError(f"Persona {persona_id} não encontrada")
         
-        # Get user's business profile
-        profile = await storage.get_business_profile(user_id)
-        
-        # Get experts
-        if expert_ids:
-            experts = []
-            for expert_id in expert_ids:
-                expert = await storage.get_expert(expert_id)
-                if expert:
-                    experts.append(expert)
-        else:
-            experts = await storage.get_experts()
+        profile = inputs["profile"]
+        experts = inputs["experts"]
         
         if not experts:
             raise ValueError("Nenhum especialista disponível")
         
         print(f"[Background] Analisando com {len(experts)} especialistas...")
         
-        # Run council analysis (synchronous, sequentially)
-        analysis = await council_orchestrator.analyze_problem(
+        # Run council analysis (experts in parallel, bounded by the optional deadline);
+        # each expert that finishes advances the task progress (pushed to /api/tasks/{id}/events)
+        analysis = None
+        finished_experts = 0
+        async for event_type, payload in council_orchestrator.analyze_problem_stream(
             user_id=user_id,
             problem=problem,
             experts=experts,
             profile=profile,
-            persona=persona
-        )
+            persona=persona,
+            deadline_seconds=metadata.get("deadlineSeconds"),
+            quorum=metadata.get("quorum")
+        ):
+            if event_type == "analysis_complete":
+                analysis = payload
+            elif event_type in ("expert_completed", "expert_failed", "expert_skipped"):
+                finished_experts += 1
+                await report_progress(
+                    80 * finished_experts // len(experts), stage=event_type, expertName=payload.get("expertName")
+                )
+            elif event_type == "consensus_started":
+                await report_progress(85, stage=event_type)
+        if analysis is None:
+            raise RuntimeError("Análise do conselho terminou sem resultado")
         
         print(f"[Background] Análise completada: {analysis.id}")
         
         # Salvar análise no banco para uso posterior no chat
         try:
             await storage.save_council_analysis(analysis)
+            await rendered_context_cache.invalidate_analysis(analysis.id)
             print(f"[Background] ✅ Análise salva no banco: {analysis.id}")
         except Exception as save_error:
             print(f"[Background] ⚠️ Erro ao salvar análise (não crítico): {save_error}")
@@ -2164,7 +2207,8 @@ async def _process_council_analysis_background(metadata: dict):
                 for c in analysis.contributions
             ],
             "consensus": analysis.consensus,
-            "actionPlan": analysis.actionPlan.model_dump() if analysis.actionPlan else None
+            "actionPlan": analysis.actionPlan.model_dump() if analysis.actionPlan else None,
+            "skippedExperts": [s.model_dump() for s in analysis.skippedExperts]
         }
         
     except Exception as e:
@@ -2177,8 +2221,15 @@ async def _process_council_analysis_background(metadata: dict):
 @app.on_event("startup")
 async def register_council_processor():
     """Registra o processador de análise do conselho"""
-    register_task_processor(TaskType.COUNCIL_ANALYSIS, _process_council_analysis_background)
-    print("[Startup] ✓ Processador de análise do conselho registrado")
+    register_task_processor(TaskType.COUNCIL_ANALYSIS, _process_council_analysis_background, concurrency=2)
+    # A 2ª tentativa acontece se o worker morrer no meio (lease vencido); ela só chama os
+    # especialistas que ainda não responderam à mensagem (turno idempotente)
+    register_task_processor(
+        TaskType.COUNCIL_CHAT_MESSAGE, council_chat.process_council_message_task, concurrency=6, max_attempts=2
+    )
+    print("[Startup] ✓ Processadores de análise e chat do conselho registrados")
+    # Worker da fila durável (desligar com BACKGROUND_WORKER=off em processos só de API)
+    await task_worker.start()
 
 @app.post("/api/council/analyze-async", response_model=BackgroundTask)
 @limiter.limit("50/hour")  # Max 50 análises de conselho por hora (ajustado para desenvolvimento)
@@ -2205,7 +2256,9 @@ async def create_council_analysis_async(request: Request, data: CouncilAnalysisC
             "problem": data.problem,
             "expertIds": data.expertIds,
             "personaId": data.personaId,
-            "userId": user_id
+            "userId": user_id,
+            "deadlineSeconds": data.deadlineSeconds,
+            "quorum": data.quorum
         }
     )
     
@@ -2224,6 +2277,43 @@ async def get_task(task_id: str):
         raise HTTPException(status_code=404, detail="Task não encontrada")
     return task
 
+_FINISHED_TASK_STATUSES = (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED)
+
+@app.get("/api/tasks/{task_id}/events")
+async def stream_task_events(task_id: str):
+    """
+    Atualizações de uma task por SSE (substitui o polling de /api/tasks/{task_id}).
+
+    Eventos:
+    - task: primeiro o estado completo; depois deltas de status (running, retry, completed...)
+    - progress: progresso reportado pelo processador (ex.: especialista concluído)
+    A conexão é encerrada quando a task termina (completed, failed ou cancelled).
+    """
+    if not await get_task_status(task_id):
+        raise HTTPException(status_code=404, detail="Task não encontrada")
+
+    async def event_generator():
+        # Assina antes de ler o estado: nada publicado entre os dois se perde
+        with event_bus.subscribe(task_topic(task_id)) as subscription:
+            current = await get_task_status(task_id)
+            yield sse_event("task", {"type": "task", **current.model_dump(mode="json")})
+            while current.status not in _FINISHED_TASK_STATUSES:
+                event = await subscription.get(timeout=KEEPALIVE_SECONDS)
+                if event is None or event["type"] == "resync":
+                    # Eventos perdidos (fila cheia, LISTEN fora): relê uma linha em vez de esperar
+                    refreshed = await get_task_status(task_id)
+                    if refreshed and refreshed.updatedAt != current.updatedAt:
+                        current = refreshed
+                        yield sse_event("task", {"type": "task", **current.model_dump(mode="json")})
+                    elif event is None:
+                        yield KEEPALIVE
+                    continue
+                if "status" in event:
+                    current = current.model_copy(update={"status": TaskStatus(event["status"])})
+                yield sse_event(event["type"], event)
+
+    return StreamingResponse(event_generator(), media_type="text/event-stream", headers=SSE_HEADERS)
+
 # ============================================================================
 # PERSONA BUILDER ENDPOINTS
 # ============================================================================
@@ -2261,8 +2351,7 @@ async def enhance_persona_description(request: Request, data: dict):
     
     try:
         # Instanciar cliente Anthropic
-        from anthropic import AsyncAnthropic
-        anthropic_client = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        anthropic_client = client_registry.require_anthropic()
         
         # Prompt otimizado para expansão inteligente + sugestões de indústria e contexto
         prompt = f"""Você é um especialista em perfis de cliente (ICP - Ideal Customer Profile) com 15+ anos de experiência.
@@ -2515,6 +2604,7 @@ async def update_persona(persona_id: str, updates: dict):
     persona = await storage.update_persona_modern(persona_id, updates)
     if not persona:
         raise HTTPException(status_code=404, detail="Persona not found")
+    await rendered_context_cache.invalidate_persona(persona_id)
     return persona
 
 @app.delete("/api/personas/{persona_id}")
@@ -2523,6 +2613,7 @@ async def delete_persona(persona_id: str):
     success = await storage.delete_persona_modern(persona_id)
     if not success:
         raise HTTPException(status_code=404, detail="Persona not found")
+    await rendered_context_cache.invalidate_persona(persona_id)
     return {"success": True}
 
 # ============================================================================
@@ -2657,7 +2748,7 @@ Personalize a persona para ser EXTREMAMENTE RELEVANTE para {business_profile.get
             "deep",
             data.targetDescription,
             data.industry,
-            json.dumps(persona.dict()),
+            persona.dict(),  # JSONB: o codec do pool serializa (pg_codecs)
             now,
             now
         )
@@ -2701,10 +2792,7 @@ async def get_deep_personas():
         
         personas = []
         for row in rows:
-            persona_data = row['data']
-            if isinstance(persona_data, str):
-                persona_data = json.loads(persona_data)
-            personas.append(PersonaDeep(**persona_data))
+            personas.append(PersonaDeep(**row['data']))
         
         return personas
     except Exception as e:
@@ -2723,11 +2811,7 @@ async def get_deep_persona(persona_id: str):
         if not row:
             raise HTTPException(status_code=404, detail="Deep persona not found")
         
-        persona_data = row['data']
-        if isinstance(persona_data, str):
-            persona_data = json.loads(persona_data)
-        
-        return PersonaDeep(**persona_data)
+        return PersonaDeep(**row['data'])
     except HTTPException:
         raise
     except Exception as e:
@@ -0,0 +1,146 @@
+"""
+MemStorage Indexes
+==================
+
+Índices secundários do ``MemStorage``.
+
+Antes, ``get_messages`` varria todas as mensagens do processo para achar as de
+uma conversa e ``get_conversations``/``get_council_conversations`` varriam e
+ordenavam tudo a cada chamada. Com os índices, cada leitura custa O(k) (itens
+da própria conversa/especialista/usuário), não O(total).
+"""
+
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Hashable, Iterator, List, Optional, Tuple
+
+Cursor = Tuple[datetime, str]  # (chave, id) do último item da página anterior
+
+
+class SortedIds:
+    """
+    Ids ordenados por uma chave (``updatedAt``/``createdAt``), lidos do mais novo ao mais antigo.
+
+    Atualizar a chave de um id o reposiciona. O caso comum (a chave nova é a
+    maior, ex.: ``updatedAt = utcnow()``) é um append no fim da lista.
+    """
+
+    def __init__(self):
+        self._entries: List[Tuple[datetime, str]] = []
+        self._keys: Dict[str, datetime] = {}
+
+    def add(self, item_id: str, key: datetime) -> None:
+        self.discard(item_id)
+        entry = (key, item_id)
+        if not self._entries or entry >= self._entries[-1]:
+            self._entries.append(entry)
+        else:
+            insort(self._entries, entry)
+        self._keys[item_id] = key
+
+    def discard(self, item_id: str) -> None:
+        key = self._keys.pop(item_id, None)
+        if key is None:
+            return
+        index = bisect_left(self._entries, (key, item_id))
+        if index < len(self._entries) and self._entries[index] == (key, item_id):
+            del self._entries[index]
+
+    def newest_first(self) -> List[str]:
+        return [item_id for _, item_id in reversed(self._entries)]
+
+    def page(self, limit: int, before: Optional[Cursor] = None) -> List[str]:
+        """Até ``limit`` ids, do mais novo ao mais antigo, estritamente antes de ``before`` (keyset)."""
+        end = len(self._entries) if before is None else bisect_left(self._entries, before)
+        start = max(end - limit, 0)
+        return [item_id for _, item_id in reversed(self._entries[start:end])]
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class GroupedSortedIds:
+    """Um ``SortedIds`` por grupo (especialista, usuário); grupos vazios são removidos."""
+
+    def __init__(self):
+        self._groups: Dict[Hashable, SortedIds] = {}
+
+    def add(self, group: Hashable, item_id: str, key: datetime) -> None:
+        self._groups.setdefault(group, SortedIds()).add(item_id, key)
+
+    def discard(self, group: Hashable, item_id: str) -> None:
+        ids = self._groups.get(group)
+        if ids is None:
+            return
+        ids.discard(item_id)
+        if not len(ids):
+            del self._groups[group]
+
+    def newest_first(self, group: Hashable) -> List[str]:
+        ids = self._groups.get(group)
+        return ids.newest_first() if ids is not None else []
+
+    def page(self, group: Hashable, limit: int, before: Optional[Cursor] = None) -> List[str]:
+        ids = self._groups.get(group)
+        return ids.page(limit, before) if ids is not None else []
+
+
+def append_in_order(ids: List[str], item_id: str, key: datetime, key_of) -> None:
+    """
+    Acrescenta ``item_id`` mantendo a lista ordenada por ``key_of(id)``.
+
+    Mensagens chegam quase sempre em ordem (append); um timestamp explícito
+    mais antigo que o último é inserido na posição certa.
+    """
+    if not ids or key >= key_of(ids[-1]):
+        ids.append(item_id)
+        return
+    low, high = 0, len(ids)
+    while low < high:
+        middle = (low + high) // 2
+        if key_of(ids[middle]) <= key:
+            low = middle + 1
+        else:
+            high = middle
+    ids.insert(low, item_id)
+
+
+class LRUTracker:
+    """Ordem de uso (menos recente primeiro) com peso por item, para limitar memória."""
+
+    def __init__(self):
+        self._order: "OrderedDict[str, int]" = OrderedDict()
+        self.total_weight = 0
+
+    def touch(self, item_id: str, weight: Optional[int] = None) -> None:
+        if item_id in self._order:
+            self._order.move_to_end(item_id)
+            if weight is not None:
+                self.total_weight += weight - self._order[item_id]
+                self._order[item_id] = weight
+        else:
+            self._order[item_id] = weight or 0
+            self.total_weight += weight or 0
+
+    def add_weight(self, item_id: str, delta: int) -> None:
+        self.touch(item_id)
+        self._order[item_id] += delta
+        self.total_weight += delta
+
+    def remove(self, item_id: str) -> None:
+        weight = self._order.pop(item_id, None)
+        if weight is not None:
+            self.total_weight -= weight
+
+    def coldest(self) -> Iterator[str]:
+        return iter(list(self._order))
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._order
+
+    def __len__(self) -> int:
+        return len(self._order)
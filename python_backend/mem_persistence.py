@@ -0,0 +1,244 @@
+"""
+MemStorage Persistence
+======================
+
+Modo durável opcional do ``MemStorage`` (deploy de um nó só, sem DATABASE_URL).
+
+Sem ele, cada restart perde todos os dados e refaz o seed. Com
+``MEMSTORAGE_DATA_DIR`` definido:
+
+1. Cada escrita do MemStorage vira uma linha JSON no log append-only
+   (``memstorage.log``): ``{"seq", "table", "key", "value"}``; ``value`` nulo é remoção
+2. A cada ``MEMSTORAGE_SNAPSHOT_EVERY`` registros (e no shutdown) o estado inteiro
+   vai para ``memstorage.snapshot`` (arquivo temporário + ``os.replace``). O log é
+   rotacionado antes, no event loop, e a escrita do snapshot roda em uma thread
+3. No startup o snapshot é lido via mmap e só a cauda do log (``seq`` maior que o
+   do snapshot) é reaplicada, sobre o JSON cru, antes de montar os modelos
+
+Uma linha final truncada (crash no meio da escrita) é descartada e cortada do
+arquivo. Cada registro vai para o SO com ``flush`` (sobrevive a crash do
+processo); MEMSTORAGE_FSYNC=always também faz ``fsync`` a cada registro
+(sobrevive a queda de energia, ao custo de latência por escrita).
+"""
+
+import asyncio
+import mmap
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from python_backend.models import (
+    BackgroundTask, Conversation, ConversationSummary, CouncilAnalysis, CouncilConversation,
+    CouncilMessage, Expert, Message, Persona, User, UserPreferences,
+)
+from python_backend.pg_codecs import JSON_BACKEND, json_dumps, json_loads
+
+SNAPSHOT_FILE = "memstorage.snapshot"
+LOG_FILE = "memstorage.log"
+
+# Atributo do MemStorage -> modelo de cada valor (None: JSON puro)
+TABLES = {
+    "users": User,
+    "experts": Expert,
+    "conversations": Conversation,
+    "messages": Message,
+    "conversation_summaries": ConversationSummary,
+    "council_conversations": CouncilConversation,
+    "council_messages": CouncilMessage,
+    "council_analyses": CouncilAnalysis,
+    "rendered_contexts": None,
+    "personas": Persona,
+    "user_preferences": UserPreferences,
+    "background_tasks": BackgroundTask,
+    "business_profiles": None,
+}
+
+
+def _loads_mapped(path: Path) -> Any:
+    """Lê um JSON grande via mmap (o orjson decodifica direto do buffer, sem cópia)."""
+    with open(path, "rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        if JSON_BACKEND != "orjson":
+            return json_loads(mapped[:])
+        view = memoryview(mapped)
+        try:
+            return json_loads(view)
+        finally:
+            view.release()
+
+
+class MemJournal:
+    """Log append-only + snapshot de um ``MemStorage``."""
+
+    def __init__(self, directory: str, snapshot_every: int = 10000, fsync: bool = False):
+        self.directory = Path(directory)
+        self.snapshot_path = self.directory / SNAPSHOT_FILE
+        self.log_path = self.directory / LOG_FILE
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.seq = 0
+        self.records_since_snapshot = 0
+        self.storage: Any = None
+        self._log = None
+        self._snapshot_task: Optional[asyncio.Task] = None
+        self.restored_records = 0
+        self.replayed_records = 0
+        self.discarded_tail_bytes = 0
+        self.snapshots = 0
+        self.load_seconds = 0.0
+
+    # ------------------------------------------------------------------
+    # Startup
+    # ------------------------------------------------------------------
+
+    def _rotated_logs(self) -> List[Path]:
+        """Logs rotacionados por um snapshot que não terminou (crash), em ordem de seq."""
+        rotated = []
+        for path in self.directory.glob(f"{LOG_FILE}.*"):
+            suffix = path.name[len(LOG_FILE) + 1:]
+            if suffix.isdigit():
+                rotated.append((int(suffix), path))
+        return [path for _, path in sorted(rotated)]
+
+    def _replay(self, path: Path, tables: Dict[str, Dict[str, Any]], after_seq: int, truncate_tail: bool) -> None:
+        good_offset = 0
+        with open(path, "rb") as handle:
+            for line in handle:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("linha incompleta")
+                    record = json_loads(line)
+                except ValueError:
+                    self.discarded_tail_bytes += path.stat().st_size - good_offset
+                    print(f"[MemJournal] ⚠️ Descartando registro truncado no fim de {path.name}")
+                    break
+                good_offset += len(line)
+                seq = record["seq"]
+                self.seq = max(self.seq, seq)
+                if seq <= after_seq:
+                    continue
+                table = tables.setdefault(record["table"], {})
+                if record["value"] is None:
+                    table.pop(record["key"], None)
+                else:
+                    table[record["key"]] = record["value"]
+                self.replayed_records += 1
+        if truncate_tail and good_offset < path.stat().st_size:
+            # Senão o próximo registro seria colado na linha truncada
+            with open(path, "r+b") as handle:
+                handle.truncate(good_offset)
+
+    def load(self, storage: Any) -> bool:
+        """Restaura ``storage`` (snapshot + cauda do log) e abre o log; True se havia dados."""
+        started = time.perf_counter()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.storage = storage
+
+        tables: Dict[str, Dict[str, Any]] = {}
+        snapshot_seq = 0
+        if self.snapshot_path.exists() and self.snapshot_path.stat().st_size:
+            snapshot = _loads_mapped(self.snapshot_path)
+            snapshot_seq = snapshot["seq"]
+            tables = snapshot["tables"]
+        self.seq = snapshot_seq
+
+        for path in self._rotated_logs():
+            self._replay(path, tables, snapshot_seq, truncate_tail=False)
+        if self.log_path.exists():
+            self._replay(self.log_path, tables, snapshot_seq, truncate_tail=True)
+        self.records_since_snapshot = self.replayed_records
+
+        for name, rows in tables.items():
+            if name not in TABLES:
+                print(f"[MemJournal] Ignorando tabela desconhecida no snapshot: {name}")
+                continue
+            model = TABLES[name]
+            target = getattr(storage, name)
+            for key, value in rows.items():
+                target[key] = model.model_validate(value) if model is not None else value
+                self.restored_records += 1
+
+        self._log = open(self.log_path, "ab")
+        self.load_seconds = time.perf_counter() - started
+        return self.restored_records > 0
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+
+    def record(self, table: str, key: str, value: Any) -> None:
+        """Acrescenta o estado atual de ``table[key]`` (None = removido) ao log."""
+        self.seq += 1
+        line = json_dumps({"seq": self.seq, "table": table, "key": key, "value": value})
+        self._log.write(line.encode("utf-8") + b"\n")
+        self._log.flush()
+        if self.fsync:
+            os.fsync(self._log.fileno())
+        self.records_since_snapshot += 1
+        if self.snapshot_every and self.records_since_snapshot >= self.snapshot_every:
+            self._schedule_snapshot()
+
+    def _schedule_snapshot(self) -> None:
+        if self._snapshot_task is not None and not self._snapshot_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write_snapshot(*self._begin_snapshot())
+            return
+        self._snapshot_task = loop.create_task(self.snapshot())
+
+    def _begin_snapshot(self) -> Tuple[bytes, int, Path]:
+        """No event loop: serializa o estado e rotaciona o log (registros novos vão para o log novo)."""
+        seq = self.seq
+        payload = json_dumps({
+            "seq": seq,
+            "tables": {name: getattr(self.storage, name) for name in TABLES},
+        }).encode("utf-8")
+        rotated = self.log_path.with_name(f"{LOG_FILE}.{seq}")
+        self._log.close()
+        os.replace(self.log_path, rotated)
+        self._log = open(self.log_path, "ab")
+        self.records_since_snapshot = 0
+        return payload, seq, rotated
+
+    def _write_snapshot(self, payload: bytes, seq: int, rotated: Path) -> None:
+        temporary = self.snapshot_path.with_name(f"{SNAPSHOT_FILE}.tmp")
+        with open(temporary, "wb") as handle:
+            handle.write(payload)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temporary, self.snapshot_path)
+        # O snapshot já cobre estes logs
+        for path in self._rotated_logs():
+            if int(path.name[len(LOG_FILE) + 1:]) <= seq:
+                path.unlink(missing_ok=True)
+        self.snapshots += 1
+
+    async def snapshot(self) -> None:
+        payload, seq, rotated = self._begin_snapshot()
+        await asyncio.to_thread(self._write_snapshot, payload, seq, rotated)
+
+    async def close(self) -> None:
+        """Shutdown: espera o snapshot em andamento, grava um final e fecha o log."""
+        if self._snapshot_task is not None:
+            await self._snapshot_task
+        if self.records_since_snapshot:
+            await self.snapshot()
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "directory": str(self.directory),
+            "seq": self.seq,
+            "recordsSinceSnapshot": self.records_since_snapshot,
+            "snapshotEvery": self.snapshot_every,
+            "fsync": self.fsync,
+            "snapshots": self.snapshots,
+            "restoredRecords": self.restored_records,
+            "replayedRecords": self.replayed_records,
+            "discardedTailBytes": self.discarded_tail_bytes,
+            "loadSeconds": round(self.load_seconds, 4),
+        }
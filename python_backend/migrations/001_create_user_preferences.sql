@@ -28,6 +28,7 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+DROP TRIGGER IF EXISTS trigger_update_user_preferences_updated_at ON user_preferences;
 CREATE TRIGGER trigger_update_user_preferences_updated_at
     BEFORE UPDATE ON user_preferences
     FOR EACH ROW
@@ -0,0 +1,145 @@
+-- Migration: Core schema (experts, chats, council)
+-- Description: Tables that PostgresStorage used to create on demand (UndefinedTableError
+--              fallbacks and _ensure_* checks), plus the indexes used by the hot-path queries
+-- Created: 2025
+
+-- Column names are camelCase (quoted) and PostgresStorage reads only those names.
+-- Tables created before this migration by unquoted DDL ("userid") or with snake_case
+-- ("system_prompt") get their legacy columns renamed first, so the statements below
+-- and the row mappers see a single naming scheme.
+DO $$
+DECLARE
+    target RECORD;
+    legacy TEXT;
+BEGIN
+    FOR target IN SELECT * FROM (VALUES
+        ('experts', 'systemPrompt'), ('experts', 'expertType'), ('experts', 'createdAt'), ('experts', 'updatedAt'),
+        ('conversations', 'userId'), ('conversations', 'expertId'), ('conversations', 'createdAt'), ('conversations', 'updatedAt'),
+        ('messages', 'conversationId'), ('messages', 'createdAt'),
+        ('conversation_summaries', 'conversationId'), ('conversation_summaries', 'coveredCount'), ('conversation_summaries', 'updatedAt'),
+        ('council_analyses', 'userId'), ('council_analyses', 'personaId'), ('council_analyses', 'actionPlan'),
+        ('council_analyses', 'skippedExperts'), ('council_analyses', 'renderedContext'), ('council_analyses', 'createdAt'),
+        ('council_conversations', 'userId'), ('council_conversations', 'personaId'), ('council_conversations', 'expertIds'),
+        ('council_conversations', 'analysisId'), ('council_conversations', 'createdAt'), ('council_conversations', 'updatedAt'),
+        ('council_messages', 'conversationId'), ('council_messages', 'expertId'), ('council_messages', 'expertName')
+    ) AS t(table_name, column_name) LOOP
+        CONTINUE WHEN EXISTS (
+            SELECT 1 FROM information_schema.columns c
+            WHERE c.table_schema = current_schema() AND c.table_name = target.table_name AND c.column_name = target.column_name
+        );
+        FOREACH legacy IN ARRAY ARRAY[lower(target.column_name), lower(regexp_replace(target.column_name, '([A-Z])', '_\1', 'g'))] LOOP
+            IF EXISTS (
+                SELECT 1 FROM information_schema.columns c
+                WHERE c.table_schema = current_schema() AND c.table_name = target.table_name AND c.column_name = legacy
+            ) THEN
+                EXECUTE format('ALTER TABLE %I RENAME COLUMN %I TO %I', target.table_name, legacy, target.column_name);
+                EXIT;
+            END IF;
+        END LOOP;
+    END LOOP;
+END $$;
+
+-- Experts ---------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS experts (
+    id VARCHAR(255) PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    title VARCHAR(255) NOT NULL,
+    expertise JSONB NOT NULL DEFAULT '[]'::jsonb,
+    bio TEXT NOT NULL,
+    "systemPrompt" TEXT NOT NULL,
+    avatar VARCHAR(500),
+    "expertType" VARCHAR(50) NOT NULL DEFAULT 'high_fidelity',
+    category VARCHAR(50) NOT NULL DEFAULT 'marketing',
+    "createdAt" TIMESTAMP NOT NULL DEFAULT NOW(),
+    "updatedAt" TIMESTAMP NOT NULL DEFAULT NOW()
+);
+-- update_expert_avatar sets "updatedAt"; tables created by the old fallback lacked it
+ALTER TABLE experts ADD COLUMN IF NOT EXISTS "updatedAt" TIMESTAMP NOT NULL DEFAULT NOW();
+
+-- 1:1 chat ---------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS conversations (
+    id VARCHAR(255) PRIMARY KEY,
+    "userId" VARCHAR(255) NOT NULL DEFAULT 'default_user',
+    "expertId" VARCHAR(255) NOT NULL,
+    title VARCHAR(500) NOT NULL,
+    "createdAt" TIMESTAMP NOT NULL DEFAULT NOW(),
+    "updatedAt" TIMESTAMP NOT NULL DEFAULT NOW()
+);
+ALTER TABLE conversations ADD COLUMN IF NOT EXISTS "userId" VARCHAR(255) DEFAULT 'default_user';
+CREATE INDEX IF NOT EXISTS idx_conversations_expert_updated ON conversations("expertId", "updatedAt" DESC);
+
+CREATE TABLE IF NOT EXISTS messages (
+    id VARCHAR(255) PRIMARY KEY,
+    "conversationId" VARCHAR(255) NOT NULL,
+    role VARCHAR(20) NOT NULL,
+    content TEXT NOT NULL,
+    "createdAt" TIMESTAMP NOT NULL DEFAULT NOW(),
+    FOREIGN KEY ("conversationId") REFERENCES conversations(id) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS idx_messages_conversation_created ON messages("conversationId", "createdAt");
+
+CREATE TABLE IF NOT EXISTS conversation_summaries (
+    "conversationId" VARCHAR(255) PRIMARY KEY,
+    summary TEXT NOT NULL,
+    "coveredCount" INTEGER NOT NULL,
+    "updatedAt" TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+-- Council ----------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS council_analyses (
+    id VARCHAR(255) PRIMARY KEY,
+    "userId" VARCHAR(255) NOT NULL,
+    problem TEXT NOT NULL,
+    "personaId" VARCHAR(255),
+    contributions JSONB NOT NULL,
+    consensus TEXT NOT NULL,
+    "actionPlan" JSONB,
+    "skippedExperts" JSONB NOT NULL DEFAULT '[]'::jsonb,
+    metadata JSONB NOT NULL DEFAULT '{}'::jsonb,
+    "renderedContext" JSONB,
+    "createdAt" TIMESTAMP NOT NULL DEFAULT NOW()
+);
+ALTER TABLE council_analyses ADD COLUMN IF NOT EXISTS "skippedExperts" JSONB NOT NULL DEFAULT '[]'::jsonb;
+ALTER TABLE council_analyses ADD COLUMN IF NOT EXISTS metadata JSONB NOT NULL DEFAULT '{}'::jsonb;
+ALTER TABLE council_analyses ADD COLUMN IF NOT EXISTS "renderedContext" JSONB;
+CREATE INDEX IF NOT EXISTS idx_council_analyses_user_created ON council_analyses("userId", "createdAt" DESC);
+
+CREATE TABLE IF NOT EXISTS council_conversations (
+    id UUID PRIMARY KEY,
+    "userId" VARCHAR(255) NOT NULL,
+    "personaId" VARCHAR(255) NOT NULL,
+    problem TEXT NOT NULL,
+    "expertIds" JSONB NOT NULL,
+    "analysisId" VARCHAR(255),
+    "createdAt" TIMESTAMP NOT NULL DEFAULT NOW(),
+    "updatedAt" TIMESTAMP NOT NULL DEFAULT NOW()
+);
+ALTER TABLE council_conversations ADD COLUMN IF NOT EXISTS "analysisId" VARCHAR(255);
+CREATE INDEX IF NOT EXISTS idx_council_conversations_user_updated ON council_conversations("userId", "updatedAt" DESC);
+
+CREATE TABLE IF NOT EXISTS council_messages (
+    id UUID PRIMARY KEY,
+    "conversationId" UUID NOT NULL REFERENCES council_conversations(id) ON DELETE CASCADE,
+    "expertId" VARCHAR(255),
+    "expertName" VARCHAR(255),
+    content TEXT NOT NULL,
+    role VARCHAR(50) NOT NULL,
+    timestamp TIMESTAMP NOT NULL DEFAULT NOW(),
+    reactions JSONB DEFAULT '[]'::jsonb
+);
+-- Replaces the single-column index: get_council_messages filters and orders by timestamp
+DROP INDEX IF EXISTS idx_council_messages_conversation;
+CREATE INDEX IF NOT EXISTS idx_council_messages_conversation_ts ON council_messages("conversationId", timestamp);
+
+-- Persistent tier of ContributionCache
+CREATE TABLE IF NOT EXISTS council_contribution_cache (
+    cache_key VARCHAR(64) PRIMARY KEY,
+    expert_id VARCHAR(255) NOT NULL,
+    contribution JSONB NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    last_hit_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    expires_at TIMESTAMP NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_contribution_cache_expires ON council_contribution_cache(expires_at);
+CREATE INDEX IF NOT EXISTS idx_contribution_cache_last_hit ON council_contribution_cache(last_hit_at);
@@ -0,0 +1,13 @@
+-- Listagem paginada das análises do conselho (GET /api/council/analyses/page)
+-- A projeção lê só colunas pequenas: os nomes dos especialistas ficam em uma coluna
+-- própria em vez de serem extraídos de "contributions" (JSONB grande, em TOAST).
+ALTER TABLE council_analyses ADD COLUMN IF NOT EXISTS "expertNames" TEXT[];
+UPDATE council_analyses
+SET "expertNames" = ARRAY(SELECT contribution->>'expertName' FROM jsonb_array_elements(contributions) AS contribution)
+WHERE "expertNames" IS NULL;
+ALTER TABLE council_analyses ALTER COLUMN "expertNames" SET DEFAULT '{}';
+ALTER TABLE council_analyses ALTER COLUMN "expertNames" SET NOT NULL;
+
+-- Keyset ("createdAt", id): o id desempata análises criadas no mesmo instante
+DROP INDEX IF EXISTS idx_council_analyses_user_created;
+CREATE INDEX IF NOT EXISTS idx_council_analyses_user_created_id ON council_analyses("userId", "createdAt" DESC, id DESC);
@@ -0,0 +1,26 @@
+-- Fila durável das tarefas em background (antes: dict em memória do processo)
+-- Workers reivindicam com SELECT ... FOR UPDATE SKIP LOCKED e mantêm um lease
+-- renovado por heartbeat; lease vencido = worker morreu, a tarefa volta para a fila.
+CREATE TABLE IF NOT EXISTS background_tasks (
+    id VARCHAR(255) PRIMARY KEY,
+    "userId" VARCHAR(255) NOT NULL,
+    "taskType" VARCHAR(64) NOT NULL,
+    status VARCHAR(32) NOT NULL DEFAULT 'pending',
+    progress INTEGER NOT NULL DEFAULT 0,
+    result JSONB,
+    error TEXT,
+    metadata JSONB NOT NULL DEFAULT '{}'::jsonb,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    "maxAttempts" INTEGER NOT NULL DEFAULT 3,
+    "runAt" TIMESTAMP NOT NULL DEFAULT NOW(),
+    "leaseOwner" VARCHAR(255),
+    "leaseExpiresAt" TIMESTAMP,
+    "createdAt" TIMESTAMP NOT NULL DEFAULT NOW(),
+    "updatedAt" TIMESTAMP NOT NULL DEFAULT NOW(),
+    "completedAt" TIMESTAMP
+);
+
+-- Claim: próximas pendentes de um tipo, na ordem de "runAt"
+CREATE INDEX IF NOT EXISTS idx_background_tasks_pending ON background_tasks("taskType", "runAt") WHERE status = 'pending';
+-- Reaper: leases vencidos
+CREATE INDEX IF NOT EXISTS idx_background_tasks_lease ON background_tasks("leaseExpiresAt") WHERE status = 'running';
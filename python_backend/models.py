@@ -63,18 +63,21 @@ class CategoryType(str, Enum):
     VIRAL = "viral"                   # Viral marketing (Jonah Berger)
     PRODUCT = "product"               # Product psychology & habits (Nir Eyal)
 
-class Expert(BaseModel):
+class ExpertSummary(BaseModel):
+    """Expert without systemPrompt (listings; prompts are several KB each)"""
     id: str
     name: str
     title: str
     expertise: List[str]
     bio: str
-    systemPrompt: str
     avatar: Optional[str] = None
     expertType: ExpertType = ExpertType.HIGH_FIDELITY
     category: CategoryType = CategoryType.MARKETING  # Default to marketing
     createdAt: datetime = Field(default_factory=datetime.utcnow)
 
+class Expert(ExpertSummary):
+    systemPrompt: str
+
 class ExpertCreate(BaseModel):
     name: str
     title: str
@@ -131,6 +134,12 @@ class BackgroundTask(BaseModel):
     createdAt: datetime = Field(default_factory=datetime.utcnow)
     updatedAt: datetime = Field(default_factory=datetime.utcnow)
     completedAt: Optional[datetime] = None
+    # Fila durável (background_tasks.TaskWorker)
+    attempts: int = 0  # Execuções iniciadas (incluindo a atual)
+    maxAttempts: int = 3
+    runAt: datetime = Field(default_factory=datetime.utcnow)  # Não executar antes (retry com backoff)
+    leaseOwner: Optional[str] = None  # Worker que está executando
+    leaseExpiresAt: Optional[datetime] = None  # Sem heartbeat até aqui = worker morreu
 
 class TaskCreate(BaseModel):
     """Request to create a new background task"""
@@ -178,6 +187,13 @@ class MessageResponse(BaseModel):
     """Response after sending a message"""
     message: Message
 
+class ConversationSummary(BaseModel):
+    """Rolling summary of the older turns of a conversation (expert or council chat)"""
+    conversationId: str
+    summary: str
+    coveredCount: int  # number of messages (oldest first) folded into the summary
+    updatedAt: datetime = Field(default_factory=datetime.utcnow)
+
 # =============================================================================
 # PERSONA MODELS
 # =============================================================================
@@ -272,21 +288,47 @@ class ActionPlan(BaseModel):
     estimatedBudget: Optional[str] = None
     successMetrics: List[str] = []
 
+class SkippedExpert(BaseModel):
+    """Expert left out of a council analysis"""
+    expertId: str
+    expertName: str
+    reason: Literal["deadline", "failed"]
+    detail: Optional[str] = None
+
 class CouncilAnalysis(BaseModel):
     """Council analysis result"""
     id: str
+    userId: Optional[str] = None
     problem: str
     personaId: Optional[str] = None
     contributions: List[ExpertContribution]
     consensus: str
     actionPlan: Optional[ActionPlan] = None
+    skippedExperts: List[SkippedExpert] = []
+    metadata: Dict[str, Any] = Field(default_factory=dict)  # ex: contributionCache hits/misses
     createdAt: datetime = Field(default_factory=datetime.utcnow)
 
+class CouncilAnalysisSummary(BaseModel):
+    """Council analysis listing item (no contributions/consensus/action plan bodies)"""
+    id: str
+    problemExcerpt: str
+    expertNames: List[str]
+    hasActionPlan: bool
+    createdAt: datetime
+
+class CouncilAnalysisPage(BaseModel):
+    """One page of the council analysis listing; pass nextCursor back to get the next one"""
+    items: List[CouncilAnalysisSummary]
+    nextCursor: Optional[str] = None
+
 class CouncilAnalysisCreate(BaseModel):
     """Request to create a council analysis"""
     problem: str
     personaId: str  # OBRIGATÓRIA
     expertIds: List[str]
+    # Orçamento de latência: ao atingir o prazo, segue com quem já respondeu (se houver quórum)
+    deadlineSeconds: Optional[float] = Field(None, gt=0, le=600)
+    quorum: Optional[int] = Field(None, ge=1)  # k de n experts necessários (padrão: 1)
 
 class CouncilConversation(BaseModel):
     """Conversation with council of experts"""
@@ -0,0 +1,42 @@
+"""
+Pagination
+==========
+
+Cursores de paginação por keyset para listagens ordenadas por ``createdAt``.
+
+Em vez de ``OFFSET`` (que relê e descarta as linhas das páginas anteriores), a
+próxima página começa logo depois do último item visto:
+``("createdAt", id) < (cursor)``, um range scan no índice
+``("userId", "createdAt" DESC, id DESC)``. O id desempata itens criados no
+mesmo instante. Para o cliente o cursor é opaco (base64 de ``createdAt|id``).
+"""
+
+import base64
+import binascii
+from datetime import datetime
+from typing import Tuple
+
+PROBLEM_EXCERPT_CHARS = 200
+
+
+def encode_cursor(created_at: datetime, item_id: str) -> str:
+    raw = f"{created_at.isoformat()}|{item_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """``(createdAt, id)`` do cursor; ValueError se ele não veio de ``encode_cursor``."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        created_at, item_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), item_id
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Cursor inválido: {cursor!r}") from e
+
+
+def excerpt(text: str, limit: int = PROBLEM_EXCERPT_CHARS) -> str:
+    """Primeiros ``limit`` caracteres, com reticências se o texto foi cortado."""
+    text = text.strip()
+    if len(text) <= limit:
+        return text
+    return text[:limit].rstrip() + "…"
@@ -7,6 +7,7 @@ import httpx
 import asyncio
 from typing import List, Dict, Optional, Any
 from python_backend.models import BusinessProfile
+from python_backend.http_clients import client_registry
 
 class PerplexityResearch:
     """Wrapper for Perplexity API with business context and lazy initialization"""
@@ -76,40 +77,41 @@ class PerplexityResearch:
             while retry_count <= max_retries:
                 try:
                     print(f"[PerplexityResearch] Trying model {model}, attempt {retry_count+1}/{max_retries+1}")
-                    async with httpx.AsyncClient(timeout=60.0) as client:
-                        response = await client.post(
-                            self.base_url,
-                            headers={
-                                "Authorization": f"Bearer {self.api_key}",
-                                "Content-Type": "application/json"
-                            },
-                            json={
-                                "model": model,
-                                "messages": [
-                                    {
-                                        "role": "system",
-                                        "content": (
-                                            "Você é um analista de pesquisa de mercado. SEMPRE responda em português brasileiro. "
-                                            "Forneça insights factuais e baseados em dados com estatísticas específicas, tendências e exemplos. "
-                                            "Foque em dados recentes (2024-2025). "
-                                            "Inclua análise competitiva e benchmarks do setor quando relevante."
-                                        )
-                                    },
-                                    {
-                                        "role": "user",
-                                        "content": query
-                                    }
-                                ],
-                                "temperature": 0.2,
-                                "search_recency_filter": "month",
-                                "return_related_questions": False
-                            }
-                        )
-                        response.raise_for_status()
-                        data = response.json()
-                        print(f"[PerplexityResearch] Successfully used model {model}")
-                        # Success! Break out of both loops
-                        break
+                    client = client_registry.http()
+                    response = await client.post(
+                        self.base_url,
+                        headers={
+                            "Authorization": f"Bearer {self.api_key}",
+                            "Content-Type": "application/json"
+                        },
+                        json={
+                            "model": model,
+                            "messages": [
+                                {
+                                    "role": "system",
+                                    "content": (
+                                        "Você é um analista de pesquisa de mercado. SEMPRE responda em português brasileiro. "
+                                        "Forneça insights factuais e baseados em dados com estatísticas específicas, tendências e exemplos. "
+                                        "Foque em dados recentes (2024-2025). "
+                                        "Inclua análise competitiva e benchmarks do setor quando relevante."
+                                    )
+                                },
+                                {
+                                    "role": "user",
+                                    "content": query
+                                }
+                            ],
+                            "temperature": 0.2,
+                            "search_recency_filter": "month",
+                            "return_related_questions": False
+                        },
+                        timeout=60.0
+                    )
+                    response.raise_for_status()
+                    data = response.json()
+                    print(f"[PerplexityResearch] Successfully used model {model}")
+                    # Success! Break out of both loops
+                    break
                 except httpx.HTTPStatusError as e:
                     print(f"[PerplexityResearch] HTTP error with model {model}: {e.response.status_code} - {e.response.text}")
                     # If it's a resource_exhausted error, we should propagate it immediately
@@ -14,6 +14,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from python_backend.validation import persona_validator
+from python_backend.rendered_context import rendered_context_cache
 
 # Create router
 router = APIRouter(prefix="/api/personas-modern", tags=["personas-modern"])
@@ -184,6 +185,7 @@ async def delete_modern_persona(
         #     raise HTTPException(status_code=403, detail="Not authorized to delete this persona")
         
         await storage.delete_persona_modern(persona_id)
+        await rendered_context_cache.invalidate_persona(persona_id)
         return None
     except HTTPException:
         raise
@@ -0,0 +1,59 @@
+"""
+PostgreSQL JSON Codecs
+======================
+
+Codecs de ``json``/``jsonb`` registrados em cada conexão do pool do asyncpg.
+
+Sem eles o asyncpg entrega colunas JSON como ``str`` e exige ``str`` na escrita,
+então cada método do ``PostgresStorage`` fazia ``json.dumps`` ao gravar e
+``json.loads`` (com ``isinstance(..., str)``) ao ler, linha a linha. Com os
+codecs a decodificação acontece uma vez, no driver, e parâmetros JSON recebem
+objetos Python direto (dict, list, ...).
+
+Usa orjson quando instalado (várias vezes mais rápido que o ``json`` da
+biblioteca padrão); sem ele, cai para ``json``.
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson é opcional
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    # Modelos Pydantic aninhados (ex.: Phase dentro do actionPlan) viram dict
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    # Demais tipos (Decimal, ...): como o json.dumps(..., default=str) usado antes
+    return str(value)
+
+
+if orjson is not None:
+    def json_dumps(value: Any) -> str:
+        # OPT_NON_STR_KEYS: chaves int/UUID viram str, como no json.dumps
+        return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    json_loads = orjson.loads
+else:
+    def json_dumps(value: Any) -> str:
+        return json.dumps(value, default=_default)
+
+    json_loads = json.loads
+
+
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+
+async def init_connection(connection) -> None:
+    """``init=`` do ``asyncpg.create_pool``: registra os codecs em cada conexão nova."""
+    for type_name in ("json", "jsonb"):
+        await connection.set_type_codec(
+            type_name,
+            encoder=json_dumps,
+            decoder=json_loads,
+            schema="pg_catalog",
+            format="text",
+        )
@@ -1,17 +1,19 @@
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 import uuid
 import asyncpg
 import os
-import json
 
 from python_backend.models import (
-    Expert, ExpertCreate, Conversation, ConversationCreate, 
+    Expert, ExpertCreate, ExpertSummary, Conversation, ConversationCreate, 
     Message, MessageSend,
     CouncilAnalysis, Persona, User, UserPreferences, UserPreferencesUpdate,
-    BackgroundTask, TaskStatus
+    BackgroundTask, TaskStatus, ConversationSummary, CouncilAnalysisSummary
 )
 from python_backend.models_persona import PersonaModern
+from python_backend.pagination import PROBLEM_EXCERPT_CHARS, excerpt
+from python_backend.pg_codecs import init_connection
+from python_backend.schema_migrations import apply_migrations
 
 class PostgresStorage:
     """PostgreSQL storage implementation."""
@@ -23,64 +25,17 @@ class PostgresStorage:
     async def connect(self):
         """Creates a connection pool."""
         if not self.pool:
-            self.pool = await asyncpg.create_pool(self.dsn)
+            # Colunas json/jsonb chegam e saem como objetos Python (ver pg_codecs)
+            pool = await asyncpg.create_pool(self.dsn, init=init_connection)
             print("Successfully connected to PostgreSQL.")
-            # Initialize schema (create tables if they don't exist)
-            await self._ensure_user_preferences_table()
-            await self._ensure_conversations_table()
-            await self._ensure_messages_table()
-
-    async def _ensure_user_preferences_table(self):
-        """Ensure user_preferences table exists, create if not."""
-        try:
-            # Check if table exists
-            check_query = """
-                SELECT EXISTS (
-                    SELECT FROM information_schema.tables 
-                    WHERE table_schema = 'public' 
-                    AND table_name = 'user_preferences'
-                );
-            """
-            exists_record = await self._fetchrow(check_query)
-            exists = exists_record[0] if exists_record else False
-            
-            if not exists:
-                # Create table
-                create_table_query = """
-                    CREATE TABLE IF NOT EXISTS user_preferences (
-                        user_id VARCHAR(255) PRIMARY KEY,
-                        style_preference VARCHAR(20) CHECK (style_preference IN ('objetivo', 'detalhado')),
-                        focus_preference VARCHAR(20) CHECK (focus_preference IN ('ROI-first', 'brand-first')),
-                        tone_preference VARCHAR(20) CHECK (tone_preference IN ('prático', 'estratégico')),
-                        communication_preference VARCHAR(20) CHECK (communication_preference IN ('bullets', 'blocos')),
-                        conversation_style VARCHAR(20) CHECK (conversation_style IN ('coach', 'consultor', 'direto')),
-                        created_at TIMESTAMP DEFAULT NOW(),
-                        updated_at TIMESTAMP DEFAULT NOW()
-                    );
-                    
-                    CREATE INDEX IF NOT EXISTS idx_user_preferences_user_id ON user_preferences(user_id);
-                    
-                    CREATE OR REPLACE FUNCTION update_user_preferences_updated_at()
-                    RETURNS TRIGGER AS $$
-                    BEGIN
-                        NEW.updated_at = NOW();
-                        RETURN NEW;
-                    END;
-                    $$ LANGUAGE plpgsql;
-                    
-                    DROP TRIGGER IF EXISTS trigger_update_user_preferences_updated_at ON user_preferences;
-                    CREATE TRIGGER trigger_update_user_preferences_updated_at
-                        BEFORE UPDATE ON user_preferences
-                        FOR EACH ROW
-                        EXECUTE FUNCTION update_user_preferences_updated_at();
-                """
-                await self._execute(create_table_query)
-                print("Created user_preferences table.")
-            else:
-                print("user_preferences table already exists.")
-        except Exception as e:
-            print(f"Warning: Could not ensure user_preferences table exists: {e}")
-            # Don't raise, allow app to continue
+            # Schema versionado (migrations/*.sql), aplicado uma vez aqui em vez de checado a cada chamada.
+            # O pool só fica visível depois das migrations: nenhuma query roda contra um schema incompleto
+            try:
+                await apply_migrations(pool)
+            except BaseException:
+                await pool.close()
+                raise
+            self.pool = pool
 
     async def close(self):
         """Closes the connection pool."""
@@ -109,6 +64,27 @@ class PostgresStorage:
         async with self.pool.acquire() as connection:
             return await connection.fetchrow(query, *args)
 
+    async def _fetchval(self, query: str, *args):
+        """Helper to fetch a single value."""
+        if not self.pool:
+            await self.connect()
+        async with self.pool.acquire() as connection:
+            return await connection.fetchval(query, *args)
+
+    # NOTIFICATIONS (LISTEN/NOTIFY entre workers)
+    async def notify(self, channel: str, payload: str = "") -> None:
+        """Publishes a notification to every connection listening on channel."""
+        await self._execute("SELECT pg_notify($1, $2)", channel, payload)
+
+    async def listen(self, channel: str, callback) -> asyncpg.Connection:
+        """
+        Opens a dedicated connection (outside the pool) listening on channel.
+        callback(payload) runs on the event loop; the caller closes the connection.
+        """
+        connection = await asyncpg.connect(self.dsn)
+        await connection.add_listener(channel, lambda _conn, _pid, _channel, payload: callback(payload))
+        return connection
+
     # USER OPERATIONS (To be implemented)
     async def create_user(self, email: str, password_hash: str, name: Optional[str] = None) -> User:
         raise NotImplementedError
@@ -213,19 +189,11 @@ class PostgresStorage:
     # EXPERT OPERATIONS
     async def create_expert(self, data: ExpertCreate, expert_id: Optional[str] = None) -> Expert:
         """Creates an expert in the database."""
-        from python_backend.models import ExpertType, CategoryType
-        import asyncpg
-        import json
-        
         if expert_id is None:
             expert_id = str(uuid.uuid4())
         
-        # Garantir que a tabela experts existe
-        await self._ensure_experts_table()
-        
-        # expertise deve ser convertido para JSON (campo é JSONB no PostgreSQL)
+        # expertise é JSONB: o codec do pool serializa a lista
         expertise_list = data.expertise if isinstance(data.expertise, list) else []
-        expertise_json = json.dumps(expertise_list)
         
         query = """
             INSERT INTO experts (id, name, title, expertise, bio, "systemPrompt", avatar, "expertType", category)
@@ -233,228 +201,91 @@ class PostgresStorage:
             RETURNING *;
         """
         
-        try:
-            record = await self._fetchrow(
-                query, expert_id, data.name, data.title, expertise_json, data.bio,
-                data.systemPrompt, data.avatar, data.expertType.value, data.category.value
-            )
-        except asyncpg.exceptions.UndefinedTableError:
-            # Tabela não existe, criar e tentar novamente
-            await self._create_experts_table()
-            record = await self._fetchrow(
-                query, expert_id, data.name, data.title, expertise_json, data.bio,
-                data.systemPrompt, data.avatar, data.expertType.value, data.category.value
-            )
+        record = await self._fetchrow(
+            query, expert_id, data.name, data.title, expertise_list, data.bio,
+            data.systemPrompt, data.avatar, data.expertType.value, data.category.value
+        )
+        return self._expert_from_record(record)
+
+    @staticmethod
+    def _expert_from_record(record) -> Expert:
+        """Maps an experts row (camelCase or snake_case columns) to the Expert model."""
+        return Expert(**PostgresStorage._expert_fields(record))
+
+    @staticmethod
+    def _expert_fields(record) -> dict:
+        """Expert model fields from an experts row; systemPrompt is "" when not selected."""
+        from python_backend.models import ExpertType, CategoryType
         
         # Convert record to dict and handle field name mapping
         expert_dict = dict(record)
         
-        # Parse expertise from JSON if needed
-        expertise_data = expert_dict.get("expertise", [])
-        if isinstance(expertise_data, str):
-            try:
-                expertise_data = json.loads(expertise_data)
-            except:
-                expertise_data = []
-        elif expertise_data is None:
-            expertise_data = []
-        
         # Map database fields to Expert model fields
         mapped_dict = {
             "id": str(expert_dict.get("id", "")),
             "name": expert_dict.get("name", ""),
             "title": expert_dict.get("title", ""),
-            "expertise": expertise_data,
+            "expertise": expert_dict.get("expertise") or [],
             "bio": expert_dict.get("bio", ""),
-            "systemPrompt": expert_dict.get("systemPrompt") or expert_dict.get("system_prompt", ""),
+            "systemPrompt": expert_dict.get("systemPrompt") or "",
             "avatar": expert_dict.get("avatar"),
-            "expertType": ExpertType(expert_dict.get("expertType") or expert_dict.get("expert_type", "high_fidelity")),
+            "expertType": ExpertType(expert_dict.get("expertType") or "high_fidelity"),
             "category": CategoryType(expert_dict.get("category", "marketing")),
-            "createdAt": expert_dict.get("createdAt") or expert_dict.get("created_at") or datetime.utcnow()
+            "createdAt": expert_dict.get("createdAt") or datetime.utcnow()
         }
         
-        return Expert(**mapped_dict)
+        return mapped_dict
 
     async def get_expert(self, expert_id: str) -> Optional[Expert]:
         """Fetches a single expert by ID."""
-        from python_backend.models import ExpertType, CategoryType
-        import asyncpg
-        
-        # Garantir que a tabela existe
-        await self._ensure_experts_table()
-        
-        try:
-            record = await self._fetchrow("SELECT * FROM experts WHERE id = $1", expert_id)
-        except asyncpg.exceptions.UndefinedTableError:
-            await self._create_experts_table()
-            return None
-            
+        record = await self._fetchrow("SELECT * FROM experts WHERE id = $1", expert_id)
         if not record:
             return None
+        return self._expert_from_record(record)
+
+    async def get_experts_by_ids(self, expert_ids: List[str]) -> List[Expert]:
+        """Fetches several experts in one query, in the order of expert_ids (unknown ids are skipped)."""
+        if not expert_ids:
+            return []
+        records = await self._fetch("SELECT * FROM experts WHERE id = ANY($1::varchar[])", list(expert_ids))
         
-        # Convert record to dict and handle field name mapping
-        expert_dict = dict(record)
-        
-        # Parse expertise from JSON if needed
-        expertise_data = expert_dict.get("expertise", [])
-        if isinstance(expertise_data, str):
+        by_id = {}
+        for record in records:
             try:
-                expertise_data = json.loads(expertise_data)
-            except:
-                expertise_data = []
-        elif expertise_data is None:
-            expertise_data = []
-        
-        # Map database fields to Expert model fields
-        # Handle both camelCase (quoted) and snake_case field names
-        mapped_dict = {
-            "id": str(expert_dict.get("id", "")),
-            "name": expert_dict.get("name", ""),
-            "title": expert_dict.get("title", ""),
-            "expertise": expertise_data,
-            "bio": expert_dict.get("bio", ""),
-            "systemPrompt": expert_dict.get("systemPrompt") or expert_dict.get("system_prompt", ""),
-            "avatar": expert_dict.get("avatar"),
-            "expertType": ExpertType(expert_dict.get("expertType") or expert_dict.get("expert_type", "high_fidelity")),
-            "category": CategoryType(expert_dict.get("category", "marketing")),
-            "createdAt": expert_dict.get("createdAt") or expert_dict.get("created_at") or datetime.utcnow()
-        }
-        
-        return Expert(**mapped_dict)
+                expert = self._expert_from_record(record)
+                by_id[expert.id] = expert
+            except Exception as e:
+                print(f"[PostgresStorage] Error converting expert record to Expert model: {e}")
+        return [by_id[expert_id] for expert_id in expert_ids if expert_id in by_id]
 
-    async def _ensure_experts_table(self):
-        """Ensure experts table exists, create if not."""
-        try:
-            check_query = """
-                SELECT EXISTS (
-                    SELECT FROM information_schema.tables 
-                    WHERE table_schema = 'public' 
-                    AND table_name = 'experts'
-                );
-            """
-            exists_record = await self._fetchrow(check_query)
-            exists = exists_record[0] if exists_record else False
-            
-            if not exists:
-                await self._create_experts_table()
-        except Exception as e:
-            print(f"[PostgresStorage] Warning checking experts table: {e}")
-            # Try to create anyway
-            try:
-                await self._create_experts_table()
-            except:
-                pass
-    
-    async def _create_experts_table(self):
-        """Create experts table if it doesn't exist"""
-        query = """
-            CREATE TABLE IF NOT EXISTS experts (
-                id VARCHAR(255) PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                title VARCHAR(255) NOT NULL,
-                expertise JSONB NOT NULL DEFAULT '[]'::jsonb,
-                bio TEXT NOT NULL,
-                "systemPrompt" TEXT NOT NULL,
-                avatar VARCHAR(500),
-                "expertType" VARCHAR(50) NOT NULL DEFAULT 'high_fidelity',
-                category VARCHAR(50) NOT NULL DEFAULT 'marketing',
-                "createdAt" TIMESTAMP NOT NULL DEFAULT NOW()
-            );
+    async def get_expert_summaries(self) -> List[ExpertSummary]:
         """
-        await self._execute(query)
-        print("[PostgresStorage] Created experts table.")
-    
-    async def _create_conversations_table(self):
-        """Create conversations table if it doesn't exist"""
-        query = """
-            CREATE TABLE IF NOT EXISTS conversations (
-                id VARCHAR(255) PRIMARY KEY,
-                "userId" VARCHAR(255) NOT NULL DEFAULT 'default_user',
-                "expertId" VARCHAR(255) NOT NULL,
-                title VARCHAR(500) NOT NULL,
-                "createdAt" TIMESTAMP NOT NULL DEFAULT NOW(),
-                "updatedAt" TIMESTAMP NOT NULL DEFAULT NOW()
-            );
-        """
-        await self._execute(query)
-        print("[PostgresStorage] Created conversations table.")
-    
-    async def _create_messages_table(self):
-        """Create messages table if it doesn't exist"""
-        query = """
-            CREATE TABLE IF NOT EXISTS messages (
-                id VARCHAR(255) PRIMARY KEY,
-                "conversationId" VARCHAR(255) NOT NULL,
-                role VARCHAR(20) NOT NULL,
-                content TEXT NOT NULL,
-                "createdAt" TIMESTAMP NOT NULL DEFAULT NOW(),
-                FOREIGN KEY ("conversationId") REFERENCES conversations(id) ON DELETE CASCADE
-            );
+        Fetches all experts without systemPrompt. The prompt column is never
+        selected, so its (TOASTed, several KB) values are not read or sent.
         """
-        await self._execute(query)
-        print("[PostgresStorage] Created messages table.")
-    
-    async def _ensure_conversations_table(self):
-        """Ensure conversations table exists"""
-        try:
-            await self._execute('SELECT 1 FROM conversations LIMIT 1')
-        except:
-            await self._create_conversations_table()
-    
-    async def _ensure_messages_table(self):
-        """Ensure messages table exists"""
-        try:
-            await self._execute('SELECT 1 FROM messages LIMIT 1')
-        except:
-            await self._create_messages_table()
+        records = await self._fetch(
+            'SELECT id, name, title, expertise, bio, avatar, "expertType", category, "createdAt" '
+            'FROM experts ORDER BY name'
+        )
+        
+        summaries = []
+        for record in records:
+            try:
+                fields = self._expert_fields(record)
+                fields.pop("systemPrompt")
+                summaries.append(ExpertSummary(**fields))
+            except Exception as e:
+                print(f"[PostgresStorage] Error converting expert record to ExpertSummary: {e}")
+        return summaries
 
     async def get_experts(self) -> List[Expert]:
         """Fetches all experts from the database."""
-        from python_backend.models import ExpertType, CategoryType
-        import asyncpg
-        
-        # Garantir que a tabela existe
-        await self._ensure_experts_table()
-        
-        try:
-            records = await self._fetch("SELECT * FROM experts ORDER BY name")
-        except asyncpg.exceptions.UndefinedTableError:
-            # Tabela não existe, criar e retornar vazio
-            await self._create_experts_table()
-            return []
+        records = await self._fetch("SELECT * FROM experts ORDER BY name")
         
         experts = []
         for record in records:
             try:
-                # Convert record to dict and handle field name mapping
-                expert_dict = dict(record)
-                
-                # Parse expertise from JSON if needed
-                expertise_data = expert_dict.get("expertise", [])
-                if isinstance(expertise_data, str):
-                    try:
-                        expertise_data = json.loads(expertise_data)
-                    except:
-                        expertise_data = []
-                elif expertise_data is None:
-                    expertise_data = []
-                
-                # Map database fields to Expert model fields
-                mapped_dict = {
-                    "id": str(expert_dict.get("id", "")),
-                    "name": expert_dict.get("name", ""),
-                    "title": expert_dict.get("title", ""),
-                    "expertise": expertise_data,
-                    "bio": expert_dict.get("bio", ""),
-                    "systemPrompt": expert_dict.get("systemPrompt") or expert_dict.get("system_prompt", ""),
-                    "avatar": expert_dict.get("avatar"),
-                    "expertType": ExpertType(expert_dict.get("expertType") or expert_dict.get("expert_type", "high_fidelity")),
-                    "category": CategoryType(expert_dict.get("category", "marketing")),
-                    "createdAt": expert_dict.get("createdAt") or expert_dict.get("created_at") or datetime.utcnow()
-                }
-                
-                expert = Expert(**mapped_dict)
-                experts.append(expert)
+                experts.append(self._expert_from_record(record))
             except Exception as e:
                 print(f"[PostgresStorage] Error converting expert record to Expert model: {e}")
                 print(f"[PostgresStorage] Record data: {dict(record)}")
@@ -475,34 +306,13 @@ class PostgresStorage:
         if not record:
             return None
         
-        # Convert record to dict and handle field name mapping
-        expert_dict = dict(record)
-        
-        # Map database fields to Expert model fields
-        mapped_dict = {
-            "id": str(expert_dict.get("id", "")),
-            "name": expert_dict.get("name", ""),
-            "title": expert_dict.get("title", ""),
-            "expertise": expert_dict.get("expertise", []),
-            "bio": expert_dict.get("bio", ""),
-            "systemPrompt": expert_dict.get("systemPrompt") or expert_dict.get("system_prompt", ""),
-            "avatar": expert_dict.get("avatar"),
-            "expertType": ExpertType(expert_dict.get("expertType") or expert_dict.get("expert_type", "high_fidelity")),
-            "category": CategoryType(expert_dict.get("category", "marketing")),
-            "createdAt": expert_dict.get("createdAt") or expert_dict.get("created_at") or datetime.utcnow()
-        }
-        
-        return Expert(**mapped_dict)
+        # expertise já chega como lista (antes vinha como str e quebrava o Expert)
+        return self._expert_from_record(record)
 
     # CONVERSATION & MESSAGE OPERATIONS
     async def create_conversation(self, data: ConversationCreate) -> Conversation:
         """Creates a conversation in the database."""
         conversation_id = str(uuid.uuid4())
-        # Ensure userId column exists (migration)
-        try:
-            await self._execute('ALTER TABLE conversations ADD COLUMN IF NOT EXISTS "userId" VARCHAR(255) DEFAULT \'default_user\'')
-        except:
-            pass  # Column may already exist
         
         query = """
             INSERT INTO conversations (id, "expertId", title, "userId", "createdAt", "updatedAt")
@@ -511,22 +321,7 @@ class PostgresStorage:
         """
         record = await self._fetchrow(query, conversation_id, data.expertId, data.title)
         
-        # Map field names (PostgreSQL may return lowercase)
-        record_dict = dict(record)
-        if "userid" in record_dict and "userId" not in record_dict:
-            record_dict["userId"] = record_dict.get("userid") or "default_user"
-        if "expertid" in record_dict and "expertId" not in record_dict:
-            record_dict["expertId"] = record_dict["expertid"]
-        if "createdat" in record_dict and "createdAt" not in record_dict:
-            record_dict["createdAt"] = record_dict["createdat"]
-        if "updatedat" in record_dict and "updatedAt" not in record_dict:
-            record_dict["updatedAt"] = record_dict["updatedat"]
-        
-        # Ensure userId exists (add default if missing)
-        if "userId" not in record_dict:
-            record_dict["userId"] = "default_user"
-        
-        return Conversation(**record_dict)
+        return Conversation(**dict(record))
 
     async def get_conversation(self, conversation_id: str) -> Optional[Conversation]:
         """Fetches a single conversation by ID."""
@@ -534,22 +329,7 @@ class PostgresStorage:
         if not record:
             return None
         
-        # Map field names (PostgreSQL may return lowercase)
-        record_dict = dict(record)
-        if "userid" in record_dict and "userId" not in record_dict:
-            record_dict["userId"] = record_dict.get("userid") or "default_user"
-        if "expertid" in record_dict and "expertId" not in record_dict:
-            record_dict["expertId"] = record_dict["expertid"]
-        if "createdat" in record_dict and "createdAt" not in record_dict:
-            record_dict["createdAt"] = record_dict["createdat"]
-        if "updatedat" in record_dict and "updatedAt" not in record_dict:
-            record_dict["updatedAt"] = record_dict["updatedat"]
-        
-        # Ensure userId exists
-        if "userId" not in record_dict:
-            record_dict["userId"] = "default_user"
-        
-        return Conversation(**record_dict)
+        return Conversation(**dict(record))
 
     async def get_conversations(self, expert_id: Optional[str] = None) -> List[Conversation]:
         """Fetches conversations, optionally filtered by expert."""
@@ -561,26 +341,7 @@ class PostgresStorage:
         else:
             records = await self._fetch('SELECT * FROM conversations ORDER BY "updatedAt" DESC')
         
-        # Map field names for each record
-        conversations = []
-        for record in records:
-            record_dict = dict(record)
-            if "userid" in record_dict and "userId" not in record_dict:
-                record_dict["userId"] = record_dict.get("userid") or "default_user"
-            if "expertid" in record_dict and "expertId" not in record_dict:
-                record_dict["expertId"] = record_dict["expertid"]
-            if "createdat" in record_dict and "createdAt" not in record_dict:
-                record_dict["createdAt"] = record_dict["createdat"]
-            if "updatedat" in record_dict and "updatedAt" not in record_dict:
-                record_dict["updatedAt"] = record_dict["updatedat"]
-            
-            # Ensure userId exists
-            if "userId" not in record_dict:
-                record_dict["userId"] = "default_user"
-            
-            conversations.append(Conversation(**record_dict))
-        
-        return conversations
+        return [Conversation(**dict(record)) for record in records]
 
     async def create_message(self, data: MessageSend) -> Message:
         """Creates a message in the database."""
@@ -598,14 +359,42 @@ class PostgresStorage:
             data.conversationId
         )
         
-        # Map field names
-        record_dict = dict(record)
-        if "conversationid" in record_dict and "conversationId" not in record_dict:
-            record_dict["conversationId"] = record_dict["conversationid"]
-        if "createdat" in record_dict and "createdAt" not in record_dict:
-            record_dict["createdAt"] = record_dict["createdat"]
-        
-        return Message(**record_dict)
+        return self._message_from_record(record)
+
+    async def create_message_pair(self, conversation_id: str, user_content: str, assistant_content: str) -> Tuple[Message, Message]:
+        """
+        Persists one chat turn (user message + assistant reply) and touches the
+        conversation's updatedAt in a single statement: one pool acquire, one
+        round-trip, atomic. The reply is stamped 1µs after the question so
+        ORDER BY "createdAt" keeps them in order.
+        """
+        query = """
+            WITH inserted AS (
+                INSERT INTO messages (id, "conversationId", role, content, "createdAt")
+                VALUES
+                    ($1, $3, 'user', $4, NOW()),
+                    ($2, $3, 'assistant', $5, NOW() + INTERVAL '1 microsecond')
+                RETURNING *
+            ), touched AS (
+                UPDATE conversations SET "updatedAt" = NOW() WHERE id = $3
+            )
+            SELECT * FROM inserted ORDER BY "createdAt";
+        """
+        records = await self._fetch(
+            query, str(uuid.uuid4()), str(uuid.uuid4()), conversation_id, user_content, assistant_content
+        )
+        user_message, assistant_message = (self._message_from_record(record) for record in records)
+        return user_message, assistant_message
+
+    @staticmethod
+    def _message_from_record(record) -> Message:
+        return Message(
+            id=record["id"],
+            conversationId=record["conversationId"],
+            role=record["role"],
+            content=record["content"],
+            timestamp=record["createdAt"]
+        )
 
     async def get_messages(self, conversation_id: str) -> List[Message]:
         """Fetches all messages for a conversation."""
@@ -614,19 +403,30 @@ class PostgresStorage:
             conversation_id
         )
         
-        # Map field names for each message
-        messages = []
-        for record in records:
-            record_dict = dict(record)
-            # Map lowercase fields to camelCase
-            if "conversationid" in record_dict and "conversationId" not in record_dict:
-                record_dict["conversationId"] = record_dict["conversationid"]
-            if "createdat" in record_dict and "createdAt" not in record_dict:
-                record_dict["createdAt"] = record_dict["createdat"]
-            
-            messages.append(Message(**record_dict))
-        
-        return messages
+        return [self._message_from_record(record) for record in records]
+
+    # CONVERSATION MEMORY (ROLLING SUMMARY) OPERATIONS
+    async def get_conversation_summary(self, conversation_id: str) -> Optional[ConversationSummary]:
+        """Fetches the rolling summary of a conversation's older messages."""
+        record = await self._fetchrow(
+            'SELECT * FROM conversation_summaries WHERE "conversationId" = $1',
+            conversation_id
+        )
+        return ConversationSummary(**dict(record)) if record else None
+
+    async def save_conversation_summary(self, conversation_id: str, summary: str, covered_count: int) -> ConversationSummary:
+        """Saves (upserts) the rolling summary of a conversation."""
+        query = """
+            INSERT INTO conversation_summaries ("conversationId", summary, "coveredCount", "updatedAt")
+            VALUES ($1, $2, $3, NOW())
+            ON CONFLICT ("conversationId") DO UPDATE SET
+                summary = EXCLUDED.summary,
+                "coveredCount" = EXCLUDED."coveredCount",
+                "updatedAt" = EXCLUDED."updatedAt"
+            RETURNING *;
+        """
+        record = await self._fetchrow(query, conversation_id, summary, covered_count)
+        return ConversationSummary(**dict(record))
 
     # BUSINESS PROFILE OPERATIONS
     async def save_business_profile(self, user_id: str, data: dict) -> dict:
@@ -754,147 +554,179 @@ class PostgresStorage:
     # COUNCIL ANALYSIS & PERSONA OPERATIONS
     async def save_council_analysis(self, analysis: CouncilAnalysis) -> CouncilAnalysis:
         """Save council analysis to database"""
-        from python_backend.models import CouncilAnalysis
-        import json
+        query = """
+            INSERT INTO council_analyses (id, "userId", problem, "personaId", contributions, consensus, "actionPlan", "skippedExperts", metadata, "createdAt", "expertNames")
+            VALUES ($1, $2, $3, $4, $5::jsonb, $6, $7::jsonb, $8::jsonb, $9::jsonb, $10, $11::text[])
+            ON CONFLICT (id) DO UPDATE SET
+                consensus = EXCLUDED.consensus,
+                "actionPlan" = EXCLUDED."actionPlan",
+                "skippedExperts" = EXCLUDED."skippedExperts",
+                metadata = EXCLUDED.metadata,
+                "renderedContext" = NULL;
+        """
         
-        # Ensure table exists
-        try:
-            query = """
-                INSERT INTO council_analyses (id, "userId", problem, "personaId", contributions, consensus, "actionPlan", "createdAt")
-                VALUES ($1, $2, $3, $4, $5::jsonb, $6, $7::jsonb, $8)
-                ON CONFLICT (id) DO UPDATE SET
-                    consensus = EXCLUDED.consensus,
-                    "actionPlan" = EXCLUDED."actionPlan";
-            """
-            
-            # Serialize contributions and actionPlan to JSON
-            contributions_json = json.dumps([{
-                "expertId": c.expertId,
-                "expertName": c.expertName,
-                "analysis": c.analysis,
-                "keyInsights": c.keyInsights,
-                "recommendations": c.recommendations
-            } for c in analysis.contributions])
-            
-            action_plan_json = None
-            if analysis.actionPlan:
-                action_plan_json = json.dumps({
-                    "phases": analysis.actionPlan.phases,
-                    "totalDuration": analysis.actionPlan.totalDuration
-                })
-            
-            await self._execute(
-                query,
-                analysis.id,
-                analysis.userId,
-                analysis.problem,
-                analysis.personaId,
-                contributions_json,
-                analysis.consensus,
-                action_plan_json,
-                analysis.createdAt
-            )
-            
-            return analysis
-            
-        except asyncpg.exceptions.UndefinedTableError:
-            # Create table and retry
-            await self._create_council_analyses_table()
-            await self._execute(
-                query,
-                analysis.id,
-                analysis.userId,
-                analysis.problem,
-                analysis.personaId,
-                contributions_json,
-                analysis.consensus,
-                action_plan_json,
-                analysis.createdAt
-            )
-            return analysis
+        # Colunas JSONB: o codec do pool serializa (ver pg_codecs)
+        contributions_data = [{
+            "expertId": c.expertId,
+            "expertName": c.expertName,
+            "analysis": c.analysis,
+            "keyInsights": c.keyInsights,
+            "recommendations": c.recommendations
+        } for c in analysis.contributions]
+        
+        action_plan_data = analysis.actionPlan.model_dump() if analysis.actionPlan else None
+        
+        skipped_data = [s.model_dump() for s in analysis.skippedExperts]
+        
+        await self._execute(
+            query,
+            analysis.id,
+            analysis.userId,
+            analysis.problem,
+            analysis.personaId,
+            contributions_data,
+            analysis.consensus,
+            action_plan_data,
+            skipped_data,
+            analysis.metadata,
+            analysis.createdAt,
+            [c.expertName for c in analysis.contributions]
+        )
+        
+        return analysis
+
+    async def get_rendered_context(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        """Get the chat context rendered from a council analysis (None if not rendered yet)"""
+        query = 'SELECT "renderedContext" FROM council_analyses WHERE id = $1'
+        value = await self._fetchval(query, analysis_id)
+        return value or None
+
+    async def save_rendered_context(self, analysis_id: str, rendered: Dict[str, Any]) -> None:
+        """Store the rendered chat context next to its council analysis"""
+        query = 'UPDATE council_analyses SET "renderedContext" = $2::jsonb WHERE id = $1'
+        await self._execute(query, analysis_id, rendered)
+
+    @staticmethod
+    def _council_analysis_from_record(record) -> CouncilAnalysis:
+        """Maps a council_analyses row to CouncilAnalysis (JSONB columns arrive decoded)."""
+        from python_backend.models import ExpertContribution, ActionPlan
+        
+        action_plan_data = record.get("actionPlan")
+        return CouncilAnalysis(
+            id=record["id"],
+            userId=record.get("userId"),
+            problem=record["problem"],
+            personaId=record.get("personaId"),
+            contributions=[ExpertContribution(**c) for c in record["contributions"]],
+            consensus=record["consensus"],
+            actionPlan=ActionPlan(**action_plan_data) if action_plan_data else None,
+            skippedExperts=record.get("skippedExperts") or [],
+            metadata=record.get("metadata") or {},
+            createdAt=record.get("createdAt")
+        )
 
     async def get_council_analysis(self, analysis_id: str) -> Optional[CouncilAnalysis]:
         """Get council analysis from database"""
-        from python_backend.models import CouncilAnalysis, ExpertContribution, ActionPlan
-        import json
-        
         query = 'SELECT * FROM council_analyses WHERE id = $1'
         
         try:
             record = await self._fetchrow(query, analysis_id)
             if not record:
                 return None
-            
-            # Deserialize contributions
-            contributions_data = json.loads(record["contributions"]) if isinstance(record["contributions"], str) else record["contributions"]
-            contributions = [ExpertContribution(**c) for c in contributions_data]
-            
-            # Deserialize action plan if exists
-            action_plan = None
-            action_plan_data = record.get("actionPlan")
-            if action_plan_data:
-                action_plan_dict = json.loads(action_plan_data) if isinstance(action_plan_data, str) else action_plan_data
-                action_plan = ActionPlan(**action_plan_dict)
-            
-            return CouncilAnalysis(
-                id=record["id"],
-                userId=record.get("userId") or record.get("userid"),
-                problem=record["problem"],
-                personaId=record.get("personaId") or record.get("personaid"),
-                contributions=contributions,
-                consensus=record["consensus"],
-                actionPlan=action_plan,
-                createdAt=record.get("createdAt") or record.get("createdat")
-            )
-        except asyncpg.exceptions.UndefinedTableError:
-            # Table doesn't exist yet
-            await self._create_council_analyses_table()
-            return None
+            return self._council_analysis_from_record(record)
         except Exception as e:
             print(f"[PostgresStorage] Erro ao buscar análise: {e}")
             return None
 
     async def get_council_analyses(self, user_id: str) -> List[CouncilAnalysis]:
         """Get all council analyses for a user"""
-        from python_backend.models import CouncilAnalysis, ExpertContribution, ActionPlan
-        import json
-        
         query = 'SELECT * FROM council_analyses WHERE "userId" = $1 ORDER BY "createdAt" DESC'
         
         try:
             records = await self._fetch(query, user_id)
-            analyses = []
-            
-            for record in records:
-                # Deserialize contributions
-                contributions_data = json.loads(record["contributions"]) if isinstance(record["contributions"], str) else record["contributions"]
-                contributions = [ExpertContribution(**c) for c in contributions_data]
-                
-                # Deserialize action plan if exists
-                action_plan = None
-                action_plan_data = record.get("actionPlan")
-                if action_plan_data:
-                    action_plan_dict = json.loads(action_plan_data) if isinstance(action_plan_data, str) else action_plan_data
-                    action_plan = ActionPlan(**action_plan_dict)
-                
-                analyses.append(CouncilAnalysis(
-                    id=record["id"],
-                    userId=record.get("userId") or record.get("userid"),
-                    problem=record["problem"],
-                    personaId=record.get("personaId") or record.get("personaid"),
-                    contributions=contributions,
-                    consensus=record["consensus"],
-                    actionPlan=action_plan,
-                    createdAt=record.get("createdAt") or record.get("createdat")
-                ))
-            
-            return analyses
-        except asyncpg.exceptions.UndefinedTableError:
-            await self._create_council_analyses_table()
-            return []
+            return [self._council_analysis_from_record(record) for record in records]
         except Exception as e:
             print(f"[PostgresStorage] Erro ao listar análises: {e}")
             return []
+    
+    # Projeção da listagem: só colunas pequenas ("contributions"/"actionPlan" não são lidos)
+    _ANALYSIS_SUMMARY_COLUMNS = (
+        f'id, left(problem, {PROBLEM_EXCERPT_CHARS + 1}) AS problem, "expertNames", '
+        '"actionPlan" IS NOT NULL AS "hasActionPlan", "createdAt"'
+    )
+    
+    async def get_council_analysis_summaries(self, user_id: str, limit: int, before: Optional[Tuple[datetime, str]] = None) -> List[CouncilAnalysisSummary]:
+        """Listing projection of a user's analyses, newest first, keyset-paginated by (createdAt, id)"""
+        # Range scan em idx_council_analyses_user_created_id ("userId", "createdAt" DESC, id DESC)
+        if before is None:
+            records = await self._fetch(
+                f'SELECT {self._ANALYSIS_SUMMARY_COLUMNS} FROM council_analyses '
+                'WHERE "userId" = $1 ORDER BY "createdAt" DESC, id DESC LIMIT $2',
+                user_id, limit
+            )
+        else:
+            records = await self._fetch(
+                f'SELECT {self._ANALYSIS_SUMMARY_COLUMNS} FROM council_analyses '
+                'WHERE "userId" = $1 AND ("createdAt", id) < ($3, $4) ORDER BY "createdAt" DESC, id DESC LIMIT $2',
+                user_id, limit, before[0], before[1]
+            )
+        return [
+            CouncilAnalysisSummary(
+                id=record["id"],
+                problemExcerpt=excerpt(record["problem"]),
+                expertNames=list(record["expertNames"] or []),
+                hasActionPlan=record["hasActionPlan"],
+                createdAt=record["createdAt"],
+            )
+            for record in records
+        ]
+    
+    # CONTRIBUTION CACHE (persistent tier of ContributionCache)
+    async def get_cached_contribution(self, cache_key: str) -> Optional[dict]:
+        """Get a non-expired cached contribution, bumping its hit counter"""
+        query = """
+            UPDATE council_contribution_cache
+            SET hits = hits + 1, last_hit_at = NOW()
+            WHERE cache_key = $1 AND expires_at > NOW()
+            RETURNING contribution;
+        """
+        record = await self._fetchrow(query, cache_key)
+        if not record:
+            return None
+        return record["contribution"]
+    
+    async def save_cached_contribution(self, cache_key: str, expert_id: str, contribution: dict, ttl_seconds: int) -> None:
+        """Insert or refresh a cached contribution with a TTL"""
+        query = """
+            INSERT INTO council_contribution_cache (cache_key, expert_id, contribution, expires_at)
+            VALUES ($1, $2, $3::jsonb, NOW() + make_interval(secs => $4))
+            ON CONFLICT (cache_key) DO UPDATE SET
+                contribution = EXCLUDED.contribution,
+                expires_at = EXCLUDED.expires_at;
+        """
+        args = (cache_key, expert_id, contribution, float(ttl_seconds))
+        await self._execute(query, *args)
+    
+    async def evict_contribution_cache(self, max_entries: int) -> int:
+        """Delete expired entries, then the least recently hit ones above max_entries"""
+        query = """
+            WITH expired AS (
+                DELETE FROM council_contribution_cache WHERE expires_at <= NOW()
+                RETURNING cache_key
+            ), overflow AS (
+                DELETE FROM council_contribution_cache
+                WHERE cache_key IN (
+                    SELECT cache_key FROM council_contribution_cache
+                    WHERE expires_at > NOW()
+                    ORDER BY last_hit_at DESC
+                    OFFSET $1
+                )
+                RETURNING cache_key
+            )
+            SELECT (SELECT COUNT(*) FROM expired) + (SELECT COUNT(*) FROM overflow) AS evicted;
+        """
+        record = await self._fetchrow(query, max_entries)
+        return int(record["evicted"]) if record else 0
         
     async def create_persona(self, user_id: str, persona_data: dict) -> Persona:
         """Creates a persona in the database."""
@@ -917,65 +749,37 @@ class PostgresStorage:
             user_id,
             persona_data.get("name", ""),
             persona_data.get("researchMode", "quick"),
-            json.dumps(persona_data.get("demographics", {})),
-            json.dumps(persona_data.get("psychographics", {})),
+            persona_data.get("demographics", {}),
+            persona_data.get("psychographics", {}),
             persona_data.get("painPoints", []),
             persona_data.get("goals", []),
             persona_data.get("values", []),
-            json.dumps(persona_data.get("contentPreferences", {})),
+            persona_data.get("contentPreferences", {}),
             persona_data.get("communities", []),
-            json.dumps(persona_data.get("behavioralPatterns", {})),
-            json.dumps(persona_data.get("researchData", {}))
+            persona_data.get("behavioralPatterns", {}),
+            persona_data.get("researchData", {})
         )
         
-        # Convert record to Persona model
-        persona_dict = dict(record)
+        return self._persona_from_record(record)
         
-        # Parse JSONB fields from string to dict
+    @staticmethod
+    def _persona_from_record(record) -> Persona:
+        """Maps a personas row to Persona (JSONB columns arrive decoded; NULLs become empty)."""
+        persona_dict = dict(record)
         for json_field in ['demographics', 'psychographics', 'contentPreferences', 'behavioralPatterns', 'researchData']:
-            if json_field in persona_dict and isinstance(persona_dict[json_field], str):
-                persona_dict[json_field] = json.loads(persona_dict[json_field])
-        
+            if json_field in persona_dict and persona_dict[json_field] is None:
+                persona_dict[json_field] = {}
+        for list_field in ['painPoints', 'goals', 'values', 'communities']:
+            if list_field in persona_dict and persona_dict[list_field] is None:
+                persona_dict[list_field] = []
         return Persona(**persona_dict)
-        
+
     async def get_persona(self, persona_id: str) -> Optional[Persona]:
         """Fetches a single persona by ID."""
         record = await self._fetchrow("SELECT * FROM personas WHERE id = $1", persona_id)
         if not record:
             return None
-        
-        persona_dict = dict(record)
-        
-        # Parse JSONB fields from string to dict
-        for json_field in ['demographics', 'psychographics', 'contentPreferences', 'behavioralPatterns', 'researchData']:
-            if json_field in persona_dict and isinstance(persona_dict[json_field], str):
-                try:
-                    persona_dict[json_field] = json.loads(persona_dict[json_field])
-                except (json.JSONDecodeError, TypeError):
-                    persona_dict[json_field] = {}
-        
-        # Parse list fields that might come as strings
-        for list_field in ['painPoints', 'goals', 'values', 'communities']:
-            if list_field in persona_dict:
-                if isinstance(persona_dict[list_field], str):
-                    try:
-                        # Try to parse as JSON array
-                        parsed = json.loads(persona_dict[list_field])
-                        if isinstance(parsed, list):
-                            persona_dict[list_field] = parsed
-                        else:
-                            persona_dict[list_field] = []
-                    except (json.JSONDecodeError, TypeError):
-                        # If it's a string like '[]', convert to empty list
-                        if persona_dict[list_field] == '[]' or persona_dict[list_field] == '':
-                            persona_dict[list_field] = []
-                        else:
-                            # Single value or comma-separated, convert to list
-                            persona_dict[list_field] = [item.strip() for item in persona_dict[list_field].split(',') if item.strip()]
-                elif persona_dict[list_field] is None:
-                    persona_dict[list_field] = []
-        
-        return Persona(**persona_dict)
+        return self._persona_from_record(record)
         
     async def get_personas(self, user_id: str) -> List[Persona]:
         """Fetches all personas for a user."""
@@ -983,43 +787,7 @@ class PostgresStorage:
             'SELECT * FROM personas WHERE "userId" = $1 ORDER BY "createdAt" DESC',
             user_id
         )
-        
-        personas = []
-        for record in records:
-            persona_dict = dict(record)
-            
-            # Parse JSONB fields from string to dict
-            for json_field in ['demographics', 'psychographics', 'contentPreferences', 'behavioralPatterns', 'researchData']:
-                if json_field in persona_dict and isinstance(persona_dict[json_field], str):
-                    try:
-                        persona_dict[json_field] = json.loads(persona_dict[json_field])
-                    except (json.JSONDecodeError, TypeError):
-                        persona_dict[json_field] = {}
-            
-            # Parse list fields that might come as strings
-            for list_field in ['painPoints', 'goals', 'values', 'communities']:
-                if list_field in persona_dict:
-                    if isinstance(persona_dict[list_field], str):
-                        try:
-                            # Try to parse as JSON array
-                            parsed = json.loads(persona_dict[list_field])
-                            if isinstance(parsed, list):
-                                persona_dict[list_field] = parsed
-                            else:
-                                persona_dict[list_field] = []
-                        except (json.JSONDecodeError, TypeError):
-                            # If it's a string like '[]', convert to empty list
-                            if persona_dict[list_field] == '[]' or persona_dict[list_field] == '':
-                                persona_dict[list_field] = []
-                            else:
-                                # Single value or comma-separated, convert to list
-                                persona_dict[list_field] = [item.strip() for item in persona_dict[list_field].split(',') if item.strip()]
-                    elif persona_dict[list_field] is None:
-                        persona_dict[list_field] = []
-            
-            personas.append(Persona(**persona_dict))
-        
-        return personas
+        return [self._persona_from_record(record) for record in records]
         
     async def update_persona(self, persona_id: str, updates: dict) -> Optional[Persona]:
         """Updates a persona."""
@@ -1029,15 +797,9 @@ class PostgresStorage:
         param_count = 1
         
         for key, value in updates.items():
-            if key in ["demographics", "psychographics", "contentPreferences", "behavioralPatterns", "researchData"]:
-                set_clauses.append(f'"{key}" = ${param_count}')
-                values.append(json.dumps(value))
-            elif key in ["painPoints", "goals", "values", "communities"]:
-                set_clauses.append(f'"{key}" = ${param_count}')
-                values.append(value)
-            else:
-                set_clauses.append(f'"{key}" = ${param_count}')
-                values.append(value)
+            # Colunas JSONB recebem dict/list direto (codec do pool)
+            set_clauses.append(f'"{key}" = ${param_count}')
+            values.append(value)
             param_count += 1
         
         set_clauses.append(f'"updatedAt" = NOW()')
@@ -1054,13 +816,7 @@ class PostgresStorage:
         if not record:
             return None
         
-        persona_dict = dict(record)
-        # Parse JSONB fields from string to dict
-        for json_field in ['demographics', 'psychographics', 'contentPreferences', 'behavioralPatterns', 'researchData']:
-            if json_field in persona_dict and isinstance(persona_dict[json_field], str):
-                persona_dict[json_field] = json.loads(persona_dict[json_field])
-        
-        return Persona(**persona_dict)
+        return self._persona_from_record(record)
         
     async def delete_persona(self, persona_id: str) -> bool:
         """Deletes a persona."""
@@ -1096,17 +852,17 @@ class PostgresStorage:
             persona.functional_jobs,
             persona.emotional_jobs,
             persona.social_jobs,
-            json.dumps(persona.behaviors),
+            persona.behaviors,
             persona.aspirations,
             persona.goals,
-            json.dumps([p.dict() for p in persona.pain_points_quantified]),
-            json.dumps(persona.decision_criteria),
-            json.dumps(persona.demographics.dict()),
+            [p.dict() for p in persona.pain_points_quantified],
+            persona.decision_criteria,
+            persona.demographics.dict(),
             persona.values,
-            json.dumps([t.dict() for t in persona.touchpoints]),
-            json.dumps(persona.content_preferences.dict()),
-            json.dumps([c.dict() for c in persona.communities]),
-            json.dumps(persona.research_data.dict())
+            [t.dict() for t in persona.touchpoints],
+            persona.content_preferences.dict(),
+            [c.dict() for c in persona.communities],
+            persona.research_data.dict()
         )
         
         return self._parse_persona_modern_record(record)
@@ -1134,17 +890,9 @@ class PostgresStorage:
         param_count = 1
         
         for key, value in updates.items():
-            if key in ["behaviors", "painPointsQuantified", "decisionCriteria", "demographics", 
-                      "touchpoints", "contentPreferences", "communities", "researchData"]:
-                set_clauses.append(f'"{key}" = ${param_count}')
-                values.append(json.dumps(value))
-            elif key in ["situationalContexts", "functionalJobs", "emotionalJobs", "socialJobs",
-                        "aspirations", "goals", "values"]:
-                set_clauses.append(f'"{key}" = ${param_count}')
-                values.append(value)
-            else:
-                set_clauses.append(f'"{key}" = ${param_count}')
-                values.append(value)
+            # Colunas JSONB recebem dict/list direto (codec do pool)
+            set_clauses.append(f'"{key}" = ${param_count}')
+            values.append(value)
             param_count += 1
         
         set_clauses.append(f'"updatedAt" = NOW()')
@@ -1178,151 +926,48 @@ class PostgresStorage:
         
         conversation_id = str(uuid.uuid4())
         
-        # Ensure analysisId column exists (migration)
-        try:
-            await self._execute('ALTER TABLE council_conversations ADD COLUMN IF NOT EXISTS "analysisId" VARCHAR(255)')
-        except:
-            pass  # Column may already exist or table doesn't exist yet
-        
-        # Insert into database (create table if needed)
-        # For now, we'll use a simple approach: store in JSON format
-        # TODO: Create proper table schema for council_conversations
         query = """
             INSERT INTO council_conversations (id, "userId", "personaId", problem, "expertIds", "analysisId", "createdAt", "updatedAt")
             VALUES ($1, $2, $3, $4, $5::jsonb, $6, NOW(), NOW())
             RETURNING *;
         """
         
-        try:
-            record = await self._fetchrow(
-                query,
-                conversation_id,
-                user_id,
-                persona_id,
-                problem,
-                json.dumps(expert_ids),
-                analysis_id  # Adicionar analysis_id no primeiro INSERT também
-            )
-            
-            # Parse expertIds from JSON
-            expert_ids_list = json.loads(record["expertIds"]) if isinstance(record["expertIds"], str) else record["expertIds"]
-            
-            # Try both case variations for field names
-            user_id_field = record.get("userId") or record.get("userid")
-            persona_id_field = record.get("personaId") or record.get("personaid")
-            expert_ids_field = record.get("expertIds") or record.get("expertids")
-            analysis_id_field = record.get("analysisId") or record.get("analysisid")
-            created_at_field = record.get("createdAt") or record.get("createdat")
-            updated_at_field = record.get("updatedAt") or record.get("updatedat")
-            
-            return CouncilConversation(
-                id=str(record["id"]),
-                userId=user_id_field,
-                personaId=persona_id_field,
-                problem=record["problem"],
-                expertIds=expert_ids_list,
-                analysisId=analysis_id_field if analysis_id_field else None,
-                createdAt=created_at_field,
-                updatedAt=updated_at_field
-            )
-        except asyncpg.exceptions.UndefinedTableError:
-            # Table doesn't exist, create it
-            await self._create_council_conversations_table()
-            # Retry the insert
-            record = await self._fetchrow(
-                query,
-                conversation_id,
-                user_id,
-                persona_id,
-                problem,
-                json.dumps(expert_ids),
-                analysis_id
-            )
-            expert_ids_list = json.loads(record["expertIds"]) if isinstance(record["expertIds"], str) else record["expertIds"]
-            
-            # Try both case variations for field names
-            user_id_field = record.get("userId") or record.get("userid")
-            persona_id_field = record.get("personaId") or record.get("personaid")
-            expert_ids_field = record.get("expertIds") or record.get("expertids")
-            analysis_id_field = record.get("analysisId") or record.get("analysisid")
-            created_at_field = record.get("createdAt") or record.get("createdat")
-            updated_at_field = record.get("updatedAt") or record.get("updatedat")
-            
-            return CouncilConversation(
-                id=str(record["id"]),
-                userId=user_id_field,
-                personaId=persona_id_field,
-                problem=record["problem"],
-                expertIds=expert_ids_list,
-                analysisId=analysis_id_field if analysis_id_field else None,
-                createdAt=created_at_field,
-                updatedAt=updated_at_field
-            )
-    
-    async def _create_council_conversations_table(self):
-        """Create council_conversations table if it doesn't exist"""
-        query = """
-            CREATE TABLE IF NOT EXISTS council_conversations (
-                id UUID PRIMARY KEY,
-                "userId" VARCHAR(255) NOT NULL,
-                "personaId" VARCHAR(255) NOT NULL,
-                problem TEXT NOT NULL,
-                "expertIds" JSONB NOT NULL,
-                "analysisId" VARCHAR(255),
-                "createdAt" TIMESTAMP NOT NULL DEFAULT NOW(),
-                "updatedAt" TIMESTAMP NOT NULL DEFAULT NOW()
-            );
-        """
-        await self._execute(query)
+        record = await self._fetchrow(
+            query,
+            conversation_id,
+            user_id,
+            persona_id,
+            problem,
+            expert_ids,
+            analysis_id
+        )
+        return self._council_conversation_from_record(record)
     
-    async def _create_council_analyses_table(self):
-        """Create council_analyses table if it doesn't exist"""
-        query = """
-            CREATE TABLE IF NOT EXISTS council_analyses (
-                id VARCHAR(255) PRIMARY KEY,
-                "userId" VARCHAR(255) NOT NULL,
-                problem TEXT NOT NULL,
-                "personaId" VARCHAR(255),
-                contributions JSONB NOT NULL,
-                consensus TEXT NOT NULL,
-                "actionPlan" JSONB,
-                "createdAt" TIMESTAMP NOT NULL DEFAULT NOW()
-            );
-        """
-        await self._execute(query)
+    @staticmethod
+    def _council_conversation_from_record(record) -> 'CouncilConversation':
+        """Maps a council_conversations row (camelCase or lowercase columns); expertIds arrives decoded."""
+        from python_backend.models import CouncilConversation
+        
+        return CouncilConversation(
+            id=str(record["id"]),
+            userId=record.get("userId"),
+            personaId=record.get("personaId"),
+            problem=record["problem"],
+            expertIds=record.get("expertIds") or [],
+            analysisId=record.get("analysisId") or None,
+            createdAt=record.get("createdAt"),
+            updatedAt=record.get("updatedAt")
+        )
     
     async def get_council_conversation(self, conversation_id: str) -> Optional['CouncilConversation']:
         """Get a council conversation by ID"""
         from python_backend.models import CouncilConversation
         
         query = 'SELECT * FROM council_conversations WHERE id = $1'
-        try:
-            record = await self._fetchrow(query, conversation_id)
-            if not record:
-                return None
-            
-            # Parse expertIds from JSON
-            expert_ids_list = json.loads(record["expertIds"]) if isinstance(record["expertIds"], str) else record["expertIds"]
-            
-            # Try both case variations for field names
-            user_id_field = record.get("userId") or record.get("userid")
-            persona_id_field = record.get("personaId") or record.get("personaid")
-            analysis_id_field = record.get("analysisId") or record.get("analysisid")
-            created_at_field = record.get("createdAt") or record.get("createdat")
-            updated_at_field = record.get("updatedAt") or record.get("updatedat")
-            
-            return CouncilConversation(
-                id=str(record["id"]),
-                userId=user_id_field,
-                personaId=persona_id_field,
-                problem=record["problem"],
-                expertIds=expert_ids_list,
-                analysisId=analysis_id_field if analysis_id_field else None,
-                createdAt=created_at_field,
-                updatedAt=updated_at_field
-            )
-        except asyncpg.exceptions.UndefinedTableError:
+        record = await self._fetchrow(query, conversation_id)
+        if not record:
             return None
+        return self._council_conversation_from_record(record)
     
     async def get_council_conversations(self, user_id: Optional[str] = None) -> List['CouncilConversation']:
         """Get all council conversations, optionally filtered by user"""
@@ -1335,24 +980,10 @@ class PostgresStorage:
             query = 'SELECT * FROM council_conversations ORDER BY "updatedAt" DESC'
             records = await self._fetch(query)
         
-        conversations = []
-        for record in records:
-            expert_ids_list = json.loads(record["expertIds"]) if isinstance(record["expertIds"], str) else record["expertIds"]
-            conversations.append(CouncilConversation(
-                id=str(record["id"]),
-                userId=record["userId"],
-                personaId=record["personaId"],
-                problem=record["problem"],
-                expertIds=expert_ids_list,
-                analysisId=record.get("analysisId"),
-                createdAt=record["createdAt"],
-                updatedAt=record["updatedAt"]
-            ))
-        
-        return conversations
+        return [self._council_conversation_from_record(record) for record in records]
     
-    async def create_council_message(self, conversation_id: str, role: str, content: str, expert_id: Optional[str] = None, expert_name: Optional[str] = None) -> 'CouncilMessage':
-        """Create a message in a council conversation"""
+    async def create_council_message(self, conversation_id: str, role: str, content: str, expert_id: Optional[str] = None, expert_name: Optional[str] = None, timestamp: Optional[datetime] = None) -> 'CouncilMessage':
+        """Create a message in a council conversation (timestamp defaults to NOW(); it defines the message order)"""
         from python_backend.models import CouncilMessage
         import uuid
         
@@ -1360,119 +991,52 @@ class PostgresStorage:
         
         query = """
             INSERT INTO council_messages (id, "conversationId", "expertId", "expertName", content, role, timestamp)
-            VALUES ($1, $2, $3, $4, $5, $6, NOW())
+            VALUES ($1, $2, $3, $4, $5, $6, COALESCE($7::timestamp, NOW()::timestamp))
             RETURNING *;
         """
         
-        try:
-            record = await self._fetchrow(
-                query,
-                message_id,
-                conversation_id,
-                expert_id,
-                expert_name,
-                content,
-                role
-            )
-            
-            # Update conversation timestamp
-            await self._execute(
-                'UPDATE council_conversations SET "updatedAt" = NOW() WHERE id = $1',
-                conversation_id
-            )
-            
-            # Parse reactions (default empty list)
-            reactions = []
-            if record.get("reactions"):
-                reactions = json.loads(record["reactions"]) if isinstance(record["reactions"], str) else record["reactions"]
-            
-            return CouncilMessage(
-                id=str(record["id"]),
-                conversationId=str(record["conversationId"]),
-                expertId=record["expertId"],
-                expertName=record["expertName"],
-                content=record["content"],
-                role=record["role"],
-                timestamp=record["timestamp"],
-                reactions=reactions
-            )
-        except asyncpg.exceptions.UndefinedTableError:
-            # Table doesn't exist, create it
-            await self._create_council_messages_table()
-            # Retry the insert
-            record = await self._fetchrow(
-                query,
-                message_id,
-                conversation_id,
-                expert_id,
-                expert_name,
-                content,
-                role
-            )
-            await self._execute(
-                'UPDATE council_conversations SET "updatedAt" = NOW() WHERE id = $1',
-                conversation_id
-            )
-            reactions = []
-            if record.get("reactions"):
-                reactions = json.loads(record["reactions"]) if isinstance(record["reactions"], str) else record["reactions"]
-            return CouncilMessage(
-                id=str(record["id"]),
-                conversationId=str(record["conversationId"]),
-                expertId=record["expertId"],
-                expertName=record["expertName"],
-                content=record["content"],
-                role=record["role"],
-                timestamp=record["timestamp"],
-                reactions=reactions
-            )
+        record = await self._fetchrow(
+            query,
+            message_id,
+            conversation_id,
+            expert_id,
+            expert_name,
+            content,
+            role,
+            timestamp
+        )
+        
+        # Update conversation timestamp
+        await self._execute(
+            'UPDATE council_conversations SET "updatedAt" = NOW() WHERE id = $1',
+            conversation_id
+        )
+        
+        return self._council_message_from_record(record)
     
-    async def _create_council_messages_table(self):
-        """Create council_messages table if it doesn't exist"""
-        query = """
-            CREATE TABLE IF NOT EXISTS council_messages (
-                id UUID PRIMARY KEY,
-                "conversationId" UUID NOT NULL REFERENCES council_conversations(id) ON DELETE CASCADE,
-                "expertId" VARCHAR(255),
-                "expertName" VARCHAR(255),
-                content TEXT NOT NULL,
-                role VARCHAR(50) NOT NULL,
-                timestamp TIMESTAMP NOT NULL DEFAULT NOW(),
-                reactions JSONB DEFAULT '[]'::jsonb
-            );
-            
-            CREATE INDEX IF NOT EXISTS idx_council_messages_conversation ON council_messages("conversationId");
-        """
-        await self._execute(query)
+    @staticmethod
+    def _council_message_from_record(record) -> 'CouncilMessage':
+        """Maps a council_messages row; reactions (JSONB) arrives decoded, NULL -> []."""
+        from python_backend.models import CouncilMessage
+        
+        return CouncilMessage(
+            id=str(record["id"]),
+            conversationId=str(record["conversationId"]),
+            expertId=record["expertId"],
+            expertName=record["expertName"],
+            content=record["content"],
+            role=record["role"],
+            timestamp=record["timestamp"],
+            reactions=record.get("reactions") or []
+        )
     
     async def get_council_messages(self, conversation_id: str) -> List['CouncilMessage']:
         """Get all messages for a council conversation"""
         from python_backend.models import CouncilMessage
         
         query = 'SELECT * FROM council_messages WHERE "conversationId" = $1 ORDER BY timestamp ASC'
-        try:
-            records = await self._fetch(query, conversation_id)
-        except asyncpg.exceptions.UndefinedTableError:
-            return []
-        
-        messages = []
-        for record in records:
-            reactions = []
-            if record.get("reactions"):
-                reactions = json.loads(record["reactions"]) if isinstance(record["reactions"], str) else record["reactions"]
-            
-            messages.append(CouncilMessage(
-                id=str(record["id"]),
-                conversationId=str(record["conversationId"]),
-                expertId=record["expertId"],
-                expertName=record["expertName"],
-                content=record["content"],
-                role=record["role"],
-                timestamp=record["timestamp"],
-                reactions=reactions
-            ))
-        
-        return messages
+        records = await self._fetch(query, conversation_id)
+        return [self._council_message_from_record(record) for record in records]
     
     async def add_council_message_reaction(self, message_id: str, reaction: 'MessageReaction') -> bool:
         """Add a reaction to a council message"""
@@ -1484,9 +1048,7 @@ class PostgresStorage:
             return False
         
         # Get current reactions
-        reactions = []
-        if message.get("reactions"):
-            reactions = json.loads(message["reactions"]) if isinstance(message["reactions"], str) else message["reactions"]
+        reactions = message.get("reactions") or []
         
         # Add new reaction
         reactions.append(reaction.model_dump() if hasattr(reaction, 'model_dump') else reaction.dict() if hasattr(reaction, 'dict') else reaction)
@@ -1494,7 +1056,7 @@ class PostgresStorage:
         # Update message
         await self._execute(
             'UPDATE council_messages SET reactions = $1::jsonb WHERE id = $2',
-            json.dumps(reactions),
+            reactions,
             message_id
         )
         
@@ -1509,39 +1071,29 @@ class PostgresStorage:
         
         persona_dict = dict(record)
         
-        # Parse JSONB fields
-        if isinstance(persona_dict.get('behaviors'), str):
-            persona_dict['behaviors'] = json.loads(persona_dict['behaviors'])
-        
-        if isinstance(persona_dict.get('painPointsQuantified'), str):
-            pains = json.loads(persona_dict['painPointsQuantified'])
-            persona_dict['pain_points_quantified'] = [QuantifiedPain(**p) for p in pains]
-        else:
-            persona_dict['pain_points_quantified'] = []
+        # JSONB fields arrive decoded (pg_codecs); build the nested models
+        persona_dict['pain_points_quantified'] = [
+            QuantifiedPain(**p) for p in persona_dict.get('painPointsQuantified') or []
+        ]
         
-        if isinstance(persona_dict.get('decisionCriteria'), str):
-            persona_dict['decision_criteria'] = json.loads(persona_dict['decisionCriteria'])
+        if persona_dict.get('decisionCriteria') is not None:
+            persona_dict['decision_criteria'] = persona_dict['decisionCriteria']
         
-        if isinstance(persona_dict.get('demographics'), str):
-            persona_dict['demographics'] = Demographics(**json.loads(persona_dict['demographics']))
+        if persona_dict.get('demographics'):
+            persona_dict['demographics'] = Demographics(**persona_dict['demographics'])
         
-        if isinstance(persona_dict.get('touchpoints'), str):
-            touchpoints = json.loads(persona_dict['touchpoints'])
-            persona_dict['touchpoints'] = [Touchpoint(**t) for t in touchpoints]
-        else:
-            persona_dict['touchpoints'] = []
+        persona_dict['touchpoints'] = [Touchpoint(**t) for t in persona_dict.get('touchpoints') or []]
         
-        if isinstance(persona_dict.get('contentPreferences'), str):
-            persona_dict['content_preferences'] = ContentPreferences(**json.loads(persona_dict['contentPreferences']))
+        if persona_dict.get('contentPreferences'):
+            persona_dict['content_preferences'] = ContentPreferences(**persona_dict['contentPreferences'])
         
-        if isinstance(persona_dict.get('communities'), str):
-            communities = json.loads(persona_dict['communities'])
-            persona_dict['communities'] = [Community(**c) for c in communities]
-        else:
-            persona_dict['communities'] = []
+        # Personas antigas guardam communities como lista de nomes
+        persona_dict['communities'] = [
+            Community(**c) for c in persona_dict.get('communities') or [] if isinstance(c, dict)
+        ]
         
-        if isinstance(persona_dict.get('researchData'), str):
-            persona_dict['research_data'] = ResearchData(**json.loads(persona_dict['researchData']))
+        if persona_dict.get('researchData'):
+            persona_dict['research_data'] = ResearchData(**persona_dict['researchData'])
         
         # Map database snake_case to Python snake_case expected by Pydantic
         persona_dict['created_at'] = persona_dict.pop('createdAt', persona_dict.get('created_at'))
@@ -1560,24 +1112,33 @@ class PostgresStorage:
     # BACKGROUND TASK OPERATIONS
     # =============================================================================
     
+    # Fila durável: workers reivindicam com FOR UPDATE SKIP LOCKED e mantêm um lease
+    # ("leaseOwner", "leaseExpiresAt") renovado por heartbeat. Conclusão/falha só valem
+    # para o dono do lease (uma tarefa reivindicada de novo não é sobrescrita pelo antigo).
+    @staticmethod
+    def _background_task_from_record(record) -> BackgroundTask:
+        """Maps a background_tasks row; result/metadata (JSONB) arrive decoded."""
+        return BackgroundTask(**dict(record))
+
     async def create_background_task(self, task: BackgroundTask) -> BackgroundTask:
-        """Create a new background task (fallback to memory if no DB)"""
-        if not self.pool:
-            from python_backend.storage import MemStorage
-            mem_storage = MemStorage()
-            return await mem_storage.create_background_task(task)
-        
-        # Para simplicidade, usar memória sempre (pode adicionar tabela SQL depois)
-        from python_backend.storage import MemStorage
-        mem_storage = MemStorage()
-        return await mem_storage.create_background_task(task)
-    
+        """Enqueue a background task (runAt = NOW(), the database clock used by every claim)."""
+        record = await self._fetchrow(
+            """
+            INSERT INTO background_tasks (id, "userId", "taskType", status, progress, metadata,
+                                          "maxAttempts", "createdAt", "updatedAt")
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $8)
+            RETURNING *
+            """,
+            task.id, task.userId, task.taskType.value, task.status.value, task.progress,
+            task.metadata or {}, task.maxAttempts, task.createdAt
+        )
+        return self._background_task_from_record(record)
+
     async def get_background_task(self, task_id: str) -> Optional[BackgroundTask]:
-        """Get a background task by ID (fallback to memory)"""
-        from python_backend.storage import MemStorage
-        mem_storage = MemStorage()
-        return await mem_storage.get_background_task(task_id)
-    
+        """Get a background task by ID."""
+        record = await self._fetchrow('SELECT * FROM background_tasks WHERE id = $1', task_id)
+        return self._background_task_from_record(record) if record else None
+
     async def update_background_task(
         self,
         task_id: str,
@@ -1587,9 +1148,123 @@ class PostgresStorage:
         error: Optional[str] = None,
         completedAt: Optional[datetime] = None
     ) -> Optional[BackgroundTask]:
-        """Update a background task (fallback to memory)"""
-        from python_backend.storage import MemStorage
-        mem_storage = MemStorage()
-        return await mem_storage.update_background_task(
-            task_id, status, progress, result, error, completedAt
+        """Update a background task (progress, cancellation); None keeps the current value."""
+        record = await self._fetchrow(
+            """
+            UPDATE background_tasks SET
+                status = COALESCE($2, status),
+                progress = COALESCE($3, progress),
+                result = COALESCE($4, result),
+                error = COALESCE($5, error),
+                "completedAt" = COALESCE($6, "completedAt"),
+                "updatedAt" = NOW()
+            WHERE id = $1
+            RETURNING *
+            """,
+            task_id, status.value if status is not None else None, progress, result, error, completedAt
+        )
+        return self._background_task_from_record(record) if record else None
+
+    async def claim_background_tasks(
+        self, task_type: str, worker_id: str, limit: int, lease_seconds: float
+    ) -> List[BackgroundTask]:
+        """Claims up to limit ready tasks of task_type; rows locked by other workers are skipped."""
+        records = await self._fetch(
+            """
+            WITH ready AS (
+                SELECT id FROM background_tasks
+                WHERE status = 'pending' AND "taskType" = $1 AND "runAt" <= NOW()
+                ORDER BY "runAt"
+                LIMIT $3
+                FOR UPDATE SKIP LOCKED
+            )
+            UPDATE background_tasks AS t SET
+                status = 'running',
+                attempts = t.attempts + 1,
+                "leaseOwner" = $2,
+                "leaseExpiresAt" = NOW() + make_interval(secs => $4),
+                "updatedAt" = NOW()
+            FROM ready
+            WHERE t.id = ready.id
+            RETURNING t.*
+            """,
+            getattr(task_type, "value", task_type), worker_id, limit, float(lease_seconds)
+        )
+        return [self._background_task_from_record(record) for record in records]
+
+    async def renew_background_task_leases(self, worker_id: str, task_ids: List[str], lease_seconds: float) -> List[str]:
+        """Heartbeat: extends the leases this worker still owns; returns the renewed ids."""
+        if not task_ids:
+            return []
+        records = await self._fetch(
+            """
+            UPDATE background_tasks SET "leaseExpiresAt" = NOW() + make_interval(secs => $3)
+            WHERE id = ANY($2::varchar[]) AND status = 'running' AND "leaseOwner" = $1
+            RETURNING id
+            """,
+            worker_id, task_ids, float(lease_seconds)
+        )
+        return [record["id"] for record in records]
+
+    async def complete_background_task(self, task_id: str, worker_id: str, result: Optional[dict]) -> bool:
+        status = await self._execute(
+            """
+            UPDATE background_tasks SET
+                status = 'completed', progress = 100, result = $3, error = NULL,
+                "leaseOwner" = NULL, "leaseExpiresAt" = NULL, "completedAt" = NOW(), "updatedAt" = NOW()
+            WHERE id = $1 AND status = 'running' AND "leaseOwner" = $2
+            """,
+            task_id, worker_id, result
+        )
+        return status == "UPDATE 1"
+
+    async def fail_background_task(
+        self, task_id: str, worker_id: str, error: str, retry_delay_seconds: Optional[float]
+    ) -> bool:
+        """Attempt failed: back to the queue after retry_delay_seconds or, if None, failed for good."""
+        if retry_delay_seconds is None:
+            query = """
+                UPDATE background_tasks SET
+                    status = 'failed', error = $3,
+                    "leaseOwner" = NULL, "leaseExpiresAt" = NULL, "completedAt" = NOW(), "updatedAt" = NOW()
+                WHERE id = $1 AND status = 'running' AND "leaseOwner" = $2
+            """
+            args = (task_id, worker_id, error)
+        else:
+            query = """
+                UPDATE background_tasks SET
+                    status = 'pending', error = $3, "runAt" = NOW() + make_interval(secs => $4),
+                    "leaseOwner" = NULL, "leaseExpiresAt" = NULL, "updatedAt" = NOW()
+                WHERE id = $1 AND status = 'running' AND "leaseOwner" = $2
+            """
+            args = (task_id, worker_id, error, float(retry_delay_seconds))
+        return await self._execute(query, *args) == "UPDATE 1"
+
+    async def release_background_task(self, task_id: str, worker_id: str) -> bool:
+        """Back to the queue without spending an attempt (worker shutting down)."""
+        status = await self._execute(
+            """
+            UPDATE background_tasks SET
+                status = 'pending', attempts = GREATEST(attempts - 1, 0), "runAt" = NOW(),
+                "leaseOwner" = NULL, "leaseExpiresAt" = NULL, "updatedAt" = NOW()
+            WHERE id = $1 AND status = 'running' AND "leaseOwner" = $2
+            """,
+            task_id, worker_id
+        )
+        return status == "UPDATE 1"
+
+    async def requeue_expired_background_tasks(self) -> int:
+        """Expired leases (dead worker): back to the queue, or failed once attempts are exhausted."""
+        records = await self._fetch(
+            """
+            UPDATE background_tasks SET
+                status = CASE WHEN attempts < "maxAttempts" THEN 'pending' ELSE 'failed' END,
+                error = CASE WHEN attempts < "maxAttempts" THEN error
+                             ELSE 'Lease expirou: o worker parou de responder' END,
+                "completedAt" = CASE WHEN attempts < "maxAttempts" THEN NULL ELSE NOW() END,
+                "runAt" = NOW(), "leaseOwner" = NULL, "leaseExpiresAt" = NULL, "updatedAt" = NOW()
+            WHERE status = 'running' AND "leaseExpiresAt" < NOW()
+            RETURNING id
+            """
         )
+        return len(records)
@@ -0,0 +1,89 @@
+"""
+Prompt Caching
+==============
+
+Helpers para o prompt caching da Anthropic.
+
+Os system prompts das lendas têm vários KB e se repetem a cada chamada. Montamos
+o ``system`` em blocos:
+
+1. Prefixo estável (prompt da lenda + signature pattern) -> cache_control
+2. Contexto compartilhado opcional (ex: análise + persona de uma conversa do
+   conselho, igual em todos os turnos) -> cache_control
+3. Sufixo dinâmico (horário, perfil, persona, preferências) -> sem cache
+
+Assim, a partir da segunda chamada o prefixo é lido do cache (mais rápido e
+mais barato), e só o sufixo é processado de novo.
+"""
+
+from typing import Any, Dict, List, Optional
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def build_system_blocks(
+    stable_prefix: str,
+    dynamic_suffix: Optional[str] = None,
+    shared_context: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Monta o parâmetro ``system`` com breakpoints de cache no prefixo estável
+    (e no contexto compartilhado, se houver). O sufixo dinâmico vai por último.
+    """
+    blocks: List[Dict[str, Any]] = [
+        {"type": "text", "text": stable_prefix, "cache_control": CACHE_CONTROL}
+    ]
+    if shared_context and shared_context.strip():
+        blocks.append({"type": "text", "text": shared_context, "cache_control": CACHE_CONTROL})
+    if dynamic_suffix and dynamic_suffix.strip():
+        blocks.append({"type": "text", "text": dynamic_suffix})
+    return blocks
+
+
+class PromptCacheStats:
+    """Contadores de uso do cache de prompt por ponto de chamada."""
+
+    def __init__(self):
+        self._sites: Dict[str, Dict[str, int]] = {}
+
+    def record(self, call_site: str, usage: Any) -> Dict[str, int]:
+        """Registra o ``usage`` de uma resposta e retorna os números desta chamada."""
+        call = {
+            "inputTokens": getattr(usage, "input_tokens", 0) or 0,
+            "cacheReadTokens": getattr(usage, "cache_read_input_tokens", 0) or 0,
+            "cacheCreationTokens": getattr(usage, "cache_creation_input_tokens", 0) or 0,
+            "outputTokens": getattr(usage, "output_tokens", 0) or 0,
+        }
+        site = self._sites.setdefault(call_site, {
+            "calls": 0,
+            "cacheHits": 0,
+            "inputTokens": 0,
+            "cacheReadTokens": 0,
+            "cacheCreationTokens": 0,
+            "outputTokens": 0,
+        })
+        site["calls"] += 1
+        if call["cacheReadTokens"]:
+            site["cacheHits"] += 1
+        for key, value in call.items():
+            site[key] += value
+
+        print(
+            f"[PromptCache] {call_site}: input={call['inputTokens']} "
+            f"cache_read={call['cacheReadTokens']} cache_creation={call['cacheCreationTokens']}"
+        )
+        return call
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {site: dict(values) for site, values in self._sites.items()}
+
+
+prompt_cache_stats = PromptCacheStats()
+
+
+def record_cache_usage(call_site: str, response: Any) -> Optional[Dict[str, int]]:
+    """Atalho: registra o uso de cache de uma resposta (ignora respostas sem ``usage``)."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return None
+    return prompt_cache_stats.record(call_site, usage)
@@ -11,7 +11,7 @@ from typing import Dict, List, Optional, Any
 import httpx
 import asyncio
 from dotenv import load_dotenv, find_dotenv
-from anthropic import AsyncAnthropic
+from python_backend.http_clients import client_registry
 
 # Carregar .env quando o módulo é importado
 _env_file = find_dotenv(usecwd=True)
@@ -21,32 +21,32 @@ if _env_file:
 class RedditResearchEngine:
     """
     Researches target audience using Perplexity API and synthesizes with Claude.
-    
+
     Features:
     - Robust error handling
     - Structured data output
     - Framework-based persona generation (JTBD + BAG)
     """
-    
+
     def __init__(self):
         self._perplexity_api_key = None
-        self._anthropic_client = None
+        self._anthropic_key_checked = False
         self._cache = {}  # Simple in-memory cache
         self._cache_ttl = 24 * 60 * 60  # 24 hours in seconds
-    
+
     def _ensure_initialized(self):
         """Lazy initialization of API clients"""
         # Garantir que .env está carregado
         _env_file = find_dotenv(usecwd=True)
         if _env_file:
             load_dotenv(_env_file, override=True)
-        
+
         if self._perplexity_api_key is None:
             self._perplexity_api_key = os.getenv("PERPLEXITY_API_KEY") or os.environ.get("PERPLEXITY_API_KEY")
             if not self._perplexity_api_key:
                 raise ValueError("PERPLEXITY_API_KEY environment variable not set")
-        
-        if self._anthropic_client is None:
+
+        if not self._anthropic_key_checked:
             anthropic_key = os.getenv("ANTHROPIC_API_KEY") or os.environ.get("ANTHROPIC_API_KEY")
             if not anthropic_key:
                 raise ValueError(
@@ -54,14 +54,19 @@ class RedditResearchEngine:
                     "Verifique se o arquivo .env existe e contém ANTHROPIC_API_KEY=sk-ant-... "
                     "ou configure como variável de ambiente do sistema."
                 )
-            self._anthropic_client = AsyncAnthropic(api_key=anthropic_key)
-    
+            self._anthropic_key_checked = True
+
+    @property
+    def _anthropic_client(self):
+        # Lido do registro a cada uso: o registro recria o cliente depois de um aclose()
+        return client_registry.anthropic()
+
     def _get_cache_key(self, method: str, **kwargs) -> str:
         """Generate a cache key from method name and arguments"""
         # Sort kwargs to ensure consistent keys
         sorted_kwargs = {k: kwargs[k] for k in sorted(kwargs.keys()) if kwargs[k] is not None}
         return f"{method}:{json.dumps(sorted_kwargs)}"
-    
+
     def _get_cached_result(self, cache_key: str) -> Optional[Dict]:
         """Get result from cache if it exists and is not expired"""
         if cache_key in self._cache:
@@ -73,27 +78,27 @@ class RedditResearchEngine:
                 print(f"[RedditResearch] Cache expired for {cache_key}")
                 del self._cache[cache_key]
         return None
-    
+
     def _set_cache_result(self, cache_key: str, data: Dict):
         """Store result in cache with current timestamp"""
         self._cache[cache_key] = (time.time(), data)
-    
+
     async def _call_perplexity_api(self, query: str, model: str = "sonar-reasoning") -> Dict:
         """
         Call Perplexity API with fallback models
-        
+
         Args:
             query: The search query
             model: Perplexity model to use
-            
+
         Returns:
             Dict containing the API response
         """
         self._ensure_initialized()
-        
+
         # Lista de modelos para fallback em ordem de preferência
         fallback_models = ["sonar-reasoning", "sonar", "sonar-pro", "sonar-deep-research", "sonar-reasoning-pro"]
-        
+
         # Se o modelo solicitado não estiver na lista de fallback, adicione-o como primeira opção
         if model not in fallback_models:
             fallback_models.insert(0, model)
@@ -101,14 +106,14 @@ class RedditResearchEngine:
             # Se o modelo já estiver na lista, reorganize para que seja o primeiro
             fallback_models.remove(model)
             fallback_models.insert(0, model)
-            
+
         last_error = None
-        
+
         # Tente cada modelo na lista de fallback
         for current_model in fallback_models:
             try:
                 print(f"[RedditResearch] Calling Perplexity API with model {current_model}...")
-                
+
                 request_payload = {
                     "model": current_model,
                     "messages": [
@@ -118,71 +123,72 @@ class RedditResearchEngine:
                     "temperature": 0.2,
                     "max_tokens": 2000
                 }
-                
-                async with httpx.AsyncClient(timeout=60.0) as client:
-                    response = await client.post(
-                        "https://api.perplexity.ai/chat/completions",
-                        headers={
-                            "Authorization": f"Bearer {self._perplexity_api_key}",
-                            "Content-Type": "application/json"
-                        },
-                        json=request_payload
-                    )
-                    
-                    response.raise_for_status()  # Raise exception for 4XX/5XX responses
-                    
-                    result = response.json()
-                    print(f"[RedditResearch] Successfully used model {current_model}")
-                    return result
-                    
+
+                client = client_registry.http()
+                response = await client.post(
+                    "https://api.perplexity.ai/chat/completions",
+                    headers={
+                        "Authorization": f"Bearer {self._perplexity_api_key}",
+                        "Content-Type": "application/json"
+                    },
+                    json=request_payload,
+                    timeout=60.0
+                )
+
+                response.raise_for_status()  # Raise exception for 4XX/5XX responses
+
+                result = response.json()
+                print(f"[RedditResearch] Successfully used model {current_model}")
+                return result
+
             except httpx.HTTPStatusError as e:
                 print(f"[RedditResearch] Perplexity API HTTP error with model {current_model}: {e.response.status_code} - {e.response.text}")
                 last_error = e
                 continue  # Try next model
-                
+
             except httpx.RequestError as e:
                 print(f"[RedditResearch] Perplexity API request error with model {current_model}: {str(e)}")
                 last_error = e
                 continue  # Try next model
-                
+
             except Exception as e:
                 print(f"[RedditResearch] Unexpected error with model {current_model}: {str(e)}")
                 last_error = e
                 continue  # Try next model
-        
+
         # If we've tried all models and none worked, check if it's a resource_exhausted error
         if last_error:
             print(f"[RedditResearch] All fallback models failed. Last error: {str(last_error)}")
-            
+
             # If it's an HTTPStatusError, pass it through so it can be handled properly
             if isinstance(last_error, httpx.HTTPStatusError):
                 if "resource_exhausted" in last_error.response.text.lower():
                     print("[RedditResearch] Resource exhausted error detected")
                 raise last_error
-                
+
             raise ValueError(f"All Perplexity API models failed: {str(last_error)}")
-        
+
         # This should never happen, but just in case
         raise ValueError("Failed to call Perplexity API with all available models")
-    
+
     async def _call_anthropic_api(self, prompt: str) -> Dict:
         """
         Call Claude API to structure data
-        
+
         Args:
             prompt: The prompt to send to Claude
-            
+
         Returns:
             Dict containing the structured data
         """
         self._ensure_initialized()
-        
+
         try:
             # Call Claude API with retry logic for network issues
             retry_count = 0
             max_retries = 3
             backoff_factor = 1.5
-            
+
             while retry_count <= max_retries:
                 try:
                     message = await self._anthropic_client.messages.create(
@@ -200,14 +206,14 @@ class RedditResearchEngine:
                     if retry_count > max_retries:
                         print(f"[RedditResearch] Max retries ({max_retries}) reached. Giving up.")
                         raise  # Re-raise the last exception
-                    
+
                     wait_time = backoff_factor ** retry_count
                     print(f"[RedditResearch] Retry {retry_count}/{max_retries} after error: {str(retry_error)}. Waiting {wait_time:.1f}s")
                     await asyncio.sleep(wait_time)
-            
-            
+
+
             content = message.content[0].text
-            
+
             # Try to extract JSON from the response
             try:
                 # First try to find JSON in code blocks
@@ -215,32 +221,32 @@ class RedditResearchEngine:
                 if json_match:
                     json_str = json_match.group(1)
                     return json.loads(json_str)
-                
+
                 # If not found in code blocks, try to find anything that looks like JSON
                 json_match = re.search(r'({.*})', content, re.DOTALL)
                 if json_match:
                     json_str = json_match.group(1)
                     return json.loads(json_str)
-                
+
                 print("[RedditResearch] Failed to parse JSON from Claude response, using full text")
             except json.JSONDecodeError:
                 print("[RedditResearch] Failed to parse JSON from Claude response, using full text")
-            
+
             # If not valid JSON or not in code blocks, return the raw text
             return {"content": content}
-            
+
         except Exception as e:
             print(f"[RedditResearch] Claude API error: {str(e)}")
             raise
-    
+
     async def research_quick(self, target_description: str, industry: Optional[str] = None) -> Dict:
         """
         Quick research mode: Uses Perplexity for research and Claude for structuring
-        
+
         Args:
             target_description: Description of the target audience
             industry: Optional industry context
-            
+
         Returns:
             Dict with structured persona data following JTBD and BAG frameworks
         """
@@ -251,9 +257,9 @@ class RedditResearchEngine:
             if cached_result:
                 print(f"[RedditResearch] Cache hit for '{target_description}'")
                 return cached_result
-            
+
             print(f"[RedditResearch] Iniciando pesquisa rápida para '{target_description}'")
-            
+
             # Build Perplexity query for JTBD + BAG framework
             context = f"na indústria de {industry}" if industry else ""
             query = f"""
@@ -281,11 +287,11 @@ Pesquise informações detalhadas sobre o público-alvo '{target_description}' {
 
 Forneça dados específicos, estatísticas quando possível, e cite fontes relevantes.
 """
-            
+
             # Call Perplexity API
             perplexity_result = await self._call_perplexity_api(query)
             perplexity_content = perplexity_result["choices"][0]["message"]["content"]
-            
+
             # Now use Claude to structure the data
             claude_prompt = f"""
 Você é um especialista em criação de personas de marketing de alta precisão.
@@ -382,31 +388,31 @@ Formate os dados no seguinte formato JSON:
 
 Importante: Todos os dados devem ser específicos, acionáveis e baseados na pesquisa.
 """
-            
+
             # Call Claude API to structure the data
             structured_data = await self._call_anthropic_api(claude_prompt)
-            
+
             # Add metadata
             if "researchData" not in structured_data:
                 structured_data["researchData"] = {}
-            
+
             structured_data["researchData"]["generated_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
             structured_data["researchData"]["target_description"] = target_description
             if industry:
                 structured_data["researchData"]["industry"] = industry
-            
+
             # Cache the result
             self._set_cache_result(cache_key, structured_data)
-            
+
             print(f"[RedditResearch] Pesquisa rápida concluída com sucesso para '{target_description}'")
             return structured_data
-            
+
         except Exception as e:
             print(f"[RedditResearch] Error in quick research: {str(e)}")
-            
+
             # Fornecer dados de fallback para evitar erro 500
             print(f"[RedditResearch] Gerando dados de fallback para '{target_description}'")
-            
+
             fallback_data = {
                 "job_statement": f"Ajudar {target_description} a ter sucesso em seus objetivos profissionais",
                 "functional_jobs": ["Economizar tempo", "Aumentar produtividade"],
@@ -442,24 +448,24 @@ Importante: Todos os dados devem ser específicos, acionáveis e baseados na pes
                     "is_fallback": True
                 }
             }
-            
+
             if industry:
                 fallback_data["research_data"]["industry"] = industry
-                
+
             # Cache o resultado de fallback também
             self._set_cache_result(cache_key, fallback_data)
-            
+
             return fallback_data
 
     async def research_strategic(self, target_description: str, industry: Optional[str] = None, additional_context: Optional[str] = None) -> Dict:
         """
         Strategic research mode: DEEP comprehensive research with multiple API calls
-        
+
         Args:
             target_description: Description of the target audience
             industry: Optional industry context
             additional_context: Additional context to refine the research
-        
+
         Returns:
             Dict with comprehensive persona data with REAL insights
         """
@@ -469,13 +475,13 @@ Importante: Todos os dados devem ser específicos, acionáveis e baseados na pes
             cached_result = self._get_cached_result(cache_key)
             if cached_result:
                 return cached_result
-            
+
             print(f"[RedditResearch] 🔍 MODO ESTRATÉGICO - Pesquisa profunda para '{target_description}'")
             self._ensure_initialized()
-            
+
             context = f"na indústria de {industry}" if industry else ""
             additional = f". {additional_context}" if additional_context else ""
-            
+
             # ============================================================================
             # FASE 1: DESCOBERTA DE COMUNIDADES E FONTES (Primeira chamada Perplexity)
             # ============================================================================
@@ -497,7 +503,7 @@ RETORNE:
             print(f"[RedditResearch] 📊 Fase 1: Descobrindo comunidades...")
             discovery_response = await self._call_perplexity_api(discovery_query)
             discovery_text = self._extract_content_from_response(discovery_response)
-            
+
             # ============================================================================
             # FASE 2: ANÁLISE PROFUNDA DE PAIN POINTS (Segunda chamada Perplexity)
             # ============================================================================
@@ -519,7 +525,7 @@ RETORNE:
             print(f"[RedditResearch] 💰 Fase 2: Analisando pain points quantificados...")
             pain_response = await self._call_perplexity_api(pain_points_query)
             pain_text = self._extract_content_from_response(pain_response)
-            
+
             # ============================================================================
             # FASE 3: COMPORTAMENTOS E DECISÕES (Terceira chamada Perplexity)
             # ============================================================================
@@ -542,12 +548,12 @@ RETORNE:
             print(f"[RedditResearch] 🎯 Fase 3: Mapeando comportamentos e decisões...")
             behavior_response = await self._call_perplexity_api(behavior_query)
             behavior_text = self._extract_content_from_response(behavior_response)
-            
+
             # ============================================================================
             # FASE 4: SÍNTESE COM CLAUDE (Quarta chamada - Claude)
             # ============================================================================
             print(f"[RedditResearch] 🤖 Fase 4: Sintetizando com Claude...")
-            
+
             synthesis_prompt = f"""Você é um especialista em personas B2B e análise de público-alvo com 15+ anos de experiência.
 
 Recebi 3 pesquisas profundas sobre: {target_description} {context}{additional}
@@ -629,18 +635,18 @@ RETORNE APENAS O JSON, SEM MARKDOWN OU EXPLICAÇÕES."""
                 temperature=0.3,  # Mais determinístico para dados estruturados
                 messages=[{"role": "user", "content": synthesis_prompt}]
             )
-            
+
             result_text = claude_response.content[0].text.strip()
-            
+
             # Remover markdown se presente
             if result_text.startswith("```json"):
                 result_text = result_text.replace("```json", "").replace("```", "").strip()
             elif result_text.startswith("```"):
                 result_text = result_text.replace("```", "").strip()
-            
+
             # Parse JSON
             result = json.loads(result_text)
-            
+
             # Adicionar metadata da pesquisa
             result["research_data"] = {
                 "sources": self._extract_sources_from_response(discovery_response),
@@ -654,17 +660,17 @@ RETORNE APENAS O JSON, SEM MARKDOWN OU EXPLICAÇÕES."""
                 "perplexity_calls": 3,
                 "claude_synthesis": True
             }
-            
+
             # Cache the result
             self._set_cache_result(cache_key, result)
-            
+
             print(f"[RedditResearch] ✅ Pesquisa estratégica concluída com ALTA qualidade!")
-            
+
             return result
-                
+
         except Exception as e:
             print(f"[RedditResearch] ❌ Error in strategic research: {str(e)}")
-            
+
             # Provide fallback data
             fallback_data = {
                 "job_statement": f"Ajudar {target_description} a ter sucesso em seus objetivos profissionais",
@@ -703,15 +709,15 @@ RETORNE APENAS O JSON, SEM MARKDOWN OU EXPLICAÇÕES."""
                     "error": str(e)
                 }
             }
-            
+
             if industry:
                 fallback_data["research_data"]["industry"] = industry
             if additional_context:
                 fallback_data["research_data"]["additional_context"] = additional_context
-                
+
             # Cache o resultado de fallback também
             self._set_cache_result(cache_key, fallback_data)
-            
+
             return fallback_data
 
 # Singleton instance
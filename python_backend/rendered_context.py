@@ -0,0 +1,308 @@
+"""
+Rendered Context
+================
+
+Cache do contexto renderizado (análise inicial + persona) do chat do conselho.
+
+A cada mensagem do chat, ``_process_council_message_background`` buscava a
+``CouncilAnalysis`` e a persona e remontava o bloco ``analysis_context`` (vários
+KB) por concatenação, contribuição por contribuição. O contexto só muda quando a
+análise ou a persona mudam, então:
+
+1. LRU em memória por (análise, persona), com TTL: mensagens seguintes não
+   fazem nenhuma leitura de análise/persona nem montagem de string
+2. A renderização compacta é gravada junto da análise (``renderedContext``),
+   com a versão da persona (``updatedAt``): outro processo reaproveita sem
+   desserializar a análise nem remontar o texto
+
+Invalidação: ``invalidate_persona`` / ``invalidate_analysis`` (chamados quando a
+persona é alterada/removida e quando a análise é salva); salvar a análise de
+novo limpa a renderização gravada. Com Postgres, a invalidação chega aos outros
+workers do uvicorn via LISTEN/NOTIFY (``start_sync``), como no catálogo de
+especialistas. Mudanças no formato exigem incrementar ``RENDER_VERSION``.
+"""
+
+import hashlib
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from python_backend.models import CouncilAnalysis, Persona
+
+RENDER_VERSION = "1"
+RENDERED_CONTEXT_CHANNEL = "rendered_context"
+
+_ANALYSIS_BANNER = """
+╔══════════════════════════════════════════════════════════════════════════════╗
+║                    CONTEXTO DA ANÁLISE INICIAL DO CONSELHO                   ║
+╚══════════════════════════════════════════════════════════════════════════════╝
+"""
+
+_PERSONA_BANNER = """
+╔══════════════════════════════════════════════════════════════════════════════╗
+║                           PERSONA DO CLIENTE IDEAL                            ║
+╚══════════════════════════════════════════════════════════════════════════════╝
+"""
+
+
+def render_analysis_context(analysis: CouncilAnalysis, persona: Any) -> str:
+    """Bloco com a análise inicial do conselho e a persona completa."""
+    parts: List[str] = [f"""{_ANALYSIS_BANNER}
+**PROBLEMA ORIGINAL:**
+{analysis.problem}
+
+**CONSENSO ESTRATÉGICO GERADO PELO CONSELHO:**
+{analysis.consensus}
+
+"""]
+    if analysis.contributions:
+        parts.append("**CONTRIBUIÇÕES INICIAIS DOS ESPECIALISTAS:**\n")
+        for contrib in analysis.contributions:
+            parts.append(f"\n--- {contrib.expertName} ---\n")
+
+            if contrib.keyInsights:
+                parts.append(f"\n### INSIGHTS DE {contrib.expertName.upper()}:\n")
+                parts.extend(f"  {idx}. {insight}\n" for idx, insight in enumerate(contrib.keyInsights, 1))
+                parts.append("\n")
+
+            if contrib.recommendations:
+                parts.append(f"### RECOMENDAÇÕES DE {contrib.expertName.upper()}:\n")
+                parts.extend(f"  {idx}. {rec}\n" for idx, rec in enumerate(contrib.recommendations, 1))
+                parts.append("\n")
+        parts.append("\n")
+    if analysis.actionPlan:
+        parts.append("**PLANO DE AÇÃO CRIADO:**\n")
+        parts.append(f"Total de {len(analysis.actionPlan.phases)} fases | Duração: {analysis.actionPlan.totalDuration}\n\n")
+
+    # Contexto COMPLETO da persona (CRÍTICO)
+    parts.append(f"""{_PERSONA_BANNER}
+**NOME DA PERSONA:** {persona.name}
+
+**JOB STATEMENT (Trabalho Principal):**
+{persona.job_statement if hasattr(persona, 'job_statement') else 'N/A'}
+
+**PRINCIPAIS JOBS TO BE DONE:**
+Funcionais: {', '.join(persona.functional_jobs[:5]) if hasattr(persona, 'functional_jobs') and persona.functional_jobs else 'N/A'}
+Emocionais: {', '.join(persona.emotional_jobs[:3]) if hasattr(persona, 'emotional_jobs') and persona.emotional_jobs else 'N/A'}
+Sociais: {', '.join(persona.social_jobs[:2]) if hasattr(persona, 'social_jobs') and persona.social_jobs else 'N/A'}
+
+**PAIN POINTS PRINCIPAIS:**
+""")
+    if hasattr(persona, 'pain_points_quantified') and persona.pain_points_quantified:
+        for idx, pain in enumerate(persona.pain_points_quantified[:3], 1):
+            description = pain['description'] if isinstance(pain, dict) else pain.description
+            impact = pain['impact'] if isinstance(pain, dict) else pain.impact
+            parts.append(f"{idx}. {description} - Impacto: {impact}\n")
+
+    parts.append(f"""
+**DEMOGRAPHICS:**
+{persona.demographics if hasattr(persona, 'demographics') else 'N/A'}
+
+**GOALS:**
+{', '.join(persona.goals[:5]) if hasattr(persona, 'goals') and persona.goals else 'N/A'}
+
+**VALORES CORE:**
+{', '.join(persona.values[:5]) if hasattr(persona, 'values') and persona.values else 'N/A'}
+
+""")
+    return "".join(parts)
+
+
+def render_persona_context(persona: Persona) -> str:
+    """Resumo da persona repetido no contexto compartilhado de todos os especialistas."""
+    return f"""
+[CONTEXTO DO CLIENTE IDEAL - PERSONA]:
+Nome: {persona.name}
+Objetivos: {', '.join(persona.goals[:5]) if persona.goals else 'Não especificados'}
+Pain Points: {', '.join(persona.painPoints[:5]) if persona.painPoints else 'Não especificados'}
+Valores: {', '.join(persona.values[:5]) if persona.values else 'Não especificados'}
+
+IMPORTANTE: Suas recomendações devem ser específicas para este perfil de cliente ideal.
+"""
+
+
+def context_version(persona: Persona) -> str:
+    """Versão da renderização gravada: formato + id e ``updatedAt`` da persona."""
+    updated_at = persona.updatedAt.isoformat() if getattr(persona, "updatedAt", None) else ""
+    raw = "\x1f".join([RENDER_VERSION, str(persona.id), updated_at])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class RenderedContextCache:
+    """
+    Contexto renderizado por (analysis_id, persona_id).
+
+    ``get`` devolve ``{"personaName", "analysisContext", "personaContext"}`` ou
+    None se a persona não existir. ``analysisContext`` é "" quando a conversa não
+    tem análise (ou a análise não foi encontrada).
+
+    Invalidações são publicadas no canal ``rendered_context``; com ``start_sync``
+    as dos outros workers chegam por LISTEN. Sem sincronização cada worker só vê
+    as próprias e as entradas dos demais vencem pelo TTL.
+    """
+
+    def __init__(self, storage: Any, max_entries: int = 256, ttl_seconds: int = 600):
+        self.storage = storage
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.worker_id = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, str]]]" = OrderedDict()
+        self._listener = None
+        self.memory_hits = 0
+        self.stored_hits = 0
+        self.renders = 0
+        self.remote_invalidations = 0
+
+    @property
+    def synced(self) -> bool:
+        return self._listener is not None
+
+    def _remember(self, key: Tuple[str, str], rendered: Dict[str, str]) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, rendered)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, analysis_id: Optional[str], persona_id: str) -> Optional[Dict[str, str]]:
+        key = (analysis_id or "", persona_id)
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, rendered = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return rendered
+            del self._entries[key]
+
+        persona = await self.storage.get_persona(persona_id)
+        if not persona:
+            return None
+        version = context_version(persona)
+
+        rendered = None
+        if analysis_id:
+            try:
+                stored = await self.storage.get_rendered_context(analysis_id)
+            except Exception as e:
+                print(f"[RenderedContext] Erro ao ler contexto gravado (ignorado): {e}")
+                stored = None
+            if stored and stored.get("version") == version:
+                rendered = stored
+                self.stored_hits += 1
+
+        if rendered is None:
+            rendered = await self._render(analysis_id, persona, version)
+
+        self._remember(key, rendered)
+        return rendered
+
+    async def _render(self, analysis_id: Optional[str], persona: Persona, version: str) -> Dict[str, str]:
+        self.renders += 1
+        analysis = None
+        if analysis_id:
+            try:
+                analysis = await self.storage.get_council_analysis(analysis_id)
+            except Exception as e:
+                print(f"[RenderedContext] ❌ Erro ao buscar análise inicial: {e}")
+            if not analysis:
+                print(f"[RenderedContext] ❌ Análise não encontrada para ID: {analysis_id}")
+
+        rendered = {
+            "version": version,
+            "personaName": persona.name,
+            "analysisContext": render_analysis_context(analysis, persona) if analysis else "",
+            "personaContext": render_persona_context(persona),
+        }
+        if analysis:
+            try:
+                await self.storage.save_rendered_context(analysis_id, rendered)
+            except Exception as e:
+                print(f"[RenderedContext] Erro ao gravar contexto (ignorado): {e}")
+        return rendered
+
+    def _drop(self, position: int, value: str) -> None:
+        for key in [k for k in self._entries if k[position] == value]:
+            del self._entries[key]
+
+    async def _publish(self, kind: str, value: str) -> None:
+        if not hasattr(self.storage, "notify"):
+            return
+        payload = json.dumps({"o": self.worker_id, "k": kind, "id": value})
+        try:
+            await self.storage.notify(RENDERED_CONTEXT_CHANNEL, payload)
+        except Exception as e:
+            print(f"[RenderedContext] Falha ao publicar invalidação (outros workers usam o TTL): {e}")
+
+    async def invalidate_persona(self, persona_id: str) -> None:
+        """Descarta as entradas da persona aqui e nos outros workers."""
+        self._drop(1, persona_id)
+        await self._publish("persona", persona_id)
+
+    async def invalidate_analysis(self, analysis_id: str) -> None:
+        """Descarta as entradas da análise aqui e nos outros workers."""
+        self._drop(0, analysis_id)
+        await self._publish("analysis", analysis_id)
+
+    def _on_notify(self, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        if message.get("o") == self.worker_id:
+            return
+        self.remote_invalidations += 1
+        self._drop(1 if message.get("k") == "persona" else 0, message.get("id"))
+
+    def _on_listener_lost(self, *args) -> None:
+        print("[RenderedContext] ⚠️ Conexão LISTEN perdida; cache em memória descartado")
+        self._listener = None
+        self._entries.clear()
+
+    async def start_sync(self) -> None:
+        """LISTEN no canal de invalidação (no-op sem Postgres)."""
+        if self._listener is not None or not hasattr(self.storage, "listen"):
+            return
+        try:
+            self._listener = await self.storage.listen(RENDERED_CONTEXT_CHANNEL, self._on_notify)
+        except Exception as e:
+            print(f"[RenderedContext] LISTEN indisponível, invalidação só neste worker: {e}")
+            self._listener = None
+            return
+        self._listener.add_termination_listener(self._on_listener_lost)
+        # Pode ter perdido invalidações antes do LISTEN
+        self._entries.clear()
+        print(f"[RenderedContext] ✓ Invalidação entre workers via LISTEN {RENDERED_CONTEXT_CHANNEL}")
+
+    async def stop_sync(self) -> None:
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            await listener.close()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.stored_hits + self.renders
+        return {
+            "entries": len(self._entries),
+            "maxEntries": self.max_entries,
+            "ttlSeconds": self.ttl_seconds,
+            "memoryHits": self.memory_hits,
+            "storedHits": self.stored_hits,
+            "renders": self.renders,
+            "synced": self.synced,
+            "remoteInvalidations": self.remote_invalidations,
+            "hitRate": round((self.memory_hits + self.stored_hits) / lookups, 3) if lookups else 0.0,
+        }
+
+
+def _build_default_cache() -> RenderedContextCache:
+    from python_backend.storage import storage
+    return RenderedContextCache(
+        storage,
+        max_entries=int(os.getenv("RENDERED_CONTEXT_CACHE_SIZE", "256")),
+        ttl_seconds=int(os.getenv("RENDERED_CONTEXT_CACHE_TTL", "600")),
+    )
+
+
+rendered_context_cache = _build_default_cache()
@@ -1,4 +1,6 @@
+import anyio
 from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from slowapi import Limiter
 from slowapi.util import get_remote_address
@@ -6,6 +8,9 @@ from slowapi.util import get_remote_address
 from python_backend.models import Conversation, ConversationCreate, Message, MessageSend, MessageResponse
 from python_backend.storage import storage
 from python_backend.crew_agent import LegendAgentFactory
+from python_backend.conversation_memory import conversation_memory
+from python_backend.context_loader import context_loader
+from python_backend.event_bus import SSE_HEADERS, sse_event
 
 router = APIRouter(
     tags=["Conversations"],
@@ -39,31 +44,26 @@ async def create_conversation(data: ConversationCreate):
 async def get_messages(conversation_id: str):
     return await storage.get_messages(conversation_id)
 
-@router.post("/api/conversations/{conversation_id}/messages", status_code=201)
-@limiter.limit("10/minute")
-async def send_message(request: Request, conversation_id: str, data: MessageSend):
-    print(f"[CHAT] Recebida mensagem para conversa {conversation_id}: {data.content[:50]}...")
-    try:
-        print(f"[CHAT] Buscando conversa...")
-        conversation = await storage.get_conversation(conversation_id)
-        if not conversation:
-            raise HTTPException(status_code=404, detail="Conversation not found")
-        
-        print(f"[CHAT] Buscando expert {conversation.expertId}...")
-        expert = await storage.get_expert(conversation.expertId)
-        if not expert:
-            raise HTTPException(status_code=404, detail="Expert for this conversation not found")
-            
-        print(f"[CHAT] Buscando histórico...")
-        history = await storage.get_messages(conversation_id)
-        print(f"[CHAT] Histórico: {len(history)} mensagens")
-        
-        # TODO: Refactor this to use a service
-        user_id = "default_user"
-        profile = await storage.get_business_profile(user_id)
-        enriched_system_prompt = expert.systemPrompt
-        if profile:
-            profile_context = f"""\n\n---
+async def _load_chat_context(conversation_id: str):
+    """Carrega especialista, histórico (janela + resumo) e contexto do negócio para um turno do chat"""
+    # Conversa, histórico e perfil em paralelo; especialista vem do catálogo em memória
+    print(f"[CHAT] Carregando contexto da conversa...")
+    # TODO: Refactor this to use a service
+    user_id = "default_user"
+    turn = await context_loader.chat_turn(conversation_id, user_id)
+    if not turn["conversation"]:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    expert = turn["expert"]
+    if not expert:
+        raise HTTPException(status_code=404, detail="Expert for this conversation not found")
+    history = turn["history"]
+    profile = turn["profile"]
+    print(f"[CHAT] Histórico: {len(history)} mensagens")
+    
+    # Perfil vai no sufixo dinâmico; o prompt da lenda fica no prefixo cacheável
+    profile_context = None
+    if profile:
+        profile_context = f"""\n\n---
 [CONTEXTO DO NEGÓCIO DO CLIENTE]:
 • Empresa: {profile.companyName}
 • Indústria: {profile.industry}
@@ -71,14 +71,30 @@ async def send_message(request: Request, conversation_id: str, data: MessageSend
 • Desafio Principal: {profile.mainChallenge}
 INSTRUÇÃO IMPORTANTE: Use essas informações para oferecer conselhos mais específicos e relevantes. NÃO mencione explicitamente que você recebeu essas informações.
 ---"""
-            enriched_system_prompt += profile_context
+
+    # Memória limitada: mensagens recentes na íntegra + resumo persistido das antigas
+    history_dicts = [h.model_dump() for h in history]
+    memory = await conversation_memory.context(conversation_id, history_dicts)
+    system_context = "\n\n".join(part for part in (profile_context, memory.summary_block()) if part) or None
+    return expert, history_dicts, memory, system_context
+
+@router.post("/api/conversations/{conversation_id}/messages", status_code=201)
+@limiter.limit("10/minute")
+async def send_message(request: Request, conversation_id: str, data: MessageSend):
+    print(f"[CHAT] Recebida mensagem para conversa {conversation_id}: {data.content[:50]}...")
+    try:
+        expert, history_dicts, memory, system_context = await _load_chat_context(conversation_id)
 
         # Criar agente - ele vai verificar a API key internamente
         try:
             print(f"[CHAT] Criando agente para {expert.name}...")
-            agent = LegendAgentFactory.create_agent(expert.name, enriched_system_prompt)
+            agent = LegendAgentFactory.create_agent(expert.name, expert.systemPrompt)
             print(f"[CHAT] Enviando mensagem para Claude...")
-            ai_response = await agent.chat([h.model_dump() for h in history], data.content)
+            ai_response = await agent.chat(
+                memory.messages,
+                data.content,
+                system_context=system_context
+            )
             print(f"[CHAT] Resposta recebida ({len(ai_response)} caracteres)")
         except ValueError as ve:
             # Erro de configuração (API key não encontrada)
@@ -115,45 +131,13 @@ INSTRUÇÃO IMPORTANTE: Use essas informações para oferecer conselhos mais esp
             )
         
         print(f"[CHAT] Salvando mensagens no banco...")
-        # Criar mensagens diretamente usando o pool do PostgreSQL
-        from python_backend.models import Message
-        import uuid
-        
-        # Mensagem do usuário
-        user_message_id = str(uuid.uuid4())
-        await storage.pool.execute(
-            'INSERT INTO messages (id, "conversationId", role, content, "createdAt") VALUES ($1, $2, $3, $4, NOW())',
-            user_message_id, conversation_id, "user", data.content
-        )
-        
-        # Mensagem do assistente
-        ai_message_id = str(uuid.uuid4())
-        await storage.pool.execute(
-            'INSERT INTO messages (id, "conversationId", role, content, "createdAt") VALUES ($1, $2, $3, $4, NOW())',
-            ai_message_id, conversation_id, "assistant", ai_response
-        )
-        
-        # Atualizar updatedAt da conversa
-        await storage.pool.execute(
-            'UPDATE conversations SET "updatedAt" = NOW() WHERE id = $1',
-            conversation_id
-        )
-        
-        # Buscar as mensagens criadas
-        user_msg_record = await storage.pool.fetchrow('SELECT * FROM messages WHERE id = $1', user_message_id)
-        ai_msg_record = await storage.pool.fetchrow('SELECT * FROM messages WHERE id = $1', ai_message_id)
+        user_message, assistant_message = await storage.create_message_pair(conversation_id, data.content, ai_response)
         
-        # Mapear campos
-        def map_msg_fields(record):
-            d = dict(record)
-            if "conversationid" in d and "conversationId" not in d:
-                d["conversationId"] = d["conversationid"]
-            if "createdat" in d and "createdAt" not in d:
-                d["createdAt"] = d["createdat"]
-            return Message(**d)
-        
-        user_message = map_msg_fields(user_msg_record)
-        assistant_message = map_msg_fields(ai_msg_record)
+        # Resumo das mensagens que saíram da janela é atualizado depois da resposta
+        conversation_memory.schedule_update(conversation_id, history_dicts + [
+            {"role": "user", "content": data.content},
+            {"role": "assistant", "content": ai_response},
+        ])
         
         print(f"[CHAT] Mensagens salvas. Retornando resposta...")
         # Frontend espera 'userMessage' e 'assistantMessage'
@@ -182,3 +166,61 @@ INSTRUÇÃO IMPORTANTE: Use essas informações para oferecer conselhos mais esp
                 status_code=500,
                 detail=f"Erro ao processar mensagem: {error_detail}"
             )
+
+@router.post("/api/conversations/{conversation_id}/messages/stream")
+@limiter.limit("10/minute")
+async def send_message_stream(request: Request, conversation_id: str, data: MessageSend):
+    """
+    Variante em streaming (SSE) de send_message: o texto chega em eventos
+    `delta` conforme o Claude gera, em vez de esperar a resposta inteira.
+    
+    Eventos: message_started -> delta* -> message_complete (ou error).
+    As mensagens só são salvas quando o stream termina; se o cliente desconectar,
+    o stream com a Anthropic é cancelado e nada é salvo.
+    """
+    print(f"[CHAT Stream] Recebida mensagem para conversa {conversation_id}: {data.content[:50]}...")
+    expert, history_dicts, memory, system_context = await _load_chat_context(conversation_id)
+    try:
+        agent = LegendAgentFactory.create_agent(expert.name, expert.systemPrompt)
+    except ValueError as ve:
+        raise HTTPException(status_code=503, detail=f"Erro de configuração: {ve}")
+    
+    async def event_generator():
+        stream = agent.chat_stream(memory.messages, data.content, system_context=system_context)
+        chunks = []
+        try:
+            yield sse_event("message_started", {"expertId": expert.id, "expertName": expert.name})
+            async for delta in stream:
+                if await request.is_disconnected():
+                    print(f"[CHAT Stream] Cliente desconectou após {len(chunks)} trechos; cancelando stream")
+                    return
+                chunks.append(delta)
+                yield sse_event("delta", {"text": delta})
+            
+            ai_response = "".join(chunks)
+            user_message, assistant_message = await storage.create_message_pair(conversation_id, data.content, ai_response)
+            conversation_memory.schedule_update(conversation_id, history_dicts + [
+                {"role": "user", "content": data.content},
+                {"role": "assistant", "content": ai_response},
+            ])
+            print(f"[CHAT Stream] Resposta completa ({len(ai_response)} caracteres) salva")
+            yield sse_event("message_complete", {
+                "userMessage": user_message.model_dump(mode="json"),
+                "assistantMessage": assistant_message.model_dump(mode="json"),
+            })
+        except Exception as e:
+            import traceback
+            print(f"[ERROR] Chat stream error: {e}")
+            print(f"[ERROR] Traceback: {traceback.format_exc()}")
+            yield sse_event("error", {"message": f"Erro ao processar mensagem: {e}"})
+        finally:
+            # Fecha o stream da Anthropic (desconexão/cancelamento interrompe a geração);
+            # blindado para rodar mesmo quando o Starlette cancela a resposta
+            with anyio.CancelScope(shield=True):
+                await stream.aclose()
+    
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
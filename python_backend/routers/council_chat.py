@@ -1,13 +1,20 @@
 from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from datetime import datetime, timedelta, timezone
 from typing import List, Optional
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
 from python_backend.models import (
-    CouncilConversation, CouncilConversationCreate, CouncilMessage, MessageSend, MessageReaction
+    CouncilConversation, CouncilConversationCreate, CouncilMessage, MessageSend, MessageReaction, TaskType
 )
 from python_backend.storage import storage
+from python_backend.background_tasks import create_task
+from python_backend.event_bus import KEEPALIVE, KEEPALIVE_SECONDS, SSE_HEADERS, council_topic, event_bus, sse_event
 from python_backend.crew_agent import LegendAgentFactory
+from python_backend.upstream_scheduler import anthropic_scheduler
+from python_backend.context_loader import context_loader, expert_catalog
+from python_backend.conversation_memory import conversation_memory
 
 router = APIRouter(
     tags=["Council Chat"],
@@ -44,15 +51,14 @@ async def create_council_conversation(request: Request, data: CouncilConversatio
                 detail="Selecione pelo menos 1 especialista para a conversa."
             )
         
-        experts = []
+        experts = await expert_catalog.get_many(data.expertIds)
+        found = {expert.id for expert in experts}
         for expert_id in data.expertIds:
-            expert = await storage.get_expert(expert_id)
-            if not expert:
+            if expert_id not in found:
                 raise HTTPException(
                     status_code=404,
                     detail=f"Especialista {expert_id} não encontrado."
                 )
-            experts.append(expert)
         
         # Validar problema
         if not data.problem or len(data.problem.strip()) < 10:
@@ -116,8 +122,84 @@ async def get_council_messages(conversation_id: str):
     messages = await storage.get_council_messages(conversation_id)
     return messages
 
-async def _process_council_message_background(conversation_id: str, message_content: str):
-    """Processa mensagem do conselho em background"""
+def _parse_since(since: Optional[str]) -> Optional[datetime]:
+    """Timestamp ISO 8601 do cliente como datetime naive em UTC (o formato do storage)."""
+    if not since:
+        return None
+    try:
+        since_at = datetime.fromisoformat(since)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="since deve ser um timestamp ISO 8601")
+    if since_at.tzinfo is not None:
+        since_at = since_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return since_at
+
+@router.get("/api/council/conversations/{conversation_id}/events")
+async def stream_council_events(conversation_id: str, since: Optional[str] = None):
+    """
+    Mensagens novas do conselho por SSE (substitui o polling de /messages).
+
+    Eventos:
+    - message: mensagem nova (usuário ou especialista), uma por evento
+    - turn_completed: os especialistas terminaram de responder ao turno
+    - resync: eventos foram perdidos; o cliente relê /messages uma vez
+
+    since (ISO 8601, opcional; com fuso é convertido para UTC): reenvia primeiro
+    as mensagens posteriores a esse timestamp (reconexão sem lacunas); sem ele,
+    só o que chegar daqui em diante.
+
+    Mensagens maiores que o limite do NOTIFY chegam de outros workers só como
+    resync (ver event_bus). Ao receber um resync o endpoint relê as mensagens
+    ainda não enviadas e as entrega como eventos message antes de repassar o
+    resync, então o conteúdo nunca depende do cliente reler /messages.
+    """
+    since_at = _parse_since(since)
+
+    conversation = await storage.get_council_conversation(conversation_id)
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Conversa não encontrada")
+
+    async def event_generator():
+        # Assina antes de ler o histórico: nada publicado entre os dois se perde
+        with event_bus.subscribe(council_topic(conversation_id)) as subscription:
+            sent = set()
+            # Sem since, a janela do catch-up começa na assinatura
+            start_at = since_at if since_at is not None else datetime.utcnow()
+
+            async def catch_up():
+                for message in await storage.get_council_messages(conversation_id):
+                    if message.timestamp > start_at and message.id not in sent:
+                        sent.add(message.id)
+                        yield sse_event("message", {"type": "message", "message": message.model_dump(mode="json")})
+
+            if since_at is not None:
+                async for chunk in catch_up():
+                    yield chunk
+            while True:
+                event = await subscription.get(timeout=KEEPALIVE_SECONDS)
+                if event is None:
+                    yield KEEPALIVE
+                    continue
+                if event["type"] == "resync":
+                    async for chunk in catch_up():
+                        yield chunk
+                elif event["type"] == "message":
+                    if event["message"]["id"] in sent:
+                        continue
+                    sent.add(event["message"]["id"])
+                yield sse_event(event["type"], event)
+
+    return StreamingResponse(event_generator(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+async def _process_council_message_background(
+    conversation_id: str, message_content: str, message_id: Optional[str] = None
+):
+    """
+    Processa mensagem do conselho em background.
+
+    message_id identifica a mensagem do usuário já persistida (tasks antigas
+    não o têm; nesse caso vale a última mensagem do usuário com o mesmo texto).
+    """
     import asyncio
     
     try:
@@ -127,150 +209,67 @@ async def _process_council_message_background(conversation_id: str, message_cont
             print(f"[Council Chat Background] Conversa {conversation_id} não encontrada")
             return
         
-        # Buscar persona
-        persona = await storage.get_persona(conversation.personaId)
-        if not persona:
+        # Em paralelo: contexto renderizado (análise + persona, em cache por (análise, persona)),
+        # especialistas (catálogo em memória) e histórico (já inclui a mensagem do usuário)
+        turn = await context_loader.council_chat_turn(conversation)
+        rendered = turn["rendered"]
+        if not rendered:
             print(f"[Council Chat Background] Persona não encontrada")
             return
+        analysis_context = rendered["analysisContext"]
+        if not conversation.analysisId:
+            print(f"[Council Chat Background] ⚠️ Conversa sem analysisId - contexto limitado")
         
-        # Buscar especialistas
-        experts = []
-        for expert_id in conversation.expertIds:
-            expert = await storage.get_expert(expert_id)
-            if not expert:
-                print(f"[Council Chat Background] Aviso: Especialista {expert_id} não encontrado, pulando...")
-                continue
-            experts.append(expert)
+        experts = turn["experts"]
+        if len(experts) < len(conversation.expertIds):
+            found = {expert.id for expert in experts}
+            for expert_id in conversation.expertIds:
+                if expert_id not in found:
+                    print(f"[Council Chat Background] Aviso: Especialista {expert_id} não encontrado, pulando...")
         
         if not experts:
             print(f"[Council Chat Background] Nenhum especialista válido encontrado")
             return
         
-        # Buscar histórico da conversa (já inclui a mensagem do usuário que foi salva antes)
-        history = await storage.get_council_messages(conversation_id)
+        history = turn["history"]
         
-        print(f"[Council Chat Background] Obtendo respostas de {len(experts)} especialistas...")
+        # As respostas são geradas em paralelo, mas cada uma recebe um timestamp fixo
+        # (mensagem do usuário + posição do especialista): a ordem em council_messages
+        # é a ordem de conversation.expertIds, não a ordem de conclusão.
+        user_message = next(
+            (
+                msg for msg in reversed(history)
+                if msg.role == "user" and (msg.id == message_id if message_id else msg.content == message_content)
+            ),
+            None
+        )
+        if user_message is None:
+            print(f"[Council Chat Background] Mensagem do usuário não encontrada em {conversation_id}")
+            return
+        turn_started_at = user_message.timestamp
         
-        # Buscar análise inicial se disponível
-        analysis_context = ""
-        if conversation.analysisId:
-            print(f"[Council Chat Background] 🔍 Buscando análise: {conversation.analysisId}")
-            try:
-                analysis = await storage.get_council_analysis(conversation.analysisId)
-                if analysis:
-                    print(f"[Council Chat Background] ✅ Análise encontrada! Consenso: {len(analysis.consensus)} chars, Contribuições: {len(analysis.contributions)}")
-                    analysis_context = f"""
-╔══════════════════════════════════════════════════════════════════════════════╗
-║                    CONTEXTO DA ANÁLISE INICIAL DO CONSELHO                   ║
-╚══════════════════════════════════════════════════════════════════════════════╝
-
-**PROBLEMA ORIGINAL:**
-{analysis.problem}
-
-**CONSENSO ESTRATÉGICO GERADO PELO CONSELHO:**
-{analysis.consensus}
-
-"""
-                    if analysis.contributions:
-                        analysis_context += "**CONTRIBUIÇÕES INICIAIS DOS ESPECIALISTAS:**\n"
-                        for contrib in analysis.contributions:
-                            analysis_context += f"\n--- {contrib.expertName} ---\n"
-                            
-                            if contrib.keyInsights:
-                                analysis_context += f"\n### INSIGHTS DE {contrib.expertName.upper()}:\n"
-                                for idx, insight in enumerate(contrib.keyInsights, 1):
-                                    analysis_context += f"  {idx}. {insight}\n"
-                                analysis_context += "\n"
-                            
-                            if contrib.recommendations:
-                                analysis_context += f"### RECOMENDAÇÕES DE {contrib.expertName.upper()}:\n"
-                                for idx, rec in enumerate(contrib.recommendations, 1):
-                                    analysis_context += f"  {idx}. {rec}\n"
-                                analysis_context += "\n"
-                        analysis_context += "\n"
-                    if analysis.actionPlan:
-                        analysis_context += "**PLANO DE AÇÃO CRIADO:**\n"
-                        analysis_context += f"Total de {len(analysis.actionPlan.phases)} fases | Duração: {analysis.actionPlan.totalDuration}\n\n"
-                    
-                    # Adicionar contexto COMPLETO da persona (CRÍTICO)
-                    analysis_context += f"""
-╔══════════════════════════════════════════════════════════════════════════════╗
-║                           PERSONA DO CLIENTE IDEAL                            ║
-╚══════════════════════════════════════════════════════════════════════════════╝
-
-**NOME DA PERSONA:** {persona.name}
-
-**JOB STATEMENT (Trabalho Principal):**
-{persona.job_statement if hasattr(persona, 'job_statement') else 'N/A'}
-
-**PRINCIPAIS JOBS TO BE DONE:**
-Funcionais: {', '.join(persona.functional_jobs[:5]) if hasattr(persona, 'functional_jobs') and persona.functional_jobs else 'N/A'}
-Emocionais: {', '.join(persona.emotional_jobs[:3]) if hasattr(persona, 'emotional_jobs') and persona.emotional_jobs else 'N/A'}
-Sociais: {', '.join(persona.social_jobs[:2]) if hasattr(persona, 'social_jobs') and persona.social_jobs else 'N/A'}
-
-**PAIN POINTS PRINCIPAIS:**
-"""
-                    if hasattr(persona, 'pain_points_quantified') and persona.pain_points_quantified:
-                        for idx, pain in enumerate(persona.pain_points_quantified[:3], 1):
-                            analysis_context += f"{idx}. {pain['description'] if isinstance(pain, dict) else pain.description} - Impacto: {pain['impact'] if isinstance(pain, dict) else pain.impact}\n"
-                    
-                    analysis_context += f"""
-**DEMOGRAPHICS:**
-{persona.demographics if hasattr(persona, 'demographics') else 'N/A'}
-
-**GOALS:**
-{', '.join(persona.goals[:5]) if hasattr(persona, 'goals') and persona.goals else 'N/A'}
-
-**VALORES CORE:**
-{', '.join(persona.values[:5]) if hasattr(persona, 'values') and persona.values else 'N/A'}
-
-"""
-                else:
-                    print(f"[Council Chat Background] ❌ Análise não encontrada no banco para ID: {conversation.analysisId}")
-            except Exception as e:
-                print(f"[Council Chat Background] ❌ Erro ao buscar análise inicial: {e}")
-                import traceback
-                traceback.print_exc()
-                analysis_context = ""
-        else:
-            print(f"[Council Chat Background] ⚠️ Conversa sem analysisId - contexto limitado")
+        # Nova tentativa da task (worker caiu no meio do turno): especialistas que já
+        # responderam a esta mensagem não são chamados de novo, e o contexto é o do
+        # momento da pergunta (sem as respostas parciais nem turnos posteriores)
+        next_turn_at = min(
+            (msg.timestamp for msg in history if msg.role == "user" and msg.timestamp > turn_started_at), default=None
+        )
+        already_replied = {
+            msg.expertId for msg in history
+            if msg.role == "expert" and msg.timestamp > turn_started_at
+            and (next_turn_at is None or msg.timestamp < next_turn_at)
+        }
+        history = [msg for msg in history if msg.timestamp <= turn_started_at]
+        pending = [(index, expert) for index, expert in enumerate(experts) if expert.id not in already_replied]
+        if already_replied:
+            print(f"[Council Chat Background] Retomando turno: {len(already_replied)} resposta(s) já gravada(s)")
         
-        # Para cada especialista, gerar resposta
-        for expert in experts:
-            try:
-                conversation_history = ""
-                if history:
-                    conversation_history = "\n\n**HISTÓRICO DA CONVERSA (últimas mensagens):**\n"
-                    for msg in history[-15:]:
-                        if msg.role == "user":
-                            conversation_history += f"\n👤 Usuário: {msg.content}\n"
-                        elif msg.role == "expert":
-                            conversation_history += f"\n👨‍💼 {msg.expertName}: {msg.content[:200]}...\n"
-                
-                persona_context = f"""
-[CONTEXTO DO CLIENTE IDEAL - PERSONA]:
-Nome: {persona.name}
-Objetivos: {', '.join(persona.goals[:5]) if persona.goals else 'Não especificados'}
-Pain Points: {', '.join(persona.painPoints[:5]) if persona.painPoints else 'Não especificados'}
-Valores: {', '.join(persona.values[:5]) if persona.values else 'Não especificados'}
-
-IMPORTANTE: Suas recomendações devem ser específicas para este perfil de cliente ideal.
-"""
-                
-                messages_for_claude = []
-                for msg in history:
-                    if msg.role == "user":
-                        messages_for_claude.append({"role": "user", "content": msg.content})
-                    elif msg.role == "expert":
-                        expert_msg_content = f"[{msg.expertName}]: {msg.content}"
-                        messages_for_claude.append({"role": "assistant", "content": expert_msg_content})
-                
-                messages_for_claude.append({"role": "user", "content": message_content})
-                
-                enriched_system_prompt = expert.systemPrompt
-                
-                # Adicionar instrução CRÍTICA no topo
-                enriched_system_prompt += """
+        print(f"[Council Chat Background] Obtendo respostas de {len(pending)} especialistas...")
+        
+        # Contexto compartilhado da conversa: igual para todos os especialistas e estável
+        # entre turnos, por isso vai em um bloco com cache_control (ver prompt_cache)
+        # Adicionar instrução CRÍTICA no topo
+        council_instructions = """
 
 ╔══════════════════════════════════════════════════════════════════════════════╗
 ║  ⚠️  CONTEXTO COMPLETO DISPONÍVEL - NÃO PEÇA INFORMAÇÕES BÁSICAS NOVAMENTE  ║
@@ -299,9 +298,9 @@ Abaixo está TODO o contexto dessa análise, incluindo:
 ✅ SEJA DIRETO e acionável
 
 """
-                
-                # FORÇAR formato executável (não texto livre)
-                execution_template = """
+        
+        # FORÇAR formato executável (não texto livre)
+        execution_template = """
 ╔══════════════════════════════════════════════════════════════════════════════╗
 ║                    FORMATO OBRIGATÓRIO DE RESPOSTA                            ║
 ╚══════════════════════════════════════════════════════════════════════════════╝
@@ -351,16 +350,8 @@ Abaixo está TODO o contexto dessa análise, incluindo:
 - 100% executável agora
 - Template deve ser copy-paste ready
 """
-                
-                enriched_system_prompt += "\n\n" + execution_template
-                
-                if analysis_context:
-                    enriched_system_prompt += "\n\n" + analysis_context
-                enriched_system_prompt += "\n\n" + persona_context
-                if conversation_history:
-                    enriched_system_prompt += "\n\n" + conversation_history
-                
-                enriched_system_prompt += f"""
+        
+        collaboration_instructions = """
 ╔══════════════════════════════════════════════════════════════════════════════╗
 ║                    INSTRUÇÕES PARA A CONVERSA COLABORATIVA                    ║
 ╚══════════════════════════════════════════════════════════════════════════════╝
@@ -384,17 +375,63 @@ Abaixo está TODO o contexto dessa análise, incluindo:
 
 7. **LEMBRE-SE:** O usuário já forneceu TODAS as informações. Não peça novamente!
 """
+        
+        persona_context = rendered["personaContext"]
+        
+        shared_context = council_instructions + "\n\n" + execution_template
+        if analysis_context:
+            shared_context += "\n\n" + analysis_context
+        shared_context += "\n\n" + persona_context
+        shared_context += "\n" + collaboration_instructions
+        
+        # Memória limitada: mensagens recentes na íntegra + resumo persistido das antigas
+        memory = await conversation_memory.context(conversation_id, [msg.model_dump() for msg in history])
+        
+        conversation_history = ""
+        if memory.summary:
+            conversation_history = "\n\n" + memory.summary_block() + "\n"
+        if memory.messages:
+            conversation_history += "\n\n**HISTÓRICO DA CONVERSA (últimas mensagens):**\n"
+            for msg in memory.messages[-15:]:
+                if msg["role"] == "user":
+                    conversation_history += f"\n👤 Usuário: {msg['content']}\n"
+                elif msg["role"] == "expert":
+                    conversation_history += f"\n👨‍💼 {msg['expertName']}: {msg['content'][:200]}...\n"
+        
+        # Histórico no formato de mensagens do Claude (igual para todos os especialistas)
+        messages_for_claude = []
+        for msg in memory.messages:
+            if msg["role"] == "user":
+                messages_for_claude.append({"role": "user", "content": msg["content"]})
+            elif msg["role"] == "expert":
+                expert_msg_content = f"[{msg['expertName']}]: {msg['content']}"
+                messages_for_claude.append({"role": "assistant", "content": expert_msg_content})
+        
+        messages_for_claude.append({"role": "user", "content": message_content})
+        
+        async def reply(index: int, expert):
+            try:
+                agent = LegendAgentFactory.create_agent(expert.name, expert.systemPrompt)
+                # Vaga do agendador compartilhado com o restante das chamadas à Anthropic;
+                # headers de rate limit e 429 desta chamada ajustam a concorrência (AIMD)
+                ai_response = await agent.chat(
+                    messages_for_claude,
+                    message_content,
+                    system_context=conversation_history or None,
+                    shared_context=shared_context,
+                    scheduler=anthropic_scheduler
+                )
                 
-                agent = LegendAgentFactory.create_agent(expert.name, enriched_system_prompt)
-                ai_response = await agent.chat(messages_for_claude, message_content)
-                
-                await storage.create_council_message(
+                # Persistir assim que ficar pronta e publicar (visível sem esperar os demais)
+                expert_message = await storage.create_council_message(
                     conversation_id=conversation_id,
                     expert_id=expert.id,
                     expert_name=expert.name,
                     role="expert",
-                    content=ai_response
+                    content=ai_response,
+                    timestamp=turn_started_at + timedelta(microseconds=index + 1)
                 )
+                await _publish_message(conversation_id, expert_message)
                 
                 print(f"[Council Chat Background] Resposta de {expert.name} gerada e salva")
                 
@@ -402,7 +439,12 @@ Abaixo está TODO o contexto dessa análise, incluindo:
                 print(f"[Council Chat Background] Erro ao gerar resposta de {expert.name}: {e}")
                 import traceback
                 traceback.print_exc()
-                continue
+        
+        await asyncio.gather(*(reply(index, expert) for index, expert in pending))
+        
+        # Resumo das mensagens que saíram da janela é atualizado depois das respostas
+        updated_history = await storage.get_council_messages(conversation_id)
+        conversation_memory.schedule_update(conversation_id, [msg.model_dump() for msg in updated_history])
         
         print(f"[Council Chat Background] Processamento completo para conversa {conversation_id}")
         
@@ -410,6 +452,20 @@ Abaixo está TODO o contexto dessa análise, incluindo:
         print(f"[Council Chat Background] Erro geral: {e}")
         import traceback
         traceback.print_exc()
+    
+    # Assinantes param de esperar respostas deste turno (inclusive após erro)
+    await event_bus.publish(council_topic(conversation_id), {"type": "turn_completed", "conversationId": conversation_id})
+
+async def _publish_message(conversation_id: str, message: CouncilMessage):
+    await event_bus.publish(
+        council_topic(conversation_id), {"type": "message", "message": message.model_dump(mode="json")}
+    )
+
+async def process_council_message_task(metadata: dict):
+    """Processador da task COUNCIL_CHAT_MESSAGE (registrado no startup, executado pelo TaskWorker)"""
+    await _process_council_message_background(
+        metadata["conversationId"], metadata["content"], metadata.get("messageId")
+    )
 
 @router.post("/api/council/conversations/{conversation_id}/messages", status_code=202)
 @limiter.limit("30/minute")
@@ -421,8 +477,6 @@ async def send_message_to_council(request: Request, conversation_id: str, data:
     O cliente deve fazer polling em /api/council/conversations/{id}/messages para
     verificar quando as respostas dos especialistas estiverem prontas.
     """
-    import asyncio
-    
     try:
         # Validar que a conversa existe
         conversation = await storage.get_council_conversation(conversation_id)
@@ -435,16 +489,22 @@ async def send_message_to_council(request: Request, conversation_id: str, data:
             role="user",
             content=data.content
         )
+        await _publish_message(conversation_id, user_message)
         
-        # Processar respostas em background (não bloqueia a resposta)
-        asyncio.create_task(_process_council_message_background(conversation_id, data.content))
+        # Processar respostas em background (fila durável: sobrevive a restart do processo)
+        task = await create_task(
+            user_id=conversation.userId,
+            task_type=TaskType.COUNCIL_CHAT_MESSAGE,
+            metadata={"conversationId": conversation_id, "content": data.content, "messageId": user_message.id}
+        )
         
         # Retornar imediatamente
         return {
             "status": "processing",
             "message": "Mensagem recebida. Processando respostas dos especialistas em background...",
             "userMessage": user_message,
-            "conversationId": conversation_id
+            "conversationId": conversation_id,
+            "taskId": task.id
         }
         
     except HTTPException:
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, HTTPException, File, UploadFile, Depends, Request
-from typing import List, Optional
+from fastapi.responses import JSONResponse
+from typing import List, Optional, Set
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
-from python_backend.models import Expert, ExpertCreate, CategoryInfo, AutoCloneRequest
+from python_backend.models import Expert, ExpertCreate, ExpertSummary, CategoryInfo, AutoCloneRequest
 from python_backend.storage import storage
+from python_backend.context_loader import expert_catalog
 
 router = APIRouter(
     tags=["Experts"],
@@ -26,10 +28,27 @@ CATEGORY_METADATA = {
     "product": { "name": "Psicologia do Produto", "description": "Formação de hábitos e design comportamental.", "icon": "Brain", "color": "purple" }
 }
 
-@router.get("/api/experts", response_model=List[Expert])
-async def get_experts(category: Optional[str] = None):
+def _parse_fields(fields: Optional[str], allowed: Set[str]) -> Optional[Set[str]]:
+    """`fields=id,name,avatar` -> {"id", "name", "avatar"}; None quando não informado"""
+    if not fields:
+        return None
+    selected = {field.strip() for field in fields.split(",") if field.strip()}
+    if "systemPrompt" in selected and "systemPrompt" not in allowed:
+        raise HTTPException(status_code=400, detail="systemPrompt só está disponível em GET /api/experts/{id}")
+    unknown = selected - allowed
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Campos inválidos: {', '.join(sorted(unknown))}")
+    return selected
+
+@router.get("/api/experts", response_model=List[ExpertSummary])
+async def get_experts(category: Optional[str] = None, fields: Optional[str] = None):
+    """
+    Lista os especialistas sem systemPrompt (ExpertSummary).
+    `fields=id,name,avatar` reduz ainda mais o payload.
+    """
+    selected = _parse_fields(fields, set(ExpertSummary.model_fields))
     try:
-        experts = await storage.get_experts()
+        experts = await expert_catalog.summaries()
         print(f"[Experts Router] get_experts called. Found {len(experts)} experts. Category filter: {category}")
         
         if len(experts) == 0:
@@ -40,6 +59,8 @@ async def get_experts(category: Optional[str] = None):
             experts = [e for e in experts if e.category.value == category]
             print(f"[Experts Router] After category filter: {len(experts)} experts")
         
+        if selected:
+            return JSONResponse([expert.model_dump(mode="json", include=selected) for expert in experts])
         return experts
     except Exception as e:
         print(f"[Experts Router] ERROR: {e}")
@@ -49,7 +70,7 @@ async def get_experts(category: Optional[str] = None):
 
 @router.get("/api/categories", response_model=List[CategoryInfo])
 async def get_categories():
-    experts = await storage.get_experts()
+    experts = await expert_catalog.summaries()
     category_counts = {}
     for expert in experts:
         cat = expert.category
@@ -71,11 +92,18 @@ async def get_categories():
     categories.sort(key=lambda x: (-x.expertCount, x.name))
     return categories
 
-@router.get("/api/experts/{expert_id}", response_model=Expert)
-async def get_expert(expert_id: str):
-    expert = await storage.get_expert(expert_id)
+@router.get("/api/experts/{expert_id}", response_model=ExpertSummary)
+async def get_expert(expert_id: str, fields: Optional[str] = None):
+    """
+    Um especialista. O systemPrompt só vem quando pedido:
+    `fields=systemPrompt` (ou junto de outros campos, ex. `fields=id,name,systemPrompt`).
+    """
+    selected = _parse_fields(fields, set(Expert.model_fields))
+    expert = await expert_catalog.get(expert_id)
     if not expert:
         raise HTTPException(status_code=404, detail="Expert not found")
+    if selected:
+        return JSONResponse(expert.model_dump(mode="json", include=selected))
     return expert
 
 @router.post("/api/experts", response_model=Expert, status_code=201)
@@ -102,6 +130,7 @@ async def create_expert(request: Request, data: ExpertCreate):
         
         # Salvar no banco de dados (comportamento original)
         expert = await storage.create_expert(data)
+        await expert_catalog.invalidate()
         
         return expert
     except Exception as e:
@@ -0,0 +1,119 @@
+"""
+Schema Migrations
+=================
+
+Aplica ``python_backend/migrations/NNN_nome.sql`` em ordem, uma vez, no startup.
+
+Antes, o ``PostgresStorage`` descobria o schema em tempo de execução: checagens
+em ``information_schema`` e ``try/except UndefinedTableError`` que criavam a
+tabela e repetiam a consulta, em cada método. Agora o schema é versionado:
+
+1. ``schema_migrations`` guarda a versão, o nome e o checksum de cada arquivo aplicado
+2. Cada migration pendente roda em uma transação, junto com o seu registro
+3. Um advisory lock serializa workers do uvicorn subindo ao mesmo tempo
+
+Arquivos aplicados não devem ser editados: mudanças entram como um novo
+``NNN_*.sql`` (um checksum diferente só gera um aviso). Arquivos sem prefixo
+numérico são ignorados.
+
+DB_MIGRATIONS=off desliga o runner (schema gerenciado fora da aplicação).
+"""
+
+import hashlib
+import os
+import re
+from pathlib import Path
+from typing import Any, List, NamedTuple
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+
+# Chave do pg_advisory_lock (qualquer bigint fixo; identifica "migrations do Advisior")
+MIGRATIONS_LOCK_KEY = 7_211_530_001
+
+_FILENAME = re.compile(r"^(\d+)_([\w-]+)\.sql$")
+
+CREATE_MIGRATIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        checksum TEXT NOT NULL,
+        applied_at TIMESTAMP NOT NULL DEFAULT NOW()
+    );
+"""
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    sql: str
+    checksum: str
+
+
+def migrations_enabled() -> bool:
+    return os.getenv("DB_MIGRATIONS", "on").lower() not in ("0", "off", "false", "no")
+
+
+def discover_migrations(directory: Path = MIGRATIONS_DIR) -> List[Migration]:
+    """Migrations do diretório, ordenadas pela versão (prefixo numérico do arquivo)."""
+    migrations = []
+    for path in sorted(directory.glob("*.sql")):
+        match = _FILENAME.match(path.name)
+        if not match:
+            print(f"[Migrations] Ignorando {path.name} (esperado NNN_nome.sql)")
+            continue
+        sql = path.read_text(encoding="utf-8")
+        migrations.append(Migration(
+            version=int(match.group(1)),
+            name=match.group(2),
+            sql=sql,
+            checksum=hashlib.sha256(sql.encode("utf-8")).hexdigest(),
+        ))
+    migrations.sort(key=lambda migration: migration.version)
+
+    versions = [migration.version for migration in migrations]
+    duplicated = sorted({version for version in versions if versions.count(version) > 1})
+    if duplicated:
+        raise ValueError(f"Versões de migration duplicadas: {duplicated}")
+    return migrations
+
+
+async def apply_migrations(pool: Any, directory: Path = MIGRATIONS_DIR) -> List[str]:
+    """
+    Aplica as migrations pendentes e retorna os nomes aplicadas (``NNN_nome``).
+
+    Erros sobem: um schema pela metade não deve servir requisições.
+    """
+    if not migrations_enabled():
+        print("[Migrations] DB_MIGRATIONS=off, pulando")
+        return []
+
+    migrations = discover_migrations(directory)
+    applied_now = []
+    async with pool.acquire() as connection:
+        await connection.execute("SELECT pg_advisory_lock($1)", MIGRATIONS_LOCK_KEY)
+        try:
+            await connection.execute(CREATE_MIGRATIONS_TABLE)
+            applied = {
+                record["version"]: record["checksum"]
+                for record in await connection.fetch("SELECT version, checksum FROM schema_migrations")
+            }
+            for migration in migrations:
+                label = f"{migration.version:03d}_{migration.name}"
+                if migration.version in applied:
+                    if applied[migration.version] != migration.checksum:
+                        print(f"[Migrations] ⚠️ {label} foi alterada depois de aplicada (crie uma nova migration)")
+                    continue
+                async with connection.transaction():
+                    await connection.execute(migration.sql)
+                    await connection.execute(
+                        "INSERT INTO schema_migrations (version, name, checksum) VALUES ($1, $2, $3)",
+                        migration.version, migration.name, migration.checksum,
+                    )
+                applied_now.append(label)
+                print(f"[Migrations] ✓ {label}")
+        finally:
+            await connection.execute("SELECT pg_advisory_unlock($1)", MIGRATIONS_LOCK_KEY)
+
+    if not applied_now:
+        print(f"[Migrations] Schema atualizado ({len(migrations)} migrations)")
+    return applied_now
@@ -0,0 +1,237 @@
+"""
+Section Parser
+==============
+
+Parser das respostas em markdown dos especialistas do conselho
+("## Análise Principal", "## Principais Insights", "## Recomendações Acionáveis").
+
+Substitui o antigo ``CouncilOrchestrator._extract_bullet_points``, que montava e
+compilava dezenas de regex a cada chamada (uma por variação de título) e
+recalculava ``text.lower()`` dentro de loops. Aqui:
+
+- Todas as regex de bullets são compiladas na importação
+- As regex de títulos são geradas uma vez por seção (mesmas variações e mesma
+  ordem de busca do extrator antigo, sem repetições) e ficam em cache
+- O texto é normalizado (e convertido para minúsculas, se necessário) uma única
+  vez, e ``parse_expert_response`` devolve todas as seções de uma vez
+
+A saída é idêntica à do extrator antigo (ver bench_section_parser.py).
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+SECTION_TITLES: Tuple[str, ...] = ("Análise Principal", "Principais Insights", "Recomendações Acionáveis")
+
+_SECTION_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "Análise Principal": ("Análise Principal", "Core Analysis", "## Análise Principal"),
+    "Principais Insights": ("Principais Insights", "Key Insights", "## Principais Insights"),
+    "Recomendações Acionáveis": ("Recomendações Acionáveis", "Actionable Recommendations", "## Recomendações Acionáveis"),
+}
+
+_MULTI_NEWLINE_RE = re.compile(r'\n{3,}')
+_BULLET_RE = re.compile(r'^\s*[-•*]\s+(.+)$', re.MULTILINE)
+_NUMBERED_RE = re.compile(r'^\s*\d+\.\s+(.+)$', re.MULTILINE)
+_BULLET_PREFIX_RE = re.compile(r'^[-•*]\s*')
+_NUMBER_START_RE = re.compile(r'^\d+\.')
+_NUMBER_PREFIX_RE = re.compile(r'^\d+\.\s*')
+_EMPHASIS_RE = re.compile(r'\*\*|__')
+_LEADING_MARKS_RE = re.compile(r'^[-•*\s]+')
+
+
+def _strip_headers(variation: str) -> str:
+    return variation.replace("## ", "").replace("### ", "")
+
+
+def _header_pattern(variation: str) -> str:
+    return rf'##+\s*{re.escape(_strip_headers(variation))}\s*:?\s*\n'
+
+
+def _title_variations(section_title: str, bold: bool) -> List[str]:
+    """Mesmas variações de título (e na mesma ordem) do extrator antigo."""
+    variations = list(_SECTION_ALIASES.get(section_title, (section_title,)))
+    variations.extend([f"## {st}" for st in variations])
+    if bold:
+        variations.extend([f"**{st}**" for st in variations])
+    variations.extend([f"### {st}" for st in variations])
+    return variations
+
+
+def _unique(items: Sequence) -> list:
+    seen = set()
+    result = []
+    for item in items:
+        if item not in seen:
+            seen.add(item)
+            result.append(item)
+    return result
+
+
+class _SectionPatterns:
+    """Regex pré-compiladas para localizar o início e o fim de uma seção."""
+
+    def __init__(self, section_title: str):
+        variations = _title_variations(section_title, bold=True)
+
+        # Início: para cada variação, título markdown e depois título numerado/negrito.
+        # Buscas repetidas são removidas (a primeira já teria encontrado o mesmo resultado).
+        start_sources = []
+        for variation in variations:
+            start_sources.append((_header_pattern(variation), re.IGNORECASE))
+            plain = _strip_headers(variation).replace("**", "")
+            start_sources.append((
+                rf'(?:^\d+\.\s*)?(\*\*)?{re.escape(plain)}(\*\*)?:?\s*\n',
+                re.IGNORECASE | re.MULTILINE,
+            ))
+        self.start_patterns = [re.compile(src, flags) for src, flags in _unique(start_sources)]
+
+        # Fallback: busca do título em qualquer lugar do texto (sem caixa)
+        self.fallback_needles = _unique([
+            (clean, clean.lower())
+            for clean in (_strip_headers(v).replace("**", "") for v in variations)
+        ])
+
+        # Fim: título da próxima seção conhecida (se houver)
+        self.end_patterns = []
+        if section_title in SECTION_TITLES and section_title != SECTION_TITLES[-1]:
+            next_title = SECTION_TITLES[SECTION_TITLES.index(section_title) + 1]
+            self.end_patterns = [
+                re.compile(src, re.IGNORECASE)
+                for src in _unique([_header_pattern(v) for v in _title_variations(next_title, bold=False)])
+            ]
+
+
+@lru_cache(maxsize=64)
+def _section_patterns(section_title: str) -> _SectionPatterns:
+    return _SectionPatterns(section_title)
+
+
+# Compilar as seções conhecidas já na importação
+for _title in SECTION_TITLES:
+    _section_patterns(_title)
+
+
+class _PreparedText:
+    """Texto normalizado uma única vez e compartilhado entre as seções."""
+
+    def __init__(self, text: str):
+        self.text = _MULTI_NEWLINE_RE.sub('\n\n', text)
+        self._lower: Optional[str] = None
+
+    @property
+    def lower(self) -> str:
+        if self._lower is None:
+            self._lower = self.text.lower()
+        return self._lower
+
+
+def _extract_bullets(section_text: str) -> List[str]:
+    bullets = _BULLET_RE.findall(section_text)
+    bullets.extend(_NUMBERED_RE.findall(section_text))
+    known = set(bullets)
+
+    # Linhas com cara de bullet que as regex acima não capturaram (ex: "-item")
+    for line in section_text.split('\n'):
+        stripped = line.strip()
+        if stripped and len(stripped) > 10 and not stripped.startswith('#'):
+            if stripped.startswith('-') or stripped.startswith('•') or stripped.startswith('*'):
+                content = _BULLET_PREFIX_RE.sub('', stripped)
+            elif _NUMBER_START_RE.match(stripped):
+                content = _NUMBER_PREFIX_RE.sub('', stripped)
+            else:
+                continue
+            if content and content not in known:
+                bullets.append(content)
+                known.add(content)
+
+    cleaned_bullets = []
+    seen = set()
+    for b in bullets:
+        clean = _EMPHASIS_RE.sub('', b.strip())
+        clean = _LEADING_MARKS_RE.sub('', clean).strip()
+        if clean and len(clean) > 5 and clean.lower() not in seen:
+            cleaned_bullets.append(clean)
+            seen.add(clean.lower())
+
+    if not cleaned_bullets:
+        # Sem bullets: parágrafos, ou em último caso linhas soltas
+        paragraphs = [p.strip() for p in section_text.split('\n\n') if p.strip() and len(p.strip()) > 20]
+        if paragraphs:
+            cleaned_bullets = paragraphs[:5]
+        else:
+            lines = [l.strip() for l in section_text.split('\n') if l.strip() and len(l.strip()) > 15 and not l.strip().startswith('#')]
+            if lines:
+                cleaned_bullets = lines[:5]
+
+    return cleaned_bullets
+
+
+def _parse_section(prepared: _PreparedText, section_title: str) -> List[str]:
+    try:
+        patterns = _section_patterns(section_title)
+        text = prepared.text
+
+        start_index = None
+        for pattern in patterns.start_patterns:
+            match = pattern.search(text)
+            if match:
+                start_index = match.end()
+                break
+
+        if start_index is None:
+            print(f"[SectionParser] Seção '{section_title}' não encontrada. Tentando busca mais ampla...")
+            lower = prepared.lower
+            for clean, needle in patterns.fallback_needles:
+                idx = lower.find(needle)
+                if idx != -1:
+                    start_index = idx + len(clean)
+                    # Pular dois-pontos, quebras de linha, espaços e asteriscos após o título
+                    while start_index < len(text) and text[start_index] in (':', '\n', ' ', '*'):
+                        start_index += 1
+                    break
+
+            if start_index is None:
+                return [f"Seção '{section_title}' não foi encontrada na resposta do especialista."]
+
+        end_index = len(text)
+        for pattern in patterns.end_patterns:
+            match = pattern.search(text, start_index)
+            if match:
+                end_index = match.start()
+                break
+
+        bullets = _extract_bullets(text[start_index:end_index].strip())
+        if not bullets:
+            return [f"Não foi possível extrair os pontos principais da seção '{section_title}'. A seção pode estar vazia ou em formato inesperado."]
+        return bullets
+    except Exception as e:
+        print(f"[SectionParser] Erro ao extrair pontos da seção '{section_title}': {str(e)}")
+        return [f"Erro ao processar a resposta do especialista: {str(e)[:100]}"]
+
+
+# Textos que _parse_section devolve no lugar dos bullets quando a seção não pôde ser extraída
+_PLACEHOLDER_RE = re.compile(
+    r"^(?:Seção '.*' não foi encontrada na resposta do especialista\."
+    r"|Não foi possível extrair os pontos principais da seção '.*'\."
+    r"|Erro ao processar a resposta do especialista: )"
+)
+
+
+def is_placeholder(bullets: List[str]) -> bool:
+    """True se a seção veio como aviso de falha do parser, não como conteúdo do especialista."""
+    return len(bullets) == 1 and bool(_PLACEHOLDER_RE.match(bullets[0]))
+
+
+def extract_section_bullets(text: str, section_title: str) -> List[str]:
+    """Bullets de uma seção da resposta (mesma saída do antigo _extract_bullet_points)."""
+    return _parse_section(_PreparedText(text), section_title)
+
+
+def parse_expert_response(
+    text: str,
+    sections: Sequence[str] = ("Principais Insights", "Recomendações Acionáveis"),
+) -> Dict[str, List[str]]:
+    """Extrai os bullets de várias seções com uma única normalização do texto."""
+    prepared = _PreparedText(text)
+    return {section: _parse_section(prepared, section) for section in sections}
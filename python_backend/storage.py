@@ -1,16 +1,19 @@
-from typing import Dict, List, Optional
-from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
 import uuid
 from python_backend.models import (
-    Expert, ExpertCreate, Conversation, ConversationCreate, 
+    Expert, ExpertCreate, ExpertSummary, Conversation, ConversationCreate, 
     Message, MessageSend, ExpertType, CategoryType,
     CouncilAnalysis, Persona, User, UserPreferences, UserPreferencesUpdate,
-    BackgroundTask, TaskStatus
+    BackgroundTask, TaskStatus, ConversationSummary, CouncilAnalysisSummary
 )
 
 # Import modern persona storage
 # from storage_persona_modern import PersonaModernStorage
 from python_backend.models_persona import PersonaModern
+from python_backend.mem_index import GroupedSortedIds, LRUTracker, SortedIds, append_in_order
+from python_backend.mem_persistence import MemJournal
+from python_backend.pagination import excerpt
 import os
 import json
 from datetime import datetime as dt
@@ -18,8 +21,23 @@ import asyncpg
 
 from python_backend.postgres_storage import PostgresStorage
 
+_FINISHED_TASK_STATUSES = (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED)
+
+
 class MemStorage:
-    """In-memory storage for development and testing."""
+    """
+    In-memory storage for development, testing and single-node deployments.
+
+    Mensagens e conversas têm índices secundários (ver ``mem_index``), então as
+    leituras custam O(k). A memória é limitada: acima de ``max_messages`` as
+    conversas menos usadas recentemente são descartadas inteiras (com mensagens
+    e resumo), assim como análises e tarefas concluídas acima dos seus limites.
+    
+    Com ``enable_persistence`` (MEMSTORAGE_DATA_DIR) cada escrita também vai para
+    um log append-only com snapshots periódicos (ver ``mem_persistence``). Nesse
+    modo os limites de conversas/análises ficam desligados: o disco é a fonte da
+    verdade e descartar da memória apagaria os dados no próximo snapshot.
+    """
     
     _instance = None
 
@@ -37,9 +55,30 @@ class MemStorage:
             self.messages: Dict[str, Message] = {}
             self.profiles: Dict[str, dict] = {}
             self.council_analyses: Dict[str, CouncilAnalysis] = {}
+            self.rendered_contexts: Dict[str, Dict[str, Any]] = {}  # analysis_id -> contexto do chat
+            self.conversation_summaries: Dict[str, ConversationSummary] = {}  # conversation_id -> resumo rolante
             self.personas: Dict[str, Persona] = {}
             self.user_preferences: Dict[str, UserPreferences] = {}  # user_id -> preferences
             self.background_tasks: Dict[str, 'BackgroundTask'] = {}  # 🆕 Background tasks storage
+            self.council_conversations: Dict[str, 'CouncilConversation'] = {}
+            self.council_messages: Dict[str, 'CouncilMessage'] = {}
+            self.business_profiles: Dict[str, dict] = {}
+            # Índices secundários: ids das mensagens de cada conversa (em ordem) e conversas por updatedAt
+            self._conversation_messages: Dict[str, List[str]] = {}
+            self._council_conversation_messages: Dict[str, List[str]] = {}
+            self._all_conversations = SortedIds()
+            self._conversations_by_expert = GroupedSortedIds()
+            self._all_council_conversations = SortedIds()
+            self._council_conversations_by_user = GroupedSortedIds()
+            self._analyses_by_user = GroupedSortedIds()
+            # Limites de memória (0 = sem limite)
+            self.max_messages = int(os.getenv("MEMSTORAGE_MAX_MESSAGES", "200000"))
+            self.max_analyses = int(os.getenv("MEMSTORAGE_MAX_ANALYSES", "5000"))
+            self.max_background_tasks = int(os.getenv("MEMSTORAGE_MAX_TASKS", "10000"))
+            self._conversation_lru = LRUTracker()  # chat + conselho; peso = nº de mensagens
+            self._analysis_lru = LRUTracker()
+            self.evictions = {"conversations": 0, "councilConversations": 0, "messages": 0, "analyses": 0, "backgroundTasks": 0}
+            self._journal: Optional[MemJournal] = None  # modo durável (enable_persistence)
             # self._persona_modern_storage = PersonaModernStorage()
             self._initialized = True
             # Reset flag on initialization - seed will check actual data
@@ -61,6 +100,7 @@ class MemStorage:
         )
         self.users[user_id] = user
         self.user_emails[email.lower()] = user_id
+        self._persist("users", user_id)
         return user
     
     async def get_user(self, user_id: str) -> Optional[User]:
@@ -85,6 +125,7 @@ class MemStorage:
                 setattr(user, key, value)
         
         user.updated_at = datetime.utcnow()
+        self._persist("users", user_id)
         return user
     
     # =============================================================================
@@ -106,6 +147,7 @@ class MemStorage:
                 if value is not None:
                     setattr(existing, key, value)
             existing.updated_at = datetime.utcnow()
+            self._persist("user_preferences", user_id)
             return existing
         else:
             # Create new preferences
@@ -114,12 +156,14 @@ class MemStorage:
                 **preferences.dict(exclude_unset=True)
             )
             self.user_preferences[user_id] = new_prefs
+            self._persist("user_preferences", user_id)
             return new_prefs
     
     async def delete_user_preferences(self, user_id: str) -> bool:
         """Delete user preferences"""
         if user_id in self.user_preferences:
             del self.user_preferences[user_id]
+            self._persist("user_preferences", user_id)
             return True
         return False
     
@@ -137,6 +181,7 @@ class MemStorage:
             expertType=data.expertType, category=data.category
         )
         self.experts[expert_id] = expert
+        self._persist("experts", expert_id)
         return expert
     
     async def get_expert(self, expert_id: str) -> Optional[Expert]:
@@ -145,39 +190,75 @@ class MemStorage:
     async def get_experts(self) -> List[Expert]:
         return list(self.experts.values())
     
+    async def get_expert_summaries(self) -> List[ExpertSummary]:
+        """Get all experts without systemPrompt (listing projection)"""
+        return [ExpertSummary(**expert.model_dump(exclude={"systemPrompt"})) for expert in self.experts.values()]
+    
+    async def get_experts_by_ids(self, expert_ids: List[str]) -> List[Expert]:
+        """Get several experts at once, in the order of expert_ids (unknown ids are skipped)"""
+        return [self.experts[expert_id] for expert_id in expert_ids if expert_id in self.experts]
+    
     async def update_expert_avatar(self, expert_id: str, avatar_path: str) -> Optional[Expert]:
         """Update expert's avatar path"""
         expert = self.experts.get(expert_id)
         if expert:
             expert.avatar = avatar_path
+            self._persist("experts", expert_id)
             return expert
         return None
     
+    # Notifications: processo único, não há outros workers para avisar
+    async def notify(self, channel: str, payload: str = "") -> None:
+        return None
+    
+    async def listen(self, channel: str, callback):
+        return None
+    
     # Conversation operations
     async def create_conversation(self, data: ConversationCreate) -> Conversation:
         conversation_id = str(uuid.uuid4())
         conversation = Conversation(
             id=conversation_id,
+            userId="default_user",
             expertId=data.expertId,
             title=data.title,
         )
         self.conversations[conversation_id] = conversation
+        self._index_conversation(conversation)
+        self._persist("conversations", conversation_id)
         return conversation
     
     async def get_conversation(self, conversation_id: str) -> Optional[Conversation]:
-        return self.conversations.get(conversation_id)
+        conversation = self.conversations.get(conversation_id)
+        if conversation is not None:
+            self._conversation_lru.touch(conversation_id)
+        return conversation
     
     async def get_conversations(self, expert_id: Optional[str] = None) -> List[Conversation]:
-        conversations = list(self.conversations.values())
-        if expert_id:
-            conversations = [c for c in conversations if c.expertId == expert_id]
-        # Sort by updatedAt descending
-        conversations.sort(key=lambda x: x.updatedAt, reverse=True)
-        return conversations
+        # Índices já ordenados por updatedAt (mais recente primeiro)
+        ids = self._conversations_by_expert.newest_first(expert_id) if expert_id else self._all_conversations.newest_first()
+        return [self.conversations[conversation_id] for conversation_id in ids]
     
     async def update_conversation_timestamp(self, conversation_id: str):
-        if conversation_id in self.conversations:
-            self.conversations[conversation_id].updatedAt = datetime.utcnow()
+        conversation = self.conversations.get(conversation_id)
+        if conversation is not None:
+            conversation.updatedAt = datetime.utcnow()
+            self._index_conversation(conversation)
+            self._persist("conversations", conversation_id)
+    
+    def _index_conversation(self, conversation: Conversation) -> None:
+        self._all_conversations.add(conversation.id, conversation.updatedAt)
+        self._conversations_by_expert.add(conversation.expertId, conversation.id, conversation.updatedAt)
+        self._conversation_lru.touch(conversation.id)
+    
+    def _append_message(self, message: Message) -> None:
+        self.messages[message.id] = message
+        append_in_order(
+            self._conversation_messages.setdefault(message.conversationId, []),
+            message.id, message.timestamp, lambda message_id: self.messages[message_id].timestamp
+        )
+        self._conversation_lru.add_weight(message.conversationId, 1)
+        self._persist("messages", message.id)
     
     # Message operations
     async def create_message(self, data: MessageSend) -> Message:
@@ -188,18 +269,37 @@ class MemStorage:
             role=data.role,
             content=data.content,
         )
-        self.messages[message_id] = message
+        self._append_message(message)
         
         # Update conversation timestamp
         await self.update_conversation_timestamp(data.conversationId)
+        self._enforce_memory_cap(keep=data.conversationId)
         
         return message
     
+    async def create_message_pair(self, conversation_id: str, user_content: str, assistant_content: str) -> Tuple[Message, Message]:
+        """Persist one chat turn (user message + assistant reply) and touch the conversation"""
+        now = datetime.utcnow()
+        user_message = Message(
+            id=str(uuid.uuid4()), conversationId=conversation_id, role="user", content=user_content, timestamp=now
+        )
+        assistant_message = Message(
+            id=str(uuid.uuid4()), conversationId=conversation_id, role="assistant", content=assistant_content,
+            timestamp=now + timedelta(microseconds=1)
+        )
+        self._append_message(user_message)
+        self._append_message(assistant_message)
+        await self.update_conversation_timestamp(conversation_id)
+        self._enforce_memory_cap(keep=conversation_id)
+        return user_message, assistant_message
+    
     async def get_messages(self, conversation_id: str) -> List[Message]:
-        messages = [m for m in self.messages.values() if m.conversationId == conversation_id]
-        # Sort by createdAt ascending (chronological order)
-        messages.sort(key=lambda x: x.createdAt)
-        return messages
+        # Lista da conversa já em ordem cronológica
+        message_ids = self._conversation_messages.get(conversation_id)
+        if not message_ids:
+            return []
+        self._conversation_lru.touch(conversation_id)
+        return [self.messages[message_id] for message_id in message_ids]
     
     # Council Conversation operations
     async def create_council_conversation(self, user_id: str, persona_id: str, problem: str, expert_ids: List[str], analysis_id: Optional[str] = None) -> 'CouncilConversation':
@@ -210,9 +310,6 @@ class MemStorage:
         conversation_id = str(uuid.uuid4())
         now = datetime.utcnow()
         
-        if not hasattr(self, 'council_conversations'):
-            self.council_conversations = {}
-        
         conversation = CouncilConversation(
             id=conversation_id,
             userId=user_id,
@@ -224,38 +321,35 @@ class MemStorage:
             updatedAt=now
         )
         self.council_conversations[conversation_id] = conversation
+        self._index_council_conversation(conversation)
+        self._persist("council_conversations", conversation_id)
         return conversation
     
     async def get_council_conversation(self, conversation_id: str) -> Optional['CouncilConversation']:
         """Get a council conversation by ID"""
-        if not hasattr(self, 'council_conversations'):
-            return None
-        return self.council_conversations.get(conversation_id)
+        conversation = self.council_conversations.get(conversation_id)
+        if conversation is not None:
+            self._conversation_lru.touch(conversation_id)
+        return conversation
     
     async def get_council_conversations(self, user_id: Optional[str] = None) -> List['CouncilConversation']:
         """Get all council conversations, optionally filtered by user"""
-        from python_backend.models import CouncilConversation
-        
-        if not hasattr(self, 'council_conversations'):
-            return []
-        
-        conversations = list(self.council_conversations.values())
-        if user_id:
-            conversations = [c for c in conversations if c.userId == user_id]
-        conversations.sort(key=lambda x: x.updatedAt, reverse=True)
-        return conversations
+        ids = self._council_conversations_by_user.newest_first(user_id) if user_id else self._all_council_conversations.newest_first()
+        return [self.council_conversations[conversation_id] for conversation_id in ids]
+    
+    def _index_council_conversation(self, conversation: 'CouncilConversation') -> None:
+        self._all_council_conversations.add(conversation.id, conversation.updatedAt)
+        self._council_conversations_by_user.add(conversation.userId, conversation.id, conversation.updatedAt)
+        self._conversation_lru.touch(conversation.id)
     
-    async def create_council_message(self, conversation_id: str, role: str, content: str, expert_id: Optional[str] = None, expert_name: Optional[str] = None) -> 'CouncilMessage':
-        """Create a message in a council conversation"""
+    async def create_council_message(self, conversation_id: str, role: str, content: str, expert_id: Optional[str] = None, expert_name: Optional[str] = None, timestamp: Optional[datetime] = None) -> 'CouncilMessage':
+        """Create a message in a council conversation (timestamp defaults to now; it defines the message order)"""
         from python_backend.models import CouncilMessage
         import uuid
         
         message_id = str(uuid.uuid4())
         now = datetime.utcnow()
         
-        if not hasattr(self, 'council_messages'):
-            self.council_messages = {}
-        
         message = CouncilMessage(
             id=message_id,
             conversationId=conversation_id,
@@ -263,41 +357,43 @@ class MemStorage:
             expertName=expert_name,
             content=content,
             role=role,
-            timestamp=now,
+            timestamp=timestamp or now,
             reactions=[]
         )
         self.council_messages[message_id] = message
+        append_in_order(
+            self._council_conversation_messages.setdefault(conversation_id, []),
+            message_id, message.timestamp, lambda other_id: self.council_messages[other_id].timestamp
+        )
+        self._conversation_lru.add_weight(conversation_id, 1)
+        self._persist("council_messages", message_id)
         
         # Update conversation timestamp
-        if hasattr(self, 'council_conversations'):
-            if conversation_id in self.council_conversations:
-                self.council_conversations[conversation_id].updatedAt = now
+        conversation = self.council_conversations.get(conversation_id)
+        if conversation is not None:
+            conversation.updatedAt = now
+            self._index_council_conversation(conversation)
+            self._persist("council_conversations", conversation_id)
+        self._enforce_memory_cap(keep=conversation_id)
         
         return message
     
     async def get_council_messages(self, conversation_id: str) -> List['CouncilMessage']:
-        """Get all messages for a council conversation"""
-        from python_backend.models import CouncilMessage
-        
-        if not hasattr(self, 'council_messages'):
+        """Get all messages for a council conversation (index kept in timestamp order)"""
+        message_ids = self._council_conversation_messages.get(conversation_id)
+        if not message_ids:
             return []
-        
-        messages = [m for m in self.council_messages.values() if m.conversationId == conversation_id]
-        messages.sort(key=lambda x: x.timestamp)
-        return messages
+        self._conversation_lru.touch(conversation_id)
+        return [self.council_messages[message_id] for message_id in message_ids]
     
     async def add_council_message_reaction(self, message_id: str, reaction: 'MessageReaction') -> bool:
         """Add a reaction to a council message"""
-        from python_backend.models import MessageReaction
-        
-        if not hasattr(self, 'council_messages'):
-            return False
-        
         if message_id not in self.council_messages:
             return False
         
         message = self.council_messages[message_id]
         message.reactions.append(reaction)
+        self._persist("council_messages", message_id)
         return True
     
     # Business Profile operations - REDIRECTS TO POSTGRES
@@ -310,9 +406,8 @@ class MemStorage:
             return await pg_storage.save_business_profile(user_id, data)
         else:
             # Fallback to in-memory (for testing)
-            if not hasattr(self, 'business_profiles'):
-                self.business_profiles = {}
             self.business_profiles[user_id] = data
+            self._persist("business_profiles", user_id)
             return data
     
     async def get_business_profile(self, user_id: str) -> Optional[dict]:
@@ -324,26 +419,208 @@ class MemStorage:
             return await pg_storage.get_business_profile(user_id)
         else:
             # Fallback to in-memory (for testing)
-            if not hasattr(self, 'business_profiles'):
-                return None
             return self.business_profiles.get(user_id)
     
+    # Conversation memory (rolling summary) operations
+    async def get_conversation_summary(self, conversation_id: str) -> Optional[ConversationSummary]:
+        """Get the rolling summary of a conversation's older messages"""
+        return self.conversation_summaries.get(conversation_id)
+    
+    async def save_conversation_summary(self, conversation_id: str, summary: str, covered_count: int) -> ConversationSummary:
+        """Save (replace) the rolling summary of a conversation"""
+        record = ConversationSummary(conversationId=conversation_id, summary=summary, coveredCount=covered_count)
+        self.conversation_summaries[conversation_id] = record
+        self._persist("conversation_summaries", conversation_id)
+        return record
+    
     # Council Analysis operations
     async def save_council_analysis(self, analysis: CouncilAnalysis) -> CouncilAnalysis:
         """Save a completed council analysis"""
+        previous = self.council_analyses.get(analysis.id)
+        if previous is not None:
+            self._analyses_by_user.discard(previous.userId, analysis.id)
         self.council_analyses[analysis.id] = analysis
+        self._persist("council_analyses", analysis.id)
+        if self.rendered_contexts.pop(analysis.id, None) is not None:
+            self._persist("rendered_contexts", analysis.id)
+        self._analyses_by_user.add(analysis.userId, analysis.id, analysis.createdAt)
+        self._analysis_lru.touch(analysis.id, 1)
+        self._enforce_analysis_cap(keep=analysis.id)
         return analysis
     
     async def get_council_analysis(self, analysis_id: str) -> Optional[CouncilAnalysis]:
         """Get a specific council analysis"""
-        return self.council_analyses.get(analysis_id)
+        analysis = self.council_analyses.get(analysis_id)
+        if analysis is not None:
+            self._analysis_lru.touch(analysis_id)
+        return analysis
+    
+    async def get_rendered_context(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        """Get the chat context rendered from a council analysis"""
+        return self.rendered_contexts.get(analysis_id)
+    
+    async def save_rendered_context(self, analysis_id: str, rendered: Dict[str, Any]) -> None:
+        """Store the rendered chat context next to its council analysis"""
+        if analysis_id in self.council_analyses:
+            self.rendered_contexts[analysis_id] = rendered
+            self._persist("rendered_contexts", analysis_id)
     
     async def get_council_analyses(self, user_id: str) -> List[CouncilAnalysis]:
-        """Get all council analyses for a user"""
-        analyses = [a for a in self.council_analyses.values() if a.userId == user_id]
-        # Sort by createdAt descending (most recent first)
-        analyses.sort(key=lambda x: x.createdAt, reverse=True)
-        return analyses
+        """Get all council analyses for a user (most recent first)"""
+        return [self.council_analyses[analysis_id] for analysis_id in self._analyses_by_user.newest_first(user_id)]
+    
+    async def get_council_analysis_summaries(self, user_id: str, limit: int, before: Optional[Tuple[datetime, str]] = None) -> List[CouncilAnalysisSummary]:
+        """Listing projection of a user's analyses, newest first, keyset-paginated by (createdAt, id)"""
+        summaries = []
+        for analysis_id in self._analyses_by_user.page(user_id, limit, before):
+            analysis = self.council_analyses[analysis_id]
+            summaries.append(CouncilAnalysisSummary(
+                id=analysis.id,
+                problemExcerpt=excerpt(analysis.problem),
+                expertNames=[contribution.expertName for contribution in analysis.contributions],
+                hasActionPlan=analysis.actionPlan is not None,
+                createdAt=analysis.createdAt,
+            ))
+        return summaries
+    
+    # Memory cap (LRU)
+    def _enforce_memory_cap(self, keep: Optional[str] = None) -> None:
+        """Descarta conversas frias (chat ou conselho) enquanto o total de mensagens passar de max_messages"""
+        if self.durable or not self.max_messages or self._conversation_lru.total_weight <= self.max_messages:
+            return
+        for conversation_id in self._conversation_lru.coldest():
+            if self._conversation_lru.total_weight <= self.max_messages:
+                break
+            if conversation_id != keep:
+                self._evict_conversation(conversation_id)
+    
+    def _evict_conversation(self, conversation_id: str) -> None:
+        """Só a cópia em memória (nunca registrado no log: o modo durável não descarta)"""
+        self._conversation_lru.remove(conversation_id)
+        council_conversation = self.council_conversations.pop(conversation_id, None)
+        if council_conversation is not None or conversation_id in self._council_conversation_messages:
+            if council_conversation is not None:
+                self._all_council_conversations.discard(conversation_id)
+                self._council_conversations_by_user.discard(council_conversation.userId, conversation_id)
+            message_ids = self._council_conversation_messages.pop(conversation_id, [])
+            for message_id in message_ids:
+                self.council_messages.pop(message_id, None)
+            self.evictions["councilConversations"] += 1
+        else:
+            conversation = self.conversations.pop(conversation_id, None)
+            if conversation is not None:
+                self._all_conversations.discard(conversation_id)
+                self._conversations_by_expert.discard(conversation.expertId, conversation_id)
+            message_ids = self._conversation_messages.pop(conversation_id, [])
+            for message_id in message_ids:
+                self.messages.pop(message_id, None)
+            self.conversation_summaries.pop(conversation_id, None)
+            self.evictions["conversations"] += 1
+        self.evictions["messages"] += len(message_ids)
+    
+    def _enforce_analysis_cap(self, keep: Optional[str] = None) -> None:
+        if self.durable or not self.max_analyses or len(self._analysis_lru) <= self.max_analyses:
+            return
+        for analysis_id in self._analysis_lru.coldest():
+            if len(self._analysis_lru) <= self.max_analyses:
+                break
+            if analysis_id == keep:
+                continue
+            self._analysis_lru.remove(analysis_id)
+            analysis = self.council_analyses.pop(analysis_id, None)
+            if analysis is not None:
+                self._analyses_by_user.discard(analysis.userId, analysis_id)
+            self.rendered_contexts.pop(analysis_id, None)
+            self.evictions["analyses"] += 1
+    
+    def _enforce_task_cap(self) -> None:
+        """Acima do limite, descarta as tarefas concluídas mais antigas (pendentes/em execução ficam)"""
+        overflow = len(self.background_tasks) - self.max_background_tasks
+        if not self.max_background_tasks or overflow <= 0:
+            return
+        finished = [task_id for task_id, task in self.background_tasks.items() if task.status in _FINISHED_TASK_STATUSES]
+        for task_id in finished[:overflow]:
+            del self.background_tasks[task_id]
+            self._persist("background_tasks", task_id)
+            self.evictions["backgroundTasks"] += 1
+    
+    def memory_stats(self) -> Dict[str, Any]:
+        return {
+            "conversations": len(self.conversations),
+            "councilConversations": len(self.council_conversations),
+            "messages": len(self.messages) + len(self.council_messages),
+            "maxMessages": self.max_messages,
+            "analyses": len(self.council_analyses),
+            "maxAnalyses": self.max_analyses,
+            "backgroundTasks": len(self.background_tasks),
+            "maxBackgroundTasks": self.max_background_tasks,
+            "evictions": dict(self.evictions),
+            "persistence": self._journal.stats() if self._journal is not None else {"enabled": False},
+        }
+    
+    # Durable mode (snapshot + append-only log)
+    def _persist(self, table: str, key: str) -> None:
+        """Modo durável: registra o estado atual de ``table[key]`` (ausente = removido) no log"""
+        if self._journal is not None:
+            self._journal.record(table, key, getattr(self, table).get(key))
+    
+    def enable_persistence(self, directory: str, snapshot_every: int = 10000, fsync: bool = False) -> bool:
+        """Restaura o estado de ``directory`` e passa a registrar cada escrita; True se havia dados"""
+        journal = MemJournal(directory, snapshot_every=snapshot_every, fsync=fsync)
+        restored = journal.load(self)
+        self._rebuild_indexes()
+        self._journal = journal
+        print(
+            f"[MemStorage] Modo durável em {directory}: {journal.restored_records} registros restaurados "
+            f"({journal.replayed_records} do log) em {journal.load_seconds * 1000:.0f}ms"
+        )
+        return restored
+    
+    @property
+    def durable(self) -> bool:
+        return self._journal is not None
+    
+    def _rebuild_indexes(self) -> None:
+        """Reconstrói índices e LRU a partir das tabelas (após restaurar do disco)"""
+        self.user_emails = {user.email.lower(): user_id for user_id, user in self.users.items()}
+        self._conversation_messages, self._council_conversation_messages = {}, {}
+        self._all_conversations, self._conversations_by_expert = SortedIds(), GroupedSortedIds()
+        self._all_council_conversations, self._council_conversations_by_user = SortedIds(), GroupedSortedIds()
+        self._analyses_by_user = GroupedSortedIds()
+        self._conversation_lru, self._analysis_lru = LRUTracker(), LRUTracker()
+        # Menos recente primeiro, para o LRU começar na ordem de uso aproximada
+        for conversation in sorted(self.conversations.values(), key=lambda c: c.updatedAt):
+            self._index_conversation(conversation)
+        for conversation in sorted(self.council_conversations.values(), key=lambda c: c.updatedAt):
+            self._index_council_conversation(conversation)
+        for message in sorted(self.messages.values(), key=lambda m: m.timestamp):
+            self._conversation_messages.setdefault(message.conversationId, []).append(message.id)
+            self._conversation_lru.add_weight(message.conversationId, 1)
+        for message in sorted(self.council_messages.values(), key=lambda m: m.timestamp):
+            self._council_conversation_messages.setdefault(message.conversationId, []).append(message.id)
+            self._conversation_lru.add_weight(message.conversationId, 1)
+        for analysis in sorted(self.council_analyses.values(), key=lambda a: a.createdAt):
+            self._analyses_by_user.add(analysis.userId, analysis.id, analysis.createdAt)
+            self._analysis_lru.touch(analysis.id, 1)
+    
+    async def close(self) -> None:
+        """Shutdown: snapshot final no modo durável"""
+        if self._journal is not None:
+            await self._journal.close()
+    
+    # Contribution cache (persistent tier)
+    # Em memória o LRU do ContributionCache já faz o papel de cache; aqui não há o que persistir.
+    async def get_cached_contribution(self, cache_key: str) -> Optional[dict]:
+        """Get a cached expert contribution (not persisted in memory mode)"""
+        return None
+    
+    async def save_cached_contribution(self, cache_key: str, expert_id: str, contribution: dict, ttl_seconds: int) -> None:
+        """Save a cached expert contribution (not persisted in memory mode)"""
+        return None
+    
+    async def evict_contribution_cache(self, max_entries: int) -> int:
+        """Evict expired/excess cached contributions (nothing to evict in memory mode)"""
+        return 0
     
     # Persona operations (PostgreSQL)
     async def _get_db_connection(self):
@@ -391,6 +668,7 @@ class MemStorage:
             
             # Armazenar em memória (temporário até migração para PostgreSQL)
             self.personas[persona_id] = persona
+            self._persist("personas", persona_id)
             
             print(f"[INFO] Persona criada em memória: {persona_id}")
             return persona
@@ -535,6 +813,8 @@ class MemStorage:
     async def create_background_task(self, task: BackgroundTask) -> BackgroundTask:
         """Create a new background task"""
         self.background_tasks[task.id] = task
+        self._persist("background_tasks", task.id)
+        self._enforce_task_cap()
         print(f"[MemStorage] Created background task: {task.id}")
         return task
     
@@ -568,10 +848,106 @@ class MemStorage:
             task.completedAt = completedAt
         
         task.updatedAt = datetime.utcnow()
+        self._persist("background_tasks", task_id)
         
         print(f"[MemStorage] Updated task {task_id}: status={task.status}, progress={task.progress}%")
         return task
 
+    # Fila (mesma semântica do Postgres: lease por worker, retry com "runAt" futuro)
+    def _owned_task(self, task_id: str, worker_id: str) -> Optional[BackgroundTask]:
+        task = self.background_tasks.get(task_id)
+        if task is None or task.status != TaskStatus.RUNNING or task.leaseOwner != worker_id:
+            return None
+        return task
+
+    def _end_lease(self, task: BackgroundTask, status: TaskStatus) -> None:
+        task.status = status
+        task.leaseOwner = None
+        task.leaseExpiresAt = None
+        task.updatedAt = datetime.utcnow()
+        if status in _FINISHED_TASK_STATUSES:
+            task.completedAt = task.updatedAt
+        self._persist("background_tasks", task.id)
+
+    async def claim_background_tasks(
+        self, task_type: str, worker_id: str, limit: int, lease_seconds: float
+    ) -> List[BackgroundTask]:
+        """Reivindica até ``limit`` tarefas pendentes de ``task_type`` já liberadas (``runAt`` vencido)"""
+        now = datetime.utcnow()
+        ready = sorted(
+            (task for task in self.background_tasks.values()
+             if task.status == TaskStatus.PENDING and task.taskType == task_type and task.runAt <= now),
+            key=lambda task: task.runAt,
+        )[:limit]
+        for task in ready:
+            task.status = TaskStatus.RUNNING
+            task.attempts += 1
+            task.leaseOwner = worker_id
+            task.leaseExpiresAt = now + timedelta(seconds=lease_seconds)
+            task.updatedAt = now
+            self._persist("background_tasks", task.id)
+        return ready
+
+    async def renew_background_task_leases(self, worker_id: str, task_ids: List[str], lease_seconds: float) -> List[str]:
+        """Heartbeat: estende os leases ainda deste worker; devolve os ids renovados"""
+        expires_at = datetime.utcnow() + timedelta(seconds=lease_seconds)
+        renewed = []
+        for task_id in task_ids:
+            task = self._owned_task(task_id, worker_id)
+            if task is not None:
+                task.leaseExpiresAt = expires_at
+                renewed.append(task_id)
+        return renewed
+
+    async def complete_background_task(self, task_id: str, worker_id: str, result: Optional[dict]) -> bool:
+        task = self._owned_task(task_id, worker_id)
+        if task is None:
+            return False
+        task.result = result
+        task.progress = 100
+        task.error = None
+        self._end_lease(task, TaskStatus.COMPLETED)
+        return True
+
+    async def fail_background_task(
+        self, task_id: str, worker_id: str, error: str, retry_delay_seconds: Optional[float]
+    ) -> bool:
+        """Falha da tentativa: volta para a fila após ``retry_delay_seconds`` ou, se None, falha de vez"""
+        task = self._owned_task(task_id, worker_id)
+        if task is None:
+            return False
+        task.error = error
+        if retry_delay_seconds is None:
+            self._end_lease(task, TaskStatus.FAILED)
+        else:
+            task.runAt = datetime.utcnow() + timedelta(seconds=retry_delay_seconds)
+            self._end_lease(task, TaskStatus.PENDING)
+        return True
+
+    async def release_background_task(self, task_id: str, worker_id: str) -> bool:
+        """Devolve a tarefa à fila sem consumir tentativa (worker encerrando)"""
+        task = self._owned_task(task_id, worker_id)
+        if task is None:
+            return False
+        task.attempts = max(task.attempts - 1, 0)
+        task.runAt = datetime.utcnow()
+        self._end_lease(task, TaskStatus.PENDING)
+        return True
+
+    async def requeue_expired_background_tasks(self) -> int:
+        """Leases vencidos (worker morreu): volta para a fila ou falha se esgotou as tentativas"""
+        now = datetime.utcnow()
+        expired = [task for task in self.background_tasks.values()
+                   if task.status == TaskStatus.RUNNING and task.leaseExpiresAt is not None and task.leaseExpiresAt < now]
+        for task in expired:
+            if task.attempts < task.maxAttempts:
+                task.runAt = now
+                self._end_lease(task, TaskStatus.PENDING)
+            else:
+                task.error = "Lease expirou: o worker parou de responder"
+                self._end_lease(task, TaskStatus.FAILED)
+        return len(expired)
+
 
 def get_storage_instance():
     """
@@ -585,7 +961,15 @@ def get_storage_instance():
         return PostgresStorage(dsn=database_url)
     else:
         print("DATABASE_URL not found. Using in-memory storage (MemStorage).")
-        return MemStorage()
+        mem_storage = MemStorage()
+        data_dir = os.getenv("MEMSTORAGE_DATA_DIR")
+        if data_dir and not mem_storage.durable:
+            mem_storage.enable_persistence(
+                data_dir,
+                snapshot_every=int(os.getenv("MEMSTORAGE_SNAPSHOT_EVERY", "10000")),
+                fsync=os.getenv("MEMSTORAGE_FSYNC", "").lower() == "always",
+            )
+        return mem_storage
 
 # Global storage instance, determined at startup.
 storage = get_storage_instance()
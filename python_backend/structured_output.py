@@ -0,0 +1,258 @@
+"""
+Structured Output
+=================
+
+Saída estruturada (tool use) para as etapas do conselho.
+
+Em vez de pedir markdown/JSON em texto livre e depois extrair com regex, cada
+etapa força uma chamada de ferramenta (``tool_choice``) cujo ``input_schema`` é
+gerado a partir dos modelos Pydantic. O ``input`` devolvido pelo Claude é
+validado com ``TypeAdapter``s compilados na importação.
+
+- Análise do especialista -> ``ExpertAnalysisOutput`` (vira ExpertContribution)
+- Consenso -> ``ConsensusReport`` (renderizado de volta em markdown)
+- Plano de ação -> ``ActionPlan``
+
+Antes de desistir da resposta, ``StructuredTool.parse`` tenta recuperá-la
+localmente, sem nova chamada ao modelo:
+
+- sem bloco ``tool_use``: procura o objeto JSON no texto da resposta
+- fora do schema: repara os desvios comuns guiado pelo ``input_schema`` (lista
+  enviada como texto com marcadores ou como JSON em string, texto enviado
+  como lista) e valida de novo
+
+Só se nada disso passar ``parse`` devolve None e o chamador repete a etapa uma
+única vez em modo texto (parser antigo). ``COUNCIL_STRUCTURED_OUTPUT=off``
+desliga o modo estruturado.
+"""
+
+import copy
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+
+from python_backend.models import ActionPlan
+
+
+class ExpertAnalysisOutput(BaseModel):
+    """Resposta estruturada de um especialista do conselho."""
+    analysis: str = Field(
+        ...,
+        min_length=1,
+        description="Análise Principal: sua perspectiva única sobre o problema em 2-3 parágrafos (markdown, pt-BR).",
+    )
+    keyInsights: List[str] = Field(
+        ...,
+        min_length=1,
+        description="Principais Insights: 3 a 5 insights específicos e acionáveis, um por item, sem marcadores.",
+    )
+    recommendations: List[str] = Field(
+        ...,
+        min_length=1,
+        description="Recomendações Acionáveis: 3 a 5 recomendações específicas, mensuráveis e priorizadas, sem marcadores.",
+    )
+
+    def to_markdown(self) -> str:
+        """Mesmo formato de seções da resposta em texto (ExpertContribution.analysis)."""
+        insights = "\n".join(f"- {item}" for item in self.keyInsights)
+        recommendations = "\n".join(f"- {item}" for item in self.recommendations)
+        return (
+            f"## Análise Principal\n\n{self.analysis.strip()}\n\n"
+            f"## Principais Insights\n\n{insights}\n\n"
+            f"## Recomendações Acionáveis\n\n{recommendations}\n"
+        )
+
+
+class ConsensusReport(BaseModel):
+    """Relatório de consenso do conselho."""
+    summary: str = Field(..., min_length=1, description="Síntese Geral: resumo da perspectiva geral em 2-3 parágrafos.")
+    keyInsights: List[str] = Field(..., min_length=1, description="Insights-Chave do Consenso: 5 áreas de concordância.")
+    priorityRecommendations: List[str] = Field(
+        ..., min_length=1, description="Recomendações Prioritárias: 5 recomendações acionáveis, em ordem de prioridade."
+    )
+    divergentPerspectives: List[str] = Field(
+        default_factory=list, description="Perspectivas Divergentes: 1-2 áreas em que os especialistas discordam (se houver)."
+    )
+    nextStep: str = Field(..., min_length=1, description="Próximos Passos (15 min): ação imediata para os próximos 15 minutos.")
+    mainRisk: str = Field(..., min_length=1, description="Risco Principal: 1 risco a observar durante a implementação.")
+    advancingQuestion: str = Field(
+        ..., min_length=1, description="Pergunta de Avanço: 1 pergunta socrática ou operacional para o usuário avançar."
+    )
+
+    def to_markdown(self) -> str:
+        """Relatório em markdown, com as mesmas seções pedidas no prompt de texto."""
+        def bullets(items: List[str]) -> str:
+            return "\n".join(f"- {item}" for item in items)
+
+        numbered = "\n".join(f"{i}. {item}" for i, item in enumerate(self.priorityRecommendations, 1))
+        parts = [
+            f"**Síntese Geral:**\n\n{self.summary.strip()}",
+            f"**Insights-Chave do Consenso:**\n\n{bullets(self.keyInsights)}",
+            f"**Recomendações Prioritárias:**\n\n{numbered}",
+        ]
+        if self.divergentPerspectives:
+            parts.append(f"**Perspectivas Divergentes:**\n\n{bullets(self.divergentPerspectives)}")
+        parts.extend([
+            f"**Próximos Passos (15 min):** {self.nextStep.strip()}",
+            f"**Risco Principal:** {self.mainRisk.strip()}",
+            f"**Pergunta de Avanço:** {self.advancingQuestion.strip()}",
+        ])
+        return "\n\n".join(parts)
+
+
+# Adapters compilados uma única vez (validação e geração de schema)
+EXPERT_ANALYSIS_ADAPTER: TypeAdapter[ExpertAnalysisOutput] = TypeAdapter(ExpertAnalysisOutput)
+CONSENSUS_ADAPTER: TypeAdapter[ConsensusReport] = TypeAdapter(ConsensusReport)
+ACTION_PLAN_ADAPTER: TypeAdapter[ActionPlan] = TypeAdapter(ActionPlan)
+
+
+def _inline_refs(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Resolve os ``$ref`` para ``$defs`` (input_schema autocontido, sem referências)."""
+    defs = schema.get("$defs", {})
+
+    def resolve(node: Any) -> Any:
+        if isinstance(node, dict):
+            ref = node.get("$ref")
+            if ref and ref.startswith("#/$defs/"):
+                return resolve(copy.deepcopy(defs[ref.split("/")[-1]]))
+            return {key: resolve(value) for key, value in node.items() if key != "$defs"}
+        if isinstance(node, list):
+            return [resolve(item) for item in node]
+        return node
+
+    return resolve(schema)
+
+
+_BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+
+
+def _schema_type(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Ramo não nulo de um ``anyOf`` (campos Optional); o próprio schema nos demais casos."""
+    for option in schema.get("anyOf", ()):
+        if option.get("type") != "null":
+            return option
+    return schema
+
+
+def repair_tool_input(value: Any, schema: Dict[str, Any]) -> Any:
+    """Ajusta ``value`` aos tipos do schema onde o desvio é inequívoco; o resto fica como veio."""
+    schema = _schema_type(schema)
+    kind = schema.get("type")
+    if isinstance(value, str) and kind in ("array", "object"):
+        try:
+            return repair_tool_input(json.loads(value), schema)
+        except ValueError:
+            pass
+        if kind == "array" and _schema_type(schema.get("items", {})).get("type") == "string":
+            lines = (_BULLET.sub("", line).strip() for line in value.splitlines())
+            return [line for line in lines if line]
+        return value
+    if isinstance(value, list) and kind == "string":
+        return "\n".join(str(item) for item in value)
+    if isinstance(value, list) and kind == "array":
+        items = schema.get("items", {})
+        repaired = [repair_tool_input(item, items) for item in value]
+        if _schema_type(items).get("type") == "string":
+            repaired = [item.strip() for item in repaired if not isinstance(item, str) or item.strip()]
+        return repaired
+    if isinstance(value, dict) and kind == "object":
+        properties = schema.get("properties", {})
+        return {
+            key: repair_tool_input(item, properties[key]) if key in properties else item
+            for key, item in value.items()
+        }
+    return value
+
+
+def json_from_text(response: Any) -> Optional[Dict[str, Any]]:
+    """Objeto JSON escrito nos blocos de texto da resposta (com ou sem cercas ```json)."""
+    text = "".join(
+        getattr(block, "text", "") for block in getattr(response, "content", None) or []
+        if getattr(block, "type", None) == "text"
+    )
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end <= start:
+        return None
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+class StructuredTool:
+    """Definição de ferramenta (nome + schema) ligada ao seu TypeAdapter."""
+
+    def __init__(self, name: str, description: str, adapter: TypeAdapter):
+        self.name = name
+        self.adapter = adapter
+        self.definition = {
+            "name": name,
+            "description": description,
+            "input_schema": _inline_refs(adapter.json_schema()),
+        }
+        self.repaired = 0
+
+    def request_kwargs(self) -> Dict[str, Any]:
+        """Parâmetros de messages.create que forçam o uso desta ferramenta."""
+        return {
+            "tools": [self.definition],
+            "tool_choice": {"type": "tool", "name": self.name},
+        }
+
+    def parse(self, response: Any) -> Optional[Any]:
+        """
+        Valida o ``input`` do bloco tool_use (ou o JSON do texto, na falta dele),
+        reparando-o localmente se preciso; None se nada passar no schema.
+        """
+        data = tool_input(response, self.name)
+        if data is None:
+            data = json_from_text(response)
+            if data is None:
+                print(f"[StructuredOutput] Resposta sem tool_use '{self.name}'")
+                return None
+        try:
+            return self.adapter.validate_python(data)
+        except ValidationError as e:
+            print(f"[StructuredOutput] '{self.name}' fora do schema ({e.error_count()} erros): {str(e)[:300]}")
+        try:
+            result = self.adapter.validate_python(repair_tool_input(data, self.definition["input_schema"]))
+        except ValidationError:
+            return None
+        self.repaired += 1
+        print(f"[StructuredOutput] '{self.name}' reparado localmente (sem nova chamada)")
+        return result
+
+
+def tool_input(response: Any, tool_name: str) -> Optional[Dict[str, Any]]:
+    """``input`` bruto do primeiro bloco tool_use com o nome indicado."""
+    for block in getattr(response, "content", None) or []:
+        if getattr(block, "type", None) == "tool_use" and getattr(block, "name", None) == tool_name:
+            data = getattr(block, "input", None)
+            return data if isinstance(data, dict) else None
+    return None
+
+
+EXPERT_ANALYSIS_TOOL = StructuredTool(
+    "registrar_analise",
+    "Registra a análise do especialista: análise principal, principais insights e recomendações acionáveis.",
+    EXPERT_ANALYSIS_ADAPTER,
+)
+CONSENSUS_TOOL = StructuredTool(
+    "registrar_consenso",
+    "Registra o relatório de consenso do conselho de especialistas.",
+    CONSENSUS_ADAPTER,
+)
+ACTION_PLAN_TOOL = StructuredTool(
+    "registrar_plano_de_acao",
+    "Registra o plano de ação estruturado (fases, ações, duração, orçamento e métricas).",
+    ACTION_PLAN_ADAPTER,
+)
+
+
+def structured_output_enabled() -> bool:
+    """Modo estruturado ligado por padrão (COUNCIL_STRUCTURED_OUTPUT=off desliga)."""
+    return os.getenv("COUNCIL_STRUCTURED_OUTPUT", "on").lower() not in ("0", "off", "false", "no")
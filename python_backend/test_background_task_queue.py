@@ -0,0 +1,203 @@
+"""
+Test script for the durable background task queue (TaskWorker, leases, retries, concurrency limits)
+"""
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from python_backend import background_tasks
+from python_backend.background_tasks import TaskWorker, register_task_processor
+from python_backend.models import BackgroundTask, TaskStatus, TaskType
+from python_backend.storage import MemStorage
+
+ANALYSIS = TaskType.COUNCIL_ANALYSIS
+CHAT = TaskType.COUNCIL_CHAT_MESSAGE
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    monkeypatch.setattr(MemStorage, "_instance", None)
+    monkeypatch.setattr(background_tasks, "_task_processors", {})
+    monkeypatch.setattr(background_tasks, "_task_concurrency", {})
+    monkeypatch.setattr(background_tasks, "_task_max_attempts", {})
+    return MemStorage()
+
+
+def _worker(storage, **kwargs) -> TaskWorker:
+    options = dict(concurrency=4, lease_seconds=30, poll_seconds=0.01, retry_base_seconds=0.01,
+                   retry_max_seconds=0.02, shutdown_grace_seconds=0)
+    options.update(kwargs)
+    return TaskWorker(storage, **options)
+
+
+async def _enqueue(storage, task_type=ANALYSIS, max_attempts=3, **metadata) -> BackgroundTask:
+    task = BackgroundTask(id=str(uuid.uuid4()), userId="u1", taskType=task_type, status=TaskStatus.PENDING,
+                          metadata=metadata, maxAttempts=max_attempts)
+    return await storage.create_background_task(task)
+
+
+async def _until(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condição não atingida"
+        await asyncio.sleep(0.01)
+
+
+def test_claim_is_exclusive_and_results_are_fenced_by_lease_owner(storage):
+    async def run():
+        task = await _enqueue(storage)
+        claimed = await storage.claim_background_tasks(ANALYSIS, "w1", 10, 30)
+        assert [t.id for t in claimed] == [task.id] and claimed[0].attempts == 1
+        assert await storage.claim_background_tasks(ANALYSIS, "w2", 10, 30) == []
+        assert await storage.complete_background_task(task.id, "w2", {"x": 1}) is False
+        assert await storage.renew_background_task_leases("w1", [task.id], 30) == [task.id]
+        assert await storage.complete_background_task(task.id, "w1", {"x": 1}) is True
+        return await storage.get_background_task(task.id)
+
+    done = asyncio.run(run())
+    assert done.status == TaskStatus.COMPLETED and done.result == {"x": 1} and done.leaseOwner is None
+
+
+def test_failed_attempts_are_retried_with_backoff_until_success(storage):
+    calls = []
+
+    async def flaky(metadata):
+        calls.append(metadata["n"])
+        if len(calls) < 3:
+            raise RuntimeError("upstream 529")
+        return {"ok": True}
+
+    register_task_processor(ANALYSIS, flaky)
+
+    async def run():
+        task = await _enqueue(storage, n=7)
+        worker = _worker(storage)
+        await worker.start()
+        await _until(lambda: storage.background_tasks[task.id].status == TaskStatus.COMPLETED)
+        await worker.stop()
+        return storage.background_tasks[task.id], worker
+
+    task, worker = asyncio.run(run())
+    assert calls == [7, 7, 7] and task.attempts == 3 and task.result == {"ok": True}
+    assert worker.retried == 2 and worker.completed == 1
+
+
+def test_exhausted_attempts_fail_the_task(storage):
+    async def broken(metadata):
+        raise ValueError("sempre falha")
+
+    register_task_processor(ANALYSIS, broken, max_attempts=2)
+
+    async def run():
+        task = await _enqueue(storage, max_attempts=2)
+        worker = _worker(storage)
+        await worker.start()
+        await _until(lambda: storage.background_tasks[task.id].status == TaskStatus.FAILED)
+        await worker.stop()
+        return storage.background_tasks[task.id]
+
+    task = asyncio.run(run())
+    assert task.attempts == 2 and task.error == "sempre falha" and task.completedAt is not None
+
+
+def test_retry_delay_grows_exponentially_and_is_capped(storage):
+    worker = TaskWorker(storage, retry_base_seconds=5, retry_max_seconds=60)
+    assert 2.5 <= worker.retry_delay(1) <= 5
+    assert 10 <= worker.retry_delay(3) <= 20
+    assert 30 <= worker.retry_delay(10) <= 60
+
+
+def test_concurrency_is_limited_per_worker_and_per_task_type(storage):
+    active = {ANALYSIS: 0, CHAT: 0}
+    peak = {ANALYSIS: 0, CHAT: 0, "total": 0}
+
+    def processor(task_type):
+        async def run(metadata):
+            active[task_type] += 1
+            peak[task_type] = max(peak[task_type], active[task_type])
+            peak["total"] = max(peak["total"], sum(active.values()))
+            await asyncio.sleep(0.03)
+            active[task_type] -= 1
+        return run
+
+    register_task_processor(ANALYSIS, processor(ANALYSIS), concurrency=2)
+    register_task_processor(CHAT, processor(CHAT))
+
+    async def run():
+        for _ in range(6):
+            await _enqueue(storage, ANALYSIS)
+            await _enqueue(storage, CHAT)
+        worker = _worker(storage, concurrency=3)
+        await worker.start()
+        await _until(lambda: all(t.status == TaskStatus.COMPLETED for t in storage.background_tasks.values()))
+        await worker.stop()
+
+    asyncio.run(run())
+    assert peak[ANALYSIS] == 2 and peak["total"] == 3 and peak[CHAT] >= 1
+
+
+def test_expired_lease_is_requeued_or_failed_when_attempts_are_exhausted(storage):
+    async def run():
+        retry = await _enqueue(storage, max_attempts=2)
+        last = await _enqueue(storage, max_attempts=1)
+        await storage.claim_background_tasks(ANALYSIS, "worker-morto", 10, 30)
+        for task in (retry, last):
+            storage.background_tasks[task.id].leaseExpiresAt = datetime.utcnow() - timedelta(seconds=1)
+        assert await storage.requeue_expired_background_tasks() == 2
+        return storage.background_tasks[retry.id], storage.background_tasks[last.id]
+
+    retry, last = asyncio.run(run())
+    assert retry.status == TaskStatus.PENDING and retry.leaseOwner is None and retry.attempts == 1
+    assert last.status == TaskStatus.FAILED and "Lease" in last.error
+
+
+def test_stop_returns_running_tasks_to_the_queue_without_spending_an_attempt(storage):
+    started = []
+
+    async def slow(metadata):
+        started.append(True)
+        await asyncio.sleep(60)
+
+    register_task_processor(ANALYSIS, slow)
+
+    async def run():
+        task = await _enqueue(storage)
+        worker = _worker(storage)
+        await worker.start()
+        await _until(lambda: started)
+        await worker.stop()
+        return storage.background_tasks[task.id], worker
+
+    task, worker = asyncio.run(run())
+    assert task.status == TaskStatus.PENDING and task.attempts == 0 and worker.released == 1
+
+
+def test_cancel_interrupts_a_running_task(storage, monkeypatch):
+    started = []
+
+    async def slow(metadata):
+        started.append(True)
+        await asyncio.sleep(60)
+
+    register_task_processor(ANALYSIS, slow)
+    worker = _worker(storage)
+    monkeypatch.setattr(background_tasks, "storage", storage)
+    monkeypatch.setattr(background_tasks, "task_worker", worker)
+
+    async def run():
+        await worker.start()
+        task = await background_tasks.create_task("u1", ANALYSIS, {"problem": "p"})
+        await _until(lambda: started)
+        assert await background_tasks.cancel_task(task.id) is True
+        await _until(lambda: not worker._running)
+        await worker.stop()
+        return await background_tasks.get_task_status(task.id)
+
+    task = asyncio.run(run())
+    assert task.status == TaskStatus.CANCELLED and task.result is None
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
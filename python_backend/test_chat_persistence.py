@@ -0,0 +1,71 @@
+"""
+Test script for single round-trip chat persistence (create_message_pair)
+"""
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+from python_backend.models import Conversation, ExpertCreate, MessageSend
+from python_backend.routers import conversations
+from python_backend.storage import MemStorage
+
+
+class _FakeAgent:
+    async def chat(self, conversation_history, user_message, **kwargs):
+        return f"Resposta {len(conversation_history) // 2 + 1}"
+
+
+def test_message_pair_keeps_turn_order_and_touches_conversation():
+    storage = MemStorage()
+    conversation = Conversation(
+        id=str(uuid.uuid4()), userId="default_user", expertId="e1", title="Chat",
+        updatedAt=datetime.utcnow() - timedelta(days=1)
+    )
+    storage.conversations[conversation.id] = conversation
+
+    async def run():
+        for i in range(3):
+            await storage.create_message_pair(conversation.id, f"Pergunta {i}", f"Resposta {i}")
+        return await storage.get_messages(conversation.id)
+
+    messages = asyncio.run(run())
+    assert [(m.role, m.content) for m in messages] == [
+        (role, f"{label} {i}") for i in range(3) for role, label in (("user", "Pergunta"), ("assistant", "Resposta"))
+    ]
+    assert storage.conversations[conversation.id].updatedAt > datetime.utcnow() - timedelta(minutes=1)
+
+
+def test_send_message_persists_turn_in_one_call(monkeypatch):
+    storage = MemStorage()
+    calls = []
+    original = storage.create_message_pair
+
+    async def counting_pair(*args):
+        calls.append(args)
+        return await original(*args)
+
+    monkeypatch.setattr(conversations, "storage", storage)
+    monkeypatch.setattr(storage, "create_message_pair", counting_pair)
+    monkeypatch.setattr(
+        conversations.LegendAgentFactory, "create_agent", staticmethod(lambda name, prompt, **kwargs: _FakeAgent())
+    )
+
+    async def run():
+        expert = await storage.create_expert(ExpertCreate(
+            name="Seth Godin", title="Especialista", expertise=["marketing"], bio="Bio", systemPrompt="Prompt"
+        ))
+        conversation = Conversation(id=str(uuid.uuid4()), userId="default_user", expertId=expert.id, title="Chat")
+        storage.conversations[conversation.id] = conversation
+        result = await conversations.send_message.__wrapped__(None, conversation.id, MessageSend(content="Olá"))
+        return result, await storage.get_messages(conversation.id)
+
+    result, messages = asyncio.run(run())
+    assert len(calls) == 1
+    assert result["userMessage"].content == "Olá"
+    assert result["assistantMessage"].content == "Resposta 1"
+    assert [m.id for m in messages] == [result["userMessage"].id, result["assistantMessage"].id]
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,175 @@
+"""
+Test script for the parallel context loader and the cached expert catalog
+"""
+import asyncio
+
+from python_backend.context_loader import ContextLoader, ExpertCatalog
+from python_backend.models import ExpertCreate
+from python_backend.rendered_context import RenderedContextCache
+from python_backend.storage import MemStorage
+
+
+class _NotifyBus:
+    """LISTEN/NOTIFY em memória: cada catálogo é um "worker" sobre o mesmo banco."""
+
+    def __init__(self):
+        self.listeners = []
+
+    async def notify(self, channel, payload=""):
+        for listen_channel, callback in list(self.listeners):
+            if listen_channel == channel:
+                callback(payload)
+
+    async def listen(self, channel, callback):
+        self.listeners.append((channel, callback))
+        return _FakeListenConnection()
+
+
+class _FakeListenConnection:
+    def __init__(self):
+        self.closed = False
+
+    def add_termination_listener(self, callback):
+        self.on_terminate = callback
+
+    async def close(self):
+        self.closed = True
+
+
+class _WorkerStorage:
+    """MemStorage compartilhado + barramento de notificações compartilhado."""
+
+    def __init__(self, storage: MemStorage, bus: _NotifyBus):
+        self.storage = storage
+        self.notify = bus.notify
+        self.listen = bus.listen
+
+    def __getattr__(self, name):
+        return getattr(self.storage, name)
+
+
+class _SlowStorage:
+    """Encaminha para o MemStorage com latência fixa por leitura, contando as chamadas."""
+
+    def __init__(self, storage: MemStorage, delay: float = 0.05):
+        self.storage = storage
+        self.delay = delay
+        self.calls = []
+
+    def __getattr__(self, name):
+        attr = getattr(self.storage, name)
+        if not name.startswith("get_"):
+            return attr
+
+        async def slow(*args, **kwargs):
+            self.calls.append(name)
+            await asyncio.sleep(self.delay)
+            return await attr(*args, **kwargs)
+        return slow
+
+
+async def _create_experts(storage: MemStorage, names):
+    return [
+        await storage.create_expert(ExpertCreate(
+            name=name, title="Especialista", expertise=["marketing"], bio="Bio", systemPrompt="Prompt"
+        ))
+        for name in names
+    ]
+
+
+def test_get_experts_by_ids_keeps_order_and_skips_unknown():
+    storage = MemStorage()
+
+    async def run():
+        first, second = await _create_experts(storage, ["Al Ries", "Dan Kennedy"])
+        return first, second, await storage.get_experts_by_ids([second.id, "nao-existe", first.id])
+
+    first, second, experts = asyncio.run(run())
+    assert [e.id for e in experts] == [second.id, first.id]
+
+
+def test_catalog_serves_repeated_lookups_from_memory():
+    slow = _SlowStorage(MemStorage())
+    catalog = ExpertCatalog(slow, ttl_seconds=60)
+
+    async def run():
+        experts = await _create_experts(slow.storage, ["Ann Handley", "Neil Patel", "Byron Sharp"])
+        ids = [e.id for e in experts]
+        for _ in range(10):
+            assert [e.id for e in await catalog.get_many(ids)] == ids
+        await catalog.invalidate()
+        await catalog.get_many(ids)
+        return ids
+
+    asyncio.run(run())
+    assert slow.calls.count("get_experts") == 2
+    assert "get_expert" not in slow.calls
+
+
+def test_invalidation_reaches_other_workers():
+    shared, bus = MemStorage(), _NotifyBus()
+    worker_a = ExpertCatalog(_WorkerStorage(shared, bus), ttl_seconds=60, synced_ttl_seconds=3600)
+    worker_b = ExpertCatalog(_WorkerStorage(shared, bus), ttl_seconds=60, synced_ttl_seconds=3600)
+
+    async def run():
+        await worker_a.start_sync()
+        await worker_b.start_sync()
+        await _create_experts(shared, ["Seth Godin"])
+        assert len(await worker_a.all()) == len(await worker_b.all())
+
+        # Worker A cria um especialista e invalida; B recarrega sem esperar o TTL
+        await _create_experts(shared, ["Gary Vaynerchuk"])
+        await worker_a.invalidate()
+        names_b = [e.name for e in await worker_b.all()][-2:]
+        await worker_b.stop_sync()
+        return names_b
+
+    names_b = asyncio.run(run())
+    assert names_b == ["Seth Godin", "Gary Vaynerchuk"]
+    assert worker_b.stats()["remoteInvalidations"] == 1
+    # A ignora o próprio NOTIFY
+    assert worker_a.stats()["remoteInvalidations"] == 0
+    assert worker_a.stats()["synced"] and not worker_b.stats()["synced"]
+
+
+def test_load_racing_an_invalidation_is_not_kept():
+    slow = _SlowStorage(MemStorage(), delay=0.05)
+    catalog = ExpertCatalog(slow, ttl_seconds=60)
+
+    async def run():
+        await _create_experts(slow.storage, ["David Ogilvy"])
+        load = asyncio.create_task(catalog.all())
+        await asyncio.sleep(0.01)
+        await _create_experts(slow.storage, ["Claude Hopkins"])
+        await catalog.invalidate()
+        await load
+        return [e.name for e in await catalog.all()][-2:]
+
+    assert asyncio.run(run()) == ["David Ogilvy", "Claude Hopkins"]
+    assert slow.calls.count("get_experts") == 2
+
+
+def test_council_inputs_are_loaded_concurrently():
+    slow = _SlowStorage(MemStorage(), delay=0.1)
+    loader = ContextLoader(slow, ExpertCatalog(slow), RenderedContextCache(slow))
+
+    async def run():
+        experts = await _create_experts(slow.storage, ["Rory Sutherland", "April Dunford"])
+        persona = await slow.storage.create_persona("default_user", {"name": "Persona", "researchMode": "quick"})
+        start = asyncio.get_running_loop().time()
+        inputs = await loader.council_inputs(persona.id, "default_user", [e.id for e in experts] + ["fantasma"])
+        return inputs, asyncio.get_running_loop().time() - start
+
+    inputs, elapsed = asyncio.run(run())
+    print(f"   3 leituras em {elapsed:.2f}s")
+    assert inputs["persona"].name == "Persona"
+    assert [e.name for e in inputs["experts"]] == ["Rory Sutherland", "April Dunford"]
+    assert inputs["missingExpertIds"] == ["fantasma"]
+    # persona, perfil e catálogo em paralelo (+ uma consulta em lote para o id ausente)
+    assert elapsed < 0.3
+    assert slow.calls.count("get_experts_by_ids") == 1
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, "-q"]))
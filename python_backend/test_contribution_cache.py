@@ -0,0 +1,72 @@
+"""
+Test script for the council contribution cache (content-addressed keys + LRU tier)
+"""
+import asyncio
+
+from python_backend.contribution_cache import ContributionCache, build_contribution_key
+from python_backend.models import ExpertContribution, Persona
+from python_backend.storage import MemStorage
+
+
+def _contribution(expert_id: str = "kotler") -> ExpertContribution:
+    return ExpertContribution(
+        expertId=expert_id,
+        expertName="Philip Kotler",
+        analysis="Análise",
+        keyInsights=["Insight"],
+        recommendations=["Recomendação"],
+    )
+
+
+def test_key_normalizes_problem_and_tracks_versions():
+    persona = Persona(id="p1", userId="u1", name="Persona", researchMode="quick")
+    base = build_contribution_key("kotler", "v1", "Como  crescer  em SaaS?", persona=persona)
+
+    assert base == build_contribution_key("kotler", "v1", "como crescer em saas?", persona=persona)
+    assert base != build_contribution_key("kotler", "v2", "Como crescer em SaaS?", persona=persona)
+    assert base != build_contribution_key("godin", "v1", "Como crescer em SaaS?", persona=persona)
+    assert base != build_contribution_key("kotler", "v1", "Como crescer em SaaS?", persona=persona,
+                                          research_findings="Mercado em alta")
+    assert base != build_contribution_key("kotler", "v1", "Como crescer em SaaS?", persona=persona,
+                                          profile={"updatedAt": "2025-01-01T00:00:00"})
+
+    updated = persona.model_copy(update={"updatedAt": persona.updatedAt.replace(year=2030)})
+    assert base != build_contribution_key("kotler", "v1", "Como crescer em SaaS?", persona=updated)
+
+
+def test_lru_hits_misses_and_eviction():
+    cache = ContributionCache(MemStorage(), max_entries=2)
+
+    async def run():
+        assert await cache.get("a") is None
+        await cache.set("a", _contribution("a"))
+        await cache.set("b", _contribution("b"))
+        assert (await cache.get("a")).expertId == "a"  # "a" passa a ser o mais recente
+        await cache.set("c", _contribution("c"))        # remove "b" (menos recente)
+        assert await cache.get("b") is None
+        assert await cache.get("c") is not None
+
+    asyncio.run(run())
+    stats = cache.stats()
+    print(f"   Stats: {stats}")
+    assert stats["entries"] == 2
+    assert stats["memoryHits"] == 2
+    assert stats["misses"] == 2
+
+
+def test_ttl_expires_entries():
+    cache = ContributionCache(MemStorage(), ttl_seconds=-1)
+
+    async def run():
+        await cache.set("a", _contribution())
+        return await cache.get("a")
+
+    assert asyncio.run(run()) is None
+
+
+if __name__ == "__main__":
+    print("🧪 TESTANDO CACHE DE CONTRIBUIÇÕES")
+    test_key_normalizes_problem_and_tracks_versions()
+    test_lru_hits_misses_and_eviction()
+    test_ttl_expires_entries()
+    print("✅ TESTES DO CACHE CONCLUÍDOS")
@@ -0,0 +1,154 @@
+"""
+Test script for the rolling conversation memory (verbatim window + summary)
+"""
+import asyncio
+
+from python_backend.conversation_memory import ConversationMemory
+from python_backend.storage import MemStorage
+
+
+def _turn(i: int):
+    return [
+        {"role": "user", "content": f"Pergunta {i}"},
+        {"role": "assistant", "content": f"Resposta {i}"},
+    ]
+
+
+def _council_turn(i: int, experts: int = 4):
+    return [{"role": "user", "content": f"Pergunta {i}"}] + [
+        {"role": "expert", "expertName": f"Especialista {e}", "content": f"Resposta {i}.{e}"}
+        for e in range(experts)
+    ]
+
+
+def _memory(monkeypatch, calls: list, window: int = 6, batch: int = 4) -> ConversationMemory:
+    memory = ConversationMemory(MemStorage(), window=window, batch=batch)
+
+    async def fake_summarize(previous_summary, messages):
+        calls.append(len(messages))
+        return f"{previous_summary}+{len(messages)}".lstrip("+")
+
+    monkeypatch.setattr(memory, "_summarize", fake_summarize)
+    return memory
+
+
+def test_short_conversation_is_sent_verbatim(monkeypatch):
+    memory = _memory(monkeypatch, [])
+    history = _turn(1) + _turn(2)
+    context = asyncio.run(memory.context("conv-short", history))
+    assert context.messages == history
+    assert context.summary_block() == ""
+
+
+def test_prompt_stays_bounded_over_hundreds_of_messages(monkeypatch):
+    calls = []
+    memory = _memory(monkeypatch, calls)
+
+    async def run():
+        history, sizes = [], []
+        for i in range(150):
+            context = await memory.context("conv-long", history)
+            sizes.append(len(context.messages))
+            # Mensagens resumidas + janela cobrem toda a conversa, sem buracos
+            assert context.summarized_count + len(context.messages) >= len(history)
+            history += _turn(i)
+            memory.schedule_update("conv-long", history)
+            await memory.drain()
+        return history, sizes, await memory.context("conv-long", history)
+
+    history, sizes, final = asyncio.run(run())
+    print(f"   {len(history)} mensagens, máximo na íntegra: {max(sizes)}, resumos: {len(calls)}")
+
+    assert len(history) == 300
+    assert max(sizes) <= memory.max_verbatim
+    assert final.summarized_count >= len(history) - memory.max_verbatim
+    assert final.messages == history[final.summarized_count:]
+    assert "RESUMO DA CONVERSA ATÉ AQUI" in final.summary_block()
+    # Cada resumo só incorpora o lote novo (não reprocessa a conversa inteira)
+    assert max(calls) <= memory.batch + 2
+
+
+def test_lagging_summary_catches_up_without_dropping_messages(monkeypatch):
+    calls = []
+    memory = _memory(monkeypatch, calls)
+    history = [m for i in range(100) for m in _turn(i)]
+
+    async def run():
+        # Resumo parado em 20 mensagens (ex.: resumidor falhou por vários turnos)
+        await memory.storage.save_conversation_summary("conv-lag", "antigo", 20)
+        return await memory.context("conv-lag", history)
+
+    context = asyncio.run(run())
+    assert context.summarized_count + len(context.messages) == len(history)
+    assert context.messages == history[context.summarized_count:]
+    assert len(context.messages) <= memory.max_verbatim
+    # Atraso resumido em lotes, cada um limitado a max_verbatim mensagens
+    assert sum(calls) == len(history) - memory.window - 20 and max(calls) <= memory.max_verbatim
+
+
+def test_council_window_always_starts_on_a_user_turn(monkeypatch):
+    calls = []
+    memory = _memory(monkeypatch, calls, window=12, batch=8)
+
+    async def run():
+        history, summarized = [], 0
+        for i in range(40):
+            context = await memory.context("conv-council", history)
+            if context.messages:
+                assert context.messages[0]["role"] == "user"
+            assert context.messages == history[context.summarized_count:]
+            summarized = max(summarized, context.summarized_count)
+            history += _council_turn(i)
+            memory.schedule_update("conv-council", history)
+            await memory.drain()
+        return summarized
+
+    assert asyncio.run(run()) > 0
+    assert calls and all(size % 5 == 0 for size in calls)  # só turnos inteiros vão para o resumo
+
+
+def test_odd_window_and_legacy_cut_keep_the_question(monkeypatch):
+    memory = _memory(monkeypatch, [], window=5, batch=4)
+    history = [m for i in range(30) for m in _turn(i)]
+
+    async def run():
+        # Resumo gravado antes da correção, cortado entre a pergunta e a resposta
+        await memory.storage.save_conversation_summary("conv-odd", "antigo", 51)
+        legacy = await memory.context("conv-odd", history)
+        longer = history + [m for i in range(30, 35) for m in _turn(i)]
+        memory.schedule_update("conv-odd", longer)
+        await memory.drain()
+        return legacy, longer, await memory.context("conv-odd", longer)
+
+    legacy, longer, context = asyncio.run(run())
+    assert legacy.messages[0] == {"role": "user", "content": "Pergunta 25"}
+    # Janela ímpar: o corte recua para a pergunta em vez de abrir com a resposta
+    assert context.summarized_count == 64
+    assert context.messages[0] == {"role": "user", "content": "Pergunta 32"}
+    assert context.messages == longer[context.summarized_count:]
+
+
+def test_failed_summary_does_not_break_chat(monkeypatch):
+    memory = ConversationMemory(MemStorage(), window=6, batch=4)
+
+    async def broken(previous_summary, messages):
+        raise RuntimeError("API indisponível")
+
+    monkeypatch.setattr(memory, "_summarize", broken)
+    history = [m for i in range(10) for m in _turn(i)]
+
+    async def run():
+        memory.schedule_update("conv-fail", history)
+        await memory.drain()
+        return await memory.context("conv-fail", history)
+
+    context = asyncio.run(run())
+    assert memory.stats()["failures"] == 2  # update em background + tentativa de alcançar no context
+    assert context.summary == ""
+    # Sem resumo, nada é descartado: o histórico vai inteiro
+    assert context.messages == history
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,97 @@
+"""
+Test script for the streaming expert chat endpoint (SSE)
+"""
+import asyncio
+import json
+import uuid
+
+from python_backend.models import Conversation, ExpertCreate, MessageSend
+from python_backend.routers import conversations
+from python_backend.storage import MemStorage
+
+
+class _FakeRequest:
+    def __init__(self, disconnect_after: int = None):
+        self.disconnect_after = disconnect_after
+        self.checks = 0
+
+    async def is_disconnected(self):
+        self.checks += 1
+        return self.disconnect_after is not None and self.checks > self.disconnect_after
+
+
+class _FakeAgent:
+    def __init__(self):
+        self.sent = 0
+        self.closed_early = False
+
+    async def chat_stream(self, conversation_history, user_message, **kwargs):
+        try:
+            for word in ["Comece ", "pela ", "sua ", "lista ", "de ", "clientes."]:
+                await asyncio.sleep(0.01)
+                self.sent += 1
+                yield word
+        except GeneratorExit:
+            self.closed_early = True
+            raise
+
+
+def _setup(monkeypatch):
+    storage = MemStorage()
+    agent = _FakeAgent()
+    monkeypatch.setattr(conversations, "storage", storage)
+    monkeypatch.setattr(
+        conversations.LegendAgentFactory, "create_agent", staticmethod(lambda name, prompt, **kwargs: agent)
+    )
+
+    async def create():
+        expert = await storage.create_expert(ExpertCreate(
+            name="Philip Kotler", title="Especialista", expertise=["marketing"], bio="Bio", systemPrompt="Prompt"
+        ))
+        conversation = Conversation(id=str(uuid.uuid4()), userId="default_user", expertId=expert.id, title="Chat")
+        storage.conversations[conversation.id] = conversation
+        return conversation
+
+    return storage, asyncio.run(create()), agent
+
+
+def _collect(request, conversation_id):
+    async def run():
+        response = await conversations.send_message_stream.__wrapped__(
+            request, conversation_id, MessageSend(content="Por onde começo?")
+        )
+        events = []
+        async for chunk in response.body_iterator:
+            event_line, data_line = chunk.strip().split("\n")
+            events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+        return events
+
+    return asyncio.run(run())
+
+
+def test_deltas_are_forwarded_then_message_is_persisted(monkeypatch):
+    storage, conversation, agent = _setup(monkeypatch)
+    events = _collect(_FakeRequest(), conversation.id)
+    persisted = [m.content for m in asyncio.run(storage.get_messages(conversation.id))]
+
+    names = [name for name, _ in events]
+    assert names[0] == "message_started"
+    assert names[1:-1] == ["delta"] * 6
+    assert names[-1] == "message_complete"
+    assert persisted == ["Por onde começo?", "Comece pela sua lista de clientes."]
+    assert events[-1][1]["assistantMessage"]["content"] == persisted[1]
+
+
+def test_client_disconnect_cancels_upstream_stream(monkeypatch):
+    storage, conversation, agent = _setup(monkeypatch)
+    events = _collect(_FakeRequest(disconnect_after=2), conversation.id)
+
+    assert [name for name, _ in events] == ["message_started", "delta", "delta"]
+    assert agent.closed_early is True
+    assert agent.sent == 3
+    assert asyncio.run(storage.get_messages(conversation.id)) == []
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,87 @@
+"""
+Test script for the keyset-paginated council analysis listing (GET /api/council/analyses/page)
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from python_backend import main
+from python_backend.models import ActionPlan, CouncilAnalysis, ExpertContribution
+from python_backend.pagination import decode_cursor, encode_cursor, excerpt
+from python_backend.storage import MemStorage
+
+BASE = datetime(2025, 11, 3, 12, 0)
+
+
+def _analysis(analysis_id: str, minutes: int, user_id: str = "default_user", with_plan: bool = False) -> CouncilAnalysis:
+    return CouncilAnalysis(
+        id=analysis_id,
+        userId=user_id,
+        problem=f"Problema {analysis_id}: " + "como aumentar a conversão do funil B2B? " * 20,
+        contributions=[
+            ExpertContribution(expertId="e1", expertName="Philip Kotler", analysis="...", keyInsights=[], recommendations=[]),
+            ExpertContribution(expertId="e2", expertName="Seth Godin", analysis="...", keyInsights=[], recommendations=[]),
+        ],
+        consensus="Consenso",
+        actionPlan=ActionPlan(phases=[], totalDuration="4 semanas") if with_plan else None,
+        createdAt=BASE + timedelta(minutes=minutes),
+    )
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(MemStorage, "_instance", None)
+    storage = MemStorage()
+    # a2 e a3 no mesmo instante: o id desempata
+    for analysis in (_analysis("a1", 1), _analysis("a2", 2, with_plan=True), _analysis("a3", 2), _analysis("a4", 3),
+                     _analysis("a5", 4), _analysis("other", 5, user_id="outro")):
+        asyncio.run(storage.save_council_analysis(analysis))
+    monkeypatch.setattr(main, "storage", storage)
+    return TestClient(main.app)
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    cursor = encode_cursor(BASE, "a2")
+    assert decode_cursor(cursor) == (BASE, "a2")
+    with pytest.raises(ValueError):
+        decode_cursor("não-é-cursor")
+    assert excerpt("curto") == "curto"
+    assert excerpt("x" * 300).endswith("…") and len(excerpt("x" * 300)) == 201
+
+
+def test_pages_walk_every_analysis_once_newest_first(client):
+    ids, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/council/analyses/page", params=params)
+        assert response.status_code == 200
+        body = response.json()
+        ids += [item["id"] for item in body["items"]]
+        pages += 1
+        cursor = body["nextCursor"]
+        if not cursor:
+            break
+    assert ids == ["a5", "a4", "a3", "a2", "a1"]
+    assert pages == 3
+
+
+def test_items_are_summaries(client):
+    items = client.get("/api/council/analyses/page", params={"limit": 5}).json()["items"]
+    by_id = {item["id"]: item for item in items}
+    assert set(by_id["a2"]) == {"id", "problemExcerpt", "expertNames", "hasActionPlan", "createdAt"}
+    assert by_id["a2"]["expertNames"] == ["Philip Kotler", "Seth Godin"]
+    assert by_id["a2"]["hasActionPlan"] is True and by_id["a3"]["hasActionPlan"] is False
+    assert by_id["a1"]["problemExcerpt"].startswith("Problema a1") and by_id["a1"]["problemExcerpt"].endswith("…")
+
+
+def test_invalid_parameters(client):
+    assert client.get("/api/council/analyses/page", params={"cursor": "%%%"}).status_code == 400
+    assert client.get("/api/council/analyses/page", params={"limit": 0}).status_code == 400
+    # A rota da página não é capturada por /api/council/analyses/{analysis_id}
+    assert client.get("/api/council/analyses/a1").json()["id"] == "a1"
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,179 @@
+"""
+Test script for concurrent council chat replies (ordered persistence + scheduler feedback)
+"""
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from anthropic import RateLimitError
+
+from python_backend.context_loader import ContextLoader, ExpertCatalog
+from python_backend.crew_agent import MarketingLegendAgent
+from python_backend.models import ExpertCreate
+from python_backend.rendered_context import RenderedContextCache
+from python_backend.routers import council_chat
+from python_backend.storage import MemStorage
+from python_backend.upstream_scheduler import UpstreamScheduler
+
+# Primeiro especialista é o mais lento: a ordem de conclusão é o inverso da ordem da conversa
+DELAYS = {"Philip Kotler": 0.3, "Seth Godin": 0.2, "Gary Vaynerchuk": 0.1}
+RATELIMIT_HEADERS = {
+    "anthropic-ratelimit-requests-limit": "1000",
+    "anthropic-ratelimit-requests-remaining": "900",
+}
+
+
+class _FakeMessages:
+    """messages.with_raw_response.create simulado: atraso por especialista, headers e 429 opcionais."""
+
+    def __init__(self, name: str, log: dict, rate_limited: set):
+        self.name = name
+        self.log = log
+        self.rate_limited = rate_limited
+        self.with_raw_response = self
+
+    async def create(self, **request):
+        self.log["inFlight"] += 1
+        self.log["peak"] = max(self.log["peak"], self.log["inFlight"])
+        try:
+            await asyncio.sleep(DELAYS[self.name])
+        finally:
+            self.log["inFlight"] -= 1
+        self.log["completed"].append(self.name)
+        if self.name in self.rate_limited:
+            response = httpx.Response(
+                429, headers={"retry-after": "0"}, request=httpx.Request("POST", "https://api.anthropic.com")
+            )
+            raise RateLimitError("rate limited", response=response, body=None)
+        content = [SimpleNamespace(type="text", text=f"Resposta de {self.name}")]
+        return SimpleNamespace(headers=RATELIMIT_HEADERS, parse=lambda: SimpleNamespace(content=content, usage=None))
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-test")
+    monkeypatch.setattr(MemStorage, "_instance", None)
+    storage = MemStorage()
+    monkeypatch.setattr(council_chat, "storage", storage)
+    monkeypatch.setattr(
+        council_chat, "context_loader",
+        ContextLoader(storage, ExpertCatalog(storage), RenderedContextCache(storage))
+    )
+    return storage
+
+
+def _use_fake_agents(monkeypatch, log: dict, rate_limited: set = frozenset()):
+    def create_agent(name, prompt, **kwargs):
+        agent = MarketingLegendAgent(name, prompt)
+        agent.anthropic_client = SimpleNamespace(messages=_FakeMessages(name, log, rate_limited))
+        return agent
+
+    monkeypatch.setattr(council_chat.LegendAgentFactory, "create_agent", staticmethod(create_agent))
+
+
+async def _conversation(storage: MemStorage):
+    experts = [
+        await storage.create_expert(ExpertCreate(
+            name=name, title="Especialista", expertise=["marketing"], bio="Bio", systemPrompt="Prompt"
+        ))
+        for name in DELAYS
+    ]
+    persona = await storage.create_persona("default_user", {"name": "Persona", "researchMode": "quick"})
+    return await storage.create_council_conversation(
+        "default_user", persona.id, "Como aumentar a retenção?", [e.id for e in experts]
+    )
+
+
+def test_replies_run_concurrently_and_keep_expert_order(storage, monkeypatch):
+    log = {"inFlight": 0, "peak": 0, "completed": []}
+    _use_fake_agents(monkeypatch, log)
+    monkeypatch.setattr(council_chat, "anthropic_scheduler", UpstreamScheduler("test", requests_per_minute=60_000))
+
+    async def run():
+        conversation = await _conversation(storage)
+        question = await storage.create_council_message(conversation.id, role="user", content="Qual o primeiro passo?")
+        await council_chat._process_council_message_background(conversation.id, question.content, question.id)
+        return question, await storage.get_council_messages(conversation.id)
+
+    question, messages = asyncio.run(run())
+    assert log["peak"] == len(DELAYS)
+    assert log["completed"] == list(reversed(DELAYS))
+    assert messages[0].id == question.id
+    assert [m.expertName for m in messages if m.role == "expert"] == list(DELAYS)
+
+
+def test_replies_are_stamped_after_the_persisted_user_message(storage, monkeypatch):
+    log = {"inFlight": 0, "peak": 0, "completed": []}
+    _use_fake_agents(monkeypatch, log)
+    monkeypatch.setattr(council_chat, "anthropic_scheduler", UpstreamScheduler("test", requests_per_minute=60_000))
+
+    async def run():
+        conversation = await _conversation(storage)
+        # Mesmo texto enviado duas vezes: o turno é o da mensagem indicada por message_id
+        first = await storage.create_council_message(
+            conversation.id, role="user", content="E agora?", timestamp=datetime(2026, 1, 1, 12, 0, 0)
+        )
+        await storage.create_council_message(
+            conversation.id, role="user", content="E agora?", timestamp=datetime(2026, 1, 1, 12, 5, 0)
+        )
+        await council_chat._process_council_message_background(conversation.id, first.content, first.id)
+        return first, await storage.get_council_messages(conversation.id)
+
+    first, messages = asyncio.run(run())
+    replies = [m for m in messages if m.role == "expert"]
+    assert [(m.timestamp - first.timestamp).microseconds for m in replies] == [1, 2, 3]
+
+
+def test_retried_turn_only_asks_experts_that_have_not_replied(storage, monkeypatch):
+    log = {"inFlight": 0, "peak": 0, "completed": []}
+    _use_fake_agents(monkeypatch, log)
+    monkeypatch.setattr(council_chat, "anthropic_scheduler", UpstreamScheduler("test", requests_per_minute=60_000))
+
+    async def run():
+        conversation = await _conversation(storage)
+        question = await storage.create_council_message(conversation.id, role="user", content="Qual o primeiro passo?")
+        # Primeira tentativa gravou a resposta de Seth Godin e o worker morreu
+        experts = await storage.get_experts()
+        seth = next(e for e in experts if e.name == "Seth Godin")
+        await storage.create_council_message(
+            conversation.id, role="expert", content="Resposta de Seth Godin", expert_id=seth.id,
+            expert_name=seth.name, timestamp=question.timestamp + timedelta(microseconds=2)
+        )
+        await council_chat.process_council_message_task(
+            {"conversationId": conversation.id, "content": question.content, "messageId": question.id}
+        )
+        # Uma terceira execução não chama ninguém
+        await council_chat.process_council_message_task(
+            {"conversationId": conversation.id, "content": question.content, "messageId": question.id}
+        )
+        return await storage.get_council_messages(conversation.id)
+
+    messages = asyncio.run(run())
+    assert sorted(log["completed"]) == ["Gary Vaynerchuk", "Philip Kotler"]
+    assert [m.expertName for m in messages if m.role == "expert"] == list(DELAYS)
+
+
+def test_replies_feed_headers_and_rate_limits_to_the_scheduler(storage, monkeypatch):
+    log = {"inFlight": 0, "peak": 0, "completed": []}
+    _use_fake_agents(monkeypatch, log, rate_limited={"Gary Vaynerchuk"})
+    scheduler = UpstreamScheduler("test", requests_per_minute=60_000, initial_concurrency=8)
+    monkeypatch.setattr(council_chat, "anthropic_scheduler", scheduler)
+
+    async def run():
+        conversation = await _conversation(storage)
+        question = await storage.create_council_message(conversation.id, role="user", content="Qual o primeiro passo?")
+        await council_chat._process_council_message_background(conversation.id, question.content, question.id)
+        return await storage.get_council_messages(conversation.id)
+
+    messages = asyncio.run(run())
+    stats = scheduler.stats()
+    assert stats["totalRequests"] == 3 and stats["inFlight"] == 0
+    assert stats["rateLimited"] == 1 and stats["concurrencyLimit"] < 8
+    assert stats["lastLimits"]
+    assert [m.expertName for m in messages if m.role == "expert"] == ["Philip Kotler", "Seth Godin"]
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,125 @@
+"""
+Test script for council deadline + quorum (slow experts are cancelled and recorded)
+"""
+import asyncio
+import time
+
+from python_backend.crew_council import CouncilOrchestrator, ExpertAnalysisError
+from python_backend.models import Expert, ExpertContribution
+
+DELAYS = {"rapido-1": 0.05, "rapido-2": 0.1, "lento": 5.0, "quebrado": 0.01, "medio": 0.2}
+FAILING = {"quebrado"}
+
+
+def _expert(expert_id: str) -> Expert:
+    return Expert(
+        id=expert_id,
+        name=expert_id.title(),
+        title="Especialista",
+        expertise=["marketing"],
+        bio="Bio",
+        systemPrompt="Prompt",
+    )
+
+
+def _orchestrator(cancelled: list) -> CouncilOrchestrator:
+    orchestrator = CouncilOrchestrator()
+    orchestrator.anthropic_client = object()  # só precisa existir; chamadas abaixo são simuladas
+
+    async def no_prefs(user_id):
+        return {}
+
+    async def fake_expert_analysis(expert, problem, **kwargs):
+        try:
+            await asyncio.sleep(DELAYS[expert.id])
+        except asyncio.CancelledError:
+            cancelled.append(expert.id)
+            raise
+        if expert.id in FAILING:
+            raise ExpertAnalysisError(f"Não consegui obter análise de {expert.name}")
+        return ExpertContribution(
+            expertId=expert.id,
+            expertName=expert.name,
+            analysis="Análise",
+            keyInsights=["Foco em retenção de clientes"],
+            recommendations=["Criar programa de indicação"],
+        )
+
+    async def fake_consensus(problem, contributions, **kwargs):
+        return f"Consenso de {len(contributions)} especialistas"
+
+    async def fake_action_plan(**kwargs):
+        return None
+
+    orchestrator._load_user_preferences = no_prefs
+    orchestrator._get_expert_analysis = fake_expert_analysis
+    orchestrator._synthesize_consensus = fake_consensus
+    orchestrator._generate_action_plan = fake_action_plan
+    return orchestrator
+
+
+def test_deadline_skips_slow_expert():
+    cancelled = []
+    orchestrator = _orchestrator(cancelled)
+    experts = [_expert(expert_id) for expert_id in ("rapido-1", "rapido-2", "lento")]
+
+    start = time.monotonic()
+    analysis = asyncio.run(orchestrator.analyze_problem(
+        user_id="test_user",
+        problem="Como aumentar a retenção de clientes?",
+        experts=experts,
+        deadline_seconds=0.3,
+        quorum=2,
+    ))
+    elapsed = time.monotonic() - start
+    print(f"   Tempo total: {elapsed:.2f}s")
+
+    assert elapsed < 1.0
+    assert [c.expertId for c in analysis.contributions] == ["rapido-1", "rapido-2"]
+    assert [(s.expertId, s.reason) for s in analysis.skippedExperts] == [("lento", "deadline")]
+    assert cancelled == ["lento"]
+
+
+def test_deadline_waits_for_quorum():
+    cancelled = []
+    orchestrator = _orchestrator(cancelled)
+    experts = [_expert(expert_id) for expert_id in ("rapido-1", "rapido-2", "lento")]
+
+    analysis = asyncio.run(orchestrator.analyze_problem(
+        user_id="test_user",
+        problem="Como aumentar a retenção de clientes?",
+        experts=experts,
+        deadline_seconds=0.01,
+        quorum=2,
+    ))
+    # O prazo venceu antes de qualquer resposta: segue assim que 2 de 3 respondem
+    assert len(analysis.contributions) == 2
+    assert analysis.consensus == "Consenso de 2 especialistas"
+    assert cancelled == ["lento"]
+
+
+def test_failed_expert_does_not_count_toward_quorum():
+    cancelled = []
+    orchestrator = _orchestrator(cancelled)
+    experts = [_expert(expert_id) for expert_id in ("quebrado", "rapido-1", "medio", "lento")]
+
+    analysis = asyncio.run(orchestrator.analyze_problem(
+        user_id="test_user",
+        problem="Como aumentar a retenção de clientes?",
+        experts=experts,
+        deadline_seconds=0.01,
+        quorum=2,
+    ))
+    # A falha chega primeiro, mas o quórum exige 2 respostas reais
+    assert [c.expertId for c in analysis.contributions] == ["rapido-1", "medio"]
+    assert [(s.expertId, s.reason) for s in analysis.skippedExperts] == [("quebrado", "failed"), ("lento", "deadline")]
+    assert analysis.consensus == "Consenso de 2 especialistas"
+    assert cancelled == ["lento"]
+
+
+if __name__ == "__main__":
+    print("🧪 TESTANDO PRAZO E QUÓRUM DO CONSELHO")
+    test_deadline_skips_slow_expert()
+    test_deadline_waits_for_quorum()
+    test_failed_expert_does_not_count_toward_quorum()
+    print("✅ TESTES DE PRAZO/QUÓRUM CONCLUÍDOS")
@@ -0,0 +1,217 @@
+"""
+Test script for push delivery: event_bus (in-process + NOTIFY between workers) and the SSE endpoints
+for background tasks and council messages
+"""
+import asyncio
+import json
+import uuid
+from datetime import timedelta
+
+import pytest
+
+from python_backend import background_tasks, main
+from python_backend.background_tasks import TaskWorker, register_task_processor, report_progress
+from python_backend.event_bus import NOTIFY_MAX_BYTES, EventBus, council_topic, event_bus
+from python_backend.models import BackgroundTask, TaskStatus, TaskType
+from python_backend.routers import council_chat
+from python_backend.storage import MemStorage
+
+
+class _FakeListener:
+    def __init__(self):
+        self.closed = False
+
+    def add_termination_listener(self, callback):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+
+class _FakePostgres:
+    """Canal compartilhado entre 'workers': notify entrega a todos os callbacks de listen."""
+
+    def __init__(self):
+        self.callbacks = []
+        self.payloads = []
+
+    async def notify(self, channel, payload=""):
+        self.payloads.append(payload)
+        for callback in list(self.callbacks):
+            callback(payload)
+
+    async def listen(self, channel, callback):
+        self.callbacks.append(callback)
+        return _FakeListener()
+
+
+def _parse(chunk: str):
+    if chunk.startswith(":"):
+        return "keepalive", None
+    event_line, data_line = chunk.strip().split("\n")
+    return event_line[len("event: "):], json.loads(data_line[len("data: "):])
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    monkeypatch.setattr(MemStorage, "_instance", None)
+    storage = MemStorage()
+    monkeypatch.setattr(background_tasks, "_task_processors", {})
+    monkeypatch.setattr(background_tasks, "_task_concurrency", {})
+    monkeypatch.setattr(background_tasks, "_task_max_attempts", {})
+    monkeypatch.setattr(background_tasks, "storage", storage)
+    monkeypatch.setattr(council_chat, "storage", storage)
+    return storage
+
+
+def test_events_cross_workers_through_notify():
+    channel = _FakePostgres()
+    worker_a, worker_b = EventBus(channel), EventBus(channel)
+
+    async def run():
+        await worker_a.start_sync()
+        await worker_b.start_sync()
+        on_a, on_b = worker_a.subscribe("task:1"), worker_b.subscribe("task:1")
+        await worker_a.publish("task:1", {"type": "progress", "progress": 40})
+        await worker_a.publish("task:1", {"type": "task", "result": "x" * NOTIFY_MAX_BYTES})
+        events_a = [await on_a.get(0.1), await on_a.get(0.1)]
+        events_b = [await on_b.get(0.1), await on_b.get(0.1), await on_b.get(0.01)]
+        await worker_a.stop_sync()
+        return events_a, events_b
+
+    events_a, events_b = asyncio.run(run())
+    # Local recebe o evento completo uma vez (o próprio NOTIFY é ignorado)
+    assert [e["type"] for e in events_a] == ["progress", "task"] and len(events_a[1]["result"]) == NOTIFY_MAX_BYTES
+    # Outro worker: o evento grande vira resync
+    assert events_b == [{"type": "progress", "progress": 40}, {"type": "resync"}, None]
+    assert worker_b.remote_received == 2 and worker_a.oversized == 1
+    assert all(len(payload.encode()) <= NOTIFY_MAX_BYTES for payload in channel.payloads)
+
+
+def test_slow_subscriber_gets_resync_instead_of_unbounded_queue():
+    bus = EventBus(object(), queue_size=2)
+
+    async def run():
+        subscription = bus.subscribe("council:c1")
+        for i in range(5):
+            await bus.publish("council:c1", {"type": "message", "n": i})
+        events = [await subscription.get(0.01) for _ in range(4)]
+        subscription.close()
+        return events
+
+    events = asyncio.run(run())
+    assert events == [{"type": "message", "n": 0}, {"type": "message", "n": 1}, {"type": "resync"}, None]
+    assert bus.dropped == 1 and bus.stats()["subscribers"] == 0
+
+
+def test_task_stream_pushes_status_and_progress_until_done(storage):
+    async def analysis(metadata):
+        await report_progress(40, stage="expert_completed", expertName="Seth Godin")
+        await report_progress(80, stage="expert_completed", expertName="Philip Kotler")
+        return {"id": "a1"}
+
+    register_task_processor(TaskType.COUNCIL_ANALYSIS, analysis)
+
+    async def run():
+        task = await storage.create_background_task(BackgroundTask(
+            id=str(uuid.uuid4()), userId="u1", taskType=TaskType.COUNCIL_ANALYSIS, status=TaskStatus.PENDING
+        ))
+        response = await main.stream_task_events(task.id)
+        events = [_parse(await response.body_iterator.__anext__())]
+        worker = TaskWorker(storage, poll_seconds=0.01, shutdown_grace_seconds=0)
+        await worker.start()
+        events += [_parse(chunk) async for chunk in response.body_iterator]
+        await worker.stop()
+        return events, task.id
+
+    events, task_id = asyncio.run(run())
+    assert events[0][0] == "task" and events[0][1]["status"] == "pending" and events[0][1]["id"] == task_id
+    assert [(name, data.get("status"), data.get("progress")) for name, data in events[1:]] == [
+        ("task", "running", None), ("progress", None, 40), ("progress", None, 80), ("task", "completed", 100)
+    ]
+    assert events[-1][1]["result"] == {"id": "a1"}
+    assert asyncio.run(storage.get_background_task(task_id)).progress == 100
+    assert event_bus.stats()["subscribers"] == 0
+
+
+def test_council_stream_replays_since_then_pushes_new_messages(storage):
+    async def run():
+        conversation = await storage.create_council_conversation("u1", "p1", "Problema", ["e1"])
+        first = await storage.create_council_message(conversation.id, "user", "Primeira pergunta")
+        second = await storage.create_council_message(
+            conversation.id, "expert", "Resposta", expert_id="e1", expert_name="Seth Godin",
+            timestamp=first.timestamp + timedelta(seconds=1)
+        )
+        response = await council_chat.stream_council_events(conversation.id, since=first.timestamp.isoformat())
+        stream = response.body_iterator
+        replayed = _parse(await stream.__anext__())
+        # Republicação da mensagem já reenviada é ignorada; a nova chega como delta
+        await council_chat._publish_message(conversation.id, second)
+        third = await storage.create_council_message(conversation.id, "user", "Segunda pergunta")
+        await council_chat._publish_message(conversation.id, third)
+        await event_bus.publish(council_topic(conversation.id), {"type": "turn_completed"})
+        pushed = [_parse(await stream.__anext__()), _parse(await stream.__anext__())]
+        await stream.aclose()
+        return replayed, pushed, second, third
+
+    replayed, pushed, second, third = asyncio.run(run())
+    assert replayed[0] == "message" and replayed[1]["message"]["id"] == second.id
+    assert pushed[0][0] == "message" and pushed[0][1]["message"]["id"] == third.id
+    assert pushed[1][0] == "turn_completed"
+    assert event_bus.stats()["subscribers"] == 0
+
+
+def test_council_stream_rejects_bad_since(storage):
+    conversation = asyncio.run(storage.create_council_conversation("u1", "p1", "Problema", ["e1"]))
+    with pytest.raises(main.HTTPException) as error:
+        asyncio.run(council_chat.stream_council_events(conversation.id, since="ontem"))
+    assert error.value.status_code == 400
+
+
+def test_council_stream_accepts_since_with_timezone(storage):
+    async def run():
+        conversation = await storage.create_council_conversation("u1", "p1", "Problema", ["e1"])
+        first = await storage.create_council_message(conversation.id, "user", "Primeira pergunta")
+        second = await storage.create_council_message(
+            conversation.id, "expert", "Resposta", expert_id="e1", expert_name="Seth Godin",
+            timestamp=first.timestamp + timedelta(seconds=1)
+        )
+        # Mesmo instante de first, expresso em UTC-03:00
+        since = (first.timestamp - timedelta(hours=3)).isoformat() + "-03:00"
+        response = await council_chat.stream_council_events(conversation.id, since=since)
+        replayed = _parse(await response.body_iterator.__anext__())
+        await response.body_iterator.aclose()
+        return replayed, second
+
+    replayed, second = asyncio.run(run())
+    assert replayed[0] == "message" and replayed[1]["message"]["id"] == second.id
+
+
+def test_council_stream_fetches_messages_that_arrived_as_resync(storage):
+    async def run():
+        conversation = await storage.create_council_conversation("u1", "p1", "Problema", ["e1"])
+        response = await council_chat.stream_council_events(conversation.id)
+        stream = response.body_iterator
+        pending = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0.01)
+        # Resposta grande gravada por outro worker: o NOTIFY dela chega aqui só como resync
+        large = await storage.create_council_message(
+            conversation.id, "expert", "x" * NOTIFY_MAX_BYTES, expert_id="e1", expert_name="Seth Godin"
+        )
+        await event_bus.publish(council_topic(conversation.id), {"type": "resync"})
+        events = [_parse(await pending), _parse(await stream.__anext__())]
+        # A republicação local da mesma mensagem não é entregue de novo
+        await council_chat._publish_message(conversation.id, large)
+        await event_bus.publish(council_topic(conversation.id), {"type": "turn_completed"})
+        events.append(_parse(await stream.__anext__()))
+        await stream.aclose()
+        return events, large
+
+    events, large = asyncio.run(run())
+    assert events[0][0] == "message" and events[0][1]["message"]["id"] == large.id
+    assert len(events[0][1]["message"]["content"]) == NOTIFY_MAX_BYTES
+    assert [name for name, _ in events[1:]] == ["resync", "turn_completed"]
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,81 @@
+"""
+Test script for the lightweight expert listing (ExpertSummary + fields=)
+"""
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from python_backend.context_loader import ExpertCatalog
+from python_backend.models import ExpertCreate
+from python_backend.routers import experts as experts_router
+from python_backend.storage import MemStorage
+
+LONG_PROMPT = "Você é um especialista. " * 400
+
+
+class _CountingStorage:
+    """MemStorage que registra quais leituras de especialistas foram feitas."""
+
+    def __init__(self, storage: MemStorage):
+        self.storage = storage
+        self.calls = []
+
+    def __getattr__(self, name):
+        attr = getattr(self.storage, name)
+        if not name.startswith("get_"):
+            return attr
+
+        async def counted(*args, **kwargs):
+            self.calls.append(name)
+            return await attr(*args, **kwargs)
+        return counted
+
+
+@pytest.fixture
+def client_and_storage(monkeypatch):
+    storage = _CountingStorage(MemStorage())
+    expert = asyncio.run(storage.storage.create_expert(ExpertCreate(
+        name="Listagem Teste", title="Estrategista", expertise=["branding"], bio="Bio", systemPrompt=LONG_PROMPT
+    )))
+    monkeypatch.setattr(experts_router, "expert_catalog", ExpertCatalog(storage))
+    app = FastAPI()
+    app.include_router(experts_router.router)
+    return TestClient(app), storage, expert
+
+
+def test_listing_never_includes_system_prompt(client_and_storage):
+    client, storage, expert = client_and_storage
+    response = client.get("/api/experts")
+    assert response.status_code == 200
+    listed = next(e for e in response.json() if e["id"] == expert.id)
+    assert "systemPrompt" not in listed
+    assert listed["name"] == "Listagem Teste"
+    # Listagem vem da projeção, não da leitura completa
+    assert storage.calls == ["get_expert_summaries"]
+
+
+def test_fields_selector_trims_listing(client_and_storage):
+    client, _, expert = client_and_storage
+    response = client.get("/api/experts", params={"fields": "id,name"})
+    assert response.status_code == 200
+    assert {"id": expert.id, "name": "Listagem Teste"} in response.json()
+    assert all(set(e) == {"id", "name"} for e in response.json())
+
+    assert client.get("/api/experts", params={"fields": "systemPrompt"}).status_code == 400
+    assert client.get("/api/experts", params={"fields": "id,senha"}).status_code == 400
+
+
+def test_detail_returns_prompt_only_when_asked(client_and_storage):
+    client, _, expert = client_and_storage
+    summary = client.get(f"/api/experts/{expert.id}").json()
+    assert "systemPrompt" not in summary
+    assert summary["title"] == "Estrategista"
+
+    full = client.get(f"/api/experts/{expert.id}", params={"fields": "id,systemPrompt"}).json()
+    assert full == {"id": expert.id, "systemPrompt": LONG_PROMPT}
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
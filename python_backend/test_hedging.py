@@ -0,0 +1,116 @@
+"""
+Test script for hedged requests (percentile trigger, budget and loser cancellation)
+"""
+import asyncio
+from types import SimpleNamespace
+
+from python_backend.crew_council import CouncilOrchestrator
+from python_backend.hedging import Hedger, HedgeBudget, LatencyHistogram
+from python_backend.upstream_scheduler import UpstreamScheduler
+
+
+def _warm(hedger: Hedger, stage: str, seconds: float = 0.02, samples: int = 20) -> None:
+    for _ in range(samples):
+        hedger.histogram(stage).record(seconds)
+
+
+def test_histogram_percentiles():
+    histogram = LatencyHistogram(window=100)
+    for i in range(1, 101):
+        histogram.record(i / 100.0)
+    assert 0.5 <= histogram.percentile(50) <= 0.51
+    assert histogram.percentile(99) >= 0.99
+    print(f"   Stats: {histogram.stats()}")
+
+
+def test_budget_caps_extra_calls():
+    budget = HedgeBudget(percent=10.0)
+    granted = 0
+    for _ in range(100):
+        budget.on_primary()
+        granted += budget.try_acquire()
+    assert granted <= 10
+    assert granted >= 9
+
+
+def test_hedge_wins_and_cancels_loser():
+    hedger = Hedger("test", enabled=True, percentile=95, budget_percent=100, min_samples=20)
+    _warm(hedger, "consensus")
+    calls = []
+    cancelled = []
+
+    async def call():
+        attempt = len(calls)
+        calls.append(attempt)
+        try:
+            # Primeira tentativa trava; a cópia responde rápido
+            await asyncio.sleep(5.0 if attempt == 0 else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(attempt)
+            raise
+        return f"resposta-{attempt}"
+
+    result = asyncio.run(hedger.run("consensus", call))
+    assert result == "resposta-1"
+    assert cancelled == [0]
+    assert hedger.hedge_wins == 1
+    assert hedger.budget.hedged_calls == 1
+
+
+def test_no_hedge_without_budget():
+    hedger = Hedger("test", enabled=True, percentile=95, budget_percent=0, min_samples=20)
+    _warm(hedger, "action_plan", seconds=0.01)
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    assert asyncio.run(hedger.run("action_plan", call)) == "ok"
+    assert len(calls) == 1
+
+
+def test_queue_time_does_not_trigger_hedges():
+    hedger = Hedger("test", enabled=True, percentile=95, budget_percent=100, min_samples=20)
+    _warm(hedger, "expert_analysis", seconds=0.2)
+    calls = []
+
+    class FakeMessages:
+        def __init__(self):
+            self.with_raw_response = self
+
+        async def create(self, **kwargs):
+            calls.append(1)
+            await asyncio.sleep(0.05)  # upstream rápido; a espera está na fila
+            return SimpleNamespace(headers={}, parse=lambda: SimpleNamespace(content=[], usage=None))
+
+    orchestrator = CouncilOrchestrator()
+    orchestrator.anthropic_client = SimpleNamespace(messages=FakeMessages())
+    orchestrator.hedger = hedger
+    orchestrator.scheduler = UpstreamScheduler(
+        "test", requests_per_minute=60_000, initial_concurrency=1, max_concurrency=1
+    )
+
+    async def run():
+        # Dez chamadas numa vaga só: as últimas esperam ~0.45s, bem acima do p95 de 0.2s
+        await asyncio.gather(*(
+            orchestrator._create_message("expert_analysis", timeout=5, model="m", max_tokens=10, messages=[])
+            for _ in range(10)
+        ))
+
+    asyncio.run(run())
+    assert len(calls) == 10
+    assert hedger.budget.hedged_calls == 0
+    # As 10 amostras novas (das 30) ficam abaixo das de aquecimento: só o upstream foi medido
+    assert hedger.histogram("expert_analysis").percentile(30) < 0.1
+
+
+if __name__ == "__main__":
+    print("🧪 TESTANDO HEDGED REQUESTS")
+    test_histogram_percentiles()
+    test_budget_caps_extra_calls()
+    test_hedge_wins_and_cancels_loser()
+    test_no_hedge_without_budget()
+    test_queue_time_does_not_trigger_hedges()
+    print("✅ TESTES DE HEDGE CONCLUÍDOS")
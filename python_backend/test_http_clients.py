@@ -0,0 +1,94 @@
+"""
+Test script for the shared HTTP client registry (keep-alive pools + stats)
+"""
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from python_backend.http_clients import ClientRegistry
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = set()
+
+    def do_GET(self):
+        _KeepAliveHandler.connections.add(self.client_address)
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_requests_reuse_pooled_connection():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    registry = ClientRegistry()
+
+    async def run():
+        await registry.start()
+        assert registry.http() is registry.http()
+        for _ in range(5):
+            response = await registry.http().get(url, timeout=5.0)
+            assert response.status_code == 200
+        stats = registry.stats()["pools"]["http"]
+        await registry.aclose()
+        return stats
+
+    try:
+        stats = asyncio.run(run())
+    finally:
+        server.shutdown()
+
+    print(f"   Stats: {stats}")
+    assert stats["requests"] == 5
+    assert stats["statusClasses"] == {"2xx": 5}
+    assert stats["inFlight"] == 0
+    assert stats["connections"] == 1
+    assert len(_KeepAliveHandler.connections) == 1  # um único handshake TCP para as 5 requisições
+
+
+def test_anthropic_client_is_shared(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-test")
+    registry = ClientRegistry()
+    assert registry.anthropic() is registry.require_anthropic()
+
+    monkeypatch.delenv("ANTHROPIC_API_KEY")
+    assert ClientRegistry().anthropic() is None
+
+
+def test_consumers_follow_the_registry_after_aclose(monkeypatch):
+    from python_backend import crew_agent, crew_council, reddit_research
+
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-ant-test")
+    registry = ClientRegistry()
+    for module in (crew_agent, crew_council, reddit_research):
+        monkeypatch.setattr(module, "client_registry", registry)
+    orchestrator = crew_council.CouncilOrchestrator()
+    agent = crew_agent.MarketingLegendAgent("Seth Godin", "prompt")
+    research = reddit_research.RedditResearchEngine()
+
+    before = registry.anthropic()
+    assert orchestrator.anthropic_client is agent.anthropic_client is research._anthropic_client is before
+    # shutdown/startup no mesmo processo (reload, testes): ninguém fica com o cliente fechado
+    asyncio.run(registry.aclose())
+    after = registry.anthropic()
+    assert after is not before
+    assert orchestrator.anthropic_client is agent.anthropic_client is research._anthropic_client is after
+
+
+def test_http2_requires_h2(monkeypatch):
+    monkeypatch.setenv("HTTP2_ENABLED", "true")
+    monkeypatch.setattr("python_backend.http_clients._http2_available", lambda: False)
+    assert ClientRegistry().http2 is False
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,119 @@
+"""
+Test script for the MemStorage durable mode (snapshot + append-only log, mem_persistence.py)
+"""
+import asyncio
+
+import pytest
+
+from python_backend.mem_persistence import LOG_FILE, SNAPSHOT_FILE
+from python_backend.models import ConversationCreate, ExpertCreate
+from python_backend.storage import MemStorage
+
+
+def _restart(monkeypatch, directory, snapshot_every=0):
+    """Novo processo: instância nova do singleton restaurada de ``directory``."""
+    monkeypatch.setattr(MemStorage, "_instance", None)
+    storage = MemStorage()
+    storage.enable_persistence(str(directory), snapshot_every=snapshot_every)
+    return storage
+
+
+async def _write_chat(storage):
+    expert = await storage.create_expert(ExpertCreate(
+        name="Seth Godin", title="Especialista", expertise=["marketing"], bio="Bio", systemPrompt="Prompt"
+    ))
+    conversation = await storage.create_conversation(ConversationCreate(expertId=expert.id, title="Chat"))
+    for i in range(3):
+        await storage.create_message_pair(conversation.id, f"Pergunta {i}", f"Resposta {i}")
+    await storage.save_conversation_summary(conversation.id, "Resumo", 2)
+    return expert, conversation
+
+
+def test_restart_replays_log_and_rebuilds_indexes(tmp_path, monkeypatch):
+    storage = _restart(monkeypatch, tmp_path)
+    expert, conversation = asyncio.run(_write_chat(storage))
+    council = asyncio.run(storage.create_council_conversation("u1", "p1", "Problema", [expert.id]))
+    asyncio.run(storage.create_council_message(council.id, "user", "Olá conselho"))
+    assert not (tmp_path / SNAPSHOT_FILE).exists()
+
+    restored = _restart(monkeypatch, tmp_path)
+    assert restored is not storage
+    assert (asyncio.run(restored.get_expert(expert.id))).name == "Seth Godin"
+    messages = asyncio.run(restored.get_messages(conversation.id))
+    assert [m.content for m in messages][:2] == ["Pergunta 0", "Resposta 0"] and len(messages) == 6
+    assert [c.id for c in asyncio.run(restored.get_conversations(expert.id))] == [conversation.id]
+    assert asyncio.run(restored.get_conversation_summary(conversation.id)).coveredCount == 2
+    assert [m.content for m in asyncio.run(restored.get_council_messages(council.id))] == ["Olá conselho"]
+    assert restored.memory_stats()["persistence"]["replayedRecords"] > 0
+
+
+def test_snapshot_rotates_log_and_restart_reads_only_the_tail(tmp_path, monkeypatch):
+    storage = _restart(monkeypatch, tmp_path, snapshot_every=5)
+
+    async def run():
+        _, conversation = await _write_chat(storage)
+        await storage.close()
+        return conversation
+
+    conversation = asyncio.run(run())
+    assert (tmp_path / SNAPSHOT_FILE).exists()
+    assert (tmp_path / LOG_FILE).stat().st_size == 0
+    assert not list(tmp_path.glob(f"{LOG_FILE}.*"))
+
+    restored = _restart(monkeypatch, tmp_path)
+    assert len(asyncio.run(restored.get_messages(conversation.id))) == 6
+    assert restored.memory_stats()["persistence"]["replayedRecords"] == 0
+
+
+def test_truncated_tail_is_discarded(tmp_path, monkeypatch):
+    storage = _restart(monkeypatch, tmp_path)
+    _, conversation = asyncio.run(_write_chat(storage))
+    storage._journal._log.write(b'{"seq": 999, "table": "messages", "ke')
+    storage._journal._log.flush()
+
+    restored = _restart(monkeypatch, tmp_path)
+    assert len(asyncio.run(restored.get_messages(conversation.id))) == 6
+    assert restored.memory_stats()["persistence"]["discardedTailBytes"] > 0
+    # O log foi cortado: registros novos continuam legíveis no próximo restart
+    asyncio.run(restored.create_message_pair(conversation.id, "Depois", "Do crash"))
+    again = _restart(monkeypatch, tmp_path)
+    assert len(asyncio.run(again.get_messages(conversation.id))) == 8
+
+
+def test_crash_during_snapshot_keeps_rotated_log(tmp_path, monkeypatch):
+    storage = _restart(monkeypatch, tmp_path)
+    _, conversation = asyncio.run(_write_chat(storage))
+    # Log rotacionado, mas o processo morreu antes de gravar o snapshot
+    storage._journal._begin_snapshot()
+    asyncio.run(storage.create_message_pair(conversation.id, "Pós", "Rotação"))
+
+    restored = _restart(monkeypatch, tmp_path)
+    assert len(asyncio.run(restored.get_messages(conversation.id))) == 8
+
+
+def test_memory_caps_never_delete_durable_rows(tmp_path, monkeypatch):
+    storage = _restart(monkeypatch, tmp_path)
+    storage.max_messages = 6
+    storage.max_analyses = 1
+    _, first = asyncio.run(_write_chat(storage))
+    _, second = asyncio.run(_write_chat(storage))
+    assert storage.memory_stats()["evictions"]["conversations"] == 0
+
+    restored = _restart(monkeypatch, tmp_path)
+    assert asyncio.run(restored.get_conversation(first.id)) is not None
+    assert asyncio.run(restored.get_conversation_summary(first.id)).coveredCount == 2
+    assert [len(asyncio.run(restored.get_messages(c.id))) for c in (first, second)] == [6, 6]
+
+
+def test_evictions_without_persistence_only_drop_memory(monkeypatch):
+    monkeypatch.setattr(MemStorage, "_instance", None)
+    storage = MemStorage()
+    storage.max_messages = 6
+    _, first = asyncio.run(_write_chat(storage))
+    _, second = asyncio.run(_write_chat(storage))
+    assert asyncio.run(storage.get_conversation(first.id)) is None
+    assert storage.memory_stats()["evictions"]["conversations"] == 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,117 @@
+"""
+Test script for the MemStorage secondary indexes and memory cap (mem_index.py)
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from python_backend.mem_index import SortedIds
+from python_backend.models import (
+    BackgroundTask, CouncilAnalysis, ConversationCreate, TaskStatus, TaskType
+)
+from python_backend.storage import MemStorage
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    # Instância nova (o MemStorage é singleton): limites e índices sem dados de outros testes
+    monkeypatch.setattr(MemStorage, "_instance", None)
+    return MemStorage()
+
+
+def test_sorted_ids_reorders_on_update():
+    ids = SortedIds()
+    base = datetime(2025, 11, 3)
+    for offset, item_id in enumerate("abc"):
+        ids.add(item_id, base + timedelta(minutes=offset))
+    assert ids.newest_first() == ["c", "b", "a"]
+    ids.add("a", base + timedelta(hours=1))
+    ids.add("c", base - timedelta(hours=1))
+    assert ids.newest_first() == ["a", "b", "c"]
+    ids.discard("b")
+    assert ids.newest_first() == ["a", "c"] and len(ids) == 2
+
+
+def test_messages_and_conversations_come_from_indexes(storage):
+    async def run():
+        first = await storage.create_conversation(ConversationCreate(expertId="e1", title="Primeira"))
+        second = await storage.create_conversation(ConversationCreate(expertId="e2", title="Segunda"))
+        third = await storage.create_conversation(ConversationCreate(expertId="e1", title="Terceira"))
+        await storage.create_message_pair(first.id, "Pergunta", "Resposta")
+        await storage.create_message_pair(second.id, "Oi", "Olá")
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+    messages = asyncio.run(storage.get_messages(first.id))
+    assert [(m.role, m.content) for m in messages] == [("user", "Pergunta"), ("assistant", "Resposta")]
+    # Mais recente primeiro: first foi tocada pela última mensagem
+    assert [c.id for c in asyncio.run(storage.get_conversations("e1"))] == [first.id, third.id]
+    assert [c.id for c in asyncio.run(storage.get_conversations())] == [second.id, first.id, third.id]
+    assert asyncio.run(storage.get_messages("inexistente")) == []
+
+
+def test_council_messages_keep_timestamp_order(storage):
+    async def run():
+        conversation = await storage.create_council_conversation("u1", "p1", "Problema", ["e1", "e2"])
+        now = datetime.utcnow()
+        await storage.create_council_message(conversation.id, "expert", "Depois", "e2", "B", timestamp=now)
+        await storage.create_council_message(conversation.id, "expert", "Antes", "e1", "A", timestamp=now - timedelta(seconds=1))
+        await storage.create_council_conversation("u2", "p1", "Outro", ["e1"])
+        return conversation, await storage.get_council_messages(conversation.id)
+
+    conversation, messages = asyncio.run(run())
+    assert [m.content for m in messages] == ["Antes", "Depois"]
+    assert [c.id for c in asyncio.run(storage.get_council_conversations("u1"))] == [conversation.id]
+
+
+def test_memory_cap_evicts_least_recently_used_conversation(storage):
+    storage.max_messages = 4
+
+    async def run():
+        cold = await storage.create_conversation(ConversationCreate(expertId="e1", title="Fria"))
+        warm = await storage.create_conversation(ConversationCreate(expertId="e1", title="Morna"))
+        await storage.create_message_pair(cold.id, "P", "R")
+        await storage.create_message_pair(warm.id, "P", "R")
+        await storage.save_conversation_summary(cold.id, "Resumo", 2)
+        # Ler a fria a torna a mais recente; a próxima escrita estoura o limite
+        await storage.get_messages(cold.id)
+        hot = await storage.create_conversation(ConversationCreate(expertId="e1", title="Quente"))
+        await storage.create_message_pair(hot.id, "P", "R")
+        return cold, warm, hot
+
+    cold, warm, hot = asyncio.run(run())
+    assert asyncio.run(storage.get_conversation(warm.id)) is None
+    assert asyncio.run(storage.get_messages(warm.id)) == []
+    assert len(asyncio.run(storage.get_messages(cold.id))) == 2
+    assert [c.id for c in asyncio.run(storage.get_conversations("e1"))] == [hot.id, cold.id]
+    stats = storage.memory_stats()
+    assert stats["messages"] == 4
+    assert stats["evictions"]["conversations"] == 1
+    assert stats["evictions"]["messages"] == 2
+
+
+def test_analysis_and_task_caps(storage):
+    storage.max_analyses = 2
+    storage.max_background_tasks = 2
+
+    async def run():
+        for i in range(3):
+            await storage.save_council_analysis(CouncilAnalysis(
+                id=f"a{i}", userId="u1", problem="P", contributions=[], consensus="C",
+                createdAt=datetime(2025, 11, 3) + timedelta(minutes=i)
+            ))
+        for i, status in enumerate((TaskStatus.RUNNING, TaskStatus.COMPLETED, TaskStatus.PENDING)):
+            await storage.create_background_task(BackgroundTask(
+                id=f"t{i}", userId="u1", taskType=TaskType.COUNCIL_ANALYSIS, status=status
+            ))
+        return await storage.get_council_analyses("u1")
+
+    analyses = asyncio.run(run())
+    assert [a.id for a in analyses] == ["a2", "a1"]
+    # Só a tarefa concluída sai; as pendentes/em execução ficam
+    assert set(storage.background_tasks) == {"t0", "t2"}
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
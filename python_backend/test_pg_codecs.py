@@ -0,0 +1,74 @@
+"""
+Test script for the asyncpg json/jsonb codecs and the PostgresStorage row mappers
+"""
+import asyncio
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from python_backend.bench_pg_json import sample_analysis_row, sample_persona_row
+from python_backend.models import Action, ActionPlan, Phase
+from python_backend.pg_codecs import init_connection, json_dumps, json_loads
+from python_backend.postgres_storage import PostgresStorage
+
+
+class _FakeConnection:
+    def __init__(self):
+        self.codecs = {}
+
+    async def set_type_codec(self, type_name, **kwargs):
+        self.codecs[type_name] = kwargs
+
+
+def test_init_connection_registers_json_and_jsonb():
+    connection = _FakeConnection()
+    asyncio.run(init_connection(connection))
+    assert set(connection.codecs) == {"json", "jsonb"}
+    for codec in connection.codecs.values():
+        assert codec["schema"] == "pg_catalog"
+        assert codec["format"] == "text"
+        assert codec["decoder"]('{"a": [1, 2]}') == {"a": [1, 2]}
+
+
+def test_encoder_handles_values_the_storage_writes():
+    phase = Phase(phaseNumber=1, name="Diagnóstico", duration="2 semanas", objectives=["Mapear"], actions=[
+        Action(id="a1", title="Auditar", description="Auditar funil", responsible="CMO", priority="alta", estimatedTime="3d")
+    ])
+    value = {
+        "plan": ActionPlan(phases=[phase], totalDuration="2 semanas"),
+        "at": datetime(2025, 11, 3, 12, 30),
+        "id": uuid.UUID(int=1),
+        "cost": Decimal("9.90"),
+        7: "chave int",
+    }
+    decoded = json_loads(json_dumps(value))
+    assert decoded["plan"]["phases"][0]["actions"][0]["title"] == "Auditar"
+    assert decoded["at"].startswith("2025-11-03")
+    assert decoded["id"] == str(uuid.UUID(int=1))
+    assert decoded["cost"] == "9.90"
+    assert decoded["7"] == "chave int"
+
+
+def test_council_analysis_mapper_reads_decoded_row():
+    row = {column: json_loads(value) if column in ("contributions", "actionPlan", "skippedExperts", "metadata") else value
+           for column, value in sample_analysis_row(0).items()}
+    analysis = PostgresStorage._council_analysis_from_record(row)
+    assert len(analysis.contributions) == 5
+    assert analysis.actionPlan.phases[0].actions[0].priority == "alta"
+    assert analysis.metadata["contributionCache"]["hits"] == 2
+
+
+def test_persona_mapper_fills_nulls():
+    row = sample_persona_row(0)
+    row.update({"demographics": None, "communities": None, "researchData": json_loads(row["researchData"])})
+    for column in ("psychographics", "contentPreferences", "behavioralPatterns"):
+        row[column] = json_loads(row[column])
+    persona = PostgresStorage._persona_from_record(row)
+    assert persona.demographics == {}
+    assert persona.communities == []
+    assert persona.researchData["sources"]
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, "-q"]))
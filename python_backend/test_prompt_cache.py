@@ -0,0 +1,54 @@
+"""
+Test script for prompt caching (stable prefix vs dynamic suffix)
+"""
+import datetime
+from types import SimpleNamespace
+
+from python_backend.deep_clone import DeepCloneEnhancer
+from python_backend.prompt_cache import PromptCacheStats, build_system_blocks
+
+BASE_PROMPT = "Você é Philip Kotler.\n\n## Communication Style\nAcadêmico e estruturado."
+
+
+def test_prefix_is_stable_across_calls():
+    morning = datetime.datetime(2025, 1, 1, 8, 0)
+    night = datetime.datetime(2025, 1, 1, 22, 0)
+    prefix_a, suffix_a, _ = DeepCloneEnhancer.split_with_deep_clone(BASE_PROMPT, "Philip Kotler", "Oi", morning)
+    prefix_b, suffix_b, _ = DeepCloneEnhancer.split_with_deep_clone(BASE_PROMPT, "Philip Kotler", "Oi", night, "CEO")
+
+    assert prefix_a == prefix_b
+    assert "SIGNATURE RESPONSE PATTERN (Kotler)" in prefix_a
+    assert "CONTEXTO DINÂMICO" not in prefix_a
+    assert suffix_a != suffix_b
+    assert "Falando com CEO" in suffix_b
+
+
+def test_system_blocks_cache_breakpoints():
+    blocks = build_system_blocks("prefixo", "sufixo", shared_context="contexto da conversa")
+    assert [b["text"] for b in blocks] == ["prefixo", "contexto da conversa", "sufixo"]
+    assert "cache_control" in blocks[0] and "cache_control" in blocks[1]
+    assert "cache_control" not in blocks[2]
+
+    # Sem sufixo/contexto: apenas o prefixo
+    assert len(build_system_blocks("prefixo", "")) == 1
+
+
+def test_cache_usage_stats():
+    stats = PromptCacheStats()
+    stats.record("legend_chat", SimpleNamespace(input_tokens=50, cache_read_input_tokens=0,
+                                                cache_creation_input_tokens=4000, output_tokens=300))
+    stats.record("legend_chat", SimpleNamespace(input_tokens=60, cache_read_input_tokens=4000,
+                                                cache_creation_input_tokens=0, output_tokens=280))
+    site = stats.stats()["legend_chat"]
+    assert site["calls"] == 2
+    assert site["cacheHits"] == 1
+    assert site["cacheReadTokens"] == 4000
+    assert site["cacheCreationTokens"] == 4000
+
+
+if __name__ == "__main__":
+    print("🧪 TESTANDO PROMPT CACHING")
+    test_prefix_is_stable_across_calls()
+    test_system_blocks_cache_breakpoints()
+    test_cache_usage_stats()
+    print("✅ TESTES DE PROMPT CACHING CONCLUÍDOS")
@@ -0,0 +1,171 @@
+"""
+Test script for the rendered council chat context cache
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+from python_backend.models import CouncilAnalysis, ExpertContribution
+from python_backend.rendered_context import RenderedContextCache
+from python_backend.storage import MemStorage
+
+
+class _CountingStorage:
+    """Encaminha para o MemStorage contando as leituras de análise/persona."""
+
+    def __init__(self, storage: MemStorage):
+        self.storage = storage
+        self.reads = {"get_persona": 0, "get_council_analysis": 0}
+
+    def __getattr__(self, name):
+        if name in self.reads:
+            self.reads[name] += 1
+        return getattr(self.storage, name)
+
+
+async def _seed(storage: MemStorage):
+    persona = await storage.create_persona("default_user", {
+        "name": "Ana", "researchMode": "quick", "goals": ["Crescer 20%"], "values": ["Transparência"]
+    })
+    analysis = await storage.save_council_analysis(CouncilAnalysis(
+        id="analysis-1",
+        userId="default_user",
+        problem="Como aumentar a retenção?",
+        personaId=persona.id,
+        contributions=[ExpertContribution(
+            expertId="e1", expertName="Philip Kotler", analysis="...",
+            keyInsights=["Segmente a base"], recommendations=["Crie um programa de fidelidade"]
+        )],
+        consensus="Foque nos clientes de maior valor",
+    ))
+    return persona, analysis
+
+
+def test_rendering_contains_analysis_and_persona():
+    storage = MemStorage()
+    cache = RenderedContextCache(storage)
+
+    async def run():
+        persona, analysis = await _seed(storage)
+        return await cache.get(analysis.id, persona.id)
+
+    rendered = asyncio.run(run())
+    assert "**PROBLEMA ORIGINAL:**\nComo aumentar a retenção?" in rendered["analysisContext"]
+    assert "### INSIGHTS DE PHILIP KOTLER:\n  1. Segmente a base\n" in rendered["analysisContext"]
+    assert "**NOME DA PERSONA:** Ana" in rendered["analysisContext"]
+    assert "Objetivos: Crescer 20%" in rendered["personaContext"]
+
+
+def test_follow_up_messages_skip_reads_and_rendering():
+    storage = _CountingStorage(MemStorage())
+    cache = RenderedContextCache(storage)
+
+    async def run():
+        persona, analysis = await _seed(storage.storage)
+        first = await cache.get(analysis.id, persona.id)
+        for _ in range(5):
+            assert await cache.get(analysis.id, persona.id) is first
+        return persona, analysis
+
+    persona, analysis = asyncio.run(run())
+    assert storage.reads == {"get_persona": 1, "get_council_analysis": 1}
+    assert cache.stats()["renders"] == 1
+    assert cache.stats()["memoryHits"] == 5
+
+    # Outro processo (cache em memória vazio) reaproveita a renderização gravada
+    other = RenderedContextCache(storage)
+    asyncio.run(other.get(analysis.id, persona.id))
+    assert storage.reads["get_council_analysis"] == 1
+    assert other.stats()["storedHits"] == 1
+
+
+def test_persona_change_invalidates():
+    storage = MemStorage()
+    cache = RenderedContextCache(storage)
+
+    async def run():
+        persona, analysis = await _seed(storage)
+        await cache.get(analysis.id, persona.id)
+        storage.personas[persona.id] = persona.model_copy(
+            update={"name": "Ana Paula", "updatedAt": datetime.utcnow() + timedelta(seconds=1)}
+        )
+        await cache.invalidate_persona(persona.id)
+        return await cache.get(analysis.id, persona.id)
+
+    rendered = asyncio.run(run())
+    # updatedAt mudou: a renderização gravada também deixa de valer
+    assert "**NOME DA PERSONA:** Ana Paula" in rendered["analysisContext"]
+    assert cache.stats()["renders"] == 2
+
+
+def test_saving_analysis_clears_stored_rendering():
+    storage = MemStorage()
+    cache = RenderedContextCache(storage)
+
+    async def run():
+        persona, analysis = await _seed(storage)
+        await cache.get(analysis.id, persona.id)
+        assert await storage.get_rendered_context(analysis.id)
+        await storage.save_council_analysis(analysis)
+        return await storage.get_rendered_context(analysis.id)
+
+    assert asyncio.run(run()) is None
+
+
+class _SharedChannel:
+    """NOTIFY/LISTEN simulado: notify entrega a todos os callbacks de listen (workers)."""
+
+    def __init__(self, storage: MemStorage):
+        self.storage = storage
+        self.callbacks = []
+
+    def __getattr__(self, name):
+        return getattr(self.storage, name)
+
+    async def notify(self, channel, payload=""):
+        for callback in list(self.callbacks):
+            callback(payload)
+
+    async def listen(self, channel, callback):
+        self.callbacks.append(callback)
+
+        class _Listener:
+            def add_termination_listener(self, callback):
+                pass
+
+            async def close(self):
+                pass
+
+        return _Listener()
+
+
+def test_invalidation_reaches_other_workers():
+    channel = _SharedChannel(MemStorage())
+    worker_a, worker_b = RenderedContextCache(channel), RenderedContextCache(channel)
+
+    async def run():
+        await worker_a.start_sync()
+        await worker_b.start_sync()
+        persona, analysis = await _seed(channel.storage)
+        await worker_a.get(analysis.id, persona.id)
+        await worker_b.get(analysis.id, persona.id)
+        channel.storage.personas[persona.id] = persona.model_copy(
+            update={"name": "Ana Paula", "updatedAt": datetime.utcnow() + timedelta(seconds=1)}
+        )
+        # Persona alterada pela requisição que caiu no worker A
+        await worker_a.invalidate_persona(persona.id)
+        return await worker_b.get(analysis.id, persona.id)
+
+    rendered = asyncio.run(run())
+    assert "**NOME DA PERSONA:** Ana Paula" in rendered["analysisContext"]
+    assert worker_b.stats()["remoteInvalidations"] == 1
+    assert worker_a.stats()["remoteInvalidations"] == 0  # o próprio NOTIFY é ignorado
+
+
+if __name__ == "__main__":
+    print("🧪 TESTANDO CACHE DE CONTEXTO RENDERIZADO")
+    test_rendering_contains_analysis_and_persona()
+    test_follow_up_messages_skip_reads_and_rendering()
+    test_persona_change_invalidates()
+    test_saving_analysis_clears_stored_rendering()
+    test_invalidation_reaches_other_workers()
+    print("✅ TESTES DE CONTEXTO RENDERIZADO CONCLUÍDOS")
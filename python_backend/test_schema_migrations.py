@@ -0,0 +1,199 @@
+"""
+Test script for the startup schema migrations (schema_migrations.py)
+"""
+import asyncio
+import re
+from pathlib import Path
+
+import pytest
+
+from python_backend import schema_migrations
+from python_backend.schema_migrations import (
+    MIGRATIONS_DIR,
+    MIGRATIONS_LOCK_KEY,
+    apply_migrations,
+    discover_migrations,
+)
+
+
+class _FakeTransaction:
+    def __init__(self, connection):
+        self.connection = connection
+
+    async def __aenter__(self):
+        self.connection.log.append("BEGIN")
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.connection.log.append("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+class _FakeConnection:
+    """Guarda o que foi executado e o conteúdo de schema_migrations."""
+
+    def __init__(self):
+        self.log = []
+        self.rows = {}
+
+    async def execute(self, query, *args):
+        if query.startswith("INSERT INTO schema_migrations"):
+            self.rows[args[0]] = args[2]
+        self.log.append((query.strip(), args))
+
+    async def fetch(self, query, *args):
+        return [{"version": version, "checksum": checksum} for version, checksum in self.rows.items()]
+
+    def transaction(self):
+        return _FakeTransaction(self)
+
+
+class _FakePool:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def acquire(self):
+        pool = self
+
+        class _Acquire:
+            async def __aenter__(self):
+                return pool.connection
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return _Acquire()
+
+
+def _write(directory: Path, files):
+    for name, sql in files.items():
+        (directory / name).write_text(sql, encoding="utf-8")
+
+
+def test_discover_orders_by_version_and_skips_unnumbered(tmp_path):
+    _write(tmp_path, {
+        "010_late.sql": "SELECT 10;",
+        "002_second.sql": "SELECT 2;",
+        "001_first.sql": "SELECT 1;",
+        "notes.sql": "SELECT 0;",
+    })
+    migrations = discover_migrations(tmp_path)
+    assert [(m.version, m.name) for m in migrations] == [(1, "first"), (2, "second"), (10, "late")]
+    assert len(migrations[0].checksum) == 64
+
+
+def test_discover_rejects_duplicate_versions(tmp_path):
+    _write(tmp_path, {"001_a.sql": "SELECT 1;", "01_b.sql": "SELECT 1;"})
+    with pytest.raises(ValueError):
+        discover_migrations(tmp_path)
+
+
+def test_apply_runs_pending_in_transactions_once(tmp_path):
+    _write(tmp_path, {"001_first.sql": "CREATE TABLE a (id INT);", "002_second.sql": "CREATE TABLE b (id INT);"})
+    connection = _FakeConnection()
+    pool = _FakePool(connection)
+
+    applied = asyncio.run(apply_migrations(pool, tmp_path))
+    assert applied == ["001_first", "002_second"]
+    assert set(connection.rows) == {1, 2}
+    # Lock antes de tudo, unlock no fim
+    assert connection.log[0] == ("SELECT pg_advisory_lock($1)", (MIGRATIONS_LOCK_KEY,))
+    assert connection.log[-1] == ("SELECT pg_advisory_unlock($1)", (MIGRATIONS_LOCK_KEY,))
+    # Cada migration e o seu registro na mesma transação
+    begin = connection.log.index("BEGIN")
+    assert connection.log[begin + 1][0] == "CREATE TABLE a (id INT);"
+    assert connection.log[begin + 2][0].startswith("INSERT INTO schema_migrations")
+    assert connection.log[begin + 3] == "COMMIT"
+
+    # Segunda subida: nada pendente
+    connection.log.clear()
+    assert asyncio.run(apply_migrations(pool, tmp_path)) == []
+    assert "BEGIN" not in connection.log
+
+    # Nova migration: só ela é aplicada
+    _write(tmp_path, {"003_third.sql": "CREATE TABLE c (id INT);"})
+    assert asyncio.run(apply_migrations(pool, tmp_path)) == ["003_third"]
+
+
+def test_apply_releases_lock_when_migration_fails(tmp_path):
+    _write(tmp_path, {"001_broken.sql": "CREATE TABLE"})
+
+    class _Failing(_FakeConnection):
+        async def execute(self, query, *args):
+            await super().execute(query, *args)
+            if query == "CREATE TABLE":
+                raise RuntimeError("syntax error")
+
+    connection = _Failing()
+    with pytest.raises(RuntimeError):
+        asyncio.run(apply_migrations(_FakePool(connection), tmp_path))
+    assert "ROLLBACK" in connection.log
+    assert connection.rows == {}
+    assert connection.log[-1] == ("SELECT pg_advisory_unlock($1)", (MIGRATIONS_LOCK_KEY,))
+
+
+def test_connect_keeps_pool_unset_when_migrations_fail(monkeypatch):
+    from python_backend import postgres_storage
+    from python_backend.postgres_storage import PostgresStorage
+
+    class _ClosablePool(_FakePool):
+        closed = False
+
+        async def close(self):
+            self.closed = True
+
+    pool = _ClosablePool(_FakeConnection())
+
+    async def create_pool(dsn, **kwargs):
+        return pool
+
+    async def broken_migrations(pool):
+        raise RuntimeError("syntax error")
+
+    monkeypatch.setattr(postgres_storage.asyncpg, "create_pool", create_pool)
+    monkeypatch.setattr(postgres_storage, "apply_migrations", broken_migrations)
+    storage = PostgresStorage("postgresql://example")
+    with pytest.raises(RuntimeError):
+        asyncio.run(storage.connect())
+    assert storage.pool is None and pool.closed
+
+    async def no_migrations(pool):
+        return []
+
+    monkeypatch.setattr(postgres_storage, "apply_migrations", no_migrations)
+    asyncio.run(storage.connect())
+    assert storage.pool is pool
+
+
+def test_apply_disabled_by_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_MIGRATIONS", "off")
+    connection = _FakeConnection()
+    assert asyncio.run(apply_migrations(_FakePool(connection), tmp_path)) == []
+    assert connection.log == []
+
+
+def test_migrations_create_every_table_the_storage_queries():
+    storage_source = (Path(schema_migrations.__file__).parent / "postgres_storage.py").read_text(encoding="utf-8")
+    queried = set(re.findall(r"\b(?:FROM|INTO|UPDATE)\s+([a-z_]+)\b", storage_source))
+    # Nomes de CTE (WITH x AS (...)) não são tabelas
+    queried -= set(re.findall(r"\b([a-z_]+) AS \(", storage_source))
+    created = set()
+    for migration in discover_migrations(MIGRATIONS_DIR):
+        created.update(re.findall(r"CREATE TABLE IF NOT EXISTS\s+([a-z_]+)", migration.sql))
+    # business_profiles e personas são criadas fora deste repositório
+    missing = queried - created - {"business_profiles", "personas"}
+    assert not missing, f"Tabelas sem migration: {sorted(missing)}"
+
+
+def test_storage_reads_only_the_camelcase_columns_the_migrations_create():
+    storage_source = (Path(schema_migrations.__file__).parent / "postgres_storage.py").read_text(encoding="utf-8")
+    core = (MIGRATIONS_DIR / "003_core_schema.sql").read_text(encoding="utf-8")
+    # Nenhum fallback para colunas minúsculas ("userid") ou snake_case legadas das tabelas do core
+    for legacy in ("userid", "personaid", "expertid", "conversationid", "createdat", "updatedat",
+                   "system_prompt", "expert_type"):
+        assert f'"{legacy}"' not in storage_source, legacy
+    # ...porque a migration renomeia essas colunas antes de criar/alterar as tabelas
+    assert core.index("RENAME COLUMN") < core.index("CREATE TABLE IF NOT EXISTS experts")
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,38 @@
+"""
+Test script for the precompiled section parser (same output as the legacy extractor)
+"""
+from python_backend.bench_section_parser import (
+    COUNCIL_SAMPLES, legacy_extract_bullet_points, load_samples, run_benchmark
+)
+from python_backend.section_parser import extract_section_bullets, parse_expert_response
+
+TITLES = ("Análise Principal", "Principais Insights", "Recomendações Acionáveis", "Seção Inexistente")
+
+
+def test_same_output_as_legacy_extractor():
+    samples = load_samples()
+    assert samples
+    for text in samples:
+        for title in TITLES:
+            assert extract_section_bullets(text, title) == legacy_extract_bullet_points(text, title)
+
+
+def test_parse_all_sections_in_one_call():
+    text = COUNCIL_SAMPLES["posicionamento_b2b"]
+    sections = parse_expert_response(text)
+    assert len(sections["Principais Insights"]) == 5
+    assert sections["Recomendações Acionáveis"][0] == "Reescrever a proposta de valor com foco em ROI em 30 dias"
+
+
+def test_benchmark_reports_no_mismatches():
+    result = run_benchmark(rounds=1)
+    print(f"   Benchmark: {result}")
+    assert result["mismatches"] == 0
+
+
+if __name__ == "__main__":
+    print("🧪 TESTANDO PARSER DE SEÇÕES")
+    test_same_output_as_legacy_extractor()
+    test_parse_all_sections_in_one_call()
+    test_benchmark_reports_no_mismatches()
+    print("✅ TESTES DO PARSER CONCLUÍDOS")
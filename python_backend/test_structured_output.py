@@ -0,0 +1,196 @@
+"""
+Test script for structured (tool use) council output with text fallback
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+
+from python_backend.crew_council import CouncilOrchestrator
+from python_backend.models import Expert
+from python_backend.section_parser import parse_expert_response
+from python_backend.structured_output import (
+    ACTION_PLAN_TOOL, CONSENSUS_TOOL, EXPERT_ANALYSIS_TOOL, ExpertAnalysisOutput
+)
+
+EXPERT_OUTPUT = {
+    "analysis": "O problema central é a retenção nos primeiros 90 dias.",
+    "keyInsights": ["Clientes cancelam antes de ver valor", "Onboarding não é personalizado"],
+    "recommendations": ["Criar trilha de onboarding em 30 dias", "Medir ativação semanalmente"],
+}
+
+TEXT_RESPONSE = """## Análise Principal
+
+Análise em texto livre sobre retenção.
+
+## Principais Insights
+
+- Insight vindo do parser de texto
+
+## Recomendações Acionáveis
+
+- Recomendação vinda do parser de texto
+"""
+
+
+def _tool_response(name: str, data: dict):
+    return SimpleNamespace(content=[SimpleNamespace(type="tool_use", name=name, input=data)], usage=None)
+
+
+def _text_response(text: str):
+    return SimpleNamespace(content=[SimpleNamespace(type="text", text=text)], usage=None)
+
+
+def _orchestrator(responses: list, calls: list) -> CouncilOrchestrator:
+    orchestrator = CouncilOrchestrator()
+    orchestrator.anthropic_client = object()  # chamadas simuladas abaixo
+    orchestrator.contribution_cache = None
+    orchestrator.structured_output = True
+
+    async def fake_create_message(stage, timeout, **kwargs):
+        calls.append(kwargs)
+        return responses.pop(0)
+
+    orchestrator._create_message = fake_create_message
+    return orchestrator
+
+
+def _expert() -> Expert:
+    return Expert(id="kotler", name="Philip Kotler", title="Especialista", expertise=["marketing"],
+                  bio="Bio", systemPrompt="Prompt")
+
+
+def test_tool_schemas_are_self_contained():
+    for tool in (EXPERT_ANALYSIS_TOOL, CONSENSUS_TOOL, ACTION_PLAN_TOOL):
+        schema = tool.definition["input_schema"]
+        assert "$ref" not in str(schema) and "$defs" not in schema
+        assert tool.request_kwargs()["tool_choice"] == {"type": "tool", "name": tool.name}
+    action_schema = ACTION_PLAN_TOOL.definition["input_schema"]
+    assert action_schema["properties"]["phases"]["items"]["properties"]["actions"]["items"]["type"] == "object"
+
+
+def test_markdown_matches_text_parser():
+    output = ExpertAnalysisOutput(**EXPERT_OUTPUT)
+    sections = parse_expert_response(output.to_markdown())
+    assert sections["Principais Insights"] == EXPERT_OUTPUT["keyInsights"]
+    assert sections["Recomendações Acionáveis"] == EXPERT_OUTPUT["recommendations"]
+
+
+def test_expert_analysis_uses_tool_output():
+    calls = []
+    orchestrator = _orchestrator([_tool_response(EXPERT_ANALYSIS_TOOL.name, EXPERT_OUTPUT)], calls)
+    contribution = asyncio.run(orchestrator._get_expert_analysis(_expert(), "Como reter clientes?", None, None))
+
+    assert len(calls) == 1 and calls[0]["tool_choice"]["name"] == EXPERT_ANALYSIS_TOOL.name
+    assert contribution.keyInsights == EXPERT_OUTPUT["keyInsights"]
+    assert contribution.analysis.startswith("## Análise Principal")
+
+
+def test_expert_analysis_falls_back_to_text_on_schema_failure():
+    calls = []
+    invalid = {"analysis": "Sem listas"}
+    orchestrator = _orchestrator([
+        _tool_response(EXPERT_ANALYSIS_TOOL.name, invalid),
+        _text_response(TEXT_RESPONSE),
+    ], calls)
+    contribution = asyncio.run(orchestrator._get_expert_analysis(_expert(), "Como reter clientes?", None, None))
+
+    assert len(calls) == 2 and "tools" not in calls[1]
+    assert contribution.keyInsights == ["Insight vindo do parser de texto"]
+    assert contribution.analysis == TEXT_RESPONSE
+
+
+def test_text_parse_miss_is_not_cached():
+    class RecordingCache:
+        def __init__(self):
+            self.stored = []
+
+        async def get(self, key):
+            return None
+
+        async def set(self, key, contribution):
+            self.stored.append(contribution)
+
+    calls = []
+    orchestrator = _orchestrator([
+        _tool_response(EXPERT_ANALYSIS_TOOL.name, {"analysis": "Sem listas"}),
+        _text_response("Resposta sem nenhuma das seções esperadas."),
+        _tool_response(EXPERT_ANALYSIS_TOOL.name, EXPERT_OUTPUT),
+    ], calls)
+    orchestrator.contribution_cache = RecordingCache()
+
+    degraded = asyncio.run(orchestrator._get_expert_analysis(_expert(), "Como reter clientes?", None, None))
+    assert degraded.keyInsights[0].startswith("Seção 'Principais Insights' não foi encontrada")
+    assert orchestrator.contribution_cache.stored == []
+
+    # A mesma pergunta chama o modelo de novo, e a resposta completa vai para o cache
+    complete = asyncio.run(orchestrator._get_expert_analysis(_expert(), "Como reter clientes?", None, None))
+    assert len(calls) == 3
+    assert orchestrator.contribution_cache.stored == [complete]
+
+
+def test_expert_analysis_repairs_tool_input_without_second_call():
+    calls = []
+    # Listas enviadas como texto com marcadores e como JSON em string
+    sloppy = {
+        "analysis": EXPERT_OUTPUT["analysis"],
+        "keyInsights": "- Clientes cancelam antes de ver valor\n- Onboarding não é personalizado\n",
+        "recommendations": '["Criar trilha de onboarding em 30 dias", "Medir ativação semanalmente"]',
+    }
+    orchestrator = _orchestrator([_tool_response(EXPERT_ANALYSIS_TOOL.name, sloppy)], calls)
+    contribution = asyncio.run(orchestrator._get_expert_analysis(_expert(), "Como reter clientes?", None, None))
+
+    assert len(calls) == 1
+    assert contribution.keyInsights == EXPERT_OUTPUT["keyInsights"]
+    assert contribution.recommendations == EXPERT_OUTPUT["recommendations"]
+
+
+def test_tool_input_written_as_json_text_is_recovered():
+    text = "Segue a análise:\n```json\n" + json.dumps(EXPERT_OUTPUT, ensure_ascii=False) + "\n```"
+    output = EXPERT_ANALYSIS_TOOL.parse(_text_response(text))
+    assert output is not None and output.recommendations == EXPERT_OUTPUT["recommendations"]
+    assert EXPERT_ANALYSIS_TOOL.parse(_text_response("sem JSON nenhum")) is None
+
+
+def test_consensus_structured_and_fallback():
+    report = {
+        "summary": "Os especialistas concordam sobre onboarding.",
+        "keyInsights": ["Ativação define a retenção"],
+        "priorityRecommendations": ["Redesenhar o onboarding"],
+        "nextStep": "Listar os 3 passos de ativação",
+        "mainRisk": "Excesso de mudanças simultâneas",
+        "advancingQuestion": "Qual é o momento 'aha' do seu produto?",
+    }
+    calls = []
+    orchestrator = _orchestrator([_tool_response(CONSENSUS_TOOL.name, report)], calls)
+    consensus = asyncio.run(orchestrator._synthesize_consensus("Como reter clientes?", []))
+    assert "**Síntese Geral:**" in consensus and "Perspectivas Divergentes" not in consensus
+
+    calls = []
+    orchestrator = _orchestrator([_text_response("sem ferramenta"), _text_response("Consenso em texto")], calls)
+    assert asyncio.run(orchestrator._synthesize_consensus("Como reter clientes?", [])) == "Consenso em texto"
+    assert "tools" in calls[0] and "tools" not in calls[1]
+
+
+def test_action_plan_tolerates_missing_fields():
+    plan = {"phases": [{"phaseNumber": 1, "name": "Ativação", "actions": [{"title": "Mapear jornada"}]}]}
+    calls = []
+    orchestrator = _orchestrator([_tool_response(ACTION_PLAN_TOOL.name, plan)], calls)
+    action_plan = asyncio.run(orchestrator._generate_action_plan("Como reter clientes?", "Consenso", []))
+
+    assert len(calls) == 1
+    assert action_plan.phases[0].actions[0].priority == "média"
+    assert action_plan.totalDuration == "Não especificado"
+
+
+if __name__ == "__main__":
+    print("🧪 TESTANDO SAÍDA ESTRUTURADA DO CONSELHO")
+    test_tool_schemas_are_self_contained()
+    test_markdown_matches_text_parser()
+    test_expert_analysis_uses_tool_output()
+    test_expert_analysis_falls_back_to_text_on_schema_failure()
+    test_text_parse_miss_is_not_cached()
+    test_expert_analysis_repairs_tool_input_without_second_call()
+    test_tool_input_written_as_json_text_is_recovered()
+    test_consensus_structured_and_fallback()
+    test_action_plan_tolerates_missing_fields()
+    print("✅ TESTES DE SAÍDA ESTRUTURADA CONCLUÍDOS")
@@ -0,0 +1,86 @@
+"""
+Test script for the council token budget planner
+"""
+from python_backend.token_budget import (
+    ContextSection, TokenBudgetPlanner, compress_text, estimate_tokens
+)
+
+RESEARCH_PARAGRAPH = (
+    "O mercado de SaaS B2B no Brasil cresceu 23% em 2024. "
+    "Empresas de médio porte lideram a adoção, principalmente em finanças e varejo. "
+)
+
+
+def _research_dump(paragraphs: int = 400) -> str:
+    lines = ["## Tendências"]
+    for i in range(paragraphs):
+        lines.append(f"- Tendência {i}: adoção de automação de marketing em ritmo acelerado")
+        lines.append("")
+        lines.append(RESEARCH_PARAGRAPH * 3)
+    return "\n".join(lines)
+
+
+def test_under_budget_is_unchanged():
+    plan = TokenBudgetPlanner("test", budget=1000).plan([
+        ContextSection("persona", "Persona curta"),
+        ContextSection("task", "Analise o problema", required=True),
+    ])
+    assert plan.join() == "Persona curta\n\nAnalise o problema"
+    assert plan.report["trimmed"] is False
+
+
+def test_join_with_empty_names_is_empty():
+    plan = TokenBudgetPlanner("test", budget=1000).plan([
+        ContextSection("persona", "Persona curta"),
+        ContextSection("task", "Analise o problema", required=True),
+    ])
+    assert plan.join([]) == ""
+    assert plan.join(["task"]) == "Analise o problema"
+
+
+def test_huge_research_is_compressed_and_required_kept():
+    task = "**Problema/Questão:**\nComo crescer em SaaS?"
+    persona = "**CLIENTE IDEAL - PERSONA:**\n- Nome: Ana, gerente de marketing"
+    research = _research_dump()
+    plan = TokenBudgetPlanner("expert_analysis", budget=2000).plan([
+        ContextSection("persona", persona, priority=2),
+        ContextSection("research", research),
+        ContextSection("task", task, required=True),
+    ])
+    report = plan.report
+    print(f"   {report['tokensBefore']} -> {report['tokensAfter']} tokens")
+
+    assert report["tokensBefore"] > 20000
+    assert report["tokensAfter"] <= 2000
+    assert plan.text("task") == task
+    assert plan.text("persona") == persona
+    assert report["sections"]["research"]["method"] in ("outline", "outline+truncated")
+    assert plan.text("research").startswith("## Tendências\n- Tendência 0")
+
+
+def test_budget_is_shared_fairly_across_experts():
+    long_list = "\n".join(f"- Recomendação detalhada número {i} sobre retenção" for i in range(300))
+    short_list = "**Seth Godin**:\n- Conte uma história que se espalhe"
+    plan = TokenBudgetPlanner("consensus", budget=1500).plan([
+        ContextSection("recommendations:0", "**Philip Kotler**:\n" + long_list, priority=2),
+        ContextSection("recommendations:1", short_list, priority=2),
+        ContextSection("task", "Sintetize", required=True),
+    ])
+    # A lista curta cabe na sua parte e fica inteira; a longa recebe o restante
+    assert plan.text("recommendations:1") == short_list
+    assert 1000 < estimate_tokens(plan.text("recommendations:0")) <= 1500
+    assert plan.text("recommendations:0").endswith("[…]")
+
+
+def test_tiny_allocation_drops_section():
+    assert compress_text(RESEARCH_PARAGRAPH * 50, 10) == {"text": "", "method": "dropped"}
+
+
+if __name__ == "__main__":
+    print("🧪 TESTANDO ORÇAMENTO DE TOKENS")
+    test_under_budget_is_unchanged()
+    test_join_with_empty_names_is_empty()
+    test_huge_research_is_compressed_and_required_kept()
+    test_budget_is_shared_fairly_across_experts()
+    test_tiny_allocation_drops_section()
+    print("✅ TESTES DE ORÇAMENTO DE TOKENS CONCLUÍDOS")
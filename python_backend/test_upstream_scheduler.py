@@ -0,0 +1,60 @@
+"""
+Test script for the adaptive upstream scheduler (token bucket + AIMD)
+"""
+import asyncio
+
+from python_backend.upstream_scheduler import UpstreamScheduler
+
+
+async def _run_burst(scheduler: UpstreamScheduler, calls: int) -> int:
+    """Dispara várias chamadas simuladas e retorna o pico de concorrência observado"""
+    peak = 0
+
+    async def fake_call():
+        nonlocal peak
+        async with scheduler.slot():
+            peak = max(peak, scheduler.in_flight)
+            await asyncio.sleep(0.01)
+            scheduler.on_success()
+
+    await asyncio.gather(*(fake_call() for _ in range(calls)))
+    return peak
+
+
+def test_concurrency_limit_respected():
+    scheduler = UpstreamScheduler("test", requests_per_minute=60_000, initial_concurrency=3, max_concurrency=3)
+    peak = asyncio.run(_run_burst(scheduler, 12))
+    print(f"   Pico de concorrência: {peak}")
+    assert 1 < peak <= 3
+    assert scheduler.in_flight == 0
+    assert scheduler.queue_depth == 0
+
+
+def test_aimd_adjustments():
+    scheduler = UpstreamScheduler("test", requests_per_minute=60_000, initial_concurrency=8, max_concurrency=16)
+    scheduler.on_rate_limited({"retry-after": "0"})
+    assert scheduler.concurrency_limit == 4
+    for _ in range(20):
+        scheduler.on_success()
+    assert scheduler.concurrency_limit > 4
+    print(f"   Limite após recuperação: {scheduler.concurrency_limit}")
+
+
+def test_ratelimit_headers_reduce_concurrency():
+    scheduler = UpstreamScheduler("test", requests_per_minute=50, initial_concurrency=8)
+    scheduler.on_success({
+        "anthropic-ratelimit-requests-limit": "1000",
+        "anthropic-ratelimit-requests-remaining": "20",
+    })
+    stats = scheduler.stats()
+    assert stats["concurrencyLimit"] == 4
+    assert stats["requestsPerSecond"] == round(1000 / 60.0, 3)
+    print(f"   Stats: {stats}")
+
+
+if __name__ == "__main__":
+    print("🧪 TESTANDO AGENDADOR DE UPSTREAM")
+    test_concurrency_limit_respected()
+    test_aimd_adjustments()
+    test_ratelimit_headers_reduce_concurrency()
+    print("✅ TESTES DO AGENDADOR CONCLUÍDOS")
@@ -0,0 +1,258 @@
+"""
+Token Budget
+============
+
+Orçamento de tokens de entrada por etapa do conselho.
+
+Os prompts de ``_get_expert_analysis`` e ``_synthesize_consensus`` concatenam
+tudo o que recebem (pesquisa de mercado inteira, persona, perfil, todas as
+contribuições). O tamanho da entrada, e com ele o tempo até o primeiro token,
+crescia sem limite.
+
+O ``TokenBudgetPlanner``:
+
+1. Estima tokens localmente (sem chamar a API)
+2. Reserva o espaço das seções obrigatórias (problema, instruções)
+3. Divide o restante entre as seções comprimíveis por "water-filling"
+   ponderado pela prioridade: seções que cabem na sua parte ficam inteiras e a
+   sobra é redistribuída entre as demais
+4. Comprime o que não coube: primeiro extrai títulos/bullets, depois corta em
+   fronteira de linha/frase; seções com orçamento mínimo demais são omitidas
+
+Cada plano registra os tamanhos antes/depois (``BudgetPlan.report``) e alimenta
+``token_budget_stats``. Orçamentos por ambiente: TOKEN_BUDGET_EXPERT_ANALYSIS,
+TOKEN_BUDGET_CONSENSUS (TOKEN_BUDGET=off desliga os cortes).
+"""
+
+import math
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+# pt-BR com acentos e markdown fica em torno de 3.5 caracteres por token
+CHARS_PER_TOKEN = 3.5
+
+DEFAULT_STAGE_BUDGETS = {
+    "expert_analysis": 6000,
+    "consensus": 8000,
+}
+
+# Seções com menos espaço que isso são omitidas em vez de virarem um fragmento
+MIN_SECTION_TOKENS = 40
+
+TRIM_MARKER = "[…]"
+
+_HEADING_RE = re.compile(r'^\s*(#{1,6}\s|\*\*[^*]+\*\*:?\s*$)')
+_BULLET_LINE_RE = re.compile(r'^\s*([-•*]|\d+[.)])\s+')
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Estimativa local (e barata) do número de tokens de um texto."""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _max_chars(tokens: int) -> int:
+    return int(tokens * CHARS_PER_TOKEN)
+
+
+def _extract_outline(text: str) -> str:
+    """Mantém títulos, bullets e a primeira frase de cada parágrafo."""
+    kept = []
+    for paragraph in text.split("\n\n"):
+        lines = [line for line in paragraph.split("\n") if line.strip()]
+        if not lines:
+            continue
+        structural = [line for line in lines if _HEADING_RE.match(line) or _BULLET_LINE_RE.match(line)]
+        if structural:
+            kept.append("\n".join(structural))
+        else:
+            first_sentence = _SENTENCE_END_RE.split(" ".join(line.strip() for line in lines), maxsplit=1)[0]
+            kept.append(first_sentence)
+    return "\n\n".join(kept)
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """Corta em fronteira de linha (ou frase/palavra) para caber em max_tokens."""
+    limit = _max_chars(max_tokens) - len(TRIM_MARKER) - 1
+    if limit <= 0:
+        return ""
+    head = text[:limit]
+    for boundary in ("\n", ". ", " "):
+        cut = head.rfind(boundary)
+        if cut > limit // 2:
+            head = head[:cut + (1 if boundary == ". " else 0)]
+            break
+    return head.rstrip() + "\n" + TRIM_MARKER
+
+
+def compress_text(text: str, max_tokens: int) -> Dict[str, Any]:
+    """
+    Comprime ``text`` para no máximo ``max_tokens``.
+
+    Returns:
+        {"text": str, "method": "kept" | "outline" | "truncated" | "outline+truncated" | "dropped"}
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return {"text": text, "method": "kept"}
+    if max_tokens < MIN_SECTION_TOKENS:
+        return {"text": "", "method": "dropped"}
+
+    outline = _extract_outline(text)
+    if outline and estimate_tokens(outline) <= max_tokens:
+        return {"text": outline, "method": "outline"}
+    if outline and estimate_tokens(outline) < estimate_tokens(text) // 2:
+        return {"text": _truncate(outline, max_tokens), "method": "outline+truncated"}
+    return {"text": _truncate(text, max_tokens), "method": "truncated"}
+
+
+class ContextSection:
+    """
+    Trecho de um prompt.
+
+    ``priority`` maior recebe uma fatia maior do orçamento; seções com
+    ``required=True`` (problema, instruções) nunca são cortadas.
+    """
+
+    def __init__(self, name: str, text: Optional[str], priority: float = 1.0, required: bool = False):
+        self.name = name
+        self.text = text or ""
+        self.priority = priority
+        self.required = required
+        self.tokens = estimate_tokens(self.text)
+
+
+class BudgetPlan:
+    """Resultado do planejamento: textos finais por seção + relatório de tamanhos."""
+
+    def __init__(self, stage: str, budget: int, sections: List[ContextSection], results: Dict[str, Dict[str, Any]]):
+        self.stage = stage
+        self.budget = budget
+        self._order = [section.name for section in sections]
+        self._results = results
+        before = sum(section.tokens for section in sections)
+        after = sum(estimate_tokens(result["text"]) for result in results.values())
+        self.report: Dict[str, Any] = {
+            "stage": stage,
+            "budget": budget,
+            "tokensBefore": before,
+            "tokensAfter": after,
+            "trimmed": after < before,
+            "sections": {
+                section.name: {
+                    "before": section.tokens,
+                    "after": estimate_tokens(results[section.name]["text"]),
+                    "method": results[section.name]["method"],
+                }
+                for section in sections
+            },
+        }
+
+    def text(self, name: str) -> str:
+        return self._results[name]["text"]
+
+    def join(self, names: Optional[Sequence[str]] = None, separator: str = "\n\n") -> str:
+        """Concatena as seções não vazias (na ordem original, ou na ordem de ``names``)."""
+        return separator.join(self.text(name) for name in (self._order if names is None else names) if self.text(name))
+
+
+def _allocate(sections: List[ContextSection], available: int) -> Dict[str, int]:
+    """Water-filling ponderado: divide ``available`` pelas prioridades, redistribuindo sobras."""
+    allocation: Dict[str, int] = {}
+    remaining = [s for s in sections if s.tokens > 0]
+    budget = max(available, 0)
+    while remaining:
+        total_weight = sum(s.priority for s in remaining)
+        satisfied = [s for s in remaining if s.tokens <= budget * s.priority / total_weight]
+        if not satisfied:
+            for s in remaining:
+                allocation[s.name] = int(budget * s.priority / total_weight)
+            break
+        for s in satisfied:
+            allocation[s.name] = s.tokens
+            budget -= s.tokens
+        remaining = [s for s in remaining if s not in satisfied]
+    return allocation
+
+
+class TokenBudgetStats:
+    """Contadores de tamanho de prompt (antes/depois dos cortes) por etapa."""
+
+    def __init__(self):
+        self._stages: Dict[str, Dict[str, int]] = {}
+
+    def record(self, report: Dict[str, Any]) -> None:
+        stage = self._stages.setdefault(report["stage"], {
+            "calls": 0,
+            "trimmedCalls": 0,
+            "tokensBefore": 0,
+            "tokensAfter": 0,
+            "maxTokensBefore": 0,
+        })
+        stage["calls"] += 1
+        stage["trimmedCalls"] += 1 if report["trimmed"] else 0
+        stage["tokensBefore"] += report["tokensBefore"]
+        stage["tokensAfter"] += report["tokensAfter"]
+        stage["maxTokensBefore"] = max(stage["maxTokensBefore"], report["tokensBefore"])
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {stage: dict(values) for stage, values in self._stages.items()}
+
+
+token_budget_stats = TokenBudgetStats()
+
+
+def stage_budget(stage: str) -> Optional[int]:
+    """Orçamento da etapa (env TOKEN_BUDGET_<ETAPA>); None se TOKEN_BUDGET=off."""
+    if os.getenv("TOKEN_BUDGET", "on").lower() in ("0", "off", "false", "no"):
+        return None
+    default = DEFAULT_STAGE_BUDGETS.get(stage, 8000)
+    try:
+        return int(os.getenv(f"TOKEN_BUDGET_{stage.upper()}", default))
+    except (TypeError, ValueError):
+        return default
+
+
+class TokenBudgetPlanner:
+    """Distribui o orçamento de tokens de uma etapa entre as seções do prompt."""
+
+    def __init__(self, stage: str, budget: Optional[int] = None):
+        self.stage = stage
+        self.budget = budget if budget is not None else stage_budget(stage)
+
+    def plan(self, sections: List[ContextSection]) -> BudgetPlan:
+        total = sum(section.tokens for section in sections)
+        if self.budget is None or total <= self.budget:
+            results = {s.name: {"text": s.text, "method": "kept"} for s in sections}
+        else:
+            required = sum(s.tokens for s in sections if s.required)
+            allocation = _allocate([s for s in sections if not s.required], self.budget - required)
+            results = {}
+            for section in sections:
+                if section.required or not section.text:
+                    results[section.name] = {"text": section.text, "method": "kept"}
+                else:
+                    results[section.name] = compress_text(section.text, allocation.get(section.name, 0))
+
+        plan = BudgetPlan(self.stage, self.budget or 0, sections, results)
+        token_budget_stats.record(plan.report)
+        if plan.report["trimmed"]:
+            print(
+                f"[TokenBudget] {self.stage}: {plan.report['tokensBefore']} -> {plan.report['tokensAfter']} "
+                f"tokens (orçamento {self.budget})"
+            )
+        return plan
+
+
+def summarize_reports(reports: List[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+    """Agrega relatórios de planos (por etapa) para os metadados de uma análise."""
+    summary: Dict[str, Dict[str, int]] = {}
+    for report in reports:
+        stage = summary.setdefault(report["stage"], {"calls": 0, "trimmedCalls": 0, "tokensBefore": 0, "tokensAfter": 0})
+        stage["calls"] += 1
+        stage["trimmedCalls"] += 1 if report["trimmed"] else 0
+        stage["tokensBefore"] += report["tokensBefore"]
+        stage["tokensAfter"] += report["tokensAfter"]
+    return summary
@@ -0,0 +1,267 @@
+"""
+Upstream Scheduler
+==================
+
+Agendador adaptativo para chamadas a APIs externas (Anthropic).
+
+Substitui o antigo ``asyncio.Semaphore(1)`` + ``sleep`` fixo do conselho por:
+- Token bucket: limita a taxa de requisições por segundo (RPM do tier da API)
+- AIMD: aumenta a concorrência aos poucos enquanto tudo vai bem e corta pela
+  metade quando recebemos 429 ou quando os headers ``anthropic-ratelimit-*``
+  mostram que estamos perto do limite
+- Estatísticas: profundidade da fila e concorrência atual para monitoramento
+
+O agendador é compartilhado pelo processo inteiro, então todas as análises de
+todos os usuários dividem o mesmo orçamento de chamadas.
+"""
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Mapping, Optional
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _parse_reset(value: Optional[str]) -> Optional[float]:
+    """Converte o header ``*-reset`` (RFC 3339) em segundos a partir de agora."""
+    if not value:
+        return None
+    try:
+        reset_at = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if reset_at.tzinfo is None:
+        reset_at = reset_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (reset_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def _header_int(headers: Mapping[str, str], name: str) -> Optional[int]:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Token bucket simples: ``rate`` fichas por segundo, até ``capacity`` acumuladas."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = max(rate, 0.01)
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def configure(self, rate: float, capacity: Optional[float] = None) -> None:
+        """Ajusta a taxa (ex: quando a API informa o limite real do tier)."""
+        self._refill()
+        self.rate = max(rate, 0.01)
+        if capacity is not None:
+            self.capacity = max(capacity, 1.0)
+            self._tokens = min(self._tokens, self.capacity)
+
+    def pause(self, seconds: float) -> None:
+        """Bloqueia novas fichas por ``seconds`` (usado após 429 com retry-after)."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+class UpstreamScheduler:
+    """
+    Limita taxa e concorrência das chamadas a um upstream.
+
+    Uso:
+        async with anthropic_scheduler.slot():
+            response = await client.messages.with_raw_response.create(...)
+            anthropic_scheduler.on_success(response.headers)
+    """
+
+    # Abaixo desta fração do limite restante, paramos de crescer e reduzimos
+    LOW_REMAINING_RATIO = 0.1
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float = 50.0,
+        min_concurrency: int = 1,
+        max_concurrency: int = 16,
+        initial_concurrency: int = 4,
+        decrease_factor: float = 0.5,
+    ):
+        self.name = name
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        self.decrease_factor = decrease_factor
+        self._limit = float(min(max(initial_concurrency, self.min_concurrency), self.max_concurrency))
+        self._bucket = TokenBucket(rate=requests_per_minute / 60.0, capacity=max(1.0, self._limit))
+        self._condition = asyncio.Condition()
+        self._in_flight = 0
+        self._waiting = 0
+        self._total_requests = 0
+        self._rate_limited = 0
+        self._last_limits: Dict[str, Any] = {}
+
+    @property
+    def concurrency_limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        return self._waiting
+
+    @asynccontextmanager
+    async def slot(self):
+        """Aguarda uma vaga de concorrência e uma ficha do bucket."""
+        self._waiting += 1
+        try:
+            async with self._condition:
+                await self._condition.wait_for(lambda: self._in_flight < int(self._limit))
+                self._in_flight += 1
+        finally:
+            self._waiting -= 1
+
+        try:
+            await self._bucket.acquire()
+            self._total_requests += 1
+            yield self
+        finally:
+            async with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
+
+    def _set_limit(self, value: float) -> None:
+        previous = int(self._limit)
+        self._limit = min(float(self.max_concurrency), max(float(self.min_concurrency), value))
+        if int(self._limit) > previous:
+            # Acordar quem está esperando por uma vaga nova
+            try:
+                asyncio.get_running_loop().create_task(self._notify())
+            except RuntimeError:
+                pass
+
+    async def _notify(self) -> None:
+        async with self._condition:
+            self._condition.notify_all()
+
+    def on_success(self, headers: Optional[Mapping[str, str]] = None) -> None:
+        """Aumento aditivo: +1 vaga a cada ``limite`` respostas bem-sucedidas."""
+        if headers is not None and self.observe_headers(headers):
+            return
+        self._set_limit(self._limit + 1.0 / max(self._limit, 1.0))
+
+    def on_rate_limited(self, headers: Optional[Mapping[str, str]] = None) -> None:
+        """Redução multiplicativa após 429 e pausa até o ``retry-after``."""
+        self._rate_limited += 1
+        retry_after = None
+        already_reduced = False
+        if headers is not None:
+            try:
+                retry_after = float(headers.get("retry-after")) if headers.get("retry-after") else None
+            except (TypeError, ValueError):
+                retry_after = None
+            already_reduced = self.observe_headers(headers)
+        if not already_reduced:
+            self._set_limit(self._limit * self.decrease_factor)
+        self._bucket.pause(retry_after if retry_after is not None else 1.0 / self._bucket.rate)
+        print(f"[UpstreamScheduler:{self.name}] 429 recebido. Concorrência reduzida para {self.concurrency_limit}")
+
+    def observe_headers(self, headers: Mapping[str, str]) -> bool:
+        """
+        Ajusta taxa e concorrência com base nos headers ``anthropic-ratelimit-*``.
+
+        Retorna True quando o limite está quase esgotado (e a concorrência foi reduzida).
+        """
+        requests_limit = _header_int(headers, "anthropic-ratelimit-requests-limit")
+        requests_remaining = _header_int(headers, "anthropic-ratelimit-requests-remaining")
+        tokens_limit = _header_int(headers, "anthropic-ratelimit-input-tokens-limit") or \
+            _header_int(headers, "anthropic-ratelimit-tokens-limit")
+        tokens_remaining = _header_int(headers, "anthropic-ratelimit-input-tokens-remaining") or \
+            _header_int(headers, "anthropic-ratelimit-tokens-remaining")
+
+        if requests_limit:
+            # O limite é por minuto: ajustar o bucket ao tier real da conta
+            self._bucket.configure(rate=requests_limit / 60.0, capacity=max(1.0, self._limit))
+
+        self._last_limits = {
+            "requestsLimit": requests_limit,
+            "requestsRemaining": requests_remaining,
+            "tokensLimit": tokens_limit,
+            "tokensRemaining": tokens_remaining,
+        }
+
+        near_limit = False
+        if requests_limit and requests_remaining is not None:
+            near_limit = requests_remaining <= requests_limit * self.LOW_REMAINING_RATIO
+            if requests_remaining == 0:
+                reset = _parse_reset(headers.get("anthropic-ratelimit-requests-reset"))
+                if reset:
+                    self._bucket.pause(reset)
+        if tokens_limit and tokens_remaining is not None:
+            near_limit = near_limit or tokens_remaining <= tokens_limit * self.LOW_REMAINING_RATIO
+
+        if near_limit:
+            self._set_limit(self._limit * self.decrease_factor)
+        return near_limit
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "concurrencyLimit": self.concurrency_limit,
+            "inFlight": self._in_flight,
+            "queueDepth": self._waiting,
+            "requestsPerSecond": round(self._bucket.rate, 3),
+            "tokensAvailable": round(self._bucket.available, 2),
+            "totalRequests": self._total_requests,
+            "rateLimited": self._rate_limited,
+            "lastLimits": self._last_limits,
+        }
+
+
+# Agendador compartilhado para a API da Anthropic (configurável por env)
+anthropic_scheduler = UpstreamScheduler(
+    name="anthropic",
+    requests_per_minute=_env_float("ANTHROPIC_REQUESTS_PER_MINUTE", 50.0),
+    min_concurrency=1,
+    max_concurrency=int(_env_float("ANTHROPIC_MAX_CONCURRENCY", 16)),
+    initial_concurrency=int(_env_float("ANTHROPIC_INITIAL_CONCURRENCY", 4)),
+)